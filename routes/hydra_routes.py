@@ -1,7 +1,17 @@
 from flask import Blueprint, request, jsonify, render_template, flash, redirect, url_for
 from markupsafe import Markup
-from services.hydra_bruteforce import run_hydra, get_available_wordlists, create_custom_wordlist, get_services
+from services.hydra_bruteforce import (run_hydra, run_sharded_hydra, get_available_wordlists, create_custom_wordlist,
+                                       get_services)
+from services.hydra_jobs import (start_hydra_job, start_sharded_hydra_job, get_hydra_job, list_hydra_jobs, get_attack_checkpoint,
+                                 list_resumable_attacks, resume_hydra_job, start_batch_hydra_job,
+                                 start_native_hydra_job)
+from services.hydra_batch import collect_batch_entries
+from services.native_bruteforce import ENGINES, ENGINE_HYDRA, ENGINE_NATIVE, NATIVE_SERVICES
+from services.wordlist_catalog import get_wordlist_catalog
+from services.candidate_ordering import ORDERINGS, ORDERING_ORIGINAL
+from services.wordlist_merge import start_wordlist_merge, get_wordlist_merge_job
 import os
+import re
 import logging
 from werkzeug.utils import secure_filename
 
@@ -14,6 +24,9 @@ hydra_bp = Blueprint('hydra', __name__)
 # Répertoire pour les wordlists
 WORDLISTS_DIR = "wordlists"
 
+# Nombre maximal de wordlists par page
+MAX_WORDLIST_PAGE = 1000
+
 # Extensions autorisées pour les uploads
 ALLOWED_EXTENSIONS = {'txt', 'lst', 'dict', 'wordlist'}
 
@@ -21,6 +34,138 @@ def allowed_file(filename):
     """Vérifie si l'extension du fichier est autorisée"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _attack_params():
+    """
+    Paramètres d'une attaque (JSON ou formulaire HTML)
+    
+    Les listes saisies directement sont enregistrées en wordlists.
+    
+    Returns:
+        tuple: (cible, service, liste d'utilisateurs, liste de mots de passe, options)
+        
+    Raises:
+        ValueError: Paramètre obligatoire manquant
+    """
+    if request.is_json:
+        # Pour les requêtes API JSON
+        data = request.get_json()
+        options = dict(data.get("options") or {})
+    else:
+        # Pour les formulaires HTML
+        data = request.form
+        
+        # Récupérer les options du formulaire
+        options = {}
+        if data.get("tasks"):
+            options["tasks"] = data.get("tasks")
+        if data.get("verbose") == "on":
+            options["verbose"] = True
+        if data.get("show_attempts") == "on":
+            options["show_attempts"] = True
+        if data.get("ordering"):
+            options["ordering"] = data.get("ordering")
+        if data.get("engine"):
+            options["engine"] = data.get("engine")
+        
+        # Options pour les formulaires HTTP
+        service = data.get("service")
+        if service and service.startswith("http") and "form" in service:
+            options["form_path"] = data.get("form_path", "/")
+            options["form_data"] = data.get("form_data", "username=^USER^&password=^PASS^")
+            options["form_success"] = data.get("form_success", "F=incorrect")
+    
+    target = data.get("target")
+    # Attaque répartie : liste de cibles (voir _sharding_params)
+    if not target and data.get("targets"):
+        targets = data.get("targets")
+        target = ",".join(targets) if isinstance(targets, list) else targets
+    service = data.get("service")
+    userlist_path = data.get("userlist")
+    passlist_path = data.get("passlist")
+    
+    # Validation des paramètres
+    if not target:
+        raise ValueError("Cible manquante")
+    if not service:
+        raise ValueError("Service manquant")
+    if options.get("ordering", ORDERING_ORIGINAL) not in ORDERINGS:
+        raise ValueError(f"Ordre des candidats inconnu: {options['ordering']} ({', '.join(ORDERINGS)})")
+    engine = options.get("engine", ENGINE_HYDRA)
+    if engine not in ENGINES:
+        raise ValueError(f"Moteur inconnu: {engine} ({', '.join(ENGINES)})")
+    if engine == ENGINE_NATIVE:
+        if service not in NATIVE_SERVICES:
+            raise ValueError(f"Service non pris en charge par le moteur natif: {service} ({', '.join(NATIVE_SERVICES)})")
+        if "," in target or int(data.get("password_shards") or 1) > 1:
+            raise ValueError("Le moteur natif attaque une seule cible, sans répartition")
+    
+    # Gestion des wordlists personnalisées
+    if data.get("custom_userlist"):
+        userlist_path = create_custom_wordlist(data.get("custom_userlist"), "userlist")
+    if data.get("custom_passlist"):
+        passlist_path = create_custom_wordlist(data.get("custom_passlist"), "passlist")
+    
+    # Validation des wordlists
+    if not userlist_path:
+        raise ValueError("Liste d'utilisateurs manquante")
+    if not passlist_path:
+        raise ValueError("Liste de mots de passe manquante")
+    return target, service, userlist_path, passlist_path, options
+
+def _max_duration():
+    """Durée maximale optionnelle d'une attaque en arrière-plan (secondes)"""
+    data = request.get_json(silent=True) or request.form
+    value = data.get("max_duration")
+    return float(value) if value not in (None, "") else None
+
+def _sharding_params(target):
+    """
+    Répartition éventuelle d'une attaque sur plusieurs processus Hydra
+    
+    Plusieurs cibles (champ targets, ou target séparé par des virgules) ou
+    plusieurs tranches de mots de passe (password_shards) activent
+    l'ordonnanceur ; max_processes, per_target et stop_on_success le règlent.
+    
+    Returns:
+        tuple: (cibles, options de répartition), None pour une attaque simple
+    """
+    data = request.get_json(silent=True) or request.form
+    targets = data.get("targets") or target
+    if isinstance(targets, str):
+        targets = [item for item in re.split(r"[\s,]+", targets) if item]
+    password_shards = int(data.get("password_shards") or 1)
+    if len(targets) <= 1 and password_shards <= 1:
+        return None
+    sharding = {
+        "password_shards": password_shards,
+        "stop_on_success": data.get("stop_on_success") in (True, "on", "true", "1")
+    }
+    for key in ("max_processes", "per_target"):
+        if data.get(key) not in (None, ""):
+            sharding[key] = int(data.get(key))
+    return targets, sharding
+
+def _start_job(target, service, userlist_path, passlist_path, options):
+    """Lance une attaque en arrière-plan, répartie ou par le moteur natif si demandé"""
+    if options.get("engine") == ENGINE_NATIVE:
+        return start_native_hydra_job(target, service, userlist_path, passlist_path, options, _max_duration())
+    sharded = _sharding_params(target)
+    if sharded:
+        targets, sharding = sharded
+        return start_sharded_hydra_job(targets, service, userlist_path, passlist_path, options, sharding,
+                                       _max_duration())
+    return start_hydra_job(target, service, userlist_path, passlist_path, options, _max_duration())
+
+def _job_response(job):
+    """État d'une attaque en arrière-plan et URLs associées"""
+    return {
+        "job": job.to_dict(),
+        "status_url": f"/api/hydra/jobs/{job.id}",
+        "output_url": f"/api/hydra/jobs/{job.id}/output",
+        "cancel_url": f"/api/hydra/jobs/{job.id}/cancel",
+        "resume_url": f"/api/hydra/jobs/{job.id}/resume"
+    }
+
 @hydra_bp.route('/upload', methods=['POST'])
 def upload_wordlist():
     """Upload d'une nouvelle wordlist"""
@@ -55,6 +200,7 @@ def upload_wordlist():
             # Sauvegarder le fichier
             file_path = os.path.join(WORDLISTS_DIR, filename)
             file.save(file_path)
+            get_wordlist_catalog().invalidate()
             
             logger.info(f"Wordlist '{filename}' téléchargée avec succès dans {file_path}")
             
@@ -73,8 +219,36 @@ def upload_wordlist():
         
 @hydra_bp.route('/wordlists', methods=['GET'])
 def get_wordlists():
-    """Récupère les listes d'utilisateurs et de mots de passe disponibles"""
+    """
+    Récupère les listes d'utilisateurs et de mots de passe disponibles
+    
+    Avec ?category=user|password, ?q=, ?offset=, ?limit=, ?sort=name|path|size|lines
+    ou ?desc=1, retourne une page filtrée du catalogue en JSON. ?refresh=1 force
+    la vérification des répertoires de wordlists.
+    """
     try:
+        if request.args.get('refresh'):
+            get_wordlist_catalog().invalidate()
+        
+        query_args = ('category', 'q', 'offset', 'limit', 'sort', 'desc')
+        if any(arg in request.args for arg in query_args):
+            offset = int(request.args.get('offset', 0))
+            limit = min(int(request.args.get('limit', 100)), MAX_WORDLIST_PAGE)
+            result = get_wordlist_catalog().query(
+                category=request.args.get('category') or None,
+                search=request.args.get('q') or None,
+                offset=offset,
+                limit=limit,
+                sort=request.args.get('sort', 'name'),
+                descending=request.args.get('desc') in ('1', 'true', 'on')
+            )
+            if offset + limit < result["total"]:
+                next_args = request.args.copy()
+                next_args['offset'] = offset + limit
+                next_args['limit'] = limit
+                result["next_url"] = url_for('hydra.get_wordlists', **next_args.to_dict())
+            return jsonify(result)
+        
         wordlists = get_available_wordlists()
         
         # Si demandé en JSON
@@ -87,15 +261,61 @@ def get_wordlists():
             title="Wordlists disponibles", 
             result=[
                 f"<h3>Listes d'utilisateurs ({len(wordlists['user_lists'])})</h3>",
-                "<ul>" + "".join([f"<li>{wl['name']} - {wl['path']}</li>" for wl in wordlists['user_lists']]) + "</ul>",
+                "<ul>" + "".join([f"<li>{wl['name']} - {wl['path']} ({wl['lines'] if wl['lines'] is not None else '?'} lignes, {wl['size']} octets)</li>" for wl in wordlists['user_lists']]) + "</ul>",
                 f"<h3>Listes de mots de passe ({len(wordlists['pass_lists'])})</h3>",
-                "<ul>" + "".join([f"<li>{wl['name']} - {wl['path']}</li>" for wl in wordlists['pass_lists']]) + "</ul>"
+                "<ul>" + "".join([f"<li>{wl['name']} - {wl['path']} ({wl['lines'] if wl['lines'] is not None else '?'} lignes, {wl['size']} octets)</li>" for wl in wordlists['pass_lists']]) + "</ul>"
             ]
         )
+    except ValueError as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des wordlists: {e}")
         return jsonify({"error": str(e)}), 500
 
+@hydra_bp.route('/wordlists/merge', methods=['POST'])
+def merge_wordlists():
+    """
+    Fusionne, normalise et dédoublonne des wordlists en arrière-plan
+    
+    Corps JSON : inputs (chemins, par ordre de priorité), name (optionnel) et
+    options (encoding, fallback_encoding, strip, case, unicode_form,
+    min_length, max_length, charset, pattern, skip_comments). Le résultat est
+    enregistré comme nouvelle wordlist.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        inputs = data.get("inputs") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        job = start_wordlist_merge(inputs, data.get("name"), data.get("options"))
+        return jsonify({
+            "job": job.to_dict(),
+            "status_url": f"/api/hydra/wordlists/merge/{job.id}",
+            "cancel_url": f"/api/hydra/wordlists/merge/{job.id}/cancel"
+        }), 202
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        logger.error(f"Erreur lors de la fusion des wordlists: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@hydra_bp.route('/wordlists/merge/<job_id>', methods=['GET'])
+def wordlist_merge_status(job_id):
+    """Progression d'une fusion de wordlists (phase, pourcentage, compteurs)"""
+    job = get_wordlist_merge_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    return jsonify({"job": job.to_dict()})
+
+@hydra_bp.route('/wordlists/merge/<job_id>/cancel', methods=['POST'])
+def cancel_wordlist_merge(job_id):
+    """Annule une fusion en cours (aucune wordlist n'est créée)"""
+    job = get_wordlist_merge_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    job.stop()
+    return jsonify({"job": job.to_dict()})
+
 @hydra_bp.route('/services', methods=['GET'])
 def list_services():
     """Liste les services supportés par Hydra"""
@@ -126,59 +346,24 @@ def list_services():
 def launch_bruteforce():
     """Lance une attaque brute-force avec Hydra"""
     try:
-        # Traiter les données selon le type de contenu
-        if request.is_json:
-            # Pour les requêtes API JSON
-            data = request.get_json()
-            target = data.get("target")
-            service = data.get("service")
-            userlist_path = data.get("userlist")
-            passlist_path = data.get("passlist")
-            custom_userlist = data.get("custom_userlist")
-            custom_passlist = data.get("custom_passlist")
-            options = data.get("options", {})
-        else:
-            # Pour les formulaires HTML
-            target = request.form.get("target")
-            service = request.form.get("service")
-            userlist_path = request.form.get("userlist")
-            passlist_path = request.form.get("passlist")
-            custom_userlist = request.form.get("custom_userlist")
-            custom_passlist = request.form.get("custom_passlist")
-            
-            # Récupérer les options du formulaire
-            options = {}
-            if request.form.get("tasks"):
-                options["tasks"] = request.form.get("tasks")
-            if request.form.get("verbose") == "on":
-                options["verbose"] = True
-            
-            # Options pour les formulaires HTTP
-            if service and service.startswith("http") and "form" in service:
-                options["form_path"] = request.form.get("form_path", "/")
-                options["form_data"] = request.form.get("form_data", "username=^USER^&password=^PASS^")
-                options["form_success"] = request.form.get("form_success", "F=incorrect")
-
-        # Validation des paramètres
-        if not target:
-            return jsonify({"error": "Cible manquante"}), 400
-        if not service:
-            return jsonify({"error": "Service manquant"}), 400
-            
-        # Gestion des wordlists personnalisées
-        if custom_userlist:
-            userlist_path = create_custom_wordlist(custom_userlist, "userlist")
-        if custom_passlist:
-            passlist_path = create_custom_wordlist(custom_passlist, "passlist")
-            
-        # Validation des wordlists
-        if not userlist_path:
-            return jsonify({"error": "Liste d'utilisateurs manquante"}), 400
-        if not passlist_path:
-            return jsonify({"error": "Liste de mots de passe manquante"}), 400
+        try:
+            target, service, userlist_path, passlist_path, options = _attack_params()
+            sharded = _sharding_params(target)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Attaque en arrière-plan : réponse immédiate avec l'identifiant de la tâche
+        if request.is_json and request.get_json().get("background"):
+            job = _start_job(target, service, userlist_path, passlist_path, options)
+            return jsonify(_job_response(job)), 202
             
-        # Exécuter Hydra
-        result = run_hydra(target, service, userlist_path, passlist_path, options)
+        # Exécuter Hydra (sur plusieurs processus si demandé)
+        if sharded:
+            targets, sharding = sharded
+            result = run_sharded_hydra(targets, service, userlist_path, passlist_path, options, **sharding)
+            result["credentials"] = [credential["line"] for credential in result.get("credentials", [])]
+        else:
+            result = run_hydra(target, service, userlist_path, passlist_path, options)
         
         # Format de réponse pour l'API JSON
         if request.is_json:
@@ -204,11 +389,26 @@ def launch_bruteforce():
             html_result.append("<h3>Détails de la commande</h3>")
             html_result.append(f"<pre>{result.get('command', '')}</pre>")
             
+            # Mesures du moteur natif
+            if result.get("metrics"):
+                metrics = result["metrics"]
+                latency = metrics["latency_ms"]
+                html_result.append("<h3>Mesures</h3>")
+                html_result.append(f"<p>{metrics['attempts']} essais, {metrics['tasks']} simultanés "
+                                   f"(au plus {metrics['peak_concurrency']}), {metrics['connections_opened']} "
+                                   f"connexions ouvertes, {metrics['connections_reused']} réutilisations, "
+                                   f"{metrics['connection_errors']} erreurs de connexion ; latence moyenne "
+                                   f"{latency['avg']} ms (p50 {latency['p50']} ms, p95 {latency['p95']} ms)</p>")
+            
             html_result.append("<h3>Sortie complète</h3>")
             html_result.append(f"<pre>{result.get('stdout', '')}</pre>")
         else:
             html_result.append(f"<div style='color: red; font-weight: bold;'>Erreur: {result.get('error', 'Erreur inconnue')}</div>")
             
+            if result.get("resumable"):
+                html_result.append(f"<p>Point de reprise enregistré : l'attaque <code>{result['attack_id']}</code> "
+                                   f"peut être reprise via <code>POST /api/hydra/jobs/{result['attack_id']}/resume</code></p>")
+            
             if "command" in result:
                 html_result.append("<h3>Commande tentée</h3>")
                 html_result.append(f"<pre>{result.get('command', '')}</pre>")
@@ -230,3 +430,124 @@ def launch_bruteforce():
             return jsonify({"error": str(e)}), 500
         else:
             return render_template("results.html", title="Erreur", result=[f"Erreur: {str(e)}"])
+
+@hydra_bp.route('/jobs', methods=['POST'])
+def create_hydra_job():
+    """Lance une attaque Hydra en arrière-plan et retourne son identifiant"""
+    try:
+        target, service, userlist_path, passlist_path, options = _attack_params()
+        job = _start_job(target, service, userlist_path, passlist_path, options)
+        return jsonify(_job_response(job)), 202
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        logger.error(f"Erreur lors du lancement de l'attaque: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@hydra_bp.route('/batch', methods=['POST'])
+def create_batch_job():
+    """
+    Lance une attaque par lot (plusieurs cibles et services) en arrière-plan
+    
+    Corps JSON : targets (triplets "hôte:port:service"), scan (résultat de
+    scan_ports ou rapport de scan), scan_file (rapport de vuln_reports),
+    hosts et services (hôtes d'une découverte réseau), userlist / passlist
+    (ou custom_userlist / custom_passlist), options, max_processes,
+    hosts_per_process, stop_on_success et max_duration. La progression et
+    les identifiants par cible sont consultables sur /jobs/<id>.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise ValueError("Corps JSON attendu")
+        services = data.get("services")
+        if isinstance(services, str):
+            services = [item for item in re.split(r"[\s,]+", services) if item]
+        entries, skipped = collect_batch_entries(data.get("targets"), data.get("scan"), data.get("scan_file"),
+                                                 data.get("hosts"), services)
+        options = dict(data.get("options") or {})
+        if options.get("ordering", ORDERING_ORIGINAL) not in ORDERINGS:
+            raise ValueError(f"Ordre des candidats inconnu: {options['ordering']} ({', '.join(ORDERINGS)})")
+        userlist_path = data.get("userlist")
+        passlist_path = data.get("passlist")
+        if data.get("custom_userlist"):
+            userlist_path = create_custom_wordlist(data.get("custom_userlist"), "userlist")
+        if data.get("custom_passlist"):
+            passlist_path = create_custom_wordlist(data.get("custom_passlist"), "passlist")
+        if not userlist_path:
+            raise ValueError("Liste d'utilisateurs manquante")
+        if not passlist_path:
+            raise ValueError("Liste de mots de passe manquante")
+        batch = {"stop_on_success": data.get("stop_on_success") in (True, "on", "true", "1")}
+        for key in ("max_processes", "hosts_per_process"):
+            if data.get(key) not in (None, ""):
+                batch[key] = int(data.get(key))
+        job = start_batch_hydra_job(entries, userlist_path, passlist_path, options, batch, _max_duration(), skipped)
+        return jsonify(dict(_job_response(job), targets=len(entries), skipped=skipped)), 202
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        logger.error(f"Erreur lors du lancement de l'attaque par lot: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@hydra_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Liste les attaques en cours et récemment terminées"""
+    return jsonify({"jobs": [job.to_dict() for job in list_hydra_jobs()]})
+
+@hydra_bp.route('/jobs/<job_id>', methods=['GET'])
+def hydra_job_status(job_id):
+    """
+    Progression d'une attaque (essais, pourcentage, débit, identifiants trouvés)
+    
+    Après un redémarrage du serveur, retourne le dernier état enregistré de
+    l'attaque (point de reprise) s'il existe.
+    """
+    job = get_hydra_job(job_id)
+    if job is None:
+        state = get_attack_checkpoint(job_id)
+        if state is None:
+            return jsonify({"error": "Tâche introuvable"}), 404
+        return jsonify({"job": state, "resume_url": f"/api/hydra/jobs/{job_id}/resume"})
+    return jsonify(_job_response(job))
+
+@hydra_bp.route('/jobs/<job_id>/output', methods=['GET'])
+def hydra_job_output(job_id):
+    """Lignes de sortie de Hydra à partir de ?since=<numéro de ligne>"""
+    job = get_hydra_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"error": "Paramètre since invalide"}), 400
+    lines, next_line = job.output(since)
+    return jsonify({"lines": lines, "next": next_line, "status": job.status})
+
+@hydra_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_hydra_job(job_id):
+    """Annule une attaque en cours (les identifiants déjà trouvés restent disponibles)"""
+    job = get_hydra_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    job.stop()
+    return jsonify(_job_response(job))
+
+@hydra_bp.route('/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """Reprend une attaque annulée ou interrompue sans rejouer les essais effectués"""
+    try:
+        job = resume_hydra_job(job_id, _max_duration())
+        if job is None:
+            return jsonify({"error": "Aucun point de reprise pour cette attaque"}), 404
+        return jsonify(_job_response(job)), 202
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erreur lors de la reprise de l'attaque {job_id}: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@hydra_bp.route('/checkpoints', methods=['GET'])
+def list_checkpoints():
+    """Attaques interrompues pouvant être reprises (y compris avant un redémarrage)"""
+    return jsonify({"attacks": list_resumable_attacks()})
@@ -1,8 +1,19 @@
-from flask import Blueprint, jsonify, request, send_file, render_template
-from markupsafe import Markup
-from services.packet_sniffer import capture_packets, get_interfaces, analyze_pcap
+from flask import Blueprint, jsonify, request, send_file, render_template, Response, stream_with_context
+from markupsafe import Markup, escape
+from services.packet_sniffer import (capture_packets, get_interfaces, analyze_pcap, analyze_captures,
+                                     export_capture_columns, compute_time_series, list_tcp_streams,
+                                     MAX_STREAM_PAGE)
 from services.sniffer_report_generator import SnifferReportGenerator
+from services.capture_jobs import start_capture_job, get_capture_job, list_capture_jobs, refilter_capture_job
+from services.batch_analysis import start_batch_analysis, get_batch_job, list_captures
+from services.pcap_index import get_index, describe_packet
+from services.pcap_reader import open_capture, detect_compression, COMPRESSION_SUFFIXES
+from services.pcap_analyzer import MODE_EXACT, ANALYSIS_MODES
+from services.tcp_reassembly import follow_stream, iter_stream_payload, DIRECTIONS, FOLLOW_MAX_BYTES
 import os
+import base64
+import json
+import time
 import logging
 
 # Configuration du logging
@@ -11,6 +22,56 @@ logger = logging.getLogger("sniffer_routes")
 
 sniffer_bp = Blueprint('sniffer', __name__)
 
+# Taille des blocs envoyés lors d'un téléchargement décompressé à la volée
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Intervalle entre deux instantanés des statistiques en direct (secondes)
+LIVE_INTERVAL = 1.0
+
+def _optional_number(source, key, cast=float):
+    """Lit un paramètre numérique optionnel (vide ou absent = None)"""
+    value = source.get(key)
+    if value in (None, ""):
+        return None
+    return cast(value)
+
+def _flag(source, key):
+    """Lit une option booléenne (JSON ou case à cocher de formulaire)"""
+    return source.get(key) in (True, 1, "1", "true", "on")
+
+def _analysis_mode(source):
+    """Mode d'analyse demandé ("exact" par défaut, "approximate" pour les captures longues)"""
+    mode = source.get("analysis_mode") or MODE_EXACT
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Mode d'analyse inconnu: {mode} ({' ou '.join(ANALYSIS_MODES)})")
+    return mode
+
+def _sampling_options(source):
+    """Échantillonnage des paquets écrits : sampling_mode (packet/flow), sample_rate, packets_per_flow, headers_only"""
+    mode = source.get("sampling_mode") or None
+    headers_only = _flag(source, "headers_only")
+    if not mode and not headers_only:
+        return None
+    return {
+        "mode": mode,
+        "rate": _optional_number(source, "sample_rate", int),
+        "per_flow": _optional_number(source, "packets_per_flow", int),
+        "headers_only": headers_only
+    }
+
+def _capture_options(source):
+    """Options de durée, de rotation et de filtrage d'une capture (JSON ou formulaire)"""
+    bpf_filter = (source.get("filter") or source.get("bpf_filter") or "").strip()
+    return {
+        "duration": _optional_number(source, "duration"),
+        "max_file_size_mb": _optional_number(source, "max_file_size_mb"),
+        "rotate_seconds": _optional_number(source, "rotate_seconds"),
+        "ring_files": _optional_number(source, "ring_files", int),
+        "bpf_filter": bpf_filter or None,
+        "snaplen": _optional_number(source, "snaplen", int),
+        "compression": source.get("compression") or None,
+        "sampling": _sampling_options(source)
+    }
+
 @sniffer_bp.route('/start', methods=['POST'])
 def start_sniffer():
     """Lance une capture réseau et retourne le chemin du fichier pcap"""
@@ -19,11 +80,23 @@ def start_sniffer():
             data = request.get_json()
             interface = data.get("interface", "eth0")
             count = int(data.get("count", 100))
+            analysis_mode = _analysis_mode(data)
+            
+            # Capture en tâche de fond : réponse immédiate avec l'identifiant
+            if data.get("background"):
+                job = start_capture_job(interface, count, _capture_options(data), live=_flag(data, "live"),
+                                        analysis_mode=analysis_mode)
+                return jsonify(_job_response(job)), 202
         else:
+            data = request.form
             interface = request.form.get("interface", "eth0")
             count = int(request.form.get("count", 100))
+            analysis_mode = _analysis_mode(data)
 
-        pcap_file = capture_packets(interface, count)
+        options = _capture_options(data)
+        # Plusieurs fichiers en cas de rotation : l'analyse les couvre tous
+        pcap_files = capture_packets(interface, count, **options)
+        pcap_file = pcap_files[-1]
         filename = os.path.basename(pcap_file)
         
         # Analyser le fichier pcap pour extraire les informations importantes
@@ -31,11 +104,17 @@ def start_sniffer():
         report_path = None
         
         try:
-            analysis_results = analyze_pcap(pcap_file)
+            if data.get("export_columns"):
+                for exported_file in pcap_files:
+                    analysis_results = export_capture_columns(exported_file)
+                if len(pcap_files) > 1:
+                    analysis_results = analyze_captures(pcap_files)
+            else:
+                analysis_results = analyze_captures(pcap_files, mode=analysis_mode)
             
             # Générer le rapport HTML
             generator = SnifferReportGenerator()
-            report_path = generator.generate_report(pcap_file)
+            report_path = generator.generate_report(pcap_file, analysis_results)
             
             if report_path:
                 report_filename = os.path.basename(report_path)
@@ -52,7 +131,9 @@ def start_sniffer():
             response_data = {
                 "message": "Capture terminée", 
                 "file": pcap_file,
+                "files": pcap_files,
                 "download_url": f"/api/sniffer/download?file={filename}",
+                "packets_url": f"/api/sniffer/packets/{filename}",
                 "analysis": analysis_results
             }
             if report_path:
@@ -64,13 +145,25 @@ def start_sniffer():
             
             # Informations générales
             analysis_html.append("<h2>Capture réseau terminée</h2>")
-            analysis_html.append(f"<p><strong>Fichier:</strong> {filename}</p>")
+            if len(pcap_files) > 1:
+                names = ", ".join(escape(os.path.basename(f)) for f in pcap_files)
+                analysis_html.append(f"<p><strong>Fichiers:</strong> {names}</p>")
+            else:
+                analysis_html.append(f"<p><strong>Fichier:</strong> {filename}</p>")
             analysis_html.append(f"<p><strong>Interface:</strong> {interface}</p>")
             analysis_html.append(f"<p><strong>Nombre de paquets demandés:</strong> {count}</p>")
+            if options["bpf_filter"]:
+                analysis_html.append(f"<p><strong>Filtre BPF:</strong> <code>{escape(options['bpf_filter'])}</code></p>")
+            estimates = analysis_results.get("sampling_estimates")
+            if estimates:
+                analysis_html.append(f"<p><strong>Capture échantillonnée:</strong> facteur {estimates['scale']}, "
+                                     f"environ {estimates['packet_count']} paquets réels</p>")
             
             # Boutons d'action
             buttons_html = '<div class="mb-3">'
             buttons_html += f'<a href="/api/sniffer/download?file={filename}" class="btn btn-primary me-2">Télécharger le fichier PCAP</a>'
+            if options["compression"]:
+                buttons_html += f'<a href="/api/sniffer/download?file={filename}&decompress=1" class="btn btn-outline-primary me-2">Télécharger décompressé</a>'
             
             if report_path:
                 buttons_html += f'<a href="/api/report/download/{report_filename}" class="btn btn-success me-2">Voir le rapport HTML</a>'
@@ -121,6 +214,7 @@ def start_sniffer():
                         analysis_html.append('</tr>')
                     
                     analysis_html.append('</tbody></table></div>')
+                    analysis_html.append(f'<p><a href="/api/sniffer/packets/{filename}?offset=0&limit=100">Parcourir tous les paquets</a></p>')
             
             # Retourner le template avec le contenu
             return render_template(
@@ -130,6 +224,15 @@ def start_sniffer():
                 module="sniffer"
             )
             
+    except ValueError as e:
+        if request.is_json:
+            return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+        return render_template(
+            "results.html",
+            title="Erreur",
+            result=[f"Paramètres invalides: {str(e)}"],
+            module="sniffer"
+        ), 400
     except Exception as e:
         if request.is_json:
             return jsonify({"error": str(e)}), 500
@@ -159,11 +262,224 @@ def download_capture():
         # Vérifier que le fichier est bien dans le répertoire de captures
         if not os.path.abspath(file_path).startswith(os.path.abspath(capture_dir)):
             return jsonify({"error": "Accès non autorisé"}), 403
+        
+        # ?decompress=1 : capture compressée envoyée décompressée, en flux
+        compression = detect_compression(file_path)
+        if compression and request.args.get('decompress') in ('1', 'true'):
+            download_name = os.path.basename(file_path)
+            suffix = COMPRESSION_SUFFIXES[compression]
+            if download_name.endswith(suffix):
+                download_name = download_name[:-len(suffix)]
+            
+            def generate():
+                with open_capture(file_path) as f:
+                    while True:
+                        chunk = f.read(DOWNLOAD_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        yield chunk
+            
+            return Response(
+                stream_with_context(generate()),
+                mimetype="application/vnd.tcpdump.pcap",
+                headers={"Content-Disposition": f'attachment; filename="{download_name}"'}
+            )
             
         return send_file(file_path, as_attachment=True)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@sniffer_bp.route('/packets/<filename>', methods=['GET'])
+def list_packets(filename):
+    """
+    Pagine les paquets d'une capture (?offset=&limit=) ou filtre par date (?start=&end=)
+    
+    L'accès passe par l'index de la capture (.idx), construit au premier appel
+    si la capture n'a pas été indexée pendant l'enregistrement.
+    """
+    try:
+        capture_dir = os.path.abspath("captures")
+        file_path = os.path.abspath(os.path.join(capture_dir, filename))
+        if not file_path.startswith(capture_dir + os.sep):
+            return jsonify({"error": "Accès non autorisé"}), 403
+        if not os.path.isfile(file_path):
+            return jsonify({"error": "Fichier introuvable"}), 404
+        
+        limit = min(int(request.args.get("limit", 100)), 1000)
+        offset = int(request.args.get("offset", 0))
+        if offset < 0 or limit < 1:
+            return jsonify({"error": "offset doit être positif et limit au moins égal à 1"}), 400
+        start = _optional_number(request.args, "start")
+        end = _optional_number(request.args, "end")
+        
+        index = get_index(file_path)
+        if start is not None or end is not None:
+            packets = index.time_range(start, end, limit)
+        else:
+            packets = index.packets(offset, limit)
+        
+        response_data = {
+            "file": filename,
+            "packet_count": index.packet_count,
+            "start_time": index.start_time,
+            "end_time": index.end_time,
+            "offset": offset,
+            "limit": limit,
+            "packets": [describe_packet(number, record) for number, record in packets]
+        }
+        if start is None and end is None and offset + limit < index.packet_count:
+            response_data["next_url"] = f"/api/sniffer/packets/{filename}?offset={offset + limit}&limit={limit}"
+        return jsonify(response_data)
+    except ValueError as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@sniffer_bp.route('/columns/<filename>', methods=['POST'])
+def export_columns(filename):
+    """Exporte les en-têtes disséqués d'une capture en colonnes pour les analyses suivantes"""
+    pcap_path = os.path.join("captures", os.path.basename(filename))
+    
+    if not os.path.isfile(pcap_path):
+        return jsonify({"error": "Fichier PCAP non trouvé"}), 404
+    
+    try:
+        analysis_results = export_capture_columns(pcap_path)
+        return jsonify({
+            "message": "Colonnes exportées",
+            "file": filename,
+            "columns_file": os.path.basename(pcap_path) + ".cols",
+            "packet_count": analysis_results.get("packet_count", 0)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@sniffer_bp.route('/timeseries/<filename>', methods=['GET'])
+def traffic_time_series(filename):
+    """
+    Série temporelle du trafic d'une capture (?bin=largeur en secondes&max_points=)
+    
+    Les captures longues sont ramenées à max_points intervalles en doublant la
+    largeur des intervalles ; la largeur effective est retournée dans bin_width.
+    """
+    pcap_path = os.path.join("captures", os.path.basename(filename))
+    
+    if not os.path.isfile(pcap_path):
+        return jsonify({"error": "Fichier PCAP non trouvé"}), 404
+    
+    try:
+        series = compute_time_series(
+            pcap_path,
+            _optional_number(request.args, "bin"),
+            _optional_number(request.args, "max_points", int)
+        )
+        return jsonify(dict(series, file=filename))
+    except ValueError as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _stream_capture_path(filename):
+    """Chemin d'une capture du répertoire captures (None si absente)"""
+    pcap_path = os.path.join("captures", os.path.basename(filename))
+    return pcap_path if os.path.isfile(pcap_path) else None
+
+def _encode_stream_data(data, output_format):
+    """Représentation JSON d'un bloc de flux TCP (text, hex ou base64)"""
+    if output_format == "hex":
+        return data.hex()
+    if output_format == "base64":
+        return base64.b64encode(data).decode()
+    return data.decode("utf-8", errors="replace")
+
+@sniffer_bp.route('/streams/<filename>', methods=['GET'])
+def tcp_streams(filename):
+    """
+    Liste paginée des flux TCP réassemblés d'une capture (?offset=&limit=)
+    
+    Chaque flux est identifié par son numéro d'apparition, utilisé par
+    /streams/<filename>/<id> (suivi) et /streams/<filename>/<id>/payload.
+    """
+    pcap_path = _stream_capture_path(filename)
+    if not pcap_path:
+        return jsonify({"error": "Fichier PCAP non trouvé"}), 404
+    
+    try:
+        offset = int(request.args.get("offset", 0))
+        limit = int(request.args.get("limit", 100))
+        if offset < 0 or not 1 <= limit <= MAX_STREAM_PAGE:
+            raise ValueError(f"La page doit contenir entre 1 et {MAX_STREAM_PAGE} flux")
+        # Liste complète en cache : chaque page n'en est qu'une tranche
+        result = list_tcp_streams(pcap_path)
+        response_data = dict(result, file=filename, offset=offset, limit=limit,
+                             streams=result["streams"][offset:offset + limit])
+        if offset + limit < result["total"]:
+            response_data["next_url"] = f"/api/sniffer/streams/{filename}?offset={offset + limit}&limit={limit}"
+        return jsonify(response_data)
+    except ValueError as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@sniffer_bp.route('/streams/<filename>/<int:stream_id>', methods=['GET'])
+def follow_tcp_stream(filename, stream_id):
+    """
+    Contenu d'un flux TCP dans l'ordre de l'échange (?format=text|hex|base64&max_bytes=)
+    """
+    pcap_path = _stream_capture_path(filename)
+    if not pcap_path:
+        return jsonify({"error": "Fichier PCAP non trouvé"}), 404
+    
+    output_format = request.args.get("format", "text")
+    if output_format not in ("text", "hex", "base64"):
+        return jsonify({"error": "Format invalide (text, hex ou base64)"}), 400
+    
+    try:
+        max_bytes = min(int(request.args.get("max_bytes", FOLLOW_MAX_BYTES)), 16 * FOLLOW_MAX_BYTES)
+        result = follow_stream(pcap_path, stream_id, max_bytes)
+        if result is None:
+            return jsonify({"error": "Flux TCP introuvable"}), 404
+        for chunk in result["chunks"]:
+            if "data" in chunk:
+                chunk["length"] = len(chunk["data"])
+                chunk["data"] = _encode_stream_data(chunk["data"], output_format)
+        result.update(file=filename, format=output_format)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@sniffer_bp.route('/streams/<filename>/<int:stream_id>/payload', methods=['GET'])
+def download_stream_payload(filename, stream_id):
+    """
+    Télécharge la charge utile réassemblée d'un sens d'un flux TCP (?direction=client|server)
+    
+    Le contenu est produit au fil de la lecture de la capture, sans être
+    chargé entièrement en mémoire.
+    """
+    pcap_path = _stream_capture_path(filename)
+    if not pcap_path:
+        return jsonify({"error": "Fichier PCAP non trouvé"}), 404
+    
+    direction = request.args.get("direction", "client")
+    if direction not in DIRECTIONS:
+        return jsonify({"error": "Sens invalide (client ou server)"}), 400
+    
+    # Le flux est recherché avant de commencer la réponse (liste des flux en cache)
+    try:
+        if stream_id >= list_tcp_streams(pcap_path)["total"]:
+            return jsonify({"error": "Flux TCP introuvable"}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    download_name = f"{os.path.basename(filename)}.stream{stream_id}.{direction}.bin"
+    return Response(
+        stream_with_context(iter_stream_payload(pcap_path, stream_id, DIRECTIONS.index(direction))),
+        mimetype="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{download_name}"'}
+    )
+
 @sniffer_bp.route('/interfaces', methods=['GET'])
 def list_interfaces():
     """Liste les interfaces réseau disponibles"""
@@ -182,8 +498,14 @@ def generate_report(filename):
         return jsonify({"error": "Fichier PCAP non trouvé"}), 404
     
     try:
+        data = request.get_json(silent=True) or request.form
+        try:
+            analysis_mode = _analysis_mode(data)
+        except ValueError as e:
+            return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+        analysis_results = analyze_pcap(pcap_path, mode=analysis_mode)
         generator = SnifferReportGenerator()
-        report_path = generator.generate_report(pcap_path)
+        report_path = generator.generate_report(pcap_path, analysis_results)
         
         if report_path:
             report_filename = os.path.basename(report_path)
@@ -196,3 +518,192 @@ def generate_report(filename):
             return jsonify({"error": "Échec de la génération du rapport"}), 500
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+def _job_response(job):
+    """État d'une tâche de capture et URLs associées"""
+    response_data = {
+        "job": job.to_dict(),
+        "status_url": f"/api/sniffer/jobs/{job.id}",
+        "stop_url": f"/api/sniffer/jobs/{job.id}/stop",
+        "analysis_url": f"/api/sniffer/jobs/{job.id}/analysis"
+    }
+    if job.live is not None:
+        response_data["live_url"] = f"/api/sniffer/jobs/{job.id}/live"
+        response_data["refilter_url"] = f"/api/sniffer/jobs/{job.id}/refilter"
+    return response_data
+
+@sniffer_bp.route('/jobs', methods=['POST'])
+def create_capture_job():
+    """Lance une capture en arrière-plan et retourne son identifiant"""
+    try:
+        data = request.get_json(silent=True) or request.form
+        interface = data.get("interface", "eth0")
+        count = int(data.get("count", 100))
+        job = start_capture_job(interface, count, _capture_options(data), live=_flag(data, "live"),
+                                analysis_mode=_analysis_mode(data))
+        return jsonify(_job_response(job)), 202
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@sniffer_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Liste les captures en cours et récemment terminées"""
+    return jsonify({"jobs": [job.to_dict() for job in list_capture_jobs()]})
+
+@sniffer_bp.route('/jobs/<job_id>', methods=['GET'])
+def capture_job_status(job_id):
+    """Progression d'une capture (paquets, octets, débit, durée)"""
+    job = get_capture_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    return jsonify(_job_response(job))
+
+@sniffer_bp.route('/jobs/<job_id>/stop', methods=['POST'])
+def stop_capture_job(job_id):
+    """Arrête une capture avant son terme (l'analyse est tout de même effectuée)"""
+    job = get_capture_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    job.stop()
+    return jsonify(_job_response(job))
+
+@sniffer_bp.route('/jobs/<job_id>/live', methods=['GET'])
+def capture_job_live(job_id):
+    """
+    Statistiques en direct d'une capture (Server-Sent Events)
+    
+    Un événement `stats` est envoyé toutes les LIVE_INTERVAL secondes (débit,
+    top talkers, protocoles, nouveaux hôtes), puis un événement `end` avec
+    l'état final de la tâche quand la capture se termine.
+    """
+    job = get_capture_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    if job.live is None:
+        return jsonify({"error": "Capture lancée sans statistiques en direct (live)"}), 409
+    
+    def generate():
+        while True:
+            # La phase est lue avant l'instantané : le dernier envoi contient tous les paquets
+            capturing = not job.finished and job.phase in ("pending", "capturing")
+            snapshot = dict(job.live.snapshot(), phase=job.phase, status=job.status)
+            yield f"event: stats\ndata: {json.dumps(snapshot)}\n\n"
+            if not capturing:
+                break
+            time.sleep(LIVE_INTERVAL)
+        yield f"event: end\ndata: {json.dumps(_job_response(job))}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@sniffer_bp.route('/jobs/<job_id>/refilter', methods=['POST'])
+def refilter_capture(job_id):
+    """Arrête une capture et la relance avec un nouveau filtre BPF"""
+    job = get_capture_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    try:
+        data = request.get_json(silent=True) or request.form
+        bpf_filter = (data.get("filter") or data.get("bpf_filter") or "").strip()
+        new_job = refilter_capture_job(job, bpf_filter)
+        return jsonify(dict(_job_response(new_job), previous_job=job.id)), 202
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@sniffer_bp.route('/jobs/<job_id>/analysis', methods=['GET'])
+def capture_job_analysis(job_id):
+    """Résultat de l'analyse d'une capture terminée"""
+    job = get_capture_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    if not job.finished:
+        return jsonify({"error": "Capture en cours", "job": job.to_dict()}), 409
+    if job.error:
+        return jsonify({"error": job.error, "job": job.to_dict()}), 500
+    
+    response_data = {
+        "job": job.to_dict(),
+        "file": job.pcap_file,
+        "files": job.pcap_files,
+        "download_url": f"/api/sniffer/download?file={os.path.basename(job.pcap_file)}",
+        "analysis": job.result
+    }
+    if job.report_path:
+        response_data["report_url"] = f"/api/report/download/{os.path.basename(job.report_path)}"
+    return jsonify(response_data)
+
+
+def _batch_response(job):
+    """État d'une analyse groupée et URLs associées"""
+    return {
+        "job": job.to_dict(),
+        "status_url": f"/api/sniffer/batch/{job.id}",
+        "stop_url": f"/api/sniffer/batch/{job.id}/stop",
+        "analysis_url": f"/api/sniffer/batch/{job.id}/analysis"
+    }
+
+@sniffer_bp.route('/batch', methods=['POST'])
+def create_batch_analysis():
+    """Analyse en parallèle toutes les captures (ou une sélection) et fusionne les résultats"""
+    try:
+        data = request.get_json(silent=True) or {}
+        files = None
+        if data.get("files"):
+            available = {os.path.basename(path): path for path in list_captures()}
+            files = []
+            for name in data["files"]:
+                if name not in available:
+                    return jsonify({"error": f"Capture introuvable: {name}"}), 404
+                files.append(available[name])
+        job = start_batch_analysis(
+            files,
+            workers=_optional_number(data, "workers", int),
+            generate_report=bool(data.get("report", True)),
+            mode=_analysis_mode(data)
+        )
+        return jsonify(_batch_response(job)), 202
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@sniffer_bp.route('/batch/<job_id>', methods=['GET'])
+def batch_analysis_status(job_id):
+    """Progression d'une analyse groupée (captures traitées, octets lus, cache)"""
+    job = get_batch_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    return jsonify(_batch_response(job))
+
+@sniffer_bp.route('/batch/<job_id>/stop', methods=['POST'])
+def stop_batch_analysis(job_id):
+    """Arrête une analyse groupée (les captures déjà analysées sont fusionnées)"""
+    job = get_batch_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    job.stop()
+    return jsonify(_batch_response(job))
+
+@sniffer_bp.route('/batch/<job_id>/analysis', methods=['GET'])
+def batch_analysis_result(job_id):
+    """Résultat combiné d'une analyse groupée terminée"""
+    job = get_batch_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    if not job.finished:
+        return jsonify({"error": "Analyse en cours", "job": job.to_dict()}), 409
+    if job.error:
+        return jsonify({"error": job.error, "job": job.to_dict()}), 500
+    
+    response_data = {"job": job.to_dict(), "analysis": job.result}
+    if job.report_path:
+        response_data["report_url"] = f"/api/report/download/{os.path.basename(job.report_path)}"
+    return jsonify(response_data)
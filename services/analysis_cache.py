@@ -0,0 +1,322 @@
+# services/analysis_cache.py
+"""
+Cache persistant des résultats d'analyse de captures.
+
+Les entrées sont adressées par le contenu : la clé combine le chemin absolu,
+la taille, la date de modification et une empreinte SHA-256 du début et de la
+fin du fichier. Une capture modifiée ou remplacée obtient donc une nouvelle
+clé et l'ancienne entrée finit évincée (LRU bornée en nombre et en taille).
+
+L'empreinte d'un fichier est mémorisée tant que sa taille et sa date de
+modification ne changent pas, et la date du dernier accès n'est écrite dans
+l'index que par lots : une lecture en cache coûte un stat, sans hachage ni
+écriture disque.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils.logger import get_logger
+
+# Configuration du logger
+logger = get_logger('analysis_cache')
+
+CACHE_DIR = os.path.join("cache", "analysis")
+INDEX_FILE = "index.json"
+
+# Limites par défaut du cache sur disque
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Nombre d'entrées gardées en mémoire
+MEMORY_ENTRIES = 32
+# Taille des échantillons hachés en début et fin de fichier
+HASH_SAMPLE_SIZE = 1024 * 1024
+# Empreintes mémorisées par (chemin, taille, date de modification)
+IDENTITY_ENTRIES = 1024
+# Délai minimal entre deux écritures de l'index pour les seuls accès (secondes)
+INDEX_FLUSH_INTERVAL = 60
+
+_identities = OrderedDict()
+_identities_lock = threading.Lock()
+
+
+def content_hash(path, size):
+    """
+    Empreinte SHA-256 du contenu d'une capture
+
+    Les fichiers de moins de 2 Mo sont hachés entièrement ; au-delà, seuls le
+    premier et le dernier Mo sont lus (les en-têtes d'enregistrement contiennent
+    des timestamps, ce qui suffit à distinguer deux captures).
+
+    Args:
+        path (str): Chemin du fichier
+        size (int): Taille du fichier
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        if size <= 2 * HASH_SAMPLE_SIZE:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(HASH_SAMPLE_SIZE))
+            f.seek(-HASH_SAMPLE_SIZE, os.SEEK_END)
+            digest.update(f.read(HASH_SAMPLE_SIZE))
+    return digest.hexdigest()
+
+
+def file_identity(path):
+    """
+    Identité d'un fichier de capture
+
+    Args:
+        path (str): Chemin du fichier
+
+    Returns:
+        dict: path, size, mtime et content_hash (mémorisée tant que la taille et
+        la date de modification sont inchangées)
+    """
+    stats = os.stat(path)
+    identity = (os.path.abspath(path), stats.st_size, stats.st_mtime_ns)
+    with _identities_lock:
+        digest = _identities.get(identity)
+        if digest is not None:
+            _identities.move_to_end(identity)
+    if digest is None:
+        digest = content_hash(path, stats.st_size)
+        with _identities_lock:
+            _identities[identity] = digest
+            while len(_identities) > IDENTITY_ENTRIES:
+                _identities.popitem(last=False)
+    return {
+        "path": identity[0],
+        "size": stats.st_size,
+        "mtime": stats.st_mtime_ns,
+        "content_hash": digest
+    }
+
+
+class AnalysisCache:
+    """Cache LRU persistant (disque + mémoire) des analyses de captures"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir (str): Répertoire de stockage
+            max_entries (int): Nombre maximal d'entrées sur disque
+            max_bytes (int): Taille maximale cumulée des entrées sur disque
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()
+        self._index = None
+        # Accès non encore écrits dans l'index (voir _touch)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self):
+        if self._index is not None:
+            return self._index
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = {}
+        try:
+            with open(self._index_path(), "r") as f:
+                self._index = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError) as e:
+            logger.warning(f"Index du cache illisible, réinitialisation: {e}")
+        return self._index
+
+    def _save_index(self):
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path())
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self):
+        """Écrit dans l'index les dates d'accès en attente"""
+        with self._lock:
+            if self._dirty:
+                try:
+                    self._save_index()
+                except OSError as e:
+                    logger.warning(f"Impossible d'enregistrer l'index du cache: {e}")
+
+    @staticmethod
+    def make_key(identity, variant=""):
+        """Clé de cache d'un fichier pour une variante d'analyse donnée"""
+        raw = f"{identity['path']}|{identity['size']}|{identity['mtime']}|{identity['content_hash']}|{variant}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, path, variant=""):
+        """
+        Récupère une analyse en cache
+
+        Args:
+            path (str): Chemin de la capture
+            variant (str): Variante d'analyse (mode, options...)
+
+        Returns:
+            dict: Résultat en cache, ou None
+        """
+        key = self.make_key(file_identity(path), variant)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._touch(key)
+                return json.loads(self._memory[key])
+
+            index = self._load_index()
+            if key not in index:
+                return None
+            try:
+                with open(self._entry_path(key), "r") as f:
+                    payload = f.read()
+                result = json.loads(payload)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Entrée de cache illisible {key}: {e}")
+                index.pop(key, None)
+                self._save_index()
+                return None
+
+            self._remember(key, payload)
+            self._touch(key)
+            return result
+
+    def put(self, path, result, variant=""):
+        """
+        Enregistre une analyse dans le cache
+
+        Args:
+            path (str): Chemin de la capture
+            result (dict): Résultat à mettre en cache (sérialisable en JSON)
+            variant (str): Variante d'analyse
+        """
+        identity = file_identity(path)
+        key = self.make_key(identity, variant)
+        payload = json.dumps(result)
+
+        with self._lock:
+            index = self._load_index()
+
+            # Les anciennes versions du même fichier ne serviront plus
+            for old_key, entry in list(index.items()):
+                if entry.get("path") == identity["path"] and entry.get("variant", "") == variant and old_key != key:
+                    self._remove(old_key)
+
+            with open(self._entry_path(key), "w") as f:
+                f.write(payload)
+            index[key] = {
+                "path": identity["path"],
+                "variant": variant,
+                "size": len(payload),
+                "last_access": time.time()
+            }
+            self._remember(key, payload)
+            self._evict()
+            self._save_index()
+
+    def get_or_compute(self, path, compute, variant=""):
+        """
+        Retourne l'analyse en cache ou la calcule puis la met en cache
+
+        Les résultats contenant une clé 'error' ne sont pas mis en cache.
+
+        Args:
+            path (str): Chemin de la capture
+            compute (callable): Fonction sans argument produisant le résultat
+            variant (str): Variante d'analyse
+
+        Returns:
+            dict: Résultat de l'analyse
+        """
+        try:
+            cached = self.get(path, variant)
+        except OSError as e:
+            logger.warning(f"Cache indisponible pour {path}: {e}")
+            return compute()
+
+        if cached is not None:
+            logger.info(f"Analyse trouvée en cache pour {path}")
+            return cached
+
+        result = compute()
+        if isinstance(result, dict) and "error" not in result:
+            try:
+                self.put(path, result, variant)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Impossible de mettre en cache l'analyse de {path}: {e}")
+        return result
+
+    def clear(self):
+        """Vide entièrement le cache"""
+        with self._lock:
+            index = self._load_index()
+            for key in list(index):
+                self._remove(key)
+            self._memory.clear()
+            self._save_index()
+
+    def _remember(self, key, payload):
+        # Les résultats sont gardés sérialisés : chaque lecture renvoie une copie
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key):
+        index = self._load_index()
+        if key in index:
+            index[key]["last_access"] = time.time()
+            # Écrit avec la prochaine modification de l'index, au plus tard après
+            # INDEX_FLUSH_INTERVAL ou à l'arrêt (flush)
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= INDEX_FLUSH_INTERVAL:
+                self._save_index()
+
+    def _remove(self, key):
+        self._index.pop(key, None)
+        self._memory.pop(key, None)
+        try:
+            os.remove(self._entry_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        index = self._index
+        total = sum(entry["size"] for entry in index.values())
+        if len(index) <= self.max_entries and total <= self.max_bytes:
+            return
+        for key, entry in sorted(index.items(), key=lambda item: item[1]["last_access"]):
+            if len(index) <= self.max_entries and total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            self._remove(key)
+            logger.debug(f"Entrée de cache évincée: {entry['path']} ({entry.get('variant', '')})")
+
+
+_cache = None
+
+
+def get_analysis_cache():
+    """Retourne l'instance partagée du cache d'analyses"""
+    global _cache
+    if _cache is None:
+        _cache = AnalysisCache()
+        atexit.register(_cache.flush)
+    return _cache
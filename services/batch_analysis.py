@@ -0,0 +1,219 @@
+# services/batch_analysis.py
+"""
+Analyse groupée de toutes les captures d'un répertoire.
+
+Chaque capture est analysée dans un processus distinct (ProcessPoolExecutor) :
+le décodage des paquets est limité par le CPU et profite ainsi de tous les
+cœurs. Les workers retournent un état partiel (CaptureAnalyzer.partial()) que
+le processus principal fusionne au fil de l'eau en un rapport combiné. Les
+états partiels sont mis en cache : une capture déjà analysée n'est pas relue.
+En mode approximatif, les états partiels contiennent des résumés à mémoire
+fixe (voir sketches), fusionnés de la même façon.
+
+Les états partiels sont aussi mis en cache par analyze_pcap (page /report,
+analyses individuelles) : une capture déjà consultée n'est pas relue non plus.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from utils.logger import get_logger
+from utils.jobs import BackgroundJob, registry
+from services.pcap_reader import PcapReader, open_capture
+from services.pcap_analyzer import CaptureAnalyzer, MODE_EXACT, ANALYSIS_MODES
+from services.analysis_cache import get_analysis_cache
+from services.packet_sniffer import CAPTURE_DIR, partial_variant
+from services.sniffer_report_generator import SnifferReportGenerator
+
+# Configuration du logger
+logger = get_logger('batch_analysis')
+
+CAPTURE_EXTENSIONS = (".pcap", ".pcapng", ".pcap.gz", ".pcapng.gz", ".pcap.xz", ".pcapng.xz")
+
+
+def list_captures(directory=CAPTURE_DIR):
+    """
+    Liste les fichiers de capture d'un répertoire
+
+    Args:
+        directory (str): Répertoire à parcourir
+
+    Returns:
+        list: Chemins des captures, triés par nom
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(CAPTURE_EXTENSIONS) and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def analyze_partial(pcap_file, mode=MODE_EXACT):
+    """
+    Analyse une capture et retourne son état partiel (exécuté dans un worker)
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+        mode (str): Mode d'analyse ("exact" ou "approximate")
+
+    Returns:
+        dict: État partiel, ou {"file", "error"} en cas d'échec
+    """
+    try:
+        analyzer = CaptureAnalyzer(pcap_file, mode=mode)
+        with open_capture(pcap_file) as f:
+            for record in PcapReader(f):
+                analyzer.add(record)
+        return analyzer.partial()
+    except Exception as e:
+        return {"file": pcap_file, "error": str(e)}
+
+
+class BatchAnalysisJob(BackgroundJob):
+    """Analyse parallèle d'un ensemble de captures et fusion des résultats"""
+
+    kind = "batch_analysis"
+
+    def __init__(self, files, workers=None, generate_report=True, mode=MODE_EXACT):
+        """
+        Args:
+            files (list): Chemins des captures à analyser
+            workers (int, optional): Nombre de processus (défaut: nombre de cœurs)
+            generate_report (bool): Générer le rapport HTML combiné
+            mode (str): Mode d'analyse ("exact" ou "approximate")
+        """
+        super().__init__()
+        self.files = list(files)
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.generate_report = generate_report
+        self.phase = "pending"
+        self.bytes_total = sum(os.path.getsize(f) for f in self.files if os.path.exists(f))
+        self.bytes_done = 0
+        self.files_done = 0
+        self.files_cached = 0
+        self.files_failed = 0
+        self.packets = 0
+        self.file_results = []
+        self.report_path = None
+
+    def _merge(self, analyzer, pcap_file, partial, cached):
+        self.files_done += 1
+        self.bytes_done += os.path.getsize(pcap_file) if os.path.exists(pcap_file) else 0
+        if "error" in partial:
+            self.files_failed += 1
+            logger.warning(f"Échec de l'analyse de {pcap_file}: {partial['error']}")
+            self.file_results.append({"file": pcap_file, "error": partial["error"]})
+            return
+        if cached:
+            self.files_cached += 1
+        analyzer.merge_partial(partial)
+        self.packets = analyzer.packet_count
+        self.file_results.append({
+            "file": pcap_file,
+            "packet_count": partial["packet_count"],
+            "flow_count": partial["flow_count"],
+            "cached": cached
+        })
+
+    def run(self):
+        analyzer = CaptureAnalyzer(mode=self.mode)
+        cache = get_analysis_cache()
+        variant = partial_variant(self.mode)
+
+        # Les captures déjà analysées sont fusionnées directement depuis le cache
+        self.phase = "cache"
+        pending = []
+        for pcap_file in self.files:
+            try:
+                partial = cache.get(pcap_file, variant)
+            except OSError as e:
+                logger.warning(f"Cache indisponible pour {pcap_file}: {e}")
+                partial = None
+            if partial is None:
+                pending.append(pcap_file)
+            else:
+                self._merge(analyzer, pcap_file, partial, cached=True)
+
+        if pending and not self.stop_event.is_set():
+            self.phase = "analyzing"
+            logger.info(f"Analyse de {len(pending)} captures sur {self.workers} processus")
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(pending))) as pool:
+                futures = {pool.submit(analyze_partial, f, self.mode): f for f in pending}
+                remaining = set(futures)
+                while remaining:
+                    if self.stop_event.is_set():
+                        # Les captures en cours se terminent, les autres sont abandonnées
+                        for future in remaining:
+                            future.cancel()
+                    done, remaining = wait(remaining, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.cancelled():
+                            continue
+                        pcap_file = futures[future]
+                        partial = future.result()
+                        if "error" not in partial:
+                            try:
+                                cache.put(pcap_file, partial, variant)
+                            except (OSError, TypeError, ValueError) as e:
+                                logger.warning(f"Impossible de mettre en cache {pcap_file}: {e}")
+                        self._merge(analyzer, pcap_file, partial, cached=False)
+
+        result = analyzer.result()
+        result["files"] = self.file_results
+        result["file_count"] = len(self.files)
+        result["total_file_size"] = self.bytes_total
+
+        if self.generate_report and not self.stop_event.is_set():
+            self.phase = "reporting"
+            self.report_path = SnifferReportGenerator().generate_report(f"batch_{self.id}", result)
+
+        self.phase = "done"
+        return result
+
+    def progress(self):
+        return {
+            "phase": self.phase,
+            "mode": self.mode,
+            "workers": self.workers,
+            "files_total": len(self.files),
+            "files_done": self.files_done,
+            "files_cached": self.files_cached,
+            "files_failed": self.files_failed,
+            "bytes_total": self.bytes_total,
+            "bytes_done": self.bytes_done,
+            "percent": round(100.0 * self.bytes_done / self.bytes_total, 1) if self.bytes_total else 0.0,
+            "packets": self.packets,
+            "report_path": self.report_path
+        }
+
+
+def start_batch_analysis(files=None, workers=None, generate_report=True, mode=MODE_EXACT):
+    """
+    Lance l'analyse groupée des captures en arrière-plan
+
+    Args:
+        files (list, optional): Captures à analyser (défaut: tout le répertoire captures/)
+        workers (int, optional): Nombre de processus
+        generate_report (bool): Générer le rapport HTML combiné
+        mode (str): Mode d'analyse ("exact" ou "approximate")
+
+    Returns:
+        BatchAnalysisJob: Tâche démarrée
+    """
+    if files is None:
+        files = list_captures()
+    if not files:
+        raise ValueError("Aucune capture à analyser")
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Mode d'analyse inconnu: {mode}")
+    job = BatchAnalysisJob(files, workers, generate_report, mode)
+    logger.info(f"Analyse groupée {job.id} programmée ({len(files)} captures)")
+    return registry.submit(job)
+
+
+def get_batch_job(job_id):
+    """Retourne une tâche d'analyse groupée par son identifiant (ou None)"""
+    job = registry.get(job_id)
+    if job is None or job.kind != BatchAnalysisJob.kind:
+        return None
+    return job
@@ -0,0 +1,246 @@
+# services/candidate_ordering.py
+"""
+Ordre des candidats (utilisateurs, mots de passe) soumis à Hydra.
+
+Hydra essaie les listes dans leur ordre sur disque : un identifiant probable
+placé loin dans la liste n'est trouvé qu'à la fin, ou jamais si l'attaque est
+limitée dans le temps. Les listes sont donc réordonnées avant l'attaque :
+
+1. a priori propres au service (root/admin pour SSH, sa pour MSSQL...) puis
+   communs à tous les services ;
+2. fréquence empirique : nombre d'occurrences dans la liste (listes
+   fusionnées) ;
+3. position d'origine, les grandes listes (rockyou) étant déjà triées par
+   fréquence.
+
+Hydra compte puis relit ses listes (rewind) : un tube nommé ne convient pas
+et des fichiers sont nécessaires. Les listes classées ne dépassent pas les
+listes d'origine. L'ordre « interleaved » s'appuie sur l'option -u de Hydra
+(chaque mot de passe essayé sur tous les utilisateurs) ou, si le produit
+utilisateurs x mots de passe tient dans MAX_PAIR_BYTES, sur un fichier de
+couples (-C) parcouru en diagonale : les couples de meilleur rang cumulé
+passent en premier. Ce fichier remplace alors les deux listes classées, qui
+ne sont pas écrites.
+
+Au-delà de RANK_IN_MEMORY_BYTES, une liste n'est pas triée en mémoire : les
+a priori présents sont remontés en tête et le reste est recopié en flux,
+dans l'ordre.
+"""
+import os
+from collections import Counter
+from utils.logger import get_logger
+
+# Configuration du logger
+logger = get_logger('candidate_ordering')
+
+ORDERING_ORIGINAL = "original"
+ORDERING_RANKED = "ranked"
+ORDERING_INTERLEAVED = "interleaved"
+ORDERINGS = (ORDERING_ORIGINAL, ORDERING_RANKED, ORDERING_INTERLEAVED)
+
+# Taille maximale d'une liste triée en mémoire (au-delà : a priori seulement, en flux)
+RANK_IN_MEMORY_BYTES = 16 * 1024 * 1024
+# Taille maximale d'un fichier de couples -C (au-delà : option -u)
+MAX_PAIR_BYTES = 8 * 1024 * 1024
+
+# Utilisateurs probables par service (les plus courants en premier)
+SERVICE_USER_PRIORS = {
+    "ssh": ["root", "admin", "ubuntu", "user", "pi", "test", "oracle", "ec2-user", "git", "deploy", "centos"],
+    "telnet": ["root", "admin", "user", "guest", "support", "default"],
+    "ftp": ["anonymous", "ftp", "admin", "root", "user", "test", "ftpuser", "www-data"],
+    "mysql": ["root", "mysql", "admin", "user", "test"],
+    "postgres": ["postgres", "admin", "root", "user"],
+    "mssql": ["sa", "admin", "administrator", "sql"],
+    "smb": ["administrator", "admin", "guest", "user", "root"],
+    "rdp": ["administrator", "admin", "user", "guest"],
+    "vnc": ["root", "admin"],
+    "smtp": ["admin", "postmaster", "root", "info", "test"],
+    "pop3": ["admin", "info", "test", "user", "postmaster"],
+    "imap": ["admin", "info", "test", "user", "postmaster"],
+    "http": ["admin", "administrator", "root", "user", "test", "guest"]
+}
+DEFAULT_USER_PRIORS = ["admin", "root", "administrator", "user", "test", "guest"]
+
+# Mots de passe probables par service, puis mots de passe les plus fréquents en général
+SERVICE_PASSWORD_PRIORS = {
+    "ssh": ["root", "toor", "admin", "raspberry", "ubuntu", "changeme"],
+    "telnet": ["admin", "root", "1234", "default", "support"],
+    "ftp": ["anonymous", "ftp", "guest"],
+    "mysql": ["root", "mysql"],
+    "postgres": ["postgres"],
+    "mssql": ["sa", "Password1", "P@ssw0rd"],
+    "vnc": ["vnc"],
+    "smb": ["Password1", "P@ssw0rd", "Welcome1"],
+    "rdp": ["Password1", "P@ssw0rd", "Welcome1"],
+    "http": ["admin", "password", "changeme"]
+}
+DEFAULT_PASSWORD_PRIORS = [
+    "123456", "password", "12345678", "qwerty", "123456789", "12345", "1234", "111111", "1234567",
+    "admin", "123123", "abc123", "password1", "1234567890", "000000", "iloveyou", "letmein",
+    "welcome", "monkey", "dragon", "root", "toor", "changeme", "default", "passw0rd", "qwerty123",
+    "654321", "superman", "1qaz2wsx", "666666", "123321", "master", "sunshine", "football"
+]
+
+KIND_USER = "user"
+KIND_PASSWORD = "password"
+
+
+def service_family(service):
+    """Famille d'un service Hydra (http-post-form, https-get... -> http)"""
+    service = (service or "").lower()
+    if service.startswith("http"):
+        return "http"
+    return service
+
+
+def priors_for(kind, service):
+    """
+    Candidats a priori pour un service, du plus probable au moins probable
+
+    Args:
+        kind (str): "user" ou "password"
+        service (str): Service Hydra
+
+    Returns:
+        list: Candidats (bytes, sans doublon)
+    """
+    family = service_family(service)
+    if kind == KIND_USER:
+        words = SERVICE_USER_PRIORS.get(family, []) + DEFAULT_USER_PRIORS
+    else:
+        words = SERVICE_PASSWORD_PRIORS.get(family, []) + DEFAULT_PASSWORD_PRIORS
+    return list(dict.fromkeys(word.encode() for word in words))
+
+
+def _lines(path):
+    with open(path, "rb") as f:
+        for line in f:
+            yield line.rstrip(b"\r\n")
+
+
+def rank_candidates(path, kind, service):
+    """
+    Candidats d'une liste, du plus probable au moins probable
+
+    Args:
+        path (str): Wordlist
+        kind (str): "user" ou "password"
+        service (str): Service Hydra
+
+    Returns:
+        tuple: (itérable de candidats en bytes, statistiques) ; en mémoire, les
+        doublons sont éliminés, en flux (grande liste) ils sont conservés
+    """
+    priors = priors_for(kind, service)
+    prior_rank = {word: rank for rank, word in enumerate(priors)}
+    if os.path.getsize(path) <= RANK_IN_MEMORY_BYTES:
+        counts = Counter()
+        first_seen = {}
+        for index, word in enumerate(_lines(path)):
+            counts[word] += 1
+            first_seen.setdefault(word, index)
+        missing = len(priors)
+        ranked = sorted(counts, key=lambda word: (prior_rank.get(word, missing), -counts[word], first_seen[word]))
+        stats = {
+            "mode": "memory",
+            "lines": sum(counts.values()),
+            "unique": len(ranked),
+            "promoted": sum(1 for word in ranked if word in prior_rank),
+            "repeated": sum(1 for count in counts.values() if count > 1)
+        }
+        return ranked, stats
+
+    # Grande liste : une passe pour repérer les a priori présents, une pour recopier le reste
+    present = set()
+    for word in _lines(path):
+        if word in prior_rank:
+            present.add(word)
+    head = [word for word in priors if word in present]
+
+    def _stream():
+        for word in head:
+            yield word
+        for word in _lines(path):
+            if word not in present:
+                yield word
+
+    return _stream(), {"mode": "stream", "promoted": len(head)}
+
+
+def write_candidates(words, out_path):
+    """Écrit des candidats (bytes), un par ligne ; retourne le nombre de lignes"""
+    count = 0
+    with open(out_path, "wb") as f:
+        for word in words:
+            f.write(word + b"\n")
+            count += 1
+    return count
+
+
+def pair_file_size(users, passwords):
+    """Taille exacte du fichier de couples login:mot de passe (sans l'écrire)"""
+    return (len(passwords) * sum(len(user) for user in users) + len(users) * sum(len(word) for word in passwords)
+            + 2 * len(users) * len(passwords))
+
+
+def _write_diagonal_pairs(users, passwords, out_path):
+    """Couples login:mot de passe par rang cumulé croissant (diagonales de la grille)"""
+    count = 0
+    with open(out_path, "wb") as f:
+        for total in range(len(users) + len(passwords) - 1):
+            for user_index in range(max(0, total - len(passwords) + 1), min(total, len(users) - 1) + 1):
+                f.write(users[user_index] + b":" + passwords[total - user_index] + b"\n")
+                count += 1
+    return count
+
+
+def prepare_candidates(userlist, passlist, service, ordering, work_dir, allow_pairs=True):
+    """
+    Prépare les listes réordonnées d'une attaque
+
+    Args:
+        userlist (str): Liste d'utilisateurs d'origine
+        passlist (str): Liste de mots de passe d'origine
+        service (str): Service Hydra
+        ordering (str): "original", "ranked" ou "interleaved"
+        work_dir (str): Répertoire des listes produites (celui de l'attaque)
+        allow_pairs (bool): Autoriser un fichier de couples (-C) pour "interleaved"
+
+    Returns:
+        dict: userlist, passlist, combo_file (ou None), loop_users (option -u)
+        et statistiques ; les listes d'origine sont retournées telles quelles
+        pour l'ordre "original" et lorsqu'un fichier de couples les remplace
+    """
+    if ordering in (None, "", ORDERING_ORIGINAL):
+        return {"userlist": userlist, "passlist": passlist, "combo_file": None, "loop_users": False,
+                "ordering": ORDERING_ORIGINAL}
+    if ordering not in ORDERINGS:
+        raise ValueError(f"Ordre des candidats inconnu: {ordering} ({', '.join(ORDERINGS)})")
+
+    os.makedirs(work_dir, exist_ok=True)
+    prepared = {"ordering": ordering, "combo_file": None, "loop_users": False,
+                "userlist": userlist, "passlist": passlist}
+    ranked = {}
+    for kind, path, key in ((KIND_USER, userlist, "userlist"), (KIND_PASSWORD, passlist, "passlist")):
+        ranked[key], prepared[f"{key}_stats"] = rank_candidates(path, kind, service)
+    users, passwords = ranked["userlist"], ranked["passlist"]
+
+    if ordering == ORDERING_INTERLEAVED and allow_pairs and isinstance(users, list) \
+            and isinstance(passwords, list) and pair_file_size(users, passwords) <= MAX_PAIR_BYTES \
+            and not any(b":" in user for user in users):
+        # Le fichier de couples remplace -L/-P : les listes classées seraient inutilisées
+        combo_file = os.path.abspath(os.path.join(work_dir, "ordered_pairs.txt"))
+        prepared["pairs"] = _write_diagonal_pairs(users, passwords, combo_file)
+        prepared["combo_file"] = combo_file
+        detail = f"{prepared['pairs']} couples ({len(users)} utilisateurs x {len(passwords)} mots de passe)"
+    else:
+        for key in ("userlist", "passlist"):
+            out_path = os.path.abspath(os.path.join(work_dir, f"ordered_{key}.txt"))
+            prepared[f"{key}_stats"]["written"] = write_candidates(ranked[key], out_path)
+            prepared[key] = out_path
+        # Chaque mot de passe, du plus probable au moins probable, sur tous les utilisateurs
+        prepared["loop_users"] = ordering == ORDERING_INTERLEAVED
+        detail = (f"{prepared['userlist_stats']['written']} utilisateurs, "
+                  f"{prepared['passlist_stats']['written']} mots de passe")
+    logger.info(f"Candidats réordonnés ({ordering}) pour {service}: {detail}")
+    return prepared
@@ -0,0 +1,166 @@
+# services/capture_jobs.py
+"""
+Captures réseau exécutées en tâches de fond.
+
+Chaque capture tourne dans son propre thread : la requête HTTP retourne
+immédiatement un identifiant de tâche, puis le client suit la progression
+(paquets, octets, débit) et récupère l'analyse une fois la capture terminée.
+En mode live, les paquets alimentent aussi des statistiques en direct
+(LiveTrafficStats) diffusées pendant la capture.
+"""
+import time
+from utils.logger import get_logger
+from utils.jobs import BackgroundJob, registry
+from services.packet_sniffer import capture_packets, analyze_captures
+from services.live_stats import LiveTrafficStats
+from services.pcap_reader import LINKTYPE_ETHERNET
+from services.pcap_analyzer import MODE_EXACT
+from services.sniffer_report_generator import SnifferReportGenerator
+
+# Configuration du logger
+logger = get_logger('capture_jobs')
+
+
+class CaptureJob(BackgroundJob):
+    """Capture suivie d'une analyse et de la génération du rapport HTML"""
+
+    kind = "capture"
+
+    def __init__(self, interface="eth0", packet_count=100, capture_options=None, generate_report=True,
+                 live=False, analysis_mode=MODE_EXACT):
+        """
+        Args:
+            interface (str): Interface réseau à utiliser
+            packet_count (int): Nombre de paquets à capturer (0 = illimité)
+            capture_options (dict, optional): Options transmises à capture_packets
+                (duration, max_file_size_mb, rotate_seconds, ring_files, bpf_filter, snaplen,
+                compression, sampling...)
+            generate_report (bool): Générer le rapport HTML en fin de capture
+            live (bool): Calculer les statistiques en direct pendant la capture
+            analysis_mode (str): Mode de l'analyse finale ("exact" ou "approximate")
+        """
+        super().__init__()
+        self.interface = interface
+        self.packet_count = packet_count
+        self.capture_options = {k: v for k, v in (capture_options or {}).items() if v is not None}
+        self.generate_report = generate_report
+        self.analysis_mode = analysis_mode
+        self.phase = "pending"
+        self.packets = 0
+        self.bytes = 0
+        self.capture_started_at = None
+        self.capture_finished_at = None
+        self.pcap_files = []
+        self.report_path = None
+        self.live = LiveTrafficStats() if live else None
+
+    def _on_packet(self, data, timestamp, length, linktype=LINKTYPE_ETHERNET):
+        self.packets += 1
+        self.bytes += length
+        if self.live is not None:
+            self.live.add(data, timestamp, length, linktype)
+
+    def run(self):
+        self.phase = "capturing"
+        self.capture_started_at = time.time()
+        try:
+            self.pcap_files = capture_packets(
+                self.interface,
+                self.packet_count,
+                stop_event=self.stop_event,
+                on_packet=self._on_packet,
+                **self.capture_options
+            )
+        finally:
+            self.capture_finished_at = time.time()
+
+        self.phase = "analyzing"
+        analysis = analyze_captures(self.pcap_files, mode=self.analysis_mode)
+
+        if self.generate_report:
+            self.phase = "reporting"
+            self.report_path = SnifferReportGenerator().generate_report(self.pcap_file, analysis)
+
+        self.phase = "done"
+        return analysis
+
+    @property
+    def pcap_file(self):
+        """Dernier fichier écrit (le seul sans rotation)"""
+        return self.pcap_files[-1] if self.pcap_files else None
+
+    def progress(self):
+        capture_elapsed = 0.0
+        if self.capture_started_at:
+            capture_elapsed = (self.capture_finished_at or time.time()) - self.capture_started_at
+        return {
+            "phase": self.phase,
+            "interface": self.interface,
+            "packet_count": self.packet_count,
+            "bpf_filter": self.capture_options.get("bpf_filter", ""),
+            "live": self.live is not None,
+            "analysis_mode": self.analysis_mode,
+            "packets": self.packets,
+            "bytes": self.bytes,
+            "capture_elapsed": round(capture_elapsed, 3),
+            "pps": round(self.packets / capture_elapsed, 2) if capture_elapsed else 0.0,
+            "bps": round(self.bytes * 8 / capture_elapsed, 2) if capture_elapsed else 0.0,
+            "file": self.pcap_file,
+            "files": self.pcap_files,
+            "report_path": self.report_path
+        }
+
+
+def start_capture_job(interface="eth0", packet_count=100, capture_options=None, generate_report=True,
+                      live=False, analysis_mode=MODE_EXACT):
+    """
+    Lance une capture en arrière-plan
+
+    Args:
+        interface (str): Interface réseau à utiliser
+        packet_count (int): Nombre de paquets à capturer (0 = illimité)
+        capture_options (dict, optional): Options transmises à capture_packets
+        generate_report (bool): Générer le rapport HTML en fin de capture
+        live (bool): Calculer les statistiques en direct pendant la capture
+        analysis_mode (str): Mode de l'analyse finale ("exact" ou "approximate")
+
+    Returns:
+        CaptureJob: Tâche démarrée
+    """
+    job = CaptureJob(interface, packet_count, capture_options, generate_report, live, analysis_mode)
+    logger.info(f"Capture {job.id} programmée sur {interface}")
+    return registry.submit(job)
+
+
+def refilter_capture_job(job, bpf_filter):
+    """
+    Arrête une capture et la relance avec un autre filtre BPF
+
+    La capture arrêtée conserve son fichier et son analyse ; la nouvelle
+    capture reprend les mêmes options.
+
+    Args:
+        job (CaptureJob): Capture à remplacer
+        bpf_filter (str): Nouveau filtre BPF (vide = aucun filtre)
+
+    Returns:
+        CaptureJob: Nouvelle tâche démarrée
+    """
+    job.stop()
+    capture_options = dict(job.capture_options, bpf_filter=bpf_filter or None)
+    logger.info(f"Capture {job.id} relancée avec le filtre '{bpf_filter or ''}'")
+    return start_capture_job(job.interface, job.packet_count, capture_options, job.generate_report,
+                             live=job.live is not None, analysis_mode=job.analysis_mode)
+
+
+def get_capture_job(job_id):
+    """Retourne une tâche de capture par son identifiant (ou None)"""
+    job = registry.get(job_id)
+    if job is None or job.kind != CaptureJob.kind:
+        return None
+    return job
+
+
+def list_capture_jobs():
+    """Liste les tâches de capture connues"""
+    return registry.list(CaptureJob.kind)
@@ -0,0 +1,240 @@
+# services/capture_sampling.py
+"""
+Échantillonnage et troncature des paquets pendant une capture.
+
+Sur un lien saturé, enregistrer chaque paquet en entier coûte plus d'E/S que
+le disque (et la boucle de capture) n'en supportent. CaptureSampler décide,
+paquet par paquet, de ce qui est écrit :
+
+- "packet" : un paquet sur N (échantillonnage systématique) ;
+- "flow" : les K premiers paquets de chaque flux (poignée de main, requête,
+  début de réponse), au plus MAX_SAMPLED_FLOWS flux suivis ;
+- headers_only : les paquets retenus sont tronqués à la fin de leurs en-têtes
+  TCP/UDP (transport compris), la taille d'origine restant enregistrée ; les
+  autres trames (ARP, ICMP, liens inconnus...) sont conservées entières.
+
+Les paramètres et les compteurs (paquets vus / écrits) sont enregistrés dans
+les métadonnées de chaque fichier ; estimate_totals() s'en sert pour
+extrapoler les compteurs d'une analyse au trafic réel.
+"""
+from itertools import islice
+from services.pcap_reader import dissect_packet
+from services.flow_table import flow_key
+
+SAMPLING_PACKET = "packet"
+SAMPLING_FLOW = "flow"
+SAMPLING_MODES = (SAMPLING_PACKET, SAMPLING_FLOW)
+# Snaplen demandé à tcpdump en mode en-têtes seuls (Ethernet + VLAN + IPv6 + TCP avec options)
+HEADER_SNAPLEN = 128
+# Flux suivis au plus en échantillonnage par flux (au-delà, les plus anciens sont oubliés)
+MAX_SAMPLED_FLOWS = 1000000
+
+
+class CaptureSampler:
+    """Sélection et troncature des paquets écrits pendant une capture"""
+
+    def __init__(self, mode=None, rate=None, per_flow=None, headers_only=False,
+                 max_flows=MAX_SAMPLED_FLOWS):
+        """
+        Args:
+            mode (str, optional): "packet", "flow" ou None (tous les paquets)
+            rate (int, optional): N du mode "packet" (un paquet écrit sur N)
+            per_flow (int, optional): K du mode "flow" (paquets écrits par flux)
+            headers_only (bool): Tronquer les paquets écrits à leurs en-têtes
+            max_flows (int): Flux suivis au plus en mode "flow"
+        """
+        if mode is not None and mode not in SAMPLING_MODES:
+            raise ValueError(f"Mode d'échantillonnage inconnu: {mode} (packet ou flow)")
+        if mode == SAMPLING_PACKET and (not rate or rate < 1):
+            raise ValueError("L'échantillonnage par paquet requiert un taux N >= 1")
+        if mode == SAMPLING_FLOW and (not per_flow or per_flow < 1):
+            raise ValueError("L'échantillonnage par flux requiert un nombre de paquets K >= 1")
+        self.mode = mode
+        self.rate = int(rate) if mode == SAMPLING_PACKET else None
+        self.per_flow = int(per_flow) if mode == SAMPLING_FLOW else None
+        self.headers_only = bool(headers_only)
+        self.max_flows = max_flows
+        self.flows = {}
+        self.forgotten_flows = 0
+        self._counter = 0
+        self._last_length = 0
+        self._reset_counters()
+
+    @property
+    def active(self):
+        """Vrai si des paquets sont écartés ou tronqués"""
+        return self.mode is not None or self.headers_only
+
+    def _reset_counters(self):
+        self.packets_seen = 0
+        self.packets_kept = 0
+        self.bytes_seen = 0
+        self.bytes_kept = 0
+
+    def sample(self, data, length, linktype):
+        """
+        Décide si un paquet est écrit
+
+        Args:
+            data (bytes): Octets capturés
+            length (int): Taille d'origine du paquet
+            linktype (int): Type de lien
+
+        Returns:
+            bytes: Octets à écrire (éventuellement tronqués), None si le paquet est écarté
+        """
+        self.packets_seen += 1
+        self.bytes_seen += length
+        info = None
+        if self.mode == SAMPLING_PACKET:
+            keep = self._counter % self.rate == 0
+            self._counter += 1
+            if not keep:
+                return None
+        elif self.mode == SAMPLING_FLOW:
+            info = dissect_packet(linktype, data)
+            # Les paquets hors IP (ARP...) sont peu nombreux : tous conservés
+            if info.src and not self._keep_flow(info):
+                return None
+        if self.headers_only:
+            info = info or dissect_packet(linktype, data)
+            # Sans en-tête TCP/UDP reconnu, payload_offset ne marque pas la fin des
+            # en-têtes (0 pour un lien inconnu, l'en-tête Ethernet pour ARP)
+            if info.transport_offset is not None:
+                data = data[:info.payload_offset]
+        self.packets_kept += 1
+        self.bytes_kept += length
+        self._last_length = length
+        return data
+
+    def _keep_flow(self, info):
+        key = flow_key(info.ip_proto, info.src, info.sport, info.dst, info.dport)[0]
+        count = self.flows.get(key, 0)
+        if count >= self.per_flow:
+            return False
+        if not count and len(self.flows) >= self.max_flows:
+            # Oublie les 10 % de flux les plus anciens (ils pourront être rééchantillonnés)
+            stale = list(islice(self.flows, max(1, self.max_flows // 10)))
+            for old in stale:
+                del self.flows[old]
+            self.forgotten_flows += len(stale)
+        self.flows[key] = count + 1
+        return True
+
+    def parameters(self):
+        """Paramètres d'échantillonnage (métadonnées de la capture)"""
+        return {
+            "mode": self.mode,
+            "rate": self.rate,
+            "per_flow": self.per_flow,
+            "headers_only": self.headers_only
+        }
+
+    def file_counters(self, carry_over=False):
+        """
+        Compteurs depuis le dernier appel (fichier qui vient d'être fermé)
+
+        Args:
+            carry_over (bool): Le dernier paquet retenu est écrit dans le fichier
+                suivant (rotation) : il est reporté sur les compteurs suivants
+
+        Returns:
+            dict: Paquets et octets vus / écrits
+        """
+        carried = 1 if carry_over and self.packets_kept else 0
+        length = self._last_length if carried else 0
+        counters = {
+            "packets_seen": self.packets_seen - carried,
+            "packets_kept": self.packets_kept - carried,
+            "bytes_seen": self.bytes_seen - length,
+            "bytes_kept": self.bytes_kept - length
+        }
+        self._reset_counters()
+        self.packets_seen = self.packets_kept = carried
+        self.bytes_seen = self.bytes_kept = length
+        return counters
+
+
+def sampling_scale(sampling):
+    """
+    Facteur d'extrapolation des compteurs de paquets d'une capture échantillonnée
+
+    Args:
+        sampling (dict): Section "sampling" des métadonnées de la capture
+
+    Returns:
+        float: Paquets vus par paquet écrit (1.0 sans échantillonnage)
+    """
+    if not sampling or not sampling.get("mode"):
+        return 1.0
+    seen, kept = sampling.get("packets_seen"), sampling.get("packets_kept")
+    if seen and kept:
+        return seen / kept
+    # Fichier encore en cours d'écriture : taux nominal
+    return float(sampling.get("rate") or 1)
+
+
+def merge_sampling(sections):
+    """
+    Cumule les compteurs d'échantillonnage des fichiers d'une même capture (rotation)
+
+    Args:
+        sections (list): Sections "sampling" des métadonnées de chaque fichier
+
+    Returns:
+        dict: Paramètres du premier fichier et compteurs cumulés, None sans échantillonnage
+    """
+    sections = [section for section in sections if section and section.get("mode")]
+    if not sections:
+        return None
+    merged = dict(sections[0])
+    for key in ("packets_seen", "packets_kept", "bytes_seen", "bytes_kept"):
+        merged[key] = sum(section.get(key) or 0 for section in sections)
+    return merged
+
+
+def _scale_counts(counts, scale):
+    return {key: int(round(value * scale)) for key, value in counts.items()}
+
+
+def estimate_totals(analysis, sampling):
+    """
+    Extrapole les compteurs d'une analyse au trafic réel d'une capture échantillonnée
+
+    L'échantillonnage par paquet donne une estimation sans biais des volumes
+    et des répartitions ; l'échantillonnage par flux conserve le nombre de
+    flux mais sous-représente les flux longs (le facteur est une moyenne).
+
+    Args:
+        analysis (dict): Résultat de analyze_pcap
+        sampling (dict): Section "sampling" des métadonnées de la capture
+
+    Returns:
+        dict: Facteur appliqué et compteurs estimés, None sans échantillonnage
+    """
+    if not sampling or not sampling.get("mode"):
+        return None
+    scale = sampling_scale(sampling)
+    estimated = {
+        "scale": round(scale, 4),
+        "method": sampling["mode"],
+        "packet_count": int(round(analysis.get("packet_count", 0) * scale)),
+        "top_protocols": [
+            [protocol, int(round(count * scale))] for protocol, count in analysis.get("top_protocols", [])
+        ],
+        "ip_counts": {
+            side: _scale_counts(counts, scale) for side, counts in analysis.get("ip_counts", {}).items()
+        },
+        "port_counts": {
+            side: _scale_counts(counts, scale) for side, counts in analysis.get("port_counts", {}).items()
+        }
+    }
+    if sampling.get("bytes_seen"):
+        estimated["bytes"] = sampling["bytes_seen"]
+    series = analysis.get("time_series")
+    if series and series.get("points"):
+        estimated["time_series"] = {
+            key: [round(value * scale, 3) for value in series[key]]
+            for key in ("pps", "bps")
+        }
+    return estimated
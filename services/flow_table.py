@@ -0,0 +1,197 @@
+# services/flow_table.py
+"""
+Agrégation exacte des flux bidirectionnels (5-tuple) d'une capture.
+
+Chaque flux est identifié par (protocole IP, extrémité A, extrémité B), les
+deux extrémités étant triées pour que les deux sens d'une même connexion
+tombent dans la même entrée. Les compteurs sont stockés dans une liste de
+taille fixe par flux (pas d'objet ni de dict par flux).
+"""
+
+# Index des compteurs dans la liste associée à chaque flux
+PACKETS, BYTES, FIRST_SEEN, LAST_SEEN, TCP_FLAGS, PACKETS_AB, BYTES_AB, INITIATOR_IS_A = range(8)
+
+TCP_FLAG_NAMES = ((0x02, "SYN"), (0x10, "ACK"), (0x08, "PSH"), (0x01, "FIN"),
+                  (0x04, "RST"), (0x20, "URG"), (0x40, "ECE"), (0x80, "CWR"))
+
+# Nombre maximal de flux suivis avant éviction des plus anciens
+DEFAULT_MAX_FLOWS = 1000000
+
+
+def tcp_flags_to_str(flags):
+    """Convertit un champ de flags TCP en liste lisible (ex: 'SYN,ACK')"""
+    return ",".join(name for bit, name in TCP_FLAG_NAMES if flags & bit)
+
+
+def flow_key(ip_proto, src, sport, dst, dport):
+    """
+    Clé canonique d'un flux bidirectionnel
+
+    Returns:
+        tuple: (clé, vrai si le paquet va de A vers B)
+    """
+    if (src, sport) <= (dst, dport):
+        return (ip_proto, src, sport, dst, dport), True
+    return (ip_proto, dst, dport, src, sport), False
+
+
+class FlowTable:
+    """Table de hachage des flux 5-tuple d'une capture"""
+
+    def __init__(self, max_flows=DEFAULT_MAX_FLOWS):
+        """
+        Args:
+            max_flows (int): Nombre maximal de flux suivis simultanément ; au-delà,
+                les 10 % de flux inactifs depuis le plus longtemps sont évincés
+                (leurs compteurs restent inclus dans les totaux)
+        """
+        self.max_flows = max_flows
+        self.flows = {}
+        self.total_flows = 0
+        self.evicted_flows = 0
+
+    def add(self, info, timestamp, length):
+        """
+        Ajoute un paquet à son flux
+
+        Args:
+            info (PacketInfo): En-têtes disséqués du paquet
+            timestamp (float): Horodatage du paquet
+            length (int): Taille du paquet
+
+        Returns:
+            bool: Vrai si le paquet ouvre un nouveau flux
+        """
+        if not info.src:
+            return False
+
+        key, forward = flow_key(info.ip_proto, info.src, info.sport, info.dst, info.dport)
+        entry = self.flows.get(key)
+        new_flow = entry is None
+        if new_flow:
+            if len(self.flows) >= self.max_flows:
+                self._evict()
+            # L'initiateur du flux est l'émetteur du premier paquet vu
+            entry = [0, 0, timestamp, timestamp, 0, 0, 0, forward]
+            self.flows[key] = entry
+            self.total_flows += 1
+
+        entry[PACKETS] += 1
+        entry[BYTES] += length
+        if timestamp < entry[FIRST_SEEN]:
+            entry[FIRST_SEEN] = timestamp
+        if timestamp > entry[LAST_SEEN]:
+            entry[LAST_SEEN] = timestamp
+        entry[TCP_FLAGS] |= info.tcp_flags
+        if forward:
+            entry[PACKETS_AB] += 1
+            entry[BYTES_AB] += length
+        return new_flow
+
+    def merge_entry(self, key, other):
+        """
+        Fusionne les compteurs d'un flux provenant d'une autre table
+
+        Args:
+            key (tuple): Clé canonique du flux
+            other (list): Compteurs du flux (même format que les entrées de la table)
+
+        Returns:
+            float: Début de la partie la plus récente si le flux était déjà connu
+            (elle a aussi été comptée comme un nouveau flux), None sinon
+        """
+        entry = self.flows.get(key)
+        if entry is None:
+            if len(self.flows) >= self.max_flows:
+                self._evict()
+            self.flows[key] = list(other)
+            self.total_flows += 1
+            return None
+
+        later_seen = max(entry[FIRST_SEEN], other[FIRST_SEEN])
+        # Le flux était déjà connu : l'initiateur est celui du flux le plus ancien
+        if other[FIRST_SEEN] < entry[FIRST_SEEN]:
+            entry[FIRST_SEEN] = other[FIRST_SEEN]
+            entry[INITIATOR_IS_A] = other[INITIATOR_IS_A]
+        entry[LAST_SEEN] = max(entry[LAST_SEEN], other[LAST_SEEN])
+        entry[PACKETS] += other[PACKETS]
+        entry[BYTES] += other[BYTES]
+        entry[TCP_FLAGS] |= other[TCP_FLAGS]
+        entry[PACKETS_AB] += other[PACKETS_AB]
+        entry[BYTES_AB] += other[BYTES_AB]
+        return later_seen
+
+    def export(self, n=None, by=BYTES):
+        """
+        Flux bruts (clé + compteurs) sérialisables, pour fusion ultérieure
+
+        Args:
+            n (int, optional): Ne garder que les n flux les plus importants
+            by (int): Compteur de tri (BYTES ou PACKETS)
+
+        Returns:
+            list: [[ip_proto, a, port_a, b, port_b], compteurs] par flux
+        """
+        items = self.flows.items()
+        if n is not None and len(self.flows) > n:
+            items = sorted(items, key=lambda item: item[1][by], reverse=True)[:n]
+        return [[list(key), list(entry)] for key, entry in items]
+
+    def _evict(self):
+        count = max(1, len(self.flows) // 10)
+        oldest = sorted(self.flows.items(), key=lambda item: item[1][LAST_SEEN])[:count]
+        for key, _ in oldest:
+            del self.flows[key]
+        self.evicted_flows += count
+
+    def top_flows(self, n=20, by=BYTES):
+        """
+        Flux les plus importants
+
+        Args:
+            n (int): Nombre de flux à retourner
+            by (int): Compteur de tri (BYTES ou PACKETS)
+
+        Returns:
+            list: Flux sous forme de dictionnaires sérialisables
+        """
+        top = sorted(self.flows.items(), key=lambda item: item[1][by], reverse=True)[:n]
+        return [self.flow_to_dict(key, entry) for key, entry in top]
+
+    def top_conversations(self, n=10):
+        """
+        Conversations IP (A <-> B) agrégées sur tous les flux
+
+        Returns:
+            dict: {"A <-> B": paquets} trié par ordre décroissant
+        """
+        conversations = {}
+        for (_, a, _, b, _), entry in self.flows.items():
+            pair = f"{a} <-> {b}" if a <= b else f"{b} <-> {a}"
+            conversations[pair] = conversations.get(pair, 0) + entry[PACKETS]
+        return dict(sorted(conversations.items(), key=lambda x: x[1], reverse=True)[:n])
+
+    @staticmethod
+    def flow_to_dict(key, entry):
+        """Flux orienté depuis son initiateur (src) vers son répondeur (dst)"""
+        ip_proto, a, port_a, b, port_b = key
+        packets_forward, bytes_forward = entry[PACKETS_AB], entry[BYTES_AB]
+        if not entry[INITIATOR_IS_A]:
+            a, port_a, b, port_b = b, port_b, a, port_a
+            packets_forward = entry[PACKETS] - packets_forward
+            bytes_forward = entry[BYTES] - bytes_forward
+        return {
+            "proto": {6: "TCP", 17: "UDP", 1: "ICMP", 58: "ICMPv6"}.get(ip_proto, str(ip_proto)),
+            "src": a,
+            "sport": port_a,
+            "dst": b,
+            "dport": port_b,
+            "packets": entry[PACKETS],
+            "bytes": entry[BYTES],
+            "packets_src_to_dst": packets_forward,
+            "bytes_src_to_dst": bytes_forward,
+            "first_seen": entry[FIRST_SEEN],
+            "last_seen": entry[LAST_SEEN],
+            "duration": round(entry[LAST_SEEN] - entry[FIRST_SEEN], 6),
+            "tcp_flags": tcp_flags_to_str(entry[TCP_FLAGS]) if ip_proto == 6 else ""
+        }
@@ -0,0 +1,343 @@
+# services/hydra_batch.py
+"""
+Attaques Hydra par lot : plusieurs cibles et plusieurs services en une tâche.
+
+Les cibles sont des triplets hôte:port:service, saisis directement ou tirés
+d'un résultat de scan (scan_ports, rapport de vuln_reports, hôtes d'une
+découverte réseau croisés avec une liste de services). Les noms de services
+Nmap sont convertis en services Hydra ; les ports fermés et les services non
+pris en charge sont écartés (et signalés).
+
+Plutôt qu'un processus Hydra par cible, les cibles d'un même service sont
+regroupées dans un fichier -M (une ligne hôte:port par cible) : un processus
+attaque jusqu'à hosts_per_process cibles, avec -t connexions par cible et -T
+au total. Les groupes sont exécutés par l'ordonnanceur des attaques réparties
+(au plus max_processes processus simultanés) et leurs identifiants fusionnés
+au fil de l'eau, cible par cible.
+"""
+import json
+import os
+from utils.logger import get_logger
+from services.hydra_bruteforce import ShardedHydraScheduler, HydraShard, get_services, MAX_HYDRA_PROCESSES
+from services.wordlist_catalog import count_lines
+from services.candidate_ordering import prepare_candidates, ORDERING_ORIGINAL
+
+# Configuration du logger
+logger = get_logger('hydra_batch')
+
+# Rapports de scan enregistrés (voir nmap_vulnscan)
+SCAN_REPORTS_DIR = "vuln_reports"
+# Cibles au plus dans un fichier -M (au-delà, le groupe est découpé en plusieurs processus)
+MAX_HOSTS_PER_PROCESS = 64
+# Cibles au plus dans un lot
+MAX_BATCH_ENTRIES = 4096
+
+# Noms de services Nmap -> services Hydra
+NMAP_SERVICES = {
+    "ssh": "ssh",
+    "ftp": "ftp",
+    "telnet": "telnet",
+    "smtp": "smtp",
+    "submission": "smtp",
+    "pop3": "pop3",
+    "imap": "imap",
+    "mysql": "mysql",
+    "postgresql": "postgres",
+    "ms-sql-s": "mssql",
+    "microsoft-ds": "smb",
+    "netbios-ssn": "smb",
+    "ms-wbt-server": "rdp",
+    "vnc": "vnc",
+    "http": "http-get",
+    "http-alt": "http-get",
+    "http-proxy": "http-get",
+    "https": "https-get",
+    "https-alt": "https-get",
+    "ssl/http": "https-get"
+}
+
+
+def _default_ports():
+    return {service["name"]: service["port"] for service in get_services()}
+
+
+def _entry(host, port, service, ports=None):
+    """Triplet validé (host, port, service)"""
+    ports = ports if ports is not None else _default_ports()
+    host = str(host or "").strip().strip("[]")
+    service = str(service or "").strip().lower()
+    if not host:
+        raise ValueError("Cible sans hôte")
+    if service not in ports:
+        raise ValueError(f"Service non pris en charge: {service}")
+    if port in (None, ""):
+        port = ports[service]
+    try:
+        port = int(port)
+    except (TypeError, ValueError):
+        raise ValueError(f"Port invalide pour {host}: {port}")
+    if not 1 <= port <= 65535:
+        raise ValueError(f"Port invalide pour {host}: {port}")
+    return {"host": host, "port": port, "service": service}
+
+
+def parse_target_triples(items):
+    """
+    Cibles saisies directement
+
+    Args:
+        items (list): Chaînes "hôte:port:service" (port vide = port par défaut
+            du service, hôte IPv6 entre crochets) ou dictionnaires host/ip,
+            port, service
+
+    Returns:
+        list: Triplets {"host", "port", "service"}
+
+    Raises:
+        ValueError: Cible mal formée ou service inconnu
+    """
+    ports = _default_ports()
+    entries = []
+    for item in items:
+        if isinstance(item, dict):
+            entries.append(_entry(item.get("host") or item.get("ip"), item.get("port"), item.get("service"), ports))
+            continue
+        parts = str(item).strip().rsplit(":", 2)
+        if len(parts) != 3:
+            raise ValueError(f"Cible mal formée (hôte:port:service attendu): {item}")
+        entries.append(_entry(*parts, ports=ports))
+    return entries
+
+
+def entries_from_hosts(hosts, services):
+    """
+    Hôtes d'une découverte réseau croisés avec des services (ports par défaut)
+
+    Args:
+        hosts (list): Adresses ou dictionnaires de discover_network (clé ip)
+        services (list): Services Hydra
+
+    Returns:
+        list: Triplets {"host", "port", "service"}
+    """
+    ports = _default_ports()
+    if not services:
+        raise ValueError("Services requis pour attaquer une liste d'hôtes")
+    entries = []
+    for host in hosts:
+        if isinstance(host, dict):
+            if host.get("state", "up") != "up":
+                continue
+            host = host.get("ip") or host.get("host")
+        for service in services:
+            entries.append(_entry(host, None, service, ports))
+    return entries
+
+
+def _scan_ports(scan):
+    """(hôte, port, état, service Nmap) de chaque port d'un résultat de scan"""
+    if isinstance(scan, list):
+        for row in scan:
+            if isinstance(row, dict) and row.get("port") is not None:
+                yield row.get("ip") or row.get("host"), row["port"], row.get("state", "open"), row.get("service")
+        return
+    if not isinstance(scan, dict):
+        raise ValueError("Résultat de scan non reconnu")
+    if isinstance(scan.get("results"), list):
+        yield from _scan_ports(scan["results"])
+    # Rapport de nmap_vulnscan : une entrée par script, sur les ports de la cible
+    for row in scan.get("vulnerabilities") or []:
+        if row.get("port") is not None:
+            yield scan.get("target"), row["port"], row.get("state", "open"), row.get("service")
+
+
+def entries_from_scan(scan, services=None):
+    """
+    Cibles d'un résultat de scan : ports ouverts dont le service est pris en charge
+
+    Args:
+        scan (list|dict): Résultat de scan_ports, rapport de vuln_reports ou
+            dictionnaire avec une clé "results"
+        services (list, optional): Services Hydra retenus (tous par défaut)
+
+    Returns:
+        tuple: (triplets retenus, ports écartés avec la raison)
+    """
+    ports = _default_ports()
+    entries = []
+    skipped = []
+    for host, port, state, nmap_service in _scan_ports(scan):
+        row = {"host": host, "port": port, "service": nmap_service}
+        service = NMAP_SERVICES.get(str(nmap_service or "").lower())
+        if state != "open":
+            skipped.append(dict(row, reason=f"port {state}"))
+        elif service is None:
+            skipped.append(dict(row, reason="service non pris en charge"))
+        elif services and service not in services:
+            skipped.append(dict(row, reason="service non demandé"))
+        else:
+            try:
+                entries.append(_entry(host, port, service, ports))
+            except ValueError as e:
+                skipped.append(dict(row, reason=str(e)))
+    return entries, skipped
+
+
+def load_scan_report(name):
+    """
+    Charge un rapport de scan enregistré
+
+    Args:
+        name (str): Nom du fichier dans SCAN_REPORTS_DIR
+
+    Returns:
+        dict|list: Contenu du rapport
+
+    Raises:
+        ValueError: Rapport introuvable ou illisible
+    """
+    path = os.path.join(SCAN_REPORTS_DIR, os.path.basename(name or ""))
+    if not name or not os.path.isfile(path):
+        raise ValueError(f"Rapport de scan introuvable: {name}")
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Rapport de scan illisible {name}: {e}")
+
+
+def collect_batch_entries(targets=None, scan=None, scan_file=None, hosts=None, services=None):
+    """
+    Rassemble les cibles d'un lot, toutes sources confondues, sans doublon
+
+    Args:
+        targets (list, optional): Triplets saisis (voir parse_target_triples)
+        scan (list|dict, optional): Résultat de scan (voir entries_from_scan)
+        scan_file (str, optional): Rapport de scan enregistré
+        hosts (list, optional): Hôtes croisés avec services
+        services (list, optional): Services Hydra (filtre des scans, services des hôtes)
+
+    Returns:
+        tuple: (triplets, ports écartés)
+    """
+    entries = parse_target_triples(targets or [])
+    skipped = []
+    for source in ([scan] if scan is not None else []) + ([load_scan_report(scan_file)] if scan_file else []):
+        found, ignored = entries_from_scan(source, services)
+        entries.extend(found)
+        skipped.extend(ignored)
+    if hosts:
+        entries.extend(entries_from_hosts(hosts, services))
+    unique = list({(entry["host"], entry["port"], entry["service"]): entry for entry in entries}.values())
+    if not unique:
+        raise ValueError("Aucune cible attaquable")
+    if len(unique) > MAX_BATCH_ENTRIES:
+        raise ValueError(f"Trop de cibles ({len(unique)}, {MAX_BATCH_ENTRIES} au plus)")
+    return unique, skipped
+
+
+def _target_line(entry):
+    host = f"[{entry['host']}]" if ":" in entry["host"] else entry["host"]
+    return f"{host}:{entry['port']}\n"
+
+
+class BatchHydraScheduler(ShardedHydraScheduler):
+    """
+    Attaque par lot : un processus Hydra (-M) par service et par paquet de cibles
+
+    Avec stop_on_success, Hydra (-f avec -M) arrête chaque cible à son
+    premier identifiant et poursuit les autres cibles du fichier.
+    """
+
+    def __init__(self, entries, userlist, passlist, options=None, max_processes=MAX_HYDRA_PROCESSES,
+                 hosts_per_process=MAX_HOSTS_PER_PROCESS, stop_on_success=False):
+        """
+        Args:
+            entries (list): Triplets {"host", "port", "service"} (voir collect_batch_entries)
+            userlist (str): Chemin vers la liste d'utilisateurs
+            passlist (str): Chemin vers la liste de mots de passe
+            options (dict, optional): Options Hydra communes (tasks, tasks_total, ordering...)
+            max_processes (int): Processus Hydra simultanés au total
+            hosts_per_process (int): Cibles au plus par processus
+            stop_on_success (bool): Arrêter chaque cible à son premier identifiant
+        """
+        if not entries:
+            raise ValueError("Aucune cible")
+        if int(hosts_per_process) < 1:
+            raise ValueError("Le nombre de cibles par processus doit être supérieur ou égal à 1")
+        super().__init__([entry["host"] for entry in entries], None, userlist, passlist, options,
+                         max_processes=max_processes, per_target=max_processes, stop_on_success=stop_on_success)
+        self.entries = list(entries)
+        self.services = list(dict.fromkeys(entry["service"] for entry in self.entries))
+        self.service = ", ".join(self.services)
+        self.hosts_per_process = int(hosts_per_process)
+
+    def _plan(self):
+        """Un groupe par service, découpé en paquets de hosts_per_process cibles (appelé sans verrou)"""
+        shards = []
+        for service in self.services:
+            group = [entry for entry in self.entries if entry["service"] == service]
+            options = dict(self.options)
+            prepared = prepare_candidates(self.userlist, self.passlist, service,
+                                          options.get("ordering", ORDERING_ORIGINAL),
+                                          os.path.join(self.work_dir, "ordered", service))
+            options["loop_users"] = options.get("loop_users") or prepared["loop_users"]
+            if prepared["combo_file"]:
+                options["combo_file"] = prepared["combo_file"]
+                tries = prepared["pairs"]
+            else:
+                tries = count_lines(prepared["userlist"]) * count_lines(prepared["passlist"])
+            userlist, passlist = os.path.abspath(prepared["userlist"]), os.path.abspath(prepared["passlist"])
+            chunks = [group[start:start + self.hosts_per_process]
+                      for start in range(0, len(group), self.hosts_per_process)]
+            for number, chunk in enumerate(chunks, 1):
+                index = len(shards)
+                directory = os.path.join(self.work_dir, f"shard{index:03d}")
+                os.makedirs(directory, exist_ok=True)
+                targets_file = os.path.abspath(os.path.join(directory, "targets.txt"))
+                with open(targets_file, "w") as f:
+                    f.writelines(_target_line(entry) for entry in chunk)
+                label = service if len(chunks) == 1 else f"{service} {number}/{len(chunks)}"
+                shards.append(HydraShard(index, label, service, userlist, passlist,
+                                         dict(options, targets_file=targets_file),
+                                         tries * len(chunk), directory, entries=chunk))
+        logger.info(f"Attaque par lot répartie en {len(shards)} processus ({len(self.entries)} cibles, "
+                    f"{len(self.services)} services), {self.max_processes} processus max")
+        return shards
+
+    def _on_credential(self, shard, credential):
+        """Fusionne un identifiant (Hydra poursuit lui-même les autres cibles du fichier)"""
+        if not any(found["line"] == credential["line"] for found in self.credentials):
+            self.credentials.append(dict(credential, shard=shard.index))
+        solved = f"{credential['host'].strip('[]')}:{credential['port']}"
+        if solved not in self.solved_targets:
+            self.solved_targets.append(solved)
+
+    def targets_state(self):
+        """
+        Résultat consolidé par cible
+
+        Returns:
+            list: host, port, service, status (celui de son processus) et
+            identifiants trouvés pour chaque triplet
+        """
+        with self._cond:
+            rows = []
+            for shard in self.shards:
+                for entry in shard.entries:
+                    found = [{"login": credential["login"], "password": credential["password"]}
+                             for credential in self.credentials
+                             if credential["shard"] == shard.index and credential["port"] == entry["port"]
+                             and credential["host"].strip("[]") == entry["host"]]
+                    rows.append(dict(entry, status=shard.status, shard=shard.index, credentials=found))
+            return rows
+
+    def progress(self):
+        """Progression cumulée et état de chaque cible"""
+        with self._cond:
+            return dict(super().progress(), targets=self.targets_state())
+
+    def result(self):
+        """Résultat fusionné (voir ShardedHydraScheduler.result) et état de chaque cible"""
+        with self._cond:
+            return dict(super().result(), targets=self.targets_state())
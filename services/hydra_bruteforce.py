@@ -1,77 +1,60 @@
 import subprocess
 import os
+import re
+import json
+import shutil
+import signal
+import threading
+import time
+import uuid
 from datetime import datetime
 from utils.logger import get_logger
+from services.wordlist_catalog import (WORDLISTS_DIR, CATEGORY_USER, CATEGORY_PASSWORD, get_wordlist_catalog,
+                                       count_lines)
+from services.candidate_ordering import prepare_candidates, ORDERING_ORIGINAL
+from services.native_bruteforce import run_native_attack, ENGINE_NATIVE
 
 # Configuration du logger
 logger = get_logger('hydra_bruteforce')
 
-# Répertoire pour stocker les fichiers temporaires de wordlists
-WORDLISTS_DIR = "wordlists"
+# Durée maximale d'une attaque synchrone (run_hydra) en secondes
+HYDRA_TIMEOUT = 600
+# Points de reprise : un répertoire de travail par attaque (hydra.restore + état)
+HYDRA_STATE_DIR = os.path.join("cache", "hydra")
+RESTORE_FILE = "hydra.restore"
+STATE_FILE = "state.json"
+# Délai laissé à Hydra pour écrire son fichier de reprise après SIGINT (secondes)
+INTERRUPT_GRACE = 10
+# Intervalle minimal entre deux enregistrements de la progression (secondes)
+CHECKPOINT_INTERVAL = 60
+_ATTACK_ID_RE = re.compile(r"^[0-9a-f]{12}$")
+# Ordonnanceur par shards : processus Hydra simultanés, au total et par cible
+MAX_HYDRA_PROCESSES = 4
+MAX_PROCESSES_PER_TARGET = 2
+MAX_PASSWORD_SHARDS = 64
+SHARDS_DIR = os.path.join(HYDRA_STATE_DIR, "shards")
 
 def get_available_wordlists():
     """
     Récupère les wordlists disponibles dans le système
     
+    Les listes proviennent du catalogue persistant (voir wordlist_catalog) :
+    seuls les répertoires modifiés depuis la dernière requête sont relus.
+    
     Returns:
         dict: Dictionnaires contenant les listes d'utilisateurs et de mots de passe
     """
     logger.info("Récupération des wordlists disponibles")
     
-    # Créer le dossier s'il n'existe pas
-    if not os.path.exists(WORDLISTS_DIR):
-        os.makedirs(WORDLISTS_DIR)
-        logger.debug(f"Création du dossier {WORDLISTS_DIR}")
-    
-    # Chemins par défaut pour Kali Linux
-    common_paths = [
-        "/usr/share/wordlists",
-        "/usr/share/seclists",
-        WORDLISTS_DIR
-    ]
-    
-    user_lists = []
-    pass_lists = []
-    
-    # Parcourir les chemins communs
-    for path in common_paths:
-        if os.path.exists(path):
-            logger.debug(f"Exploration du chemin: {path}")
-            for root, _, files in os.walk(path):
-                for file in files:
-                    full_path = os.path.join(root, file)
-                    # Filtrer les fichiers selon certains critères
-                    if os.path.getsize(full_path) < 20 * 1024 * 1024:  # Limiter à 20MB
-                        # MODIFICATION: Si le fichier est dans notre WORDLISTS_DIR local, l'ajouter aux deux listes
-                        if root == WORDLISTS_DIR:
-                            # Ajouter le fichier aux listes d'utilisateurs
-                            user_lists.append({"name": file, "path": full_path})
-                            # Et aussi aux listes de mots de passe
-                            pass_lists.append({"name": file, "path": full_path})
-                            logger.debug(f"Ajout de {file} aux listes utilisateurs et mots de passe")
-                        else:
-                            # Pour les autres chemins, garder le comportement original
-                            if "user" in file.lower() or "login" in file.lower():
-                                user_lists.append({"name": file, "path": full_path})
-                                logger.debug(f"Ajout de {file} à la liste des utilisateurs")
-                            elif "pass" in file.lower() or "pwd" in file.lower() or "dict" in file.lower():
-                                pass_lists.append({"name": file, "path": full_path})
-                                logger.debug(f"Ajout de {file} à la liste des mots de passe")
-    
-    # Ajouter les wordlists communes si elles existent
-    if os.path.exists("/usr/share/wordlists/rockyou.txt"):
-        pass_lists.append({"name": "rockyou.txt", "path": "/usr/share/wordlists/rockyou.txt"})
-        logger.debug("Ajout de rockyou.txt")
-    
-    if os.path.exists("/etc/passwd"):
-        user_lists.append({"name": "system-users", "path": "/etc/passwd"})
-        logger.debug("Ajout des utilisateurs système")
+    catalog = get_wordlist_catalog()
+    user_lists = catalog.query(CATEGORY_USER)["wordlists"]
+    pass_lists = catalog.query(CATEGORY_PASSWORD)["wordlists"]
     
     logger.info(f"Trouvé {len(user_lists)} listes d'utilisateurs et {len(pass_lists)} listes de mots de passe")
     
     return {
-        "user_lists": sorted(user_lists, key=lambda x: x["name"]),
-        "pass_lists": sorted(pass_lists, key=lambda x: x["name"])
+        "user_lists": user_lists,
+        "pass_lists": pass_lists
     }
 
 def create_custom_wordlist(content, list_type="userlist"):
@@ -101,6 +84,7 @@ def create_custom_wordlist(content, list_type="userlist"):
         with open(filename, "w") as f:
             f.write(content)
         
+        get_wordlist_catalog().invalidate()
         logger.info(f"Wordlist personnalisée créée: {filename}")
         return filename
     except Exception as e:
@@ -138,50 +122,68 @@ def get_services():
     
     return common_services
 
-def run_hydra(target_ip, service, userlist, passlist, options=None):
+def build_hydra_command(target_ip, service, userlist, passlist, options=None):
     """
-    Lance une attaque brute-force avec Hydra
+    Construit la ligne de commande Hydra
     
     Args:
         target_ip (str): Adresse IP ou nom d'hôte de la cible
         service (str): Service à attaquer (ssh, ftp, etc.)
         userlist (str): Chemin vers la liste d'utilisateurs
         passlist (str): Chemin vers la liste de mots de passe
-        options (dict, optional): Options supplémentaires pour Hydra
+        options (dict, optional): Options supplémentaires (tasks, verbose,
+            show_attempts, exit_on_first, form_path, form_data, form_success) ;
+            combo_file (couples login:mot de passe, remplace -L/-P) et
+            loop_users (-u) sont renseignés par prepare_candidates ;
+            targets_file (-M, une cible hôte ou hôte:port par ligne, remplace
+            target_ip) et tasks_total (-T) servent aux attaques par lot
         
     Returns:
-        dict: Résultats de l'attaque
+        list: Arguments de la commande
     """
-    logger.info(f"Lancement de l'attaque Hydra sur {target_ip} - Service: {service}")
-    
-    # Vérifier que les fichiers existent
-    if not os.path.exists(userlist):
-        logger.error(f"Liste d'utilisateurs introuvable: {userlist}")
-        return {"error": f"Liste d'utilisateurs introuvable: {userlist}"}
-    
-    if not os.path.exists(passlist):
-        logger.error(f"Liste de mots de passe introuvable: {passlist}")
-        return {"error": f"Liste de mots de passe introuvable: {passlist}"}
-    
-    # Options par défaut
     if options is None:
         options = {}
     
-    # Construction de la commande
     command = ["hydra"]
     
     # Ajouter les options
     if options.get("tasks"):
         command.extend(["-t", str(options["tasks"])])
     
+    # Connexions simultanées toutes cibles confondues (avec -M)
+    if options.get("tasks_total"):
+        command.extend(["-T", str(options["tasks_total"])])
+    
     if options.get("verbose"):
         command.append("-v")
     
+    # Une ligne [ATTEMPT] par essai : progression exacte, sortie plus volumineuse
+    if options.get("show_attempts"):
+        command.append("-V")
+    
+    # Arrêt dès le premier identifiant trouvé sur la cible
+    if options.get("exit_on_first"):
+        command.append("-f")
+    
+    # Chaque mot de passe essayé sur tous les utilisateurs avant le suivant
+    if options.get("loop_users"):
+        command.append("-u")
+    
     # Paramètres principaux
-    command.extend([
-        "-L", userlist,
-        "-P", passlist
-    ])
+    if options.get("combo_file"):
+        command.extend(["-C", options["combo_file"]])
+    else:
+        command.extend([
+            "-L", userlist,
+            "-P", passlist
+        ])
+    
+    # Fichier de cibles : Hydra attaque chaque ligne, avec son port éventuel
+    if options.get("targets_file"):
+        command.extend(["-M", options["targets_file"]])
+        target_args = []
+    else:
+        target_args = [f"{target_ip}"]
     
     # Paramètres spécifiques aux formulaires HTTP
     if service.startswith("http") and "form" in service:
@@ -191,27 +193,401 @@ def run_hydra(target_ip, service, userlist, passlist, options=None):
         
         # Format pour http-post-form: "path:form_data:failure_message"
         http_form_param = f"{form_path}:{form_data}:{form_success}"
-        command.extend([target_ip, service, http_form_param])
+        command.extend(target_args + [service, http_form_param])
     else:
         # Pour les autres services
-        command.append(f"{target_ip}")
+        command.extend(target_args)
         command.append(service)
     
+    return command
+
+def check_wordlists(userlist, passlist):
+    """
+    Vérifie que les wordlists d'une attaque existent
+    
+    Returns:
+        str: Message d'erreur, None si les deux listes existent
+    """
+    if not os.path.exists(userlist):
+        logger.error(f"Liste d'utilisateurs introuvable: {userlist}")
+        return f"Liste d'utilisateurs introuvable: {userlist}"
+    
+    if not os.path.exists(passlist):
+        logger.error(f"Liste de mots de passe introuvable: {passlist}")
+        return f"Liste de mots de passe introuvable: {passlist}"
+    return None
+
+# Lignes de sortie de Hydra exploitées pour la progression
+_CREDENTIAL_RE = re.compile(r"^\[(\d+)\]\[([\w-]+)\]\s+host:\s*(\S+)\s+login:\s*(\S*)\s+password:\s?(.*)$")
+_DATA_RE = re.compile(r"^\[DATA\].*?per (\d+) servers?,.*?(\d+) login tries")
+_STATUS_RE = re.compile(r"^\[STATUS\]\s+([\d.]+) tries/min, (\d+) tries in [\d:]+h, (\d+) to do")
+_ATTEMPT_RE = re.compile(r"^\[(?:RE-)?ATTEMPT\].* - (\d+) of (\d+) ")
+
+class HydraOutputParser:
+    """
+    Analyse incrémentale de la sortie de Hydra
+    
+    Chaque ligne met à jour la progression : taille de l'espace de
+    combinaisons ([DATA]), essais effectués ([STATUS] chaque minute, ou
+    [ATTEMPT] à chaque essai avec -V), identifiants trouvés et erreurs.
+    """
+    
+    # Erreurs conservées (les plus récentes)
+    MAX_ERRORS = 20
+    
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.hydra_rate = 0.0
+        self.credentials = []
+        self.errors = []
+        self.summary = None
+    
+    def feed(self, line):
+        """
+        Intègre une ligne de sortie
+        
+        Args:
+            line (str): Ligne de sortie (sans retour à la ligne)
+            
+        Returns:
+            dict: Identifiant trouvé sur cette ligne, sinon None
+        """
+        line = line.strip()
+        match = _CREDENTIAL_RE.match(line)
+        if match:
+            port, service, host, login, password = match.groups()
+            credential = {"host": host, "port": int(port), "service": service, "login": login,
+                          "password": password, "line": line}
+            # Une attaque reprise peut réafficher un identifiant déjà trouvé
+            if any(found["line"] == line for found in self.credentials):
+                return None
+            self.credentials.append(credential)
+            logger.info(f"Credentials trouvés: {line}")
+            return credential
+        
+        match = _STATUS_RE.match(line)
+        if match:
+            self.hydra_rate = float(match.group(1)) / 60
+            self.done = max(self.done, int(match.group(2)))
+            self.total = max(self.total, int(match.group(2)) + int(match.group(3)))
+            return None
+        
+        match = _ATTEMPT_RE.match(line)
+        if match:
+            self.done = max(self.done, int(match.group(1)))
+            self.total = max(self.total, int(match.group(2)))
+            return None
+        
+        match = _DATA_RE.match(line)
+        if match:
+            self.total = max(self.total, int(match.group(1)) * int(match.group(2)))
+        elif line.startswith("[ERROR]"):
+            self.errors = (self.errors + [line])[-self.MAX_ERRORS:]
+        elif "valid password" in line and "target" in line:
+            self.summary = line
+        return None
+    
+    def progress(self, elapsed):
+        """
+        Progression de l'attaque
+        
+        Args:
+            elapsed (float): Durée écoulée depuis le lancement (secondes)
+            
+        Returns:
+            dict: Essais effectués / total, pourcentage, débit, temps restant estimé
+        """
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total - self.done)
+        return {
+            "tries_done": self.done,
+            "tries_total": self.total,
+            "percent": round(100.0 * self.done / self.total, 2) if self.total else 0.0,
+            "tries_per_second": round(rate, 2),
+            "hydra_tries_per_second": round(self.hydra_rate, 2),
+            "eta_seconds": round(remaining / rate, 1) if rate and self.total else None,
+            "credentials_found": len(self.credentials)
+        }
+
+def start_hydra_process(command, cwd=None):
+    """
+    Lance Hydra avec sa sortie redirigée vers un pipe lu ligne par ligne
+    
+    stdbuf (s'il est disponible) force un tampon par ligne : les identifiants
+    et la progression arrivent dès qu'ils sont écrits.
+    
+    Args:
+        command (list): Commande construite par build_hydra_command
+        cwd (str, optional): Répertoire de travail (où Hydra écrit hydra.restore)
+        
+    Returns:
+        subprocess.Popen: Processus (stderr fusionné dans stdout, texte)
+    """
+    if shutil.which("stdbuf"):
+        command = ["stdbuf", "-oL", "-eL"] + command
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, errors="replace", bufsize=1, cwd=cwd)
+
+def interrupt_hydra(process, grace=INTERRUPT_GRACE):
+    """
+    Interrompt Hydra comme un Ctrl-C : il écrit son fichier de reprise puis s'arrête
+    
+    Args:
+        process (subprocess.Popen): Processus Hydra
+        grace (float): Délai avant un arrêt forcé (SIGTERM)
+    """
+    if process.poll() is not None:
+        return
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(grace)
+    except subprocess.TimeoutExpired:
+        logger.warning("Hydra ne s'est pas arrêté après SIGINT, envoi de SIGTERM")
+        process.terminate()
+
+class AttackCheckpoint:
+    """
+    Point de reprise d'une attaque Hydra
+    
+    Hydra est lancé dans un répertoire propre à l'attaque : il y écrit
+    hydra.restore toutes les 5 minutes et lorsqu'il est interrompu (SIGINT,
+    SIGTERM). state.json garde les paramètres, les identifiants déjà trouvés
+    et la progression ; « hydra -R » relancé dans ce répertoire reprend là où
+    l'attaque s'était arrêtée, y compris après un redémarrage du serveur.
+    """
+    
+    def __init__(self, attack_id, params, created_at=None, resumes=0, status="pending", state=None):
+        """
+        Args:
+            attack_id (str): Identifiant de l'attaque (celui de la tâche)
+            params (dict): target, service, userlist, passlist et options
+            created_at (float, optional): Date de création
+            resumes (int): Nombre de reprises déjà effectuées
+            status (str): Dernier état enregistré
+            state (dict, optional): Contenu de state.json (progression, identifiants)
+        """
+        if not attack_id or not _ATTACK_ID_RE.match(attack_id):
+            raise ValueError(f"Identifiant d'attaque invalide: {attack_id}")
+        self.id = attack_id
+        self.params = params
+        self.created_at = created_at or time.time()
+        self.resumes = resumes
+        self.status = status
+        self.state = state or {}
+        self._saved_at = 0.0
+    
+    @classmethod
+    def create(cls, target, service, userlist, passlist, options=None, attack_id=None):
+        """Nouveau point de reprise (les listes sont enregistrées en chemins absolus)"""
+        params = {
+            "target": target,
+            "service": service,
+            "userlist": os.path.abspath(userlist),
+            "passlist": os.path.abspath(passlist),
+            "options": dict(options or {})
+        }
+        return cls(attack_id or uuid.uuid4().hex[:12], params)
+    
+    @classmethod
+    def load(cls, attack_id):
+        """
+        Relit le point de reprise d'une attaque
+        
+        Returns:
+            AttackCheckpoint: Point de reprise, None s'il n'existe pas
+            
+        Raises:
+            ValueError: Identifiant invalide
+        """
+        checkpoint = cls(attack_id, {})
+        try:
+            with open(os.path.join(checkpoint.directory, STATE_FILE), "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            logger.warning(f"Point de reprise illisible pour l'attaque {attack_id}: {e}")
+            return None
+        return cls(attack_id, state["params"], state.get("created_at"), state.get("resumes", 0),
+                   state.get("status", "interrupted"), state)
+    
+    @property
+    def directory(self):
+        return os.path.join(HYDRA_STATE_DIR, self.id)
+    
+    @property
+    def resumable(self):
+        """Vrai si Hydra a laissé un fichier de reprise"""
+        return self.status != "completed" and os.path.isfile(os.path.join(self.directory, RESTORE_FILE))
+    
+    def prepare(self):
+        """
+        Réordonne les candidats selon options["ordering"] (listes écrites dans
+        self.directory, voir candidate_ordering)
+        """
+        params = self.params
+        ordering = params["options"].get("ordering", ORDERING_ORIGINAL)
+        if ordering == ORDERING_ORIGINAL or "prepared" in params:
+            return
+        params["prepared"] = prepare_candidates(params["userlist"], params["passlist"], params["service"],
+                                                ordering, self.directory)
+    
+    def command(self, resume=False):
+        """Commande Hydra (hydra -R pour une reprise, lancée dans self.directory)"""
+        if resume:
+            return ["hydra", "-R"]
+        params = self.params
+        prepared = params.get("prepared")
+        if prepared:
+            options = dict(params["options"], combo_file=prepared["combo_file"], loop_users=prepared["loop_users"])
+            return build_hydra_command(params["target"], params["service"], prepared["userlist"],
+                                       prepared["passlist"], options)
+        return build_hydra_command(params["target"], params["service"], params["userlist"],
+                                   params["passlist"], params["options"])
+    
+    def seed(self, parser):
+        """Reporte dans un analyseur la progression et les identifiants déjà enregistrés"""
+        parser.credentials = list(self.state.get("credentials", []))
+        parser.done = self.state.get("tries_done", 0)
+        parser.total = self.state.get("tries_total", 0)
+    
+    def save(self, status, parser=None, force=True):
+        """
+        Enregistre l'état de l'attaque
+        
+        Args:
+            status (str): running, interrupted, failed ou completed
+            parser (HydraOutputParser, optional): Progression et identifiants
+            force (bool): Ignorer CHECKPOINT_INTERVAL
+        """
+        now = time.time()
+        if not force and now - self._saved_at < CHECKPOINT_INTERVAL:
+            return
+        self.status = status
+        state = dict(self.state, id=self.id, params=self.params, status=status, created_at=self.created_at,
+                     updated_at=now, resumes=self.resumes)
+        if parser is not None:
+            state.update(credentials=list(parser.credentials), tries_done=parser.done, tries_total=parser.total)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, STATE_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+        self.state = state
+        self._saved_at = now
+    
+    def discard(self):
+        """Supprime le répertoire de l'attaque (plus rien à reprendre)"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def to_dict(self):
+        """État enregistré, sérialisable en JSON"""
+        return dict(self.state, id=self.id, status=self.status, resumable=self.resumable)
+
+def list_attack_checkpoints():
+    """
+    Points de reprise enregistrés sur disque
+    
+    Returns:
+        list: AttackCheckpoint, du plus récent au plus ancien
+    """
+    if not os.path.isdir(HYDRA_STATE_DIR):
+        return []
+    checkpoints = []
+    for name in os.listdir(HYDRA_STATE_DIR):
+        if _ATTACK_ID_RE.match(name):
+            checkpoint = AttackCheckpoint.load(name)
+            if checkpoint is not None:
+                checkpoints.append(checkpoint)
+    return sorted(checkpoints, key=lambda checkpoint: checkpoint.created_at, reverse=True)
+
+def run_hydra(target_ip, service, userlist, passlist, options=None, timeout=HYDRA_TIMEOUT):
+    """
+    Lance une attaque brute-force avec Hydra et attend sa fin
+    
+    Pour les attaques longues, préférer une tâche de fond (hydra_jobs) :
+    progression en direct, pas de délai maximal, annulation possible.
+    Une attaque interrompue par le délai maximal laisse un point de reprise :
+    le résultat contient alors attack_id, à reprendre via hydra_jobs.
+    
+    Args:
+        target_ip (str): Adresse IP ou nom d'hôte de la cible
+        service (str): Service à attaquer (ssh, ftp, etc.)
+        userlist (str): Chemin vers la liste d'utilisateurs
+        passlist (str): Chemin vers la liste de mots de passe
+        options (dict, optional): Options supplémentaires pour Hydra ;
+            engine="native" teste les identifiants sans Hydra (voir native_bruteforce)
+        timeout (float, optional): Durée maximale en secondes (None = illimitée)
+        
+    Returns:
+        dict: Résultats de l'attaque
+    """
+    # Vérifier que les fichiers existent
+    error = check_wordlists(userlist, passlist)
+    if error:
+        return {"error": error}
+    
+    if (options or {}).get("engine") == ENGINE_NATIVE:
+        return run_native_attack(target_ip, service, userlist, passlist, options, timeout)
+    
+    logger.info(f"Lancement de l'attaque Hydra sur {target_ip} - Service: {service}")
+    
+    checkpoint = AttackCheckpoint.create(target_ip, service, userlist, passlist, options)
+    command = checkpoint.command()
+    parser = HydraOutputParser()
+    output = []
+    timed_out = threading.Event()
+    
     try:
+        # Candidats les plus probables en premier (options["ordering"])
+        checkpoint.prepare()
+        command = checkpoint.command()
         logger.info(f"Commande Hydra: {' '.join(command)}")
         
-        # Exécuter la commande
-        process = subprocess.run(command, capture_output=True, text=True, timeout=600)
+        # Exécuter la commande en lisant sa sortie au fil de l'eau
+        checkpoint.save("running")
+        process = start_hydra_process(command, cwd=checkpoint.directory)
+        timer = None
+        if timeout:
+            def _expire():
+                timed_out.set()
+                interrupt_hydra(process)
+            timer = threading.Timer(timeout, _expire)
+            timer.start()
+        try:
+            for line in process.stdout:
+                output.append(line)
+                found = parser.feed(line)
+                checkpoint.save("running", parser, force=found is not None)
+            process.wait()
+        finally:
+            if timer:
+                timer.cancel()
+        
+        stdout = "".join(output)
+        credentials = [credential["line"] for credential in parser.credentials]
+        if timed_out.is_set():
+            checkpoint.save("interrupted", parser)
+            logger.error(f"Délai d'exécution dépassé ({timeout} s), point de reprise {checkpoint.id}")
+            return {
+                "success": False,
+                "error": f"Délai d'exécution dépassé ({timeout} s)",
+                "credentials": credentials,
+                "progress": parser.progress(timeout),
+                "attack_id": checkpoint.id,
+                "resumable": checkpoint.resumable,
+                "stdout": stdout,
+                "command": " ".join(command)
+            }
+        
+        if process.returncode == 0 or not checkpoint.resumable:
+            checkpoint.discard()
+        else:
+            checkpoint.save("failed", parser)
         
         # Traiter la sortie
         if process.returncode == 0:
-            # Analyser les résultats
-            credentials = []
-            for line in process.stdout.splitlines():
-                if "host:" in line and "login:" in line and "password:" in line:
-                    credentials.append(line.strip())
-                    logger.info(f"Credentials trouvés: {line.strip()}")
-            
             if credentials:
                 logger.info(f"Attaque réussie: {len(credentials)} credential(s) trouvé(s)")
             else:
@@ -220,8 +596,8 @@ def run_hydra(target_ip, service, userlist, passlist, options=None):
             return {
                 "success": True,
                 "credentials": credentials,
-                "stdout": process.stdout,
-                "stderr": process.stderr,
+                "stdout": stdout,
+                "stderr": "\n".join(parser.errors),
                 "command": " ".join(command)
             }
         else:
@@ -230,25 +606,374 @@ def run_hydra(target_ip, service, userlist, passlist, options=None):
             return {
                 "success": False,
                 "error": f"Hydra a échoué avec le code {process.returncode}",
-                "stdout": process.stdout,
-                "stderr": process.stderr,
+                "attack_id": checkpoint.id,
+                "resumable": checkpoint.resumable,
+                "stdout": stdout,
+                "stderr": "\n".join(parser.errors),
                 "command": " ".join(command)
             }
-    except subprocess.TimeoutExpired:
-        logger.error("Délai d'exécution dépassé (10 minutes)")
-        return {
-            "success": False,
-            "error": "Délai d'exécution dépassé (10 minutes)",
-            "command": " ".join(command)
-        }
     except Exception as e:
         logger.error(f"Erreur d'exécution : {str(e)}", exc_info=True)
+        if not checkpoint.resumable:
+            checkpoint.discard()
         return {
             "success": False,
             "error": f"Erreur d'exécution : {str(e)}",
             "command": " ".join(command)
         }
 
+def split_wordlist(path, parts, out_dir):
+    """
+    Répartit les lignes d'une wordlist entre plusieurs fichiers, à tour de rôle
+    
+    La répartition alternée (ligne i dans le fichier i % parts) garde en tête
+    de chaque fichier les mots les plus courants de la liste d'origine : tous
+    les shards essaient d'abord les meilleurs candidats.
+    
+    Args:
+        path (str): Wordlist à répartir
+        parts (int): Nombre de fichiers
+        out_dir (str): Répertoire des fichiers produits
+        
+    Returns:
+        list: (chemin absolu, nombre de lignes) de chaque fichier
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    name = os.path.basename(path)
+    paths = [os.path.abspath(os.path.join(out_dir, f"{index:03d}_{name}")) for index in range(parts)]
+    counts = [0] * parts
+    files = [open(shard_path, "wb") for shard_path in paths]
+    try:
+        with open(path, "rb") as f:
+            for index, line in enumerate(f):
+                if not line.endswith(b"\n"):
+                    line += b"\n"
+                files[index % parts].write(line)
+                counts[index % parts] += 1
+    finally:
+        for shard_file in files:
+            shard_file.close()
+    return list(zip(paths, counts))
+
+class HydraShard:
+    """Part d'une attaque exécutée par un processus Hydra"""
+    
+    def __init__(self, index, target, service, userlist, passlist, options, expected_tries, directory,
+                 entries=None):
+        """
+        Args:
+            index (int): Numéro du shard
+            target (str): Cible (nom du groupe pour une attaque par lot)
+            service (str): Service attaqué
+            userlist (str): Liste d'utilisateurs
+            passlist (str): Part de la liste de mots de passe
+            options (dict): Options Hydra
+            expected_tries (int): Essais prévus (utilisateurs x mots de passe)
+            directory (str): Répertoire de travail du processus
+            entries (list, optional): Cibles du fichier -M (host, port, service)
+        """
+        self.index = index
+        self.target = target
+        self.service = service
+        self.command = build_hydra_command(target, service, userlist, passlist, options)
+        self.expected_tries = expected_tries
+        self.directory = directory
+        self.entries = entries
+        self.parser = HydraOutputParser()
+        self.status = "pending"
+        self.stopping = False
+        self.returncode = None
+        self.error = None
+        self.process = None
+    
+    def to_dict(self):
+        """État du shard sérialisable en JSON"""
+        state = {
+            "index": self.index,
+            "target": self.target,
+            "status": self.status,
+            "returncode": self.returncode,
+            "error": self.error,
+            "tries_done": self.parser.done,
+            "tries_total": max(self.parser.total, self.expected_tries),
+            "credentials_found": len(self.parser.credentials),
+            "command": " ".join(self.command)
+        }
+        if self.entries is not None:
+            state["entries"] = len(self.entries)
+        return state
+
+class ShardedHydraScheduler:
+    """
+    Attaque répartie sur plusieurs processus Hydra
+    
+    L'attaque est découpée par cible et, si password_shards > 1, par tranches
+    de la liste de mots de passe. Les shards sont lancés dans l'ordre, au plus
+    max_processes à la fois et per_target par cible. Les identifiants de tous
+    les shards sont fusionnés ; avec stop_on_success, le premier identifiant
+    trouvé sur une cible arrête ses autres shards et annule ceux en attente.
+    """
+    
+    def __init__(self, targets, service, userlist, passlist, options=None, password_shards=1,
+                 max_processes=MAX_HYDRA_PROCESSES, per_target=MAX_PROCESSES_PER_TARGET, stop_on_success=False):
+        """
+        Args:
+            targets (list): Cibles (adresses IP ou noms d'hôte)
+            service (str): Service à attaquer
+            userlist (str): Chemin vers la liste d'utilisateurs
+            passlist (str): Chemin vers la liste de mots de passe
+            options (dict, optional): Options Hydra communes à tous les shards
+            password_shards (int): Tranches de la liste de mots de passe par cible
+            max_processes (int): Processus Hydra simultanés au total
+            per_target (int): Processus Hydra simultanés par cible
+            stop_on_success (bool): Arrêter une cible dès son premier identifiant
+        """
+        targets = [target for target in dict.fromkeys(targets) if target]
+        if not targets:
+            raise ValueError("Aucune cible")
+        if not 1 <= int(password_shards) <= MAX_PASSWORD_SHARDS:
+            raise ValueError(f"Le nombre de tranches doit être compris entre 1 et {MAX_PASSWORD_SHARDS}")
+        if int(max_processes) < 1 or int(per_target) < 1:
+            raise ValueError("Les limites de processus doivent être supérieures ou égales à 1")
+        self.targets = targets
+        self.service = service
+        self.userlist = userlist
+        self.passlist = passlist
+        self.options = dict(options or {})
+        if stop_on_success:
+            self.options["exit_on_first"] = True
+        self.password_shards = int(password_shards)
+        self.max_processes = int(max_processes)
+        self.per_target = int(per_target)
+        self.stop_on_success = stop_on_success
+        self.id = uuid.uuid4().hex[:12]
+        self.work_dir = os.path.join(SHARDS_DIR, self.id)
+        self.shards = []
+        self.credentials = []
+        self.solved_targets = []
+        self._cond = threading.Condition()
+        self._threads = []
+        self._on_line = None
+    
+    def _plan(self):
+        """
+        Découpe l'attaque en shards (tranches de mots de passe x cibles)
+        
+        Appelé sans verrou : réordonner et découper les listes peut prendre du
+        temps, pendant lequel progress() doit rester disponible.
+        
+        Returns:
+            list: HydraShard, dans l'ordre de lancement
+        """
+        # Listes réordonnées avant découpage : chaque tranche garde l'ordre de probabilité
+        prepared = prepare_candidates(self.userlist, self.passlist, self.service,
+                                      self.options.get("ordering", ORDERING_ORIGINAL),
+                                      os.path.join(self.work_dir, "ordered"), allow_pairs=False)
+        if prepared["loop_users"]:
+            self.options["loop_users"] = True
+        userlist = os.path.abspath(prepared["userlist"])
+        passlist = prepared["passlist"]
+        users = count_lines(userlist)
+        if self.password_shards > 1:
+            slices = split_wordlist(passlist, self.password_shards, os.path.join(self.work_dir, "lists"))
+        else:
+            slices = [(os.path.abspath(passlist), count_lines(passlist))]
+        # Tranche par tranche : chaque cible avance en parallèle sur ses meilleurs candidats
+        shards = []
+        for passlist, passwords in slices:
+            for target in self.targets:
+                index = len(shards)
+                directory = os.path.join(self.work_dir, f"shard{index:03d}")
+                os.makedirs(directory, exist_ok=True)
+                shards.append(HydraShard(index, target, self.service, userlist, passlist, self.options,
+                                         users * passwords, directory))
+        logger.info(f"Attaque répartie en {len(shards)} shards ({len(self.targets)} cibles, "
+                    f"{len(slices)} tranches), {self.max_processes} processus max")
+        return shards
+    
+    def run(self, stop_event=None, on_line=None):
+        """
+        Exécute tous les shards et attend leur fin
+        
+        Args:
+            stop_event (threading.Event, optional): Arrêt anticipé de tous les shards
+            on_line (callable, optional): Appelé avec (shard, ligne) pour chaque ligne de sortie
+            
+        Returns:
+            dict: Résultat fusionné (voir result())
+        """
+        error = check_wordlists(self.userlist, self.passlist)
+        if error:
+            raise FileNotFoundError(error)
+        self._on_line = on_line
+        try:
+            shards = self._plan()
+            with self._cond:
+                self.shards = shards
+                while True:
+                    if stop_event is not None and stop_event.is_set():
+                        self._stop_shards(self.shards)
+                    else:
+                        self._start_ready()
+                    if not any(shard.status in ("pending", "running") for shard in self.shards):
+                        break
+                    self._cond.wait(0.5)
+            for thread in self._threads:
+                thread.join()
+        finally:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+        return self.result()
+    
+    def _start_ready(self):
+        running = [shard for shard in self.shards if shard.status == "running"]
+        per_target = {}
+        for shard in running:
+            per_target[shard.target] = per_target.get(shard.target, 0) + 1
+        for shard in self.shards:
+            if len(running) >= self.max_processes:
+                break
+            if shard.status != "pending" or per_target.get(shard.target, 0) >= self.per_target:
+                continue
+            shard.status = "running"
+            running.append(shard)
+            per_target[shard.target] = per_target.get(shard.target, 0) + 1
+            thread = threading.Thread(target=self._run_shard, args=(shard,), daemon=True,
+                                      name=f"hydra-shard-{self.id}-{shard.index}")
+            self._threads.append(thread)
+            thread.start()
+    
+    def _run_shard(self, shard):
+        try:
+            shard.process = start_hydra_process(shard.command, cwd=shard.directory)
+        except OSError as e:
+            with self._cond:
+                shard.status = "failed"
+                shard.error = str(e)
+                self._cond.notify_all()
+            return
+        logger.debug(f"Shard {shard.index} lancé: {' '.join(shard.command)}")
+        for line in shard.process.stdout:
+            line = line.rstrip("\n")
+            with self._cond:
+                found = shard.parser.feed(line)
+                if self._on_line is not None:
+                    self._on_line(shard, line)
+                if found is not None:
+                    self._on_credential(shard, found)
+        returncode = shard.process.wait()
+        with self._cond:
+            shard.returncode = returncode
+            if shard.stopping:
+                shard.status = "stopped"
+            elif returncode == 0:
+                shard.status = "completed"
+            else:
+                shard.status = "failed"
+                shard.error = shard.parser.errors[-1] if shard.parser.errors else f"code {returncode}"
+            self._cond.notify_all()
+    
+    def _on_credential(self, shard, credential):
+        """Fusionne un identifiant ; arrête les autres shards de la cible si demandé"""
+        if not any(found["line"] == credential["line"] for found in self.credentials):
+            self.credentials.append(dict(credential, shard=shard.index))
+        if self.stop_on_success and shard.target not in self.solved_targets:
+            self.solved_targets.append(shard.target)
+            logger.info(f"Identifiant trouvé sur {shard.target}: arrêt de ses autres shards")
+            self._stop_shards([other for other in self.shards if other.target == shard.target and other is not shard])
+    
+    def _stop_shards(self, shards):
+        for shard in shards:
+            if shard.status == "pending":
+                shard.status = "skipped"
+            elif shard.status == "running" and not shard.stopping:
+                shard.stopping = True
+                if shard.process is not None and shard.process.poll() is None:
+                    shard.process.terminate()
+        self._cond.notify_all()
+    
+    def progress(self):
+        """Progression cumulée de tous les shards"""
+        with self._cond:
+            done = sum(shard.parser.done for shard in self.shards)
+            total = sum(max(shard.parser.total, shard.expected_tries) for shard in self.shards
+                        if shard.status != "skipped")
+            counts = {}
+            for shard in self.shards:
+                counts[shard.status] = counts.get(shard.status, 0) + 1
+            return {
+                "tries_done": done,
+                "tries_total": total,
+                "percent": round(100.0 * done / total, 2) if total else 0.0,
+                "credentials_found": len(self.credentials),
+                "credentials": list(self.credentials),
+                "solved_targets": list(self.solved_targets),
+                "shards": counts
+            }
+    
+    def result(self):
+        """
+        Résultat fusionné de l'attaque
+        
+        Returns:
+            dict: success (aucun shard en échec), credentials (tous shards
+            confondus), solved_targets et état de chaque shard
+        """
+        with self._cond:
+            return {
+                "success": bool(self.shards) and all(shard.status != "failed" for shard in self.shards),
+                "credentials": list(self.credentials),
+                "solved_targets": list(self.solved_targets),
+                "shards": [shard.to_dict() for shard in self.shards]
+            }
+
+def run_sharded_hydra(targets, service, userlist, passlist, options=None, password_shards=1,
+                      max_processes=MAX_HYDRA_PROCESSES, per_target=MAX_PROCESSES_PER_TARGET,
+                      stop_on_success=False, timeout=HYDRA_TIMEOUT):
+    """
+    Lance une attaque répartie sur plusieurs processus Hydra et attend sa fin
+    
+    Comme run_hydra, l'attaque est bornée par timeout : au-delà, les shards
+    sont arrêtés et les identifiants déjà trouvés retournés. Pour les
+    attaques longues, préférer une tâche de fond (hydra_jobs).
+    
+    Args:
+        targets (list): Cibles (adresses IP ou noms d'hôte)
+        service (str): Service à attaquer
+        userlist (str): Chemin vers la liste d'utilisateurs
+        passlist (str): Chemin vers la liste de mots de passe
+        options (dict, optional): Options Hydra communes
+        password_shards (int): Tranches de la liste de mots de passe par cible
+        max_processes (int): Processus Hydra simultanés au total
+        per_target (int): Processus Hydra simultanés par cible
+        stop_on_success (bool): Arrêter une cible dès son premier identifiant
+        timeout (float, optional): Durée maximale en secondes (None = illimitée)
+        
+    Returns:
+        dict: Résultat fusionné (voir ShardedHydraScheduler.result) et timed_out
+    """
+    scheduler = ShardedHydraScheduler(targets, service, userlist, passlist, options, password_shards,
+                                      max_processes, per_target, stop_on_success)
+    stop = threading.Event()
+    timer = None
+    if timeout:
+        timer = threading.Timer(timeout, stop.set)
+        timer.daemon = True
+        timer.start()
+    try:
+        result = scheduler.run(stop_event=stop)
+    except Exception as e:
+        logger.error(f"Erreur de l'attaque répartie : {str(e)}", exc_info=True)
+        return {"success": False, "error": str(e), "credentials": list(scheduler.credentials)}
+    finally:
+        if timer:
+            timer.cancel()
+    result["timed_out"] = stop.is_set()
+    if result["timed_out"]:
+        logger.error(f"Délai d'exécution dépassé ({timeout} s) pour l'attaque répartie")
+        result["success"] = False
+        result["error"] = f"Délai d'exécution dépassé ({timeout} s)"
+    return result
+
 # Test du module
 if __name__ == "__main__":
     # Afficher les wordlists disponibles
@@ -0,0 +1,534 @@
+# services/hydra_jobs.py
+"""
+Attaques Hydra exécutées en tâches de fond.
+
+La requête HTTP retourne immédiatement un identifiant de tâche. La sortie de
+Hydra est lue ligne par ligne pendant l'attaque : progression (essais
+effectués sur l'espace de combinaisons, débit, temps restant), identifiants
+dès qu'ils sont trouvés et dernières lignes de sortie sont consultables à
+tout moment. Une attaque peut être annulée ; elle n'est limitée par aucun
+délai, sauf max_duration s'il est fourni.
+
+Chaque attaque garde un point de reprise (AttackCheckpoint) : annulée,
+interrompue par max_duration ou par un redémarrage du serveur, elle peut
+être reprise avec le même identifiant (resume_hydra_job) sans rejouer les
+essais déjà effectués.
+"""
+import threading
+import time
+from collections import deque
+from utils.logger import get_logger
+from utils.jobs import BackgroundJob, registry
+from services.hydra_bruteforce import (check_wordlists, start_hydra_process, interrupt_hydra,
+                                       HydraOutputParser, AttackCheckpoint, list_attack_checkpoints,
+                                       ShardedHydraScheduler)
+from services.hydra_batch import BatchHydraScheduler
+from services.native_bruteforce import NativeAttack, ENGINE_NATIVE
+
+# Configuration du logger
+logger = get_logger('hydra_jobs')
+
+# Lignes de sortie conservées par attaque (les plus récentes)
+OUTPUT_LINES = 1000
+
+
+class OutputBuffer:
+    """Dernières lignes de sortie d'une attaque, numérotées depuis son lancement"""
+
+    def _init_output(self):
+        self._output = deque(maxlen=OUTPUT_LINES)
+        self._line_count = 0
+        # Réentrant : HydraJob ajoute ses lignes en tenant déjà le verrou
+        self._lock = threading.RLock()
+
+    def _append_output(self, line):
+        with self._lock:
+            self._output.append(line)
+            self._line_count += 1
+
+    def output(self, since=0):
+        """
+        Lignes de sortie à partir d'un numéro de ligne
+
+        Args:
+            since (int): Numéro de la première ligne voulue (0 = début)
+
+        Returns:
+            tuple: (lignes, numéro de la ligne suivante) ; les lignes trop
+            anciennes (au-delà de OUTPUT_LINES) ne sont plus disponibles
+        """
+        with self._lock:
+            first = self._line_count - len(self._output)
+            start = max(since, first)
+            return list(self._output)[start - first:], self._line_count
+
+
+class HydraJob(OutputBuffer, BackgroundJob):
+    """Attaque Hydra suivie ligne par ligne"""
+
+    kind = "hydra"
+
+    def __init__(self, target, service, userlist, passlist, options=None, max_duration=None, checkpoint=None):
+        """
+        Args:
+            target (str): Adresse IP ou nom d'hôte de la cible
+            service (str): Service à attaquer (ssh, ftp, etc.)
+            userlist (str): Chemin vers la liste d'utilisateurs
+            passlist (str): Chemin vers la liste de mots de passe
+            options (dict, optional): Options Hydra (voir build_hydra_command)
+            max_duration (float, optional): Durée maximale en secondes (None = illimitée)
+            checkpoint (AttackCheckpoint, optional): Point de reprise d'une attaque
+                interrompue (la tâche reprend son identifiant et lance hydra -R)
+        """
+        super().__init__(checkpoint.id if checkpoint else None)
+        self.target = target
+        self.service = service
+        self.userlist = userlist
+        self.passlist = passlist
+        self.options = options or {}
+        self.max_duration = max_duration
+        self.parser = HydraOutputParser()
+        self.resumed = checkpoint is not None
+        if checkpoint is None:
+            checkpoint = AttackCheckpoint.create(target, service, userlist, passlist, self.options, self.id)
+        else:
+            checkpoint.resumes += 1
+            checkpoint.seed(self.parser)
+        self.checkpoint = checkpoint
+        self.command = checkpoint.command(resume=self.resumed)
+        self.returncode = None
+        self.timed_out = False
+        self._init_output()
+        self._process = None
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint, max_duration=None):
+        """Tâche reprenant une attaque interrompue"""
+        params = checkpoint.params
+        return cls(params["target"], params["service"], params["userlist"], params["passlist"],
+                   params["options"], max_duration, checkpoint)
+
+    def run(self):
+        if not self.resumed:
+            error = check_wordlists(self.userlist, self.passlist)
+            if error:
+                raise FileNotFoundError(error)
+
+            # Candidats les plus probables en premier (options["ordering"])
+            try:
+                self.checkpoint.prepare()
+            except Exception:
+                self.checkpoint.discard()
+                raise
+            self.command = self.checkpoint.command()
+
+        logger.info(f"Commande Hydra ({self.id}): {' '.join(self.command)}")
+        self.checkpoint.save("running", self.parser)
+        try:
+            self._process = start_hydra_process(self.command, cwd=self.checkpoint.directory)
+        except OSError:
+            if not self.resumed:
+                self.checkpoint.discard()
+            raise
+        finished = threading.Event()
+        deadline = time.monotonic() + self.max_duration if self.max_duration else None
+
+        def _watchdog():
+            # Annulation ou durée maximale, même si Hydra n'écrit rien
+            while not finished.wait(0.2):
+                if self.stop_event.is_set():
+                    self._terminate()
+                    return
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.timed_out = True
+                    self._terminate()
+                    return
+
+        threading.Thread(target=_watchdog, daemon=True).start()
+        try:
+            for line in self._process.stdout:
+                line = line.rstrip("\n")
+                with self._lock:
+                    found = self.parser.feed(line)
+                    self._append_output(line)
+                    # Identifiants enregistrés aussitôt, progression au plus chaque minute
+                    self.checkpoint.save("running", self.parser, force=found is not None)
+            self.returncode = self._process.wait()
+        finally:
+            finished.set()
+            if self._process.poll() is None:
+                self._process.kill()
+                self._process.wait()
+
+        interrupted = self.stop_event.is_set() or self.timed_out
+        with self._lock:
+            if self.returncode == 0 and not interrupted:
+                self.checkpoint.save("completed", self.parser)
+                self.checkpoint.discard()
+            else:
+                self.checkpoint.save("interrupted" if interrupted else "failed", self.parser)
+        if self.returncode != 0 and not interrupted:
+            detail = self.parser.errors[-1] if self.parser.errors else ""
+            raise RuntimeError(f"Hydra a échoué avec le code {self.returncode} {detail}".strip())
+        return self.summary()
+
+    def _terminate(self):
+        """Interrompt Hydra (SIGINT) pour qu'il écrive son fichier de reprise"""
+        if self._process is not None and self._process.poll() is None:
+            logger.info(f"Arrêt de l'attaque Hydra {self.id}")
+            interrupt_hydra(self._process)
+
+    def summary(self):
+        """Résultat de l'attaque (identifiants trouvés et progression finale)"""
+        with self._lock:
+            return {
+                "success": self.returncode == 0,
+                "credentials": list(self.parser.credentials),
+                "summary": self.parser.summary,
+                "timed_out": self.timed_out,
+                "resumable": self.checkpoint.resumable,
+                "command": " ".join(self.command)
+            }
+
+    def progress(self):
+        with self._lock:
+            data = {
+                "target": self.target,
+                "service": self.service,
+                "command": " ".join(self.command),
+                "credentials": list(self.parser.credentials),
+                "errors": self.parser.errors[-5:],
+                "output_lines": self._line_count,
+                "timed_out": self.timed_out,
+                "resumed": self.resumed,
+                "resumes": self.checkpoint.resumes,
+                "resumable": self.finished and self.checkpoint.resumable
+            }
+            data.update(self.parser.progress(self.elapsed))
+        return data
+
+
+class ShardedHydraJob(OutputBuffer, BackgroundJob):
+    """Attaque répartie sur plusieurs processus Hydra (voir ShardedHydraScheduler)"""
+
+    kind = "hydra"
+
+    def __init__(self, targets, service, userlist, passlist, options=None, sharding=None, max_duration=None):
+        """
+        Args:
+            targets (list): Cibles
+            service (str): Service à attaquer
+            userlist (str): Chemin vers la liste d'utilisateurs
+            passlist (str): Chemin vers la liste de mots de passe
+            options (dict, optional): Options Hydra communes
+            sharding (dict, optional): password_shards, max_processes, per_target, stop_on_success
+            max_duration (float, optional): Durée maximale en secondes (None = illimitée)
+        """
+        super().__init__()
+        self._attach(ShardedHydraScheduler(targets, service, userlist, passlist, options, **(sharding or {})),
+                     max_duration)
+
+    def _attach(self, scheduler, max_duration):
+        self.scheduler = scheduler
+        self.target = ", ".join(scheduler.targets)
+        self.service = scheduler.service
+        self.max_duration = max_duration
+        self.timed_out = False
+        self._init_output()
+
+    def _on_line(self, shard, line):
+        self._append_output(f"[shard {shard.index} {shard.target}] {line}")
+
+    def run(self):
+        finished = threading.Event()
+        stop = threading.Event()
+        deadline = time.monotonic() + self.max_duration if self.max_duration else None
+
+        def _watchdog():
+            while not finished.wait(0.2):
+                if self.stop_event.is_set():
+                    stop.set()
+                    return
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.timed_out = True
+                    stop.set()
+                    return
+
+        threading.Thread(target=_watchdog, daemon=True).start()
+        try:
+            result = self.scheduler.run(stop_event=stop, on_line=self._on_line)
+        finally:
+            finished.set()
+        failed = [shard for shard in result["shards"] if shard["status"] == "failed"]
+        if failed and len(failed) == len(result["shards"]):
+            raise RuntimeError(f"Tous les shards ont échoué: {failed[0]['error']}")
+        return dict(result, timed_out=self.timed_out)
+
+    def summary(self):
+        """Résultat fusionné de l'attaque"""
+        return dict(self.scheduler.result(), timed_out=self.timed_out)
+
+    def progress(self):
+        data = {
+            "target": self.target,
+            "service": self.service,
+            "sharded": True,
+            "max_processes": self.scheduler.max_processes,
+            "per_target": self.scheduler.per_target,
+            "password_shards": self.scheduler.password_shards,
+            "output_lines": self._line_count,
+            "timed_out": self.timed_out,
+            "resumable": False
+        }
+        data.update(self.scheduler.progress())
+        # Débit et temps restant calculés sur l'ensemble des shards
+        rate = data["tries_done"] / self.elapsed if self.elapsed > 0 else 0.0
+        remaining = max(0, data["tries_total"] - data["tries_done"])
+        data["tries_per_second"] = round(rate, 2)
+        data["eta_seconds"] = round(remaining / rate, 1) if rate and data["tries_total"] else None
+        return data
+
+
+class BatchHydraJob(ShardedHydraJob):
+    """Attaque par lot, plusieurs cibles et services (voir BatchHydraScheduler)"""
+
+    def __init__(self, entries, userlist, passlist, options=None, batch=None, max_duration=None, skipped=None):
+        """
+        Args:
+            entries (list): Triplets {"host", "port", "service"}
+            userlist (str): Chemin vers la liste d'utilisateurs
+            passlist (str): Chemin vers la liste de mots de passe
+            options (dict, optional): Options Hydra communes
+            batch (dict, optional): max_processes, hosts_per_process, stop_on_success
+            max_duration (float, optional): Durée maximale en secondes (None = illimitée)
+            skipped (list, optional): Ports du scan écartés (rappelés dans le résultat)
+        """
+        BackgroundJob.__init__(self)
+        self._attach(BatchHydraScheduler(entries, userlist, passlist, options, **(batch or {})), max_duration)
+        self.target = f"{len(self.scheduler.entries)} cibles"
+        self.skipped = list(skipped or [])
+
+    def summary(self):
+        """Résultat consolidé par cible"""
+        return dict(super().summary(), skipped=self.skipped)
+
+    def run(self):
+        return dict(super().run(), skipped=self.skipped)
+
+    def progress(self):
+        data = super().progress()
+        data.update({
+            "sharded": False,
+            "batch": True,
+            "hosts_per_process": self.scheduler.hosts_per_process,
+            "services": list(self.scheduler.services),
+            "skipped": len(self.skipped)
+        })
+        del data["per_target"], data["password_shards"]
+        return data
+
+
+class NativeHydraJob(OutputBuffer, BackgroundJob):
+    """Attaque exécutée par le moteur natif (voir native_bruteforce)"""
+
+    kind = "hydra"
+
+    def __init__(self, target, service, userlist, passlist, options=None, max_duration=None):
+        """
+        Args:
+            target (str): Adresse IP ou nom d'hôte de la cible
+            service (str): Service (voir NATIVE_SERVICES)
+            userlist (str): Chemin vers la liste d'utilisateurs
+            passlist (str): Chemin vers la liste de mots de passe
+            options (dict, optional): Options (voir NativeAttack)
+            max_duration (float, optional): Durée maximale en secondes (None = illimitée)
+        """
+        super().__init__()
+        self.attack = NativeAttack(target, service, userlist, passlist, options)
+        self.target = target
+        self.service = service
+        self.max_duration = max_duration
+        self._init_output()
+
+    def run(self):
+        error = check_wordlists(self.attack.userlist, self.attack.passlist)
+        if error:
+            raise FileNotFoundError(error)
+        logger.info(f"Attaque native ({self.id}): {self.attack.describe()}")
+        result = self.attack.run(timeout=self.max_duration, stop_event=self.stop_event, on_line=self._append_output)
+        if self.attack.unreachable:
+            raise RuntimeError(result["error"])
+        return result
+
+    def summary(self):
+        """Résultat de l'attaque (identifiants, mesures)"""
+        return dict(self.attack.result(), credentials=list(self.attack.credentials))
+
+    def progress(self):
+        data = {
+            "target": self.target,
+            "service": self.service,
+            "engine": ENGINE_NATIVE,
+            "command": self.attack.describe(),
+            "credentials": list(self.attack.credentials),
+            "errors": self.attack.errors[-5:],
+            "output_lines": self._line_count,
+            "timed_out": self.attack.timed_out,
+            "resumable": False
+        }
+        data.update(self.attack.progress())
+        return data
+
+
+def start_native_hydra_job(target, service, userlist, passlist, options=None, max_duration=None):
+    """
+    Lance une attaque par le moteur natif en arrière-plan
+
+    Args:
+        target (str): Adresse IP ou nom d'hôte de la cible
+        service (str): Service (voir NATIVE_SERVICES)
+        userlist (str): Chemin vers la liste d'utilisateurs
+        passlist (str): Chemin vers la liste de mots de passe
+        options (dict, optional): Options (voir NativeAttack)
+        max_duration (float, optional): Durée maximale en secondes
+
+    Returns:
+        NativeHydraJob: Tâche démarrée
+    """
+    job = NativeHydraJob(target, service, userlist, passlist, options, max_duration)
+    logger.info(f"Attaque native {job.id} programmée sur {target} ({service})")
+    return registry.submit(job)
+
+
+def start_batch_hydra_job(entries, userlist, passlist, options=None, batch=None, max_duration=None, skipped=None):
+    """
+    Lance une attaque par lot (plusieurs cibles et services) en arrière-plan
+
+    Args:
+        entries (list): Triplets {"host", "port", "service"} (voir collect_batch_entries)
+        userlist (str): Chemin vers la liste d'utilisateurs
+        passlist (str): Chemin vers la liste de mots de passe
+        options (dict, optional): Options Hydra communes
+        batch (dict, optional): max_processes, hosts_per_process, stop_on_success
+        max_duration (float, optional): Durée maximale en secondes
+        skipped (list, optional): Ports du scan écartés
+
+    Returns:
+        BatchHydraJob: Tâche démarrée
+    """
+    job = BatchHydraJob(entries, userlist, passlist, options, batch, max_duration, skipped)
+    logger.info(f"Attaque Hydra par lot {job.id} programmée: {len(entries)} cibles ({job.service})")
+    return registry.submit(job)
+
+
+def start_sharded_hydra_job(targets, service, userlist, passlist, options=None, sharding=None, max_duration=None):
+    """
+    Lance une attaque répartie sur plusieurs processus Hydra en arrière-plan
+
+    Args:
+        targets (list): Cibles
+        service (str): Service à attaquer
+        userlist (str): Chemin vers la liste d'utilisateurs
+        passlist (str): Chemin vers la liste de mots de passe
+        options (dict, optional): Options Hydra communes
+        sharding (dict, optional): password_shards, max_processes, per_target, stop_on_success
+        max_duration (float, optional): Durée maximale en secondes
+
+    Returns:
+        ShardedHydraJob: Tâche démarrée
+    """
+    job = ShardedHydraJob(targets, service, userlist, passlist, options, sharding, max_duration)
+    logger.info(f"Attaque Hydra répartie {job.id} programmée sur {job.target} ({service})")
+    return registry.submit(job)
+
+
+def start_hydra_job(target, service, userlist, passlist, options=None, max_duration=None):
+    """
+    Lance une attaque Hydra en arrière-plan
+
+    Args:
+        target (str): Adresse IP ou nom d'hôte de la cible
+        service (str): Service à attaquer
+        userlist (str): Chemin vers la liste d'utilisateurs
+        passlist (str): Chemin vers la liste de mots de passe
+        options (dict, optional): Options Hydra
+        max_duration (float, optional): Durée maximale en secondes
+
+    Returns:
+        HydraJob: Tâche démarrée
+    """
+    job = HydraJob(target, service, userlist, passlist, options, max_duration)
+    logger.info(f"Attaque Hydra {job.id} programmée sur {target} ({service})")
+    return registry.submit(job)
+
+
+def get_hydra_job(job_id):
+    """Retourne une attaque Hydra par son identifiant (ou None)"""
+    job = registry.get(job_id)
+    if job is None or job.kind != HydraJob.kind:
+        return None
+    return job
+
+
+def list_hydra_jobs():
+    """Liste les attaques Hydra connues"""
+    return registry.list(HydraJob.kind)
+
+
+def get_attack_checkpoint(job_id):
+    """
+    État enregistré d'une attaque absente du registre (serveur redémarré)
+
+    Args:
+        job_id (str): Identifiant de l'attaque
+
+    Returns:
+        dict: Dernier état enregistré (status, progression, identifiants,
+        resumable), None si aucun point de reprise n'existe
+    """
+    try:
+        checkpoint = AttackCheckpoint.load(job_id)
+    except ValueError:
+        return None
+    if checkpoint is None:
+        return None
+    state = checkpoint.to_dict()
+    # Une attaque « running » sans tâche active a été interrompue par un arrêt du serveur
+    job = get_hydra_job(job_id)
+    if state["status"] == "running" and (job is None or job.finished):
+        state["status"] = "interrupted"
+    return state
+
+
+def list_resumable_attacks():
+    """Attaques interrompues qui peuvent être reprises"""
+    running = {job.id for job in list_hydra_jobs() if not job.finished}
+    return [checkpoint.to_dict() for checkpoint in list_attack_checkpoints()
+            if checkpoint.id not in running and checkpoint.resumable]
+
+
+def resume_hydra_job(job_id, max_duration=None):
+    """
+    Reprend une attaque interrompue là où Hydra s'était arrêté (hydra -R)
+
+    Args:
+        job_id (str): Identifiant de l'attaque interrompue
+        max_duration (float, optional): Durée maximale de la reprise
+
+    Returns:
+        HydraJob: Tâche relancée avec le même identifiant, None si l'attaque est inconnue
+
+    Raises:
+        ValueError: Attaque en cours ou sans fichier de reprise
+    """
+    job = get_hydra_job(job_id)
+    if job is not None and not job.finished:
+        raise ValueError("L'attaque est toujours en cours")
+    checkpoint = AttackCheckpoint.load(job_id)
+    if checkpoint is None:
+        return None
+    if not checkpoint.resumable:
+        raise ValueError("Aucun fichier de reprise Hydra pour cette attaque")
+    resumed = HydraJob.from_checkpoint(checkpoint, max_duration)
+    logger.info(f"Reprise de l'attaque Hydra {job_id} ({checkpoint.resumes}e reprise)")
+    return registry.submit(resumed)
@@ -0,0 +1,133 @@
+# services/live_stats.py
+"""
+Statistiques de trafic en direct pendant une capture.
+
+LiveTrafficStats est alimenté par le callback on_packet de capture_packets :
+chaque paquet est disséqué puis réduit à quelques compteurs (débit par
+seconde, octets par hôte, protocoles, nouveaux hôtes), sans conserver le
+paquet lui-même. snapshot() retourne un instantané sérialisable, diffusé au
+navigateur toutes les secondes (Server-Sent Events).
+
+Les compteurs sont bornés (MAX_HOSTS hôtes suivis, HISTORY secondes
+d'historique) : la mémoire reste constante quelle que soit la durée de la
+capture.
+"""
+import threading
+import time
+from collections import deque
+from services.pcap_reader import dissect_packet, LINKTYPE_ETHERNET
+
+# Secondes de débit conservées dans l'historique
+HISTORY = 60
+# Nombre maximal d'hôtes suivis (les suivants ne sont plus comptés individuellement)
+MAX_HOSTS = 10000
+# Derniers nouveaux hôtes listés dans l'instantané
+RECENT_HOSTS = 20
+TOP_N = 10
+
+
+class LiveTrafficStats:
+    """Compteurs de trafic mis à jour paquet par paquet (thread-safe)"""
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Args:
+            clock (callable): Horloge monotone (secondes), remplaçable pour les tests
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.started_at = clock()
+        self.packets = 0
+        self.bytes = 0
+        self.protocols = {}
+        self.host_bytes = {}
+        self.host_packets = {}
+        self.hosts_dropped = 0
+        self.new_hosts = deque(maxlen=RECENT_HOSTS)
+        # [seconde, paquets, octets, nouveaux hôtes] par seconde écoulée
+        self.history = deque(maxlen=HISTORY)
+
+    def _bucket(self, now):
+        second = int(now - self.started_at)
+        if not self.history or self.history[-1][0] != second:
+            self.history.append([second, 0, 0, 0])
+        return self.history[-1]
+
+    def _add_host(self, ip, length, timestamp, bucket):
+        if ip not in self.host_bytes:
+            if len(self.host_bytes) >= MAX_HOSTS:
+                self.hosts_dropped += 1
+                return
+            self.host_bytes[ip] = 0
+            self.host_packets[ip] = 0
+            self.new_hosts.append({"ip": ip, "first_seen": timestamp})
+            bucket[3] += 1
+        self.host_bytes[ip] += length
+        self.host_packets[ip] += 1
+
+    def add(self, data, timestamp, length, linktype=LINKTYPE_ETHERNET):
+        """
+        Intègre un paquet (signature du callback on_packet de capture_packets)
+
+        Args:
+            data (bytes): Octets du paquet
+            timestamp (float): Horodatage du paquet
+            length (int): Taille d'origine du paquet
+            linktype (int): Type de lien
+        """
+        info = dissect_packet(linktype, data)
+        with self._lock:
+            bucket = self._bucket(self._clock())
+            bucket[1] += 1
+            bucket[2] += length
+            self.packets += 1
+            self.bytes += length
+            self.protocols[info.protocol] = self.protocols.get(info.protocol, 0) + 1
+            if info.src:
+                self._add_host(info.src, length, timestamp, bucket)
+                self._add_host(info.dst, length, timestamp, bucket)
+
+    def snapshot(self):
+        """
+        Instantané des statistiques
+
+        pps / bps portent sur la dernière seconde complète ; history contient
+        le débit de chacune des HISTORY dernières secondes.
+
+        Returns:
+            dict: Compteurs, débits, top talkers, protocoles et nouveaux hôtes
+        """
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self.started_at
+            current = int(elapsed)
+            last = [0, 0, 0, 0]
+            for bucket in reversed(self.history):
+                if bucket[0] == current - 1:
+                    last = bucket
+                    break
+                if bucket[0] < current - 1:
+                    break
+            history = [
+                {"second": second, "packets": packets, "bytes": size, "new_hosts": new_hosts}
+                for second, packets, size, new_hosts in self.history if second < current
+            ]
+            top = sorted(self.host_bytes.items(), key=lambda x: x[1], reverse=True)[:TOP_N]
+            return {
+                "elapsed": round(elapsed, 3),
+                "packets": self.packets,
+                "bytes": self.bytes,
+                "pps": last[1],
+                "bps": last[2] * 8,
+                "avg_pps": round(self.packets / elapsed, 2) if elapsed else 0.0,
+                "avg_bps": round(self.bytes * 8 / elapsed, 2) if elapsed else 0.0,
+                "protocols": dict(sorted(self.protocols.items(), key=lambda x: x[1], reverse=True)),
+                "top_talkers": [
+                    {"ip": ip, "packets": self.host_packets[ip], "bytes": size} for ip, size in top
+                ],
+                "hosts": len(self.host_bytes),
+                "hosts_dropped": self.hosts_dropped,
+                "new_hosts": last[3],
+                "recent_hosts": list(self.new_hosts),
+                "history": history
+            }
@@ -0,0 +1,785 @@
+# services/native_bruteforce.py
+"""
+Moteur natif (asyncio) de test d'identifiants, alternative au binaire Hydra.
+
+Lancer Hydra coûte un processus par attaque et ne laisse maîtriser ni la
+réutilisation des connexions ni les mesures par essai. Ce moteur teste les
+identifiants dans le processus de l'application, pour les services dont le
+protocole d'authentification est simple :
+
+- ftp : USER / PASS ;
+- pop3 : USER / PASS ;
+- imap : LOGIN ;
+- http-get / https-get : authentification Basic sur form_path ;
+- http-post-form / https-post-form : formulaire, avec la sémantique de Hydra
+  pour "form_path:form_data:F=..." (^USER^ et ^PASS^ remplacés, F=texte
+  d'échec ou S=texte de succès recherché dans la réponse).
+
+Les connexions sont gardées dans un pool et réutilisées d'un essai à l'autre
+(keep-alive HTTP, nouvelle tentative USER/LOGIN sur la même session) : une
+connexion n'est rouverte que si le serveur la ferme. tasks fixe le nombre
+d'essais simultanés sur la cible (et donc de connexions ouvertes). Chaque
+essai est chronométré : nombre d'essais, connexions ouvertes / réutilisées,
+erreurs et latences (min, moyenne, p50, p95, max) sont retournés avec le
+résultat.
+
+Les identifiants trouvés sont écrits au format de Hydra ("[21][ftp] host:
+... login: ... password: ...") : le résultat a la forme de celui de
+run_hydra.
+"""
+import asyncio
+import base64
+import os
+import shutil
+import ssl
+import threading
+import time
+import uuid
+from collections import deque
+from urllib.parse import quote_plus
+from utils.logger import get_logger
+from services.wordlist_catalog import count_lines
+from services.candidate_ordering import prepare_candidates, ORDERING_ORIGINAL
+
+# Configuration du logger
+logger = get_logger('native_bruteforce')
+
+ENGINE_HYDRA = "hydra"
+ENGINE_NATIVE = "native"
+ENGINES = (ENGINE_HYDRA, ENGINE_NATIVE)
+
+# Essais simultanés par cible (connexions du pool)
+NATIVE_TASKS = 4
+MAX_NATIVE_TASKS = 64
+# Délais de connexion et d'un essai (secondes)
+CONNECT_TIMEOUT = 10
+IO_TIMEOUT = 15
+# Tentatives d'un essai dont la connexion a échoué (fermeture par le serveur...)
+MAX_RETRIES = 3
+# Délai laissé aux essais en cours après une demande d'arrêt (secondes)
+STOP_GRACE = 2
+# Essais dont la latence est conservée pour les percentiles (les plus récents)
+LATENCY_SAMPLES = 10000
+# Taille maximale d'une réponse HTTP lue
+MAX_HTTP_BODY = 1024 * 1024
+# Répertoire des listes réordonnées
+NATIVE_WORK_DIR = os.path.join("cache", "hydra", "native")
+
+
+class ProtocolError(Exception):
+    """Réponse inattendue du serveur"""
+
+
+class _Session:
+    """Connexion à la cible, réutilisée pour plusieurs essais"""
+
+    def __init__(self, host, port, use_ssl, options):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.options = options
+        self.reader = None
+        self.writer = None
+        # Faux quand la session ne peut plus servir (fermée, ou authentifiée)
+        self.reusable = True
+
+    async def open(self):
+        context = None
+        if self.use_ssl:
+            # Comme Hydra : certificats non vérifiés
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+        await self.greet()
+
+    async def greet(self):
+        """Lit l'accueil du serveur"""
+
+    async def attempt(self, login, password):
+        """Retourne True si l'identifiant est valide"""
+        raise NotImplementedError
+
+    async def quit(self):
+        """Fin de session polie (QUIT, LOGOUT)"""
+
+    async def close(self):
+        if self.writer is None:
+            return
+        try:
+            await asyncio.wait_for(self.quit(), 2)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ProtocolError):
+            pass
+        self.abort()
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.reusable = False
+
+    async def _send(self, text):
+        self.writer.write(text.encode("utf-8", "surrogateescape") + b"\r\n")
+        await self.writer.drain()
+
+    async def _readline(self):
+        line = await self.reader.readline()
+        if not line:
+            self.reusable = False
+            raise ConnectionResetError("Connexion fermée par le serveur")
+        return line.decode("utf-8", "replace").rstrip("\r\n")
+
+
+class _FtpSession(_Session):
+
+    async def _reply(self):
+        line = await self._readline()
+        code = line[:3]
+        # Réponse sur plusieurs lignes : "230-..." jusqu'à "230 ..."
+        if line[3:4] == "-":
+            while not (line.startswith(code) and line[3:4] == " "):
+                line = await self._readline()
+        if not code.isdigit():
+            raise ProtocolError(f"Réponse FTP invalide: {line}")
+        if code == "421":
+            self.reusable = False
+            raise ConnectionResetError(f"Fermeture annoncée par le serveur: {line}")
+        return int(code), line
+
+    async def greet(self):
+        code, line = await self._reply()
+        if code // 100 != 2:
+            raise ProtocolError(f"Accueil FTP inattendu: {line}")
+
+    async def attempt(self, login, password):
+        await self._send(f"USER {login}")
+        code, line = await self._reply()
+        if code in (331, 332):
+            await self._send(f"PASS {password}")
+            code, line = await self._reply()
+        if code in (230, 202):
+            self.reusable = False
+            return True
+        if code // 100 == 5:
+            return False
+        raise ProtocolError(f"Réponse FTP inattendue: {line}")
+
+    async def quit(self):
+        await self._send("QUIT")
+
+
+class _Pop3Session(_Session):
+
+    async def greet(self):
+        line = await self._readline()
+        if not line.startswith("+OK"):
+            raise ProtocolError(f"Accueil POP3 inattendu: {line}")
+
+    async def attempt(self, login, password):
+        await self._send(f"USER {login}")
+        line = await self._readline()
+        if line.startswith("-ERR"):
+            return False
+        await self._send(f"PASS {password}")
+        line = await self._readline()
+        if line.startswith("+OK"):
+            self.reusable = False
+            return True
+        if line.startswith("-ERR"):
+            return False
+        raise ProtocolError(f"Réponse POP3 inattendue: {line}")
+
+    async def quit(self):
+        await self._send("QUIT")
+
+
+def _imap_quote(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class _ImapSession(_Session):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._tag = 0
+
+    async def greet(self):
+        line = await self._readline()
+        if not line.startswith("* OK"):
+            raise ProtocolError(f"Accueil IMAP inattendu: {line}")
+
+    async def _command(self, command):
+        self._tag += 1
+        tag = f"a{self._tag}"
+        await self._send(f"{tag} {command}")
+        while True:
+            line = await self._readline()
+            if line.startswith("* BYE"):
+                self.reusable = False
+            elif line.startswith(tag + " "):
+                return line[len(tag) + 1:]
+
+    async def attempt(self, login, password):
+        status = await self._command(f"LOGIN {_imap_quote(login)} {_imap_quote(password)}")
+        if status.startswith("OK"):
+            self.reusable = False
+            return True
+        if status.startswith("NO"):
+            return False
+        raise ProtocolError(f"Réponse IMAP inattendue: {status}")
+
+    async def quit(self):
+        await self._command("LOGOUT")
+
+
+class _HttpSession(_Session):
+    """Requêtes HTTP/1.1 en keep-alive"""
+
+    def _request(self, login, password):
+        raise NotImplementedError
+
+    def _valid(self, status, head, body):
+        raise NotImplementedError
+
+    def _host_header(self):
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        default = 443 if self.use_ssl else 80
+        return host if self.port == default else f"{host}:{self.port}"
+
+    async def attempt(self, login, password):
+        method, path, headers, body = self._request(login, password)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self._host_header()}", "User-Agent: Mozilla/5.0",
+                 "Accept: */*", "Connection: keep-alive"] + headers
+        payload = body.encode("utf-8", "surrogateescape") if body is not None else b""
+        if body is not None:
+            lines.append(f"Content-Length: {len(payload)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("utf-8", "surrogateescape") + payload)
+        await self.writer.drain()
+        status, head, response_body = await self._response(method)
+        return self._valid(status, head, response_body)
+
+    async def _response(self, method):
+        status_line = await self._readline()
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise ProtocolError(f"Réponse HTTP invalide: {status_line}")
+        version, status = parts[0], int(parts[1])
+        head = [status_line]
+        headers = {}
+        while True:
+            line = await self._readline()
+            if not line:
+                break
+            head.append(line)
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        if "close" in connection or (version == "HTTP/1.0" and "keep-alive" not in connection):
+            self.reusable = False
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            body = await self._read_chunked()
+        elif "content-length" in headers:
+            length = int(headers["content-length"])
+            if length > MAX_HTTP_BODY:
+                raise ProtocolError(f"Réponse HTTP trop volumineuse ({length} octets)")
+            body = await self.reader.readexactly(length)
+        else:
+            # Corps délimité par la fermeture de la connexion
+            body = await self.reader.read(MAX_HTTP_BODY)
+            self.reusable = False
+        return status, "\r\n".join(head), body.decode("utf-8", "replace")
+
+    async def _read_chunked(self):
+        body = bytearray()
+        while True:
+            size = int((await self._readline()).split(";")[0].strip() or "0", 16)
+            if size == 0:
+                # Trailers éventuels jusqu'à la ligne vide
+                while await self._readline():
+                    pass
+                return bytes(body)
+            if len(body) + size > MAX_HTTP_BODY:
+                raise ProtocolError("Réponse HTTP trop volumineuse")
+            body += await self.reader.readexactly(size)
+            await self._readline()
+
+
+class _HttpBasicSession(_HttpSession):
+
+    def _request(self, login, password):
+        token = base64.b64encode(f"{login}:{password}".encode("utf-8", "surrogateescape")).decode()
+        return "GET", self.options.get("form_path") or "/", [f"Authorization: Basic {token}"], None
+
+    def _valid(self, status, head, body):
+        if status >= 500:
+            raise ProtocolError(f"Erreur du serveur HTTP ({status})")
+        return 200 <= status < 400
+
+
+class _HttpFormSession(_HttpSession):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        condition = self.options.get("form_success", "F=incorrect")
+        # Comme Hydra : "S=texte" (succès), "F=texte" ou texte seul (échec)
+        if condition.startswith("S="):
+            self._success, self._needle = True, condition[2:]
+        else:
+            self._success, self._needle = False, condition[2:] if condition.startswith("F=") else condition
+        if not self._needle:
+            raise ValueError("Condition de succès ou d'échec du formulaire vide")
+
+    def _request(self, login, password):
+        data = self.options.get("form_data", "username=^USER^&password=^PASS^")
+        # Lignes non UTF-8 des wordlists (rockyou...) : octets d'origine, encodés tels quels
+        data = data.replace("^USER^", quote_plus(login, errors="surrogateescape")) \
+            .replace("^PASS^", quote_plus(password, errors="surrogateescape"))
+        return "POST", self.options.get("form_path") or "/", \
+            ["Content-Type: application/x-www-form-urlencoded"], data
+
+    def _valid(self, status, head, body):
+        if status >= 500:
+            raise ProtocolError(f"Erreur du serveur HTTP ({status})")
+        found = self._needle in head or self._needle in body
+        return found if self._success else not found
+
+
+# Service -> (session, port par défaut, TLS)
+NATIVE_PROTOCOLS = {
+    "ftp": (_FtpSession, 21, False),
+    "pop3": (_Pop3Session, 110, False),
+    "imap": (_ImapSession, 143, False),
+    "http-get": (_HttpBasicSession, 80, False),
+    "https-get": (_HttpBasicSession, 443, True),
+    "http-post-form": (_HttpFormSession, 80, False),
+    "https-post-form": (_HttpFormSession, 443, True)
+}
+NATIVE_SERVICES = tuple(NATIVE_PROTOCOLS)
+
+
+class _ConnectionPool:
+    """Connexions inactives vers la cible, réutilisées par les essais suivants"""
+
+    def __init__(self, factory, connect_timeout):
+        self._factory = factory
+        self._connect_timeout = connect_timeout
+        self._idle = []
+        self.opened = 0
+        self.reused = 0
+
+    async def acquire(self):
+        if self._idle:
+            self.reused += 1
+            return self._idle.pop()
+        session = self._factory()
+        try:
+            await asyncio.wait_for(session.open(), self._connect_timeout)
+        except BaseException:
+            session.abort()
+            raise
+        self.opened += 1
+        return session
+
+    async def release(self, session):
+        if session.reusable:
+            self._idle.append(session)
+        else:
+            await session.close()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for session in idle:
+            await session.close()
+
+
+class NativeAttack:
+    """
+    Attaque d'une cible par le moteur natif
+
+    run() s'exécute dans sa propre boucle asyncio (thread appelant) ;
+    progress() et metrics() peuvent être appelés depuis un autre thread.
+    """
+
+    def __init__(self, target, service, userlist, passlist, options=None):
+        """
+        Args:
+            target (str): Adresse IP ou nom d'hôte de la cible
+            service (str): Service (voir NATIVE_SERVICES)
+            userlist (str): Chemin vers la liste d'utilisateurs
+            passlist (str): Chemin vers la liste de mots de passe
+            options (dict, optional): port, tasks (essais simultanés), ssl
+                (TLS implicite), exit_on_first, ordering, form_path,
+                form_data, form_success, connect_timeout, io_timeout
+        """
+        if service not in NATIVE_PROTOCOLS:
+            raise ValueError(f"Service non pris en charge par le moteur natif: {service} "
+                             f"({', '.join(NATIVE_SERVICES)})")
+        self.options = dict(options or {})
+        session_class, default_port, use_ssl = NATIVE_PROTOCOLS[service]
+        self.target = target
+        self.service = service
+        self.userlist = userlist
+        self.passlist = passlist
+        self.port = int(self.options.get("port") or default_port)
+        self.tasks = int(self.options.get("tasks") or NATIVE_TASKS)
+        if not 1 <= self.tasks <= MAX_NATIVE_TASKS:
+            raise ValueError(f"Le nombre d'essais simultanés doit être compris entre 1 et {MAX_NATIVE_TASKS}")
+        self.use_ssl = use_ssl or bool(self.options.get("ssl"))
+        self.connect_timeout = float(self.options.get("connect_timeout") or CONNECT_TIMEOUT)
+        self.io_timeout = float(self.options.get("io_timeout") or IO_TIMEOUT)
+        self._session_class = session_class
+        # Erreur de configuration (condition de formulaire...) signalée dès la création
+        session_class(target, self.port, self.use_ssl, self.options)
+        self.id = uuid.uuid4().hex[:12]
+        self.credentials = []
+        self.errors = []
+        self.done = 0
+        self.total = 0
+        self.failures = 0
+        self.connection_errors = 0
+        # Erreurs inattendues d'un essai (candidat abandonné) et d'un worker (attaque arrêtée)
+        self.attempt_errors = 0
+        self.crashed = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.timed_out = False
+        self.unreachable = False
+        self.started_at = None
+        self.finished_at = None
+        self._pool = None
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._latency_count = 0
+        self._latency_sum = 0.0
+        self._latency_min = None
+        self._latency_max = 0.0
+        self._found_logins = set()
+        self._stop = threading.Event()
+        self._on_line = None
+
+    def describe(self):
+        """Équivalent de la commande Hydra (affichage)"""
+        return f"native {self.service}://{self.target}:{self.port} (tasks={self.tasks})"
+
+    def stop(self):
+        """Demande l'arrêt de l'attaque (les essais en cours se terminent)"""
+        self._stop.set()
+
+    def _emit(self, line):
+        if self._on_line is not None:
+            self._on_line(line)
+
+    def _candidates(self, prepared):
+        """Couples (login, mot de passe) dans l'ordre de Hydra (-C, -u ou utilisateur par utilisateur)"""
+        def _read(path):
+            with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+                for line in f:
+                    yield line.rstrip("\r\n")
+
+        if prepared.get("combo_file"):
+            for line in _read(prepared["combo_file"]):
+                login, _, password = line.partition(":")
+                yield login, password
+            return
+        users = list(_read(prepared["userlist"]))
+        if prepared.get("loop_users"):
+            for password in _read(prepared["passlist"]):
+                for login in users:
+                    yield login, password
+        else:
+            for login in users:
+                for password in _read(prepared["passlist"]):
+                    yield login, password
+
+    def _record_latency(self, seconds):
+        self._latencies.append(seconds)
+        self._latency_count += 1
+        self._latency_sum += seconds
+        self._latency_min = seconds if self._latency_min is None else min(self._latency_min, seconds)
+        self._latency_max = max(self._latency_max, seconds)
+
+    def _error(self, message):
+        line = f"[ERROR] {message}"
+        self.errors = (self.errors + [line])[-20:]
+        logger.warning(f"Moteur natif {self.target}:{self.port}: {message}")
+        self._emit(line)
+
+    async def _try(self, login, password):
+        """Un essai, sur une connexion du pool (rouverte si le serveur l'a fermée)"""
+        last_error = None
+        for retry in range(MAX_RETRIES):
+            if retry and self._stop.is_set():
+                return None
+            try:
+                session = await self._pool.acquire()
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ProtocolError) as e:
+                self.connection_errors += 1
+                last_error = str(e) or "délai de connexion dépassé"
+                await asyncio.sleep(0.5)
+                continue
+            except Exception as e:
+                return self._attempt_failed(login, e)
+            started = time.perf_counter()
+            try:
+                valid = await asyncio.wait_for(session.attempt(login, password), self.io_timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ProtocolError) as e:
+                # Connexion fermée entre deux essais (keep-alive expiré, limite d'essais du serveur)
+                session.abort()
+                self.connection_errors += 1
+                last_error = str(e) or "délai dépassé"
+                continue
+            except Exception as e:
+                session.abort()
+                return self._attempt_failed(login, e)
+            self._record_latency(time.perf_counter() - started)
+            await self._pool.release(session)
+            return valid
+        if not self._pool.opened:
+            # Aucune connexion n'a jamais abouti : inutile d'essayer les autres candidats
+            if not self.unreachable:
+                self.unreachable = True
+                self._error(f"Cible injoignable {self.target}:{self.port}: {last_error}")
+            self._stop.set()
+            return None
+        self._error(f"Essai abandonné pour {login} après {MAX_RETRIES} tentatives: {last_error}")
+        return None
+
+    def _attempt_failed(self, login, error):
+        """Erreur inattendue pendant un essai : le candidat est abandonné, l'attaque continue"""
+        self.attempt_errors += 1
+        logger.debug(f"Erreur inattendue pendant l'essai de {login}", exc_info=error)
+        self._error(f"Essai abandonné pour {login}: {type(error).__name__}: {error}")
+        return None
+
+    async def _worker(self, candidates):
+        try:
+            await self._work(candidates)
+        except Exception:
+            # Les autres workers s'arrêtent aussitôt (voir _run)
+            self._stop.set()
+            raise
+
+    async def _work(self, candidates):
+        while not self._stop.is_set():
+            try:
+                login, password = next(candidates)
+            except StopIteration:
+                return
+            # Comme Hydra : un utilisateur trouvé n'est plus essayé
+            if login in self._found_logins:
+                self.done += 1
+                continue
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                valid = await self._try(login, password)
+            finally:
+                self.in_flight -= 1
+            self.done += 1
+            if valid is None:
+                continue
+            if not valid:
+                self.failures += 1
+                continue
+            if login in self._found_logins:
+                continue
+            self._found_logins.add(login)
+            line = f"[{self.port}][{self.service}] host: {self.target}   login: {login}   password: {password}"
+            self.credentials.append({"host": self.target, "port": self.port, "service": self.service,
+                                     "login": login, "password": password, "line": line})
+            logger.info(f"Credentials trouvés: {line}")
+            self._emit(line)
+            if self.options.get("exit_on_first"):
+                self._stop.set()
+
+    async def _run(self, prepared, stop_event, deadline):
+        self._pool = _ConnectionPool(
+            lambda: self._session_class(self.target, self.port, self.use_ssl, self.options), self.connect_timeout)
+        candidates = self._candidates(prepared)
+        workers = [asyncio.ensure_future(self._worker(candidates)) for _ in range(self.tasks)]
+        stopping_since = None
+        try:
+            while True:
+                _, pending = await asyncio.wait(workers, timeout=0.2)
+                for worker in workers:
+                    if worker.done() and not worker.cancelled() and worker.exception() is not None \
+                            and self.crashed is None:
+                        # Arrêt immédiat, les identifiants déjà trouvés restent dans le résultat
+                        error = worker.exception()
+                        self.crashed = f"{type(error).__name__}: {error}"
+                        logger.error(f"Moteur natif {self.target}:{self.port} interrompu", exc_info=error)
+                        self._error(f"Attaque interrompue: {self.crashed}")
+                        self._stop.set()
+                if not pending:
+                    break
+                now = time.monotonic()
+                if stop_event is not None and stop_event.is_set():
+                    self._stop.set()
+                if deadline is not None and now >= deadline:
+                    self.timed_out = True
+                    self._stop.set()
+                    stopping_since = now - STOP_GRACE
+                if self._stop.is_set():
+                    # Les essais en cours ont STOP_GRACE secondes pour se terminer
+                    stopping_since = stopping_since or now
+                    if now - stopping_since >= STOP_GRACE:
+                        break
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self._pool.close()
+
+    def _prepare(self, work_dir):
+        prepared = prepare_candidates(self.userlist, self.passlist, self.service,
+                                      self.options.get("ordering", ORDERING_ORIGINAL), work_dir)
+        if self.options.get("loop_users"):
+            prepared["loop_users"] = True
+        if prepared.get("combo_file"):
+            self.total = prepared["pairs"]
+        else:
+            self.total = count_lines(prepared["userlist"]) * count_lines(prepared["passlist"])
+        return prepared
+
+    def run(self, timeout=None, stop_event=None, on_line=None):
+        """
+        Exécute l'attaque et attend sa fin
+
+        Args:
+            timeout (float, optional): Durée maximale en secondes
+            stop_event (threading.Event, optional): Arrêt anticipé
+            on_line (callable, optional): Appelé avec chaque ligne de sortie (format Hydra)
+
+        Returns:
+            dict: Résultat (voir result())
+        """
+        self._on_line = on_line
+        work_dir = os.path.join(NATIVE_WORK_DIR, self.id)
+        self.started_at = time.monotonic()
+        deadline = self.started_at + timeout if timeout else None
+        try:
+            prepared = self._prepare(work_dir)
+            self._emit(f"[DATA] moteur natif, {self.tasks} essais simultanés, {self.total} essais, "
+                       f"{self.service}://{self.target}:{self.port}")
+            asyncio.run(self._run(prepared, stop_event, deadline))
+        finally:
+            self._stop.set()
+            self.finished_at = time.monotonic()
+            shutil.rmtree(work_dir, ignore_errors=True)
+        found = len(self.credentials)
+        self._emit(f"1 of 1 target {'successfully ' if found else ''}completed, {found} valid password"
+                   f"{'s' if found != 1 else ''} found")
+        return self.result()
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def metrics(self):
+        """
+        Mesures de l'attaque
+
+        Returns:
+            dict: Essais simultanés (configurés / au plus), connexions ouvertes et
+            réutilisées, erreurs de connexion et d'essai, latences des essais en ms
+        """
+        samples = sorted(self._latencies)
+
+        def _percentile(rank):
+            return round(1000 * samples[min(len(samples) - 1, int(rank * len(samples)))], 2) if samples else None
+
+        pool = self._pool
+        return {
+            "target": self.target,
+            "port": self.port,
+            "service": self.service,
+            "tasks": self.tasks,
+            "peak_concurrency": self.peak_in_flight,
+            "attempts": self._latency_count,
+            "failures": self.failures,
+            "connections_opened": pool.opened if pool else 0,
+            "connections_reused": pool.reused if pool else 0,
+            "connection_errors": self.connection_errors,
+            "attempt_errors": self.attempt_errors,
+            "latency_ms": {
+                "min": round(1000 * self._latency_min, 2) if self._latency_min is not None else None,
+                "avg": round(1000 * self._latency_sum / self._latency_count, 2) if self._latency_count else None,
+                "p50": _percentile(0.5),
+                "p95": _percentile(0.95),
+                "max": round(1000 * self._latency_max, 2) if self._latency_count else None
+            }
+        }
+
+    def progress(self):
+        """Progression (mêmes clés que HydraOutputParser.progress) et mesures"""
+        elapsed = self.elapsed
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total - self.done)
+        return {
+            "tries_done": self.done,
+            "tries_total": self.total,
+            "percent": round(100.0 * self.done / self.total, 2) if self.total else 0.0,
+            "tries_per_second": round(rate, 2),
+            "eta_seconds": round(remaining / rate, 1) if rate and self.total else None,
+            "credentials_found": len(self.credentials),
+            "metrics": self.metrics()
+        }
+
+    def result(self):
+        """
+        Résultat de l'attaque, sous la forme de celui de run_hydra
+
+        Returns:
+            dict: success, credentials (lignes au format Hydra), stderr,
+            command, engine, progress et metrics
+        """
+        result = {
+            "success": not self.timed_out and not self.unreachable and self.crashed is None,
+            "engine": ENGINE_NATIVE,
+            "credentials": [credential["line"] for credential in self.credentials],
+            "stderr": "\n".join(self.errors),
+            "command": self.describe(),
+            "progress": self.progress(),
+            "metrics": self.metrics()
+        }
+        if self.timed_out:
+            result["error"] = "Délai d'exécution dépassé"
+        elif self.unreachable:
+            result["error"] = f"Cible injoignable: {self.target}:{self.port}"
+        elif self.crashed is not None:
+            result["error"] = f"Erreur d'exécution : {self.crashed}"
+        return result
+
+
+def run_native_attack(target, service, userlist, passlist, options=None, timeout=None):
+    """
+    Teste des identifiants avec le moteur natif et attend la fin
+
+    Args:
+        target (str): Adresse IP ou nom d'hôte de la cible
+        service (str): Service (voir NATIVE_SERVICES)
+        userlist (str): Chemin vers la liste d'utilisateurs
+        passlist (str): Chemin vers la liste de mots de passe
+        options (dict, optional): Options (voir NativeAttack)
+        timeout (float, optional): Durée maximale en secondes
+
+    Returns:
+        dict: Résultat (voir NativeAttack.result)
+    """
+    logger.info(f"Lancement de l'attaque native sur {target} - Service: {service}")
+    try:
+        attack = NativeAttack(target, service, userlist, passlist, options)
+    except ValueError as e:
+        return {"success": False, "engine": ENGINE_NATIVE, "error": str(e)}
+    output = []
+    try:
+        result = attack.run(timeout=timeout, on_line=output.append)
+    except Exception as e:
+        logger.error(f"Erreur d'exécution du moteur natif : {str(e)}", exc_info=True)
+        return {"success": False, "engine": ENGINE_NATIVE, "error": f"Erreur d'exécution : {str(e)}",
+                "command": attack.describe()}
+    result["stdout"] = "\n".join(output)
+    return result
@@ -0,0 +1,489 @@
+# services/packet_columns.py
+"""
+Export en colonnes des en-têtes disséqués d'une capture.
+
+Le fichier `<capture>.cols` contient un en-tête JSON (dictionnaires, schéma,
+identité de la capture source) suivi d'une colonne binaire typée par champ,
+alignée sur 8 octets. Les adresses, noms de protocoles et piles de couches
+sont encodés par dictionnaire : chaque paquet ne stocke que des entiers. Les
+détails applicatifs déjà bornés (journaux DNS / ARP) sont stockés tels quels
+dans l'en-tête.
+
+Les colonnes sont relues par np.memmap : une nouvelle analyse ou un nouveau
+rapport se résume alors à des group-by vectorisés, sans relire ni disséquer
+la capture.
+"""
+import array
+import json
+import os
+import struct
+import sys
+from datetime import datetime
+from utils.logger import get_logger
+from services.pcap_reader import PcapReader, open_capture
+from services.pcap_analyzer import CaptureAnalyzer
+from services.flow_table import FlowTable
+from services.packet_table import USE_NUMPY
+from services.traffic_series import series_from_arrays
+
+# Configuration du logger
+logger = get_logger('packet_columns')
+
+if USE_NUMPY:
+    import numpy as np
+
+COLUMNS_SUFFIX = ".cols"
+COLUMNS_MAGIC = b"PCOL"
+COLUMNS_VERSION = 3
+
+# Nom, code array et dtype NumPy (little-endian) de chaque colonne
+COLUMNS = (
+    ("ts", "d", "<f8"),
+    ("length", "I", "<u4"),
+    ("caplen", "I", "<u4"),
+    ("src", "I", "<u4"),
+    ("dst", "I", "<u4"),
+    ("ip_proto", "B", "u1"),
+    ("sport", "H", "<u2"),
+    ("dport", "H", "<u2"),
+    ("tcp_flags", "B", "u1"),
+    ("protocol", "H", "<u2"),
+    ("layers", "H", "<u2"),
+)
+
+_PREAMBLE = struct.Struct("<4sI")
+
+
+def columns_path(pcap_file):
+    """Chemin du fichier de colonnes associé à une capture"""
+    return pcap_file + COLUMNS_SUFFIX
+
+
+class _Dictionary:
+    """Encodage par dictionnaire (valeur -> identifiant)"""
+
+    def __init__(self, first=None):
+        self.values = []
+        self.ids = {}
+        if first is not None:
+            self.encode(first)
+
+    def encode(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+
+class PacketColumnsBuilder:
+    """Accumule les champs disséqués paquet par paquet puis écrit le fichier"""
+
+    def __init__(self):
+        self.columns = {name: array.array(code) for name, code, _ in COLUMNS}
+        # L'identifiant 0 correspond à "pas d'adresse"
+        self.addresses = _Dictionary("")
+        self.protocols = _Dictionary()
+        self.layers = _Dictionary()
+
+    def add(self, record, info):
+        """
+        Ajoute un paquet
+
+        Args:
+            record (PacketRecord): Paquet lu
+            info (PacketInfo): En-têtes disséqués (CaptureAnalyzer.add)
+        """
+        c = self.columns
+        c["ts"].append(record.timestamp)
+        c["length"].append(record.length)
+        c["caplen"].append(record.caplen)
+        c["src"].append(self.addresses.encode(info.src))
+        c["dst"].append(self.addresses.encode(info.dst))
+        c["ip_proto"].append(info.ip_proto)
+        c["sport"].append(info.sport)
+        c["dport"].append(info.dport)
+        c["tcp_flags"].append(info.tcp_flags)
+        c["protocol"].append(self.protocols.encode(info.protocol))
+        c["layers"].append(self.layers.encode(info.layers))
+
+    def save(self, pcap_file, extras=None):
+        """
+        Écrit le fichier de colonnes à côté de la capture
+
+        Args:
+            pcap_file (str): Chemin vers la capture source
+            extras (dict, optional): Détails de l'analyse non reconstructibles depuis
+                les colonnes (CaptureAnalyzer.protocol_details())
+        """
+        stats = os.stat(pcap_file)
+        rows = len(self.columns["ts"])
+        header = {
+            "version": COLUMNS_VERSION,
+            "source": {"size": stats.st_size, "mtime": stats.st_mtime_ns},
+            "rows": rows,
+            "columns": [],
+            "dictionaries": {
+                "address": self.addresses.values,
+                "protocol": self.protocols.values,
+                "layers": [list(layers) for layers in self.layers.values]
+            },
+            "extras": extras or {}
+        }
+        # Offsets des colonnes, calculés après l'en-tête (aligné sur 8 octets) ; la
+        # taille de l'en-tête dépend elle-même des offsets, d'où l'itération
+        sizes = [(name, dtype, rows * struct.calcsize(code)) for name, code, dtype in COLUMNS]
+        header_bytes = b""
+        while True:
+            offset = _align(_PREAMBLE.size + len(header_bytes))
+            header["columns"] = []
+            for name, dtype, size in sizes:
+                header["columns"].append({"name": name, "dtype": dtype, "offset": offset})
+                offset = _align(offset + size)
+            encoded = json.dumps(header).encode()
+            if len(encoded) == len(header_bytes):
+                break
+            header_bytes = encoded
+        header_bytes = encoded
+
+        path = columns_path(pcap_file)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_PREAMBLE.pack(COLUMNS_MAGIC, len(header_bytes)))
+            f.write(header_bytes)
+            for (name, code, _), column in zip(COLUMNS, header["columns"]):
+                f.write(b"\0" * (column["offset"] - f.tell()))
+                values = self.columns[name]
+                if sys.byteorder != "little":
+                    values = array.array(code, values)
+                    values.byteswap()
+                values.tofile(f)
+        os.replace(tmp_path, path)
+        logger.info(f"Colonnes exportées: {path} ({rows} paquets)")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def load_columns(pcap_file):
+    """
+    Projette en mémoire les colonnes d'une capture
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+
+    Returns:
+        dict: {"rows", "columns": {nom: np.memmap}, "dictionaries"}, ou None si le
+        fichier est absent, périmé ou si NumPy n'est pas disponible
+    """
+    if not USE_NUMPY:
+        return None
+    path = columns_path(pcap_file)
+    try:
+        stats = os.stat(pcap_file)
+        with open(path, "rb") as f:
+            magic, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != COLUMNS_MAGIC:
+                return None
+            header = json.loads(f.read(header_len))
+    except (OSError, ValueError, struct.error) as e:
+        logger.debug(f"Colonnes indisponibles pour {pcap_file}: {e}")
+        return None
+
+    source = header.get("source", {})
+    if header.get("version") != COLUMNS_VERSION or source.get("size") != stats.st_size \
+            or source.get("mtime") != stats.st_mtime_ns:
+        logger.debug(f"Colonnes périmées pour {pcap_file}")
+        return None
+
+    rows = header["rows"]
+    columns = {}
+    for column in header["columns"]:
+        if rows:
+            columns[column["name"]] = np.memmap(path, dtype=column["dtype"], mode="r",
+                                                offset=column["offset"], shape=(rows,))
+        else:
+            columns[column["name"]] = np.zeros(0, dtype=column["dtype"])
+    return {"rows": rows, "columns": columns, "dictionaries": header["dictionaries"],
+            "extras": header.get("extras", {})}
+
+
+def export_columns(pcap_file):
+    """
+    Dissèque une capture et exporte ses colonnes (analyse complète au passage)
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+
+    Returns:
+        dict: Résultat de l'analyse (même format que CaptureAnalyzer.result())
+    """
+    analyzer = CaptureAnalyzer(pcap_file)
+    builder = PacketColumnsBuilder()
+    with open_capture(pcap_file) as f:
+        for record in PcapReader(f):
+            builder.add(record, analyzer.add(record))
+    builder.save(pcap_file, analyzer.protocol_details())
+    return analyzer.result()
+
+
+def _ordered_counts(values):
+    """Valeurs distinctes et effectifs, dans l'ordre de première apparition"""
+    uniq, first, counts = np.unique(values, return_index=True, return_counts=True)
+    order = np.argsort(first, kind="stable")
+    return uniq[order], counts[order]
+
+
+def _top_ordered(values, n):
+    """n valeurs les plus fréquentes (ex aequo départagés par première apparition)"""
+    uniq, counts = _ordered_counts(values)
+    top = np.argsort(-counts, kind="stable")[:n]
+    return uniq[top], counts[top]
+
+
+def analysis_from_columns(data, pcap_file=None):
+    """
+    Analyse une capture à partir de ses colonnes, sans dissection
+
+    Le résultat a le même format (et, à l'éviction des flux près, le même
+    contenu) que CaptureAnalyzer.result().
+
+    Args:
+        data (dict): Colonnes chargées par load_columns()
+        pcap_file (str, optional): Fichier reporté dans le résultat
+
+    Returns:
+        dict: Statistiques de la capture
+    """
+    rows = data["rows"]
+    if not rows:
+        return CaptureAnalyzer(pcap_file).result()
+
+    c = data["columns"]
+    addresses = data["dictionaries"]["address"]
+    protocol_names = data["dictionaries"]["protocol"]
+    layer_stacks = data["dictionaries"]["layers"]
+
+    ts = np.asarray(c["ts"])
+    length = np.asarray(c["length"]).astype(np.int64)
+    src = np.asarray(c["src"])
+    dst = np.asarray(c["dst"])
+    ip_proto = np.asarray(c["ip_proto"])
+    sport = np.asarray(c["sport"])
+    dport = np.asarray(c["dport"])
+    has_ip = src != 0
+
+    ip_ids = np.unique(np.concatenate([src[has_ip], dst[has_ip]]))
+    protocols = set()
+    for layers_id in np.unique(c["layers"]):
+        protocols.update(layer_stacks[layers_id])
+
+    uniq, counts = _top_ordered(c["protocol"], CaptureAnalyzer.TOP_PROTOCOLS)
+    top_protocols = [(protocol_names[u], int(n)) for u, n in zip(uniq, counts)]
+
+    def _ports(proto):
+        mask = ip_proto == proto
+        ports = np.union1d(sport[mask & (sport != 0)], dport[mask & (dport != 0)])
+        return [int(port) for port in ports]
+
+    def _address_counts(values):
+        uniq, counts = _top_ordered(values, CaptureAnalyzer.TOP_N)
+        return {addresses[u]: int(n) for u, n in zip(uniq, counts)}
+
+    def _port_counts(values):
+        uniq, counts = _top_ordered(values[values != 0], CaptureAnalyzer.TOP_N)
+        return {int(u): int(n) for u, n in zip(uniq, counts)}
+
+    first_packets = []
+    for i in range(min(rows, CaptureAnalyzer.FIRST_PACKETS)):
+        first_packets.append({
+            "number": i + 1,
+            "time": datetime.fromtimestamp(float(ts[i])).strftime("%b %d, %Y %H:%M:%S.%f"),
+            "src": addresses[src[i]],
+            "dst": addresses[dst[i]],
+            "protocol": protocol_names[c["protocol"][i]],
+            "length": int(length[i])
+        })
+
+    flow_count, flows, conversations, flow_starts = _flows_from_columns(c, addresses, has_ip, length)
+
+    analysis_result = {
+        "file": pcap_file,
+        "analysis_mode": "exact",
+        "packet_count": rows,
+        "unique_ips": len(ip_ids),
+        "ip_addresses": [addresses[i] for i in ip_ids],
+        "protocols": list(protocols),
+        "top_protocols": top_protocols,
+        "avg_packet_size": round(int(length.sum()) / rows, 2),
+        "tcp_ports": _ports(6),
+        "udp_ports": _ports(17),
+        "first_packets": first_packets,
+        "capture_duration": round(float(ts.max() - ts.min()), 6),
+        "flow_count": flow_count,
+        "evicted_flows": 0,
+        "flows": flows,
+        "conversations": conversations,
+        "ip_counts": {
+            "src": _address_counts(src[has_ip]),
+            "dst": _address_counts(dst[has_ip])
+        },
+        "port_counts": {
+            "src": _port_counts(sport),
+            "dst": _port_counts(dport)
+        },
+        "time_series": _series(c, protocol_names, flow_starts, rows,
+                               CaptureAnalyzer.SERIES_BIN_WIDTH, CaptureAnalyzer.SERIES_POINTS)
+    }
+    analysis_result.update(column_statistics(data, CaptureAnalyzer.TOP_N))
+    analysis_result.update(data["extras"])
+    return analysis_result
+
+
+def _series(c, protocol_names, flow_starts, rows, bin_width, max_points):
+    """Série temporelle vectorisée (flow_starts: lignes ouvrant un flux)"""
+    new_flow_mask = np.zeros(rows, dtype=bool)
+    new_flow_mask[flow_starts] = True
+    return series_from_arrays(np.asarray(c["ts"]), np.asarray(c["length"]), np.asarray(c["protocol"]),
+                              protocol_names, new_flow_mask, bin_width, max_points)
+
+
+def series_from_columns(data, bin_width, max_points):
+    """
+    Série temporelle d'une capture calculée sur ses colonnes
+
+    Args:
+        data (dict): Colonnes chargées par load_columns()
+        bin_width (float): Largeur initiale des intervalles (secondes)
+        max_points (int): Nombre maximal de points
+
+    Returns:
+        dict: Série (format de TimeSeriesAccumulator.result())
+    """
+    if not data["rows"]:
+        return CaptureAnalyzer(bin_width=bin_width, max_points=max_points).series.result()
+    c = data["columns"]
+    has_ip = np.asarray(c["src"]) != 0
+    length = np.asarray(c["length"]).astype(np.int64)
+    flow_starts = _flows_from_columns(c, data["dictionaries"]["address"], has_ip, length)[3]
+    return _series(c, data["dictionaries"]["protocol"], flow_starts, data["rows"], bin_width, max_points)
+
+
+def _flows_from_columns(c, addresses, has_ip, length):
+    """
+    Table des flux 5-tuple reconstruite par tri et réductions segmentées
+
+    Returns:
+        tuple: Nombre de flux, flux principaux, conversations, lignes ouvrant un flux
+    """
+    index = np.flatnonzero(has_ip)
+    if not len(index):
+        return 0, [], {}, index
+
+    # Rang de chaque adresse dans l'ordre lexicographique (comme flow_key)
+    rank = np.zeros(len(addresses), dtype=np.int64)
+    for position, address_id in enumerate(sorted(range(1, len(addresses)), key=lambda i: addresses[i])):
+        rank[address_id] = position + 1
+
+    src = c["src"][index].astype(np.int64)
+    dst = c["dst"][index].astype(np.int64)
+    sport = c["sport"][index].astype(np.int64)
+    dport = c["dport"][index].astype(np.int64)
+    proto = c["ip_proto"][index].astype(np.int64)
+    ts = np.asarray(c["ts"])[index]
+    size = length[index]
+    flags = c["tcp_flags"][index]
+
+    forward = (rank[src] < rank[dst]) | ((rank[src] == rank[dst]) & (sport <= dport))
+    a = np.where(forward, src, dst)
+    b = np.where(forward, dst, src)
+    port_a = np.where(forward, sport, dport)
+    port_b = np.where(forward, dport, sport)
+
+    key_hosts = (a.astype(np.uint64) << np.uint64(32)) | b.astype(np.uint64)
+    key_ports = (proto.astype(np.uint64) << np.uint64(32)) | (port_a.astype(np.uint64) << np.uint64(16)) \
+        | port_b.astype(np.uint64)
+    # Tri stable : le premier paquet de chaque groupe est le premier du flux dans le fichier
+    order = np.lexsort((key_ports, key_hosts))
+    hosts_sorted = key_hosts[order]
+    ports_sorted = key_ports[order]
+    boundary = np.ones(len(order), dtype=bool)
+    boundary[1:] = (hosts_sorted[1:] != hosts_sorted[:-1]) | (ports_sorted[1:] != ports_sorted[:-1])
+    starts = np.flatnonzero(boundary)
+
+    packets = np.diff(np.append(starts, len(order)))
+    flow_bytes = np.add.reduceat(size[order], starts)
+    first_seen = np.minimum.reduceat(ts[order], starts)
+    last_seen = np.maximum.reduceat(ts[order], starts)
+    tcp_flags = np.bitwise_or.reduceat(flags[order], starts)
+    packets_ab = np.add.reduceat(forward[order].astype(np.int64), starts)
+    bytes_ab = np.add.reduceat(np.where(forward, size, 0)[order], starts)
+    first_index = order[starts]
+    initiator_is_a = forward[first_index]
+
+    # Flux dans l'ordre d'apparition (ordre d'insertion de FlowTable)
+    appearance = np.argsort(first_index, kind="stable")
+    top = appearance[np.argsort(-flow_bytes[appearance], kind="stable")[:CaptureAnalyzer.TOP_FLOWS]]
+
+    flows = []
+    for g in top:
+        i = first_index[g]
+        key = (int(proto[i]), addresses[a[i]], int(port_a[i]), addresses[b[i]], int(port_b[i]))
+        entry = [int(packets[g]), int(flow_bytes[g]), float(first_seen[g]), float(last_seen[g]),
+                 int(tcp_flags[g]), int(packets_ab[g]), int(bytes_ab[g]), bool(initiator_is_a[g])]
+        flows.append(FlowTable.flow_to_dict(key, entry))
+
+    # Conversations A <-> B : somme des paquets des flux de chaque paire d'hôtes
+    group_a = a[first_index][appearance]
+    group_b = b[first_index][appearance]
+    low = np.where(rank[group_a] <= rank[group_b], group_a, group_b)
+    high = np.where(rank[group_a] <= rank[group_b], group_b, group_a)
+    pair_keys = (low.astype(np.uint64) << np.uint64(32)) | high.astype(np.uint64)
+    pairs, pair_first, pair_inverse = np.unique(pair_keys, return_index=True, return_inverse=True)
+    pair_packets = np.bincount(pair_inverse, weights=packets[appearance], minlength=len(pairs))
+    pair_order = np.argsort(pair_first, kind="stable")
+    pair_top = pair_order[np.argsort(-pair_packets[pair_order], kind="stable")[:CaptureAnalyzer.TOP_N]]
+    conversations = {}
+    for p in pair_top:
+        key = int(pairs[p])
+        conversations[f"{addresses[key >> 32]} <-> {addresses[key & 0xFFFFFFFF]}"] = int(pair_packets[p])
+
+    return len(starts), flows, conversations, index[first_index]
+
+
+def column_statistics(data, n=10):
+    """
+    Top talkers et débit par seconde calculés sur les colonnes
+
+    Args:
+        data (dict): Colonnes chargées par load_columns()
+        n (int): Nombre d'hôtes à retourner
+
+    Returns:
+        dict: top_talkers et bytes_per_second (format de CaptureAnalyzer.result())
+    """
+    c = data["columns"]
+    addresses = data["dictionaries"]["address"]
+    if not data["rows"]:
+        return {"top_talkers": [], "bytes_per_second": []}
+
+    length = np.asarray(c["length"]).astype(np.float64)
+    has_ip = np.asarray(c["src"]) != 0
+    hosts = np.concatenate([c["src"][has_ip], c["dst"][has_ip]])
+    weights = np.concatenate([length[has_ip], length[has_ip]])
+    top_talkers = []
+    if len(hosts):
+        uniq, inverse = np.unique(hosts, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(uniq))
+        sums = np.bincount(inverse, weights=weights, minlength=len(uniq))
+        for i in np.argsort(-sums, kind="stable")[:n]:
+            top_talkers.append({"ip": addresses[uniq[i]], "packets": int(counts[i]), "bytes": int(sums[i])})
+
+    # Secondes entières, comme CaptureAnalyzer.bytes_per_second()
+    seconds = np.floor(np.asarray(c["ts"])).astype(np.int64)
+    seconds -= seconds.min()
+    return {
+        "top_talkers": top_talkers,
+        "bytes_per_second": np.bincount(seconds, weights=length).astype(np.int64).tolist()
+    }
@@ -1,14 +1,36 @@
+from collections import deque
 from datetime import datetime
 import os
 import subprocess
 import json
-import tempfile
+import threading
+import time
 from utils.logger import get_logger
+from services.pcap_reader import (PcapReader, PcapFormatError, open_capture, read_capture_metadata,
+                                  dissect_packet, LINKTYPE_ETHERNET)
+from services.pcap_writer import RingPcapWriter, DEFAULT_SNAPLEN, capture_extension
+from services.pcap_analyzer import CaptureAnalyzer, MODE_EXACT, ANALYSIS_MODES
+from services.analysis_cache import get_analysis_cache
+from services.packet_columns import load_columns, analysis_from_columns, export_columns, series_from_columns
+from services.flow_table import FlowTable
+from services.traffic_series import TimeSeriesAccumulator
+from services.tcp_reassembly import list_streams
+from services.capture_sampling import CaptureSampler, estimate_totals, merge_sampling, HEADER_SNAPLEN
 
 # Configuration du logger
 logger = get_logger('packet_sniffer')
 
 CAPTURE_DIR = "captures"
+# Bornes de la série temporelle demandée par l'API
+MAX_SERIES_POINTS = 5000
+# Flux TCP au plus par page de la liste des flux
+MAX_STREAM_PAGE = 1000
+# Dernières lignes de la sortie d'erreur de tcpdump conservées pour les messages d'erreur
+TCPDUMP_STDERR_LINES = 50
+
+# Noms de captures déjà attribués (captures simultanées)
+_capture_names = set()
+_capture_names_lock = threading.Lock()
 
 def get_interfaces():
     """Récupère la liste des interfaces réseau disponibles"""
@@ -44,186 +66,348 @@ def get_interfaces():
         logger.error(f"Erreur lors de la récupération des interfaces: {e}", exc_info=True)
         return []
 
-def capture_packets(interface="eth0", packet_count=100):
+def _new_capture_writer(max_file_size_mb=None, rotate_seconds=None, ring_files=None,
+                        snaplen=None, metadata=None, compression=None, sampler=None):
     """
-    Capture les paquets réseau
+    Prépare l'écriture incrémentale d'une nouvelle capture
     
     Args:
-        interface (str): Interface réseau à utiliser pour la capture
-        packet_count (int): Nombre de paquets à capturer
+        max_file_size_mb (float, optional): Taille déclenchant une rotation (Mo)
+        rotate_seconds (float, optional): Durée déclenchant une rotation
+        ring_files (int, optional): Nombre de fichiers conservés dans l'anneau
+        snaplen (int, optional): Taille maximale enregistrée par paquet
+        metadata (dict, optional): Métadonnées écrites à côté de chaque fichier
+        compression (str, optional): Compression en flux des fichiers ("gzip" ou "xz")
+        sampler (CaptureSampler, optional): Échantillonnage dont les compteurs sont
+            ajoutés aux métadonnées de chaque fichier à sa fermeture
         
     Returns:
-        str: Chemin vers le fichier pcap généré
+        RingPcapWriter: Writer de capture (fichier unique si aucune rotation)
     """
-    logger.info(f"Démarrage de la capture sur {interface} - {packet_count} paquets")
+    extension = capture_extension(compression)
     
     # Créer le répertoire de captures s'il n'existe pas
     if not os.path.exists(CAPTURE_DIR):
         os.makedirs(CAPTURE_DIR)
         logger.debug(f"Création du dossier {CAPTURE_DIR}")
 
-    # Générer un nom de fichier unique avec timestamp
+    # Générer un nom de fichier unique avec timestamp (plusieurs captures
+    # peuvent démarrer dans la même seconde)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    pcap_filename = f"{CAPTURE_DIR}/capture_{timestamp}.pcap"
+    with _capture_names_lock:
+        base_path = f"{CAPTURE_DIR}/capture_{timestamp}"
+        suffix = 1
+        while base_path in _capture_names or os.path.exists(f"{base_path}{extension}") \
+                or os.path.exists(f"{base_path}_000{extension}"):
+            suffix += 1
+            base_path = f"{CAPTURE_DIR}/capture_{timestamp}_{suffix}"
+        _capture_names.add(base_path)
     
-    try:
-        # Capturer les paquets réseau
-        packets = sniff(iface=interface, count=packet_count)
+    max_file_size = int(max_file_size_mb * 1024 * 1024) if max_file_size_mb else None
+    
+    return RingPcapWriter(
+        base_path,
+        snaplen=snaplen or DEFAULT_SNAPLEN,
+        max_file_size=max_file_size,
+        rotate_seconds=rotate_seconds,
+        max_files=ring_files,
+        metadata=metadata,
+        compression=compression,
+        file_metadata=_sampling_counters(sampler) if sampler else None
+    )
+
+def _sampling_counters(sampler):
+    """Métadonnées d'échantillonnage d'un fichier qui vient d'être fermé"""
+    return lambda rotating: {"sampling": dict(sampler.parameters(), **sampler.file_counters(rotating))}
+
+def _new_sampler(sampling):
+    """
+    Prépare l'échantillonnage d'une capture
+    
+    Args:
+        sampling (dict, optional): Paramètres de CaptureSampler (mode, rate,
+            per_flow, headers_only)
         
-        # Enregistrer la capture dans un fichier pcap
-        wrpcap(pcap_filename, packets)
+    Returns:
+        CaptureSampler: Échantillonneur, None si tous les paquets sont écrits en entier
+    """
+    if not sampling:
+        return None
+    sampler = CaptureSampler(**sampling)
+    return sampler if sampler.active else None
+
+def _capture_metadata(tool, interface, packet_count, duration, bpf_filter, snaplen, compression=None,
+                      sampler=None):
+    """Métadonnées enregistrées avec une capture (.meta.json)"""
+    return {
+        "tool": tool,
+        "interface": interface,
+        "bpf_filter": bpf_filter or "",
+        "snaplen": snaplen or DEFAULT_SNAPLEN,
+        "compression": compression,
+        "sampling": sampler.parameters() if sampler else None,
+        "packet_count": packet_count,
+        "duration": duration,
+        "started_at": datetime.now().isoformat(timespec="seconds")
+    }
+
+def _check_stop_condition(packet_count, duration, stop_event=None):
+    """Une capture doit s'arrêter sur un nombre de paquets, une durée ou une demande d'arrêt"""
+    if not packet_count and not duration and stop_event is None:
+        raise ValueError("Un nombre de paquets ou une durée de capture est requis")
+
+def _check_snaplen(snaplen):
+    """Le snaplen doit être compris entre 1 et DEFAULT_SNAPLEN octets"""
+    if snaplen is not None and not 0 < snaplen <= DEFAULT_SNAPLEN:
+        raise ValueError(f"Le snaplen doit être compris entre 1 et {DEFAULT_SNAPLEN} octets")
+
+def _should_stop(stop_event, deadline):
+    """Vrai si l'arrêt a été demandé ou si la durée maximale est atteinte"""
+    if stop_event is not None and stop_event.is_set():
+        return True
+    return deadline is not None and time.monotonic() >= deadline
+
+def capture_packets(interface="eth0", packet_count=100, duration=None,
+                    max_file_size_mb=None, rotate_seconds=None, ring_files=None,
+                    stop_event=None, on_packet=None, bpf_filter=None, snaplen=None,
+                    compression=None, sampling=None):
+    """
+    Capture les paquets réseau
+    
+    Les paquets sont écrits sur disque au fur et à mesure (store=False) : la
+    mémoire reste constante quelle que soit la durée de la capture. Le filtre
+    BPF est compilé et attaché à la socket de capture : les paquets écartés ne
+    sont jamais copiés vers l'espace utilisateur.
+    
+    Args:
+        interface (str): Interface réseau à utiliser pour la capture
+        packet_count (int): Nombre de paquets à capturer (0 = illimité)
+        duration (float, optional): Durée maximale de la capture en secondes
+        max_file_size_mb (float, optional): Rotation du fichier au-delà de cette taille (Mo)
+        rotate_seconds (float, optional): Rotation du fichier après cette durée
+        ring_files (int, optional): Nombre de fichiers conservés (anneau)
+        stop_event (threading.Event, optional): Arrête la capture dès qu'il est positionné
+        on_packet (callable, optional): Appelé avec (data, timestamp, length, linktype) pour chaque paquet
+        bpf_filter (str, optional): Filtre BPF (syntaxe tcpdump, ex: "host 10.0.0.1 and tcp port 443")
+        snaplen (int, optional): Nombre maximal d'octets enregistrés par paquet
+        compression (str, optional): Compression en flux des fichiers écrits ("gzip" ou "xz")
+        sampling (dict, optional): Échantillonnage des paquets écrits : mode ("packet" :
+            un paquet sur rate, "flow" : per_flow premiers paquets de chaque flux) et/ou
+            headers_only (paquets tronqués à leurs en-têtes) ; on_packet reçoit tous les paquets
         
-        logger.info(f"Capture enregistrée : {pcap_filename} ({len(packets)} paquets)")
-        return pcap_filename
+    Returns:
+        list: Chemins des fichiers pcap générés, du plus ancien au plus récent
+            (un seul sans rotation ; voir analyze_captures)
+    """
+    logger.info(f"Démarrage de la capture sur {interface} - {packet_count} paquets, durée {duration}, filtre '{bpf_filter or ''}'")
+    _check_stop_condition(packet_count, duration, stop_event)
+    _check_snaplen(snaplen)
+    sampler = _new_sampler(sampling)
+    
+    metadata = _capture_metadata("scapy", interface, packet_count, duration, bpf_filter, snaplen, compression,
+                                 sampler)
+    writer = _new_capture_writer(max_file_size_mb, rotate_seconds, ring_files, snaplen, metadata, compression,
+                                 sampler)
+    deadline = time.monotonic() + duration if duration else None
+    
+    def _write_packet(packet):
+        if writer.linktype is None:
+            writer.linktype = conf.l2types.layer2num.get(type(packet), LINKTYPE_ETHERNET)
+        data = bytes(packet)
+        timestamp = float(packet.time)
+        length = getattr(packet, "wirelen", None) or len(data)
+        if sampler is None:
+            writer.write(data, timestamp, length)
+        else:
+            written = sampler.sample(data, length, writer.linktype)
+            if written is not None:
+                writer.write(written, timestamp, length)
+        if on_packet:
+            on_packet(data, timestamp, length, writer.linktype)
+    
+    try:
+        # Capturer les paquets réseau sans les garder en mémoire
+        # scapy n'a pas de snaplen noyau : la troncature est faite à l'écriture
+        sniffer = AsyncSniffer(iface=interface, count=packet_count or 0, store=False,
+                               filter=bpf_filter or None, prn=_write_packet)
+        sniffer.start()
+        while sniffer.thread.is_alive():
+            if _should_stop(stop_event, deadline) and sniffer.running:
+                sniffer.stop(join=False)
+            sniffer.thread.join(0.2)
+        if sniffer.exception is not None:
+            raise sniffer.exception
     except Exception as e:
         logger.error(f"Erreur lors de la capture : {e}", exc_info=True)
         raise
+    finally:
+        writer.close()
+    
+    logger.info(f"Capture enregistrée : {', '.join(writer.files)} ({writer.packet_count} paquets)")
+    return list(writer.files)
+
+def analysis_variant(mode=MODE_EXACT):
+    """Variante de cache d'une analyse selon son mode"""
+    if mode == MODE_EXACT:
+        return f"v{CaptureAnalyzer.VERSION}"
+    return f"v{CaptureAnalyzer.VERSION}-{mode}"
+
+PARTIAL_VARIANT = f"partial-v{CaptureAnalyzer.VERSION}"
+
+def partial_variant(mode=MODE_EXACT):
+    """Variante de cache des états partiels (analyse groupée) selon le mode d'analyse"""
+    return PARTIAL_VARIANT if mode == MODE_EXACT else f"{PARTIAL_VARIANT}-{mode}"
 
-def analyze_pcap(pcap_file):
+def _cache_partial(pcap_file, analyzer):
+    """Met en cache l'état partiel d'une analyse, réutilisé par l'analyse groupée"""
+    try:
+        get_analysis_cache().put(pcap_file, analyzer.partial(), variant=partial_variant(analyzer.mode))
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Impossible de mettre en cache l'état partiel de {pcap_file}: {e}")
+
+def analyze_pcap(pcap_file, use_cache=True, mode=MODE_EXACT):
     """
     Analyse un fichier pcap et extrait les informations importantes
     
     Args:
         pcap_file (str): Chemin vers le fichier pcap à analyser
+        use_cache (bool): Réutiliser une analyse déjà en cache pour ce fichier
+        mode (str): "exact" ou "approximate" (résumés à mémoire fixe, bornes
+            d'erreur dans error_bounds ; pour les captures longues ou continues)
         
     Returns:
         dict: Informations extraites du fichier pcap
     """
-    logger.info(f"Début de l'analyse du fichier pcap: {pcap_file}")
+    logger.info(f"Début de l'analyse du fichier pcap: {pcap_file} (mode {mode})")
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Mode d'analyse inconnu: {mode}")
     
     if not os.path.exists(pcap_file):
         logger.error(f"Fichier pcap introuvable: {pcap_file}")
         raise FileNotFoundError(f"Fichier pcap introuvable: {pcap_file}")
+    
+    if use_cache:
+        analysis_result = get_analysis_cache().get_or_compute(
+            pcap_file, lambda: _analyze_pcap_file(pcap_file, mode), variant=analysis_variant(mode)
+        )
+    else:
+        analysis_result = _analyze_pcap_file(pcap_file, mode)
+    
+    # Les métadonnées (filtre BPF, snaplen, échantillonnage...) sont lues à
+    # part : elles ne font pas partie de l'analyse mise en cache
+    metadata = read_capture_metadata(pcap_file)
+    analysis_result["capture_metadata"] = metadata
+    estimates = estimate_totals(analysis_result, metadata.get("sampling"))
+    if estimates:
+        analysis_result["sampling_estimates"] = estimates
+    return analysis_result
+
+def export_capture_columns(pcap_file):
+    """
+    Exporte les en-têtes disséqués d'une capture en colonnes (.cols)
+    
+    L'analyse complète est calculée pendant la même passe et mise en cache ;
+    les analyses suivantes de la capture liront les colonnes sans dissection.
+    
+    Args:
+        pcap_file (str): Chemin vers le fichier pcap
         
+    Returns:
+        dict: Informations extraites du fichier pcap
+    """
+    logger.info(f"Export en colonnes de {pcap_file}")
+    analysis_result = export_columns(pcap_file)
     try:
-        # Utiliser tshark (wireshark en ligne de commande) pour analyser le pcap
-        logger.debug("Extraction des statistiques générales")
-        
-        # Extraire les statistiques générales
-        stats_cmd = [
-            "tshark", "-r", pcap_file, 
-            "-q", "-z", "io,stat,1", 
-            "-z", "conv,ip", 
-            "-z", "endpoints,ip"
-        ]
-        stats_result = subprocess.run(stats_cmd, capture_output=True, text=True)
-        
-        # Extraire les protocoles utilisés
-        logger.debug("Extraction des protocoles")
-        protocols_cmd = [
-            "tshark", "-r", pcap_file, 
-            "-T", "fields", "-e", "frame.protocols"
-        ]
-        protocols_result = subprocess.run(protocols_cmd, capture_output=True, text=True)
-        
-        # Extraire les informations de base sur chaque paquet
-        logger.debug("Extraction des informations de paquets")
-        packets_cmd = [
-            "tshark", "-r", pcap_file, 
-            "-T", "fields", 
-            "-e", "frame.number", "-e", "frame.time", 
-            "-e", "ip.src", "-e", "ip.dst", 
-            "-e", "_ws.col.Protocol", "-e", "frame.len",
-            "-E", "separator=,"
-        ]
-        packets_result = subprocess.run(packets_cmd, capture_output=True, text=True)
-        
-        # Extraire les ports utilisés
-        logger.debug("Extraction des ports")
-        ports_cmd = [
-            "tshark", "-r", pcap_file, 
-            "-T", "fields", 
-            "-e", "tcp.srcport", "-e", "tcp.dstport", "-e", "udp.srcport", "-e", "udp.dstport"
-        ]
-        ports_result = subprocess.run(ports_cmd, capture_output=True, text=True)
-        
-        # Analyser les résultats
-        protocols = set()
-        for line in protocols_result.stdout.splitlines():
-            if line:
-                for proto in line.split(':'):
-                    protocols.add(proto)
-        
-        packets = []
-        for line in packets_result.stdout.splitlines():
-            if line:
-                parts = line.split(',')
-                if len(parts) >= 6:
-                    try:
-                        packet = {
-                            "number": parts[0],
-                            "time": parts[1],
-                            "src": parts[2],
-                            "dst": parts[3],
-                            "protocol": parts[4],
-                            "length": parts[5]
-                        }
-                        packets.append(packet)
-                    except Exception as e:
-                        logger.warning(f"Impossible de parser la ligne de paquet: {line} - {e}")
-        
-        # Extraire les ports utilisés
-        tcp_ports = set()
-        udp_ports = set()
-        for line in ports_result.stdout.splitlines():
-            if line:
-                parts = line.split('\t')
-                for part in parts:
-                    if part and part != "":
-                        try:
-                            port = int(part)
-                            if port > 0:
-                                if parts.index(part) < 2:  # Les deux premiers champs sont TCP
-                                    tcp_ports.add(port)
-                                else:  # Les deux derniers champs sont UDP
-                                    udp_ports.add(port)
-                        except (ValueError, IndexError):
-                            pass
-        
-        # Analyser les adresses IP uniques
-        ip_addresses = set()
-        for packet in packets:
-            if packet.get("src"):
-                ip_addresses.add(packet.get("src"))
-            if packet.get("dst"):
-                ip_addresses.add(packet.get("dst"))
-        
-        # Trouver les 3 protocoles les plus courants
-        protocol_counts = {}
-        for packet in packets:
-            proto = packet.get("protocol", "")
-            if proto:
-                protocol_counts[proto] = protocol_counts.get(proto, 0) + 1
-        
-        top_protocols = sorted(protocol_counts.items(), key=lambda x: x[1], reverse=True)[:3]
-        
-        # Calculer la taille moyenne des paquets
-        total_size = 0
-        for packet in packets:
-            try:
-                total_size += int(packet.get("length", 0))
-            except (ValueError, TypeError):
-                pass
-        
-        avg_packet_size = total_size / len(packets) if packets else 0
+        get_analysis_cache().put(pcap_file, analysis_result, variant=analysis_variant())
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Impossible de mettre en cache l'analyse de {pcap_file}: {e}")
+    analysis_result["capture_metadata"] = read_capture_metadata(pcap_file)
+    return analysis_result
+
+def analyze_captures(pcap_files, use_cache=True, mode=MODE_EXACT):
+    """
+    Analyse l'ensemble des fichiers d'une capture (rotation par taille ou durée)
+    
+    Les états partiels de chaque fichier (mis en cache comme pour l'analyse
+    groupée) sont fusionnés : le résultat couvre toute la capture et pas
+    seulement le dernier fichier de l'anneau.
+    
+    Args:
+        pcap_files (list): Fichiers retournés par capture_packets
+        use_cache (bool): Réutiliser les états partiels déjà en cache
+        mode (str): "exact" ou "approximate"
         
-        # Construire le résultat
-        analysis_result = {
-            "file": pcap_file,
-            "packet_count": len(packets),
-            "unique_ips": len(ip_addresses),
-            "ip_addresses": list(ip_addresses),
-            "protocols": list(protocols),
-            "top_protocols": top_protocols,
-            "avg_packet_size": round(avg_packet_size, 2),
-            "tcp_ports": sorted(list(tcp_ports)),
-            "udp_ports": sorted(list(udp_ports)),
-            "first_packets": packets[:5] if len(packets) > 5 else packets,
-            "capture_duration": stats_result.stdout
-        }
+    Returns:
+        dict: Informations extraites des fichiers (même format qu'analyze_pcap)
+    """
+    pcap_files = list(pcap_files)
+    if len(pcap_files) == 1:
+        return analyze_pcap(pcap_files[0], use_cache, mode)
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Mode d'analyse inconnu: {mode}")
+    if not pcap_files:
+        raise ValueError("Aucun fichier de capture à analyser")
+    for pcap_file in pcap_files:
+        if not os.path.exists(pcap_file):
+            raise FileNotFoundError(f"Fichier pcap introuvable: {pcap_file}")
+    
+    logger.info(f"Analyse de {len(pcap_files)} fichiers de capture (mode {mode})")
+    analyzer = CaptureAnalyzer(mode=mode)
+    for pcap_file in pcap_files:
+        analyzer.merge_partial(_capture_partial(pcap_file, use_cache, mode))
+    
+    analysis_result = analyzer.result()
+    analysis_result["files"] = pcap_files
+    analysis_result["file_count"] = len(pcap_files)
+    analysis_result["total_file_size"] = sum(os.path.getsize(f) for f in pcap_files)
+    
+    # Paramètres communs du premier fichier, compteurs d'échantillonnage cumulés
+    metadata = [read_capture_metadata(f) for f in pcap_files]
+    sampling = merge_sampling([m.get("sampling") for m in metadata])
+    analysis_result["capture_metadata"] = dict(metadata[0], sampling=sampling) if metadata[0] else {}
+    estimates = estimate_totals(analysis_result, sampling)
+    if estimates:
+        analysis_result["sampling_estimates"] = estimates
+    return analysis_result
+
+def _capture_partial(pcap_file, use_cache=True, mode=MODE_EXACT):
+    """État partiel d'un fichier de capture, lu depuis le cache ou calculé en une passe"""
+    cache = get_analysis_cache()
+    if use_cache:
+        partial = cache.get(pcap_file, partial_variant(mode))
+        if partial is not None:
+            return partial
+    analyzer = CaptureAnalyzer(pcap_file, mode=mode)
+    with open_capture(pcap_file) as f:
+        for record in PcapReader(f):
+            analyzer.add(record)
+    _cache_partial(pcap_file, analyzer)
+    return analyzer.partial()
+
+def _analyze_pcap_file(pcap_file, mode=MODE_EXACT):
+    """Analyse effective d'une capture, sans passer par le cache"""
+    try:
+        # Colonnes déjà exportées : agrégations vectorisées, sans dissection
+        columns = load_columns(pcap_file) if mode == MODE_EXACT else None
+        if columns is not None:
+            logger.debug("Analyse à partir des colonnes exportées")
+            return analysis_from_columns(columns, pcap_file)
         
-        logger.info(f"Analyse terminée: {len(packets)} paquets analysés, {len(ip_addresses)} IPs uniques")
-        logger.debug(f"Protocoles trouvés: {protocols}")
+        # Lecture en une seule passe : aucun paquet n'est conservé en mémoire
+        logger.debug("Lecture en flux de la capture")
+        analyzer = CaptureAnalyzer(pcap_file, mode=mode)
+        with open_capture(pcap_file) as f:
+            reader = PcapReader(f)
+            logger.debug(f"Format détecté: {reader.format}")
+            for record in reader:
+                analyzer.add(record)
+
+        analysis_result = analyzer.result()
+        # L'analyse groupée fusionne des états partiels : celui-ci lui évite de relire la capture
+        _cache_partial(pcap_file, analyzer)
+
+        logger.info(f"Analyse terminée: {analysis_result['packet_count']} paquets analysés, {analysis_result['unique_ips']} IPs uniques")
+        logger.debug(f"Protocoles trouvés: {analysis_result['protocols']}")
         return analysis_result
         
     except Exception as e:
@@ -236,58 +420,184 @@ def analyze_pcap(pcap_file):
             "note": "L'analyse détaillée n'a pas pu être effectuée. Vous pouvez toujours télécharger le fichier pcap pour l'analyser manuellement."
         }
 
+def compute_time_series(pcap_file, bin_width=None, max_points=None):
+    """
+    Série temporelle du trafic d'une capture (paquets/s, octets/s, nouveaux flux/s, protocoles)
+    
+    Calculée de façon vectorisée sur les colonnes exportées si elles existent,
+    sinon en une passe sur la capture ; le résultat est mis en cache par
+    largeur d'intervalle et nombre de points.
+    
+    Args:
+        pcap_file (str): Chemin vers le fichier pcap
+        bin_width (float, optional): Largeur initiale des intervalles en secondes
+        max_points (int, optional): Nombre maximal de points (la largeur est doublée au-delà)
+        
+    Returns:
+        dict: Série temporelle (voir TimeSeriesAccumulator.result())
+    """
+    bin_width = float(bin_width or CaptureAnalyzer.SERIES_BIN_WIDTH)
+    max_points = int(max_points or CaptureAnalyzer.SERIES_POINTS)
+    if bin_width <= 0:
+        raise ValueError("La largeur d'intervalle doit être positive")
+    if not 1 <= max_points <= MAX_SERIES_POINTS:
+        raise ValueError(f"Le nombre de points doit être compris entre 1 et {MAX_SERIES_POINTS}")
+    if not os.path.exists(pcap_file):
+        raise FileNotFoundError(f"Fichier pcap introuvable: {pcap_file}")
+    
+    def compute():
+        columns = load_columns(pcap_file)
+        if columns is not None:
+            return series_from_columns(columns, bin_width, max_points)
+        flows = FlowTable()
+        series = TimeSeriesAccumulator(bin_width, max_points)
+        with open_capture(pcap_file) as f:
+            for record in PcapReader(f):
+                info = dissect_packet(record.linktype, record.data)
+                new_flow = flows.add(info, record.timestamp, record.length)
+                series.add(record.timestamp, record.length, info.protocol, new_flow)
+        return series.result()
+    
+    variant = f"series-v{CaptureAnalyzer.VERSION}-{bin_width}-{max_points}"
+    return get_analysis_cache().get_or_compute(pcap_file, compute, variant=variant)
+
+def list_tcp_streams(pcap_file):
+    """
+    Liste complète des flux TCP réassemblés d'une capture (mise en cache)
+    
+    La liste est calculée une seule fois par capture ; les pages demandées
+    à l'API en sont des tranches.
+    
+    Args:
+        pcap_file (str): Chemin vers le fichier pcap
+        
+    Returns:
+        dict: Voir tcp_reassembly.list_streams()
+    """
+    if not os.path.exists(pcap_file):
+        raise FileNotFoundError(f"Fichier pcap introuvable: {pcap_file}")
+    return get_analysis_cache().get_or_compute(
+        pcap_file, lambda: list_streams(pcap_file), variant=f"streams-v{CaptureAnalyzer.VERSION}"
+    )
+
 # Importer ces fonctions seulement si nécessaire
 try:
-    from scapy.all import sniff, wrpcap
+    from scapy.all import AsyncSniffer, conf
     USE_SCAPY = True
     logger.info("Scapy est disponible - utilisation pour la capture")
 except ImportError:
     USE_SCAPY = False
     logger.warning("Scapy n'est pas installé. Utilisation de TCPDump comme alternative.")
     
-    def capture_packets(interface="eth0", packet_count=100):
+    def capture_packets(interface="eth0", packet_count=100, duration=None,
+                        max_file_size_mb=None, rotate_seconds=None, ring_files=None,
+                        stop_event=None, on_packet=None, bpf_filter=None, snaplen=None,
+                        compression=None, sampling=None):
         """
         Capture les paquets réseau en utilisant tcpdump
         
+        tcpdump écrit le flux pcap sur sa sortie standard (-U -w -), qui est lu
+        en continu et écrit sur disque avec la même rotation que la version scapy.
+        
         Args:
             interface (str): Interface réseau à utiliser pour la capture
-            packet_count (int): Nombre de paquets à capturer
+            packet_count (int): Nombre de paquets à capturer (0 = illimité)
+            duration (float, optional): Durée maximale de la capture en secondes
+            max_file_size_mb (float, optional): Rotation du fichier au-delà de cette taille (Mo)
+            rotate_seconds (float, optional): Rotation du fichier après cette durée
+            ring_files (int, optional): Nombre de fichiers conservés (anneau)
+            stop_event (threading.Event, optional): Arrête la capture dès qu'il est positionné
+            on_packet (callable, optional): Appelé avec (data, timestamp, length, linktype) pour chaque paquet
+            bpf_filter (str, optional): Filtre BPF (syntaxe tcpdump, ex: "host 10.0.0.1 and tcp port 443")
+            snaplen (int, optional): Nombre maximal d'octets enregistrés par paquet
+            compression (str, optional): Compression en flux des fichiers écrits ("gzip" ou "xz")
+            sampling (dict, optional): Échantillonnage des paquets écrits (voir la version scapy)
             
         Returns:
-            str: Chemin vers le fichier pcap généré
+            list: Chemins des fichiers pcap générés, du plus ancien au plus récent
         """
-        logger.info(f"Démarrage de la capture TCPDump sur {interface} - {packet_count} paquets")
+        logger.info(f"Démarrage de la capture TCPDump sur {interface} - {packet_count} paquets, durée {duration}, filtre '{bpf_filter or ''}'")
+        _check_stop_condition(packet_count, duration, stop_event)
+        _check_snaplen(snaplen)
+        sampler = _new_sampler(sampling)
         
-        # Créer le répertoire de captures s'il n'existe pas
-        if not os.path.exists(CAPTURE_DIR):
-            os.makedirs(CAPTURE_DIR)
-            logger.debug(f"Création du dossier {CAPTURE_DIR}")
-
-        # Générer un nom de fichier unique avec timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        pcap_filename = f"{CAPTURE_DIR}/capture_{timestamp}.pcap"
+        metadata = _capture_metadata("tcpdump", interface, packet_count, duration, bpf_filter, snaplen, compression,
+                                     sampler)
+        writer = _new_capture_writer(max_file_size_mb, rotate_seconds, ring_files, snaplen, metadata, compression,
+                                     sampler)
+        deadline = time.monotonic() + duration if duration else None
+        
+        # Utiliser tcpdump pour la capture, en flux sur stdout
+        cmd = [
+            "sudo", "tcpdump", 
+            "-i", interface, 
+            "-U", "-w", "-"
+        ]
+        if packet_count:
+            cmd.extend(["-c", str(packet_count)])
+        if snaplen:
+            cmd.extend(["-s", str(snaplen)])
+        elif sampler is not None and sampler.headers_only:
+            # En-têtes seuls : tcpdump ne copie déjà plus les charges utiles
+            cmd.extend(["-s", str(HEADER_SNAPLEN)])
+        if bpf_filter:
+            # Expression passée en un seul argument après "--" : elle ne peut
+            # être interprétée ni par un shell ni comme une option de tcpdump
+            cmd.extend(["--", bpf_filter])
+        
+        logger.info(f"Exécution de la commande: {' '.join(cmd)}")
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        finished = threading.Event()
+        
+        def _watchdog():
+            # Arrêt sur durée ou sur demande, même si aucun paquet n'arrive
+            while not finished.wait(0.2):
+                if _should_stop(stop_event, deadline):
+                    process.terminate()
+                    return
+        
+        # La sortie d'erreur est lue en continu : un tube plein bloquerait tcpdump
+        stderr_tail = deque(maxlen=TCPDUMP_STDERR_LINES)
+        
+        def _drain_stderr():
+            for line in process.stderr:
+                stderr_tail.append(line.decode(errors="replace"))
+        
+        threading.Thread(target=_watchdog, daemon=True).start()
+        stderr_thread = threading.Thread(target=_drain_stderr, daemon=True)
+        stderr_thread.start()
         
         try:
-            # Utiliser tcpdump pour la capture
-            cmd = [
-                "sudo", "tcpdump", 
-                "-i", interface, 
-                "-c", str(packet_count),
-                "-w", pcap_filename
-            ]
-            
-            logger.info(f"Exécution de la commande: {' '.join(cmd)}")
-            process = subprocess.run(cmd, capture_output=True, text=True)
+            try:
+                reader = PcapReader(process.stdout)
+            except PcapFormatError:
+                process.wait()
+                stderr_thread.join(1.0)
+                stderr = "".join(stderr_tail)
+                logger.error(f"Erreur tcpdump: {stderr}")
+                raise Exception(f"Échec de la capture : {stderr}")
             
-            if process.returncode != 0:
-                logger.error(f"Erreur tcpdump: {process.stderr}")
-                raise Exception(f"Échec de la capture : {process.stderr}")
-                
-            logger.info(f"Capture enregistrée : {pcap_filename}")
-            return pcap_filename
+            writer.linktype = reader.interfaces[0][0]
+            for record in reader:
+                if sampler is None:
+                    writer.write(record.data, record.timestamp, record.length)
+                else:
+                    written = sampler.sample(record.data, record.length, record.linktype)
+                    if written is not None:
+                        writer.write(written, record.timestamp, record.length)
+                if on_packet:
+                    on_packet(record.data, record.timestamp, record.length, record.linktype)
         except Exception as e:
             logger.error(f"Erreur lors de la capture : {e}", exc_info=True)
+            process.terminate()
             raise
+        finally:
+            finished.set()
+            writer.close()
+            process.wait()
+            
+        logger.info(f"Capture enregistrée : {', '.join(writer.files)} ({writer.packet_count} paquets)")
+        return list(writer.files)
 
 if __name__ == "__main__":
     # Test de la fonction de capture
@@ -298,11 +608,11 @@ if __name__ == "__main__":
         print(f"{i+1}. {iface['name']}")
     
     # Utiliser l'interface par défaut
-    capture_file = capture_packets(interface="eth0", packet_count=10)
-    print(f"Capture enregistrée dans : {capture_file}")
+    capture_files = capture_packets(interface="eth0", packet_count=10)
+    print(f"Capture enregistrée dans : {', '.join(capture_files)}")
     
-    # Analyser le fichier
-    analysis = analyze_pcap(capture_file)
+    # Analyser les fichiers
+    analysis = analyze_captures(capture_files)
     print("Résultats de l'analyse :")
     print(json.dumps(analysis, indent=2))
     
@@ -0,0 +1,385 @@
+# services/packet_table.py
+"""
+Table d'en-têtes de paquets NumPy construite à partir d'un mmap de la capture.
+
+Chaque paquet occupe une ligne d'un tableau structuré (timestamp, taille,
+IP source/destination IPv4 en uint32, protocole IP, ports). Les statistiques
+(top talkers, matrice de conversations, histogrammes de ports, octets par
+seconde) sont ensuite calculées par des group-by vectorisés au lieu de
+boucles Python sur des dictionnaires.
+
+C'est un outil à la demande : le rapport de capture n'en dépend pas (top
+talkers et débit sont calculés pendant l'analyse en flux). Si la capture a
+été exportée en colonnes (packet_columns), la table en est dérivée sans
+relire le fichier.
+"""
+import array
+import mmap
+import os
+import socket
+import struct
+from utils.logger import get_logger
+from services.pcap_reader import (
+    PcapReader, open_capture, dissect_packet,
+    PCAP_MAGIC_USEC, PCAP_MAGIC_NSEC,
+    LINKTYPE_ETHERNET, LINKTYPE_LINUX_SLL, RAW_LINKTYPES
+)
+
+# Configuration du logger
+logger = get_logger('packet_table')
+
+try:
+    import numpy as np
+    USE_NUMPY = True
+except ImportError:
+    USE_NUMPY = False
+    logger.warning("NumPy n'est pas installé. Les statistiques vectorisées sont désactivées.")
+
+if USE_NUMPY:
+    PACKET_DTYPE = np.dtype([
+        ("ts", "<f8"),
+        ("length", "<u4"),
+        ("src", "<u4"),
+        ("dst", "<u4"),
+        ("proto", "u1"),
+        ("sport", "<u2"),
+        ("dport", "<u2"),
+    ])
+
+# Position de l'en-tête IP selon le type de lien (chemin vectorisé)
+_L3_OFFSETS = {LINKTYPE_ETHERNET: 14, LINKTYPE_LINUX_SLL: 16}
+for _linktype in RAW_LINKTYPES:
+    _L3_OFFSETS[_linktype] = 0
+
+_CHUNK_ROWS = 65536
+
+
+def int_to_ip(value):
+    """Convertit une adresse IPv4 uint32 en notation pointée"""
+    return socket.inet_ntoa(struct.pack("!I", int(value)))
+
+
+def build_packet_table(pcap_file):
+    """
+    Construit la table des en-têtes d'une capture
+
+    Les colonnes exportées (.cols) sont réutilisées si elles existent ; sinon
+    les fichiers pcap classiques sont lus via mmap et disséqués de façon
+    vectorisée, et les autres formats passent par le lecteur en flux.
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+
+    Returns:
+        numpy.ndarray: Tableau structuré de dtype PACKET_DTYPE
+    """
+    if not USE_NUMPY:
+        raise RuntimeError("NumPy est requis pour construire la table de paquets")
+
+    # Import local : packet_columns dépend de ce module
+    from services.packet_columns import load_columns
+    columns = load_columns(pcap_file)
+    if columns is not None:
+        logger.debug(f"Table dérivée des colonnes exportées pour {pcap_file}")
+        return _table_from_columns(columns)
+
+    with open(pcap_file, "rb") as f:
+        head = f.read(24)
+        if len(head) == 24:
+            for endian in ("<", ">"):
+                magic, _, _, _, _, _, linktype = struct.unpack(endian + "IHHiIII", head)
+                if magic in (PCAP_MAGIC_USEC, PCAP_MAGIC_NSEC) and (linktype & 0xFFFF) in _L3_OFFSETS:
+                    logger.debug(f"Construction vectorisée de la table pour {pcap_file}")
+                    divisor = 1000000 if magic == PCAP_MAGIC_USEC else 1000000000
+                    return _table_from_mmap(f, endian, divisor, _L3_OFFSETS[linktype & 0xFFFF])
+
+    logger.debug(f"Construction de la table en flux pour {pcap_file}")
+    return _table_from_stream(pcap_file)
+
+
+def _table_from_columns(data):
+    """Table construite à partir des colonnes exportées (aucune lecture de la capture)"""
+    c = data["columns"]
+    table = np.zeros(data["rows"], dtype=PACKET_DTYPE)
+    if not data["rows"]:
+        return table
+    # Conversion par adresse distincte (dictionnaire), pas par paquet ; 0 hors IPv4
+    ipv4 = np.array([struct.unpack("!I", socket.inet_aton(address))[0] if address and ":" not in address else 0
+                     for address in data["dictionaries"]["address"]], dtype=np.uint32)
+    table["ts"] = c["ts"]
+    table["length"] = c["length"]
+    table["src"] = ipv4[np.asarray(c["src"])]
+    table["dst"] = ipv4[np.asarray(c["dst"])]
+    table["proto"] = c["ip_proto"]
+    table["sport"] = c["sport"]
+    table["dport"] = c["dport"]
+    return table
+
+
+def _table_from_stream(pcap_file):
+    """Remplit la table paquet par paquet (pcapng, types de lien exotiques)"""
+    chunks = []
+    rows = np.zeros(_CHUNK_ROWS, dtype=PACKET_DTYPE)
+    count = 0
+
+    with open_capture(pcap_file) as f:
+        for record in PcapReader(f):
+            info = dissect_packet(record.linktype, record.data)
+            src = dst = 0
+            if info.src and ":" not in info.src:
+                src = struct.unpack("!I", socket.inet_aton(info.src))[0]
+                dst = struct.unpack("!I", socket.inet_aton(info.dst))[0]
+            rows[count] = (record.timestamp, record.length, src, dst, info.ip_proto, info.sport, info.dport)
+            count += 1
+            if count == _CHUNK_ROWS:
+                chunks.append(rows)
+                rows = np.zeros(_CHUNK_ROWS, dtype=PACKET_DTYPE)
+                count = 0
+
+    chunks.append(rows[:count])
+    return np.concatenate(chunks)
+
+
+def _gather_u16_be(buf, idx):
+    return (buf[idx].astype(np.uint16) << 8) | buf[idx + 1]
+
+
+def _gather_u32(buf, idx, endian):
+    b0 = buf[idx].astype(np.uint32)
+    b1 = buf[idx + 1].astype(np.uint32)
+    b2 = buf[idx + 2].astype(np.uint32)
+    b3 = buf[idx + 3].astype(np.uint32)
+    if endian == "<":
+        return b0 | (b1 << 8) | (b2 << 16) | (b3 << 24)
+    return (b0 << 24) | (b1 << 16) | (b2 << 8) | b3
+
+
+def _table_from_mmap(f, endian, divisor, l3_offset):
+    """Dissection vectorisée d'un fichier pcap classique projeté en mémoire"""
+    size = os.fstat(f.fileno()).st_size
+    if size <= 24:
+        return np.zeros(0, dtype=PACKET_DTYPE)
+
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        # 1. Chaînage des en-têtes d'enregistrement : seule partie séquentielle
+        # (chaque position dépend de la taille du précédent), 8 octets par paquet
+        unpack_caplen = struct.Struct(endian + "I").unpack_from
+        offsets = array.array("q")
+        append = offsets.append
+        pos = 24
+        while pos + 16 <= size:
+            caplen = unpack_caplen(mm, pos + 8)[0]
+            if pos + 16 + caplen > size:
+                break
+            append(pos)
+            pos += 16 + caplen
+
+        table = np.zeros(len(offsets), dtype=PACKET_DTYPE)
+        if not offsets:
+            return table
+
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        last = len(buf) - 1
+        rec = np.frombuffer(offsets, dtype=np.int64)
+        del offsets
+
+        # 2. Champs de l'en-tête d'enregistrement
+        ts_sec = _gather_u32(buf, rec, endian)
+        ts_frac = _gather_u32(buf, rec + 4, endian)
+        caplen = _gather_u32(buf, rec + 8, endian).astype(np.int64)
+        table["ts"] = ts_sec + ts_frac / divisor
+        table["length"] = _gather_u32(buf, rec + 12, endian)
+
+        data = rec + 16
+        end = data + caplen
+
+        # 3. Couche 2 : ethertype (avec un niveau de VLAN pour Ethernet)
+        l3 = data + l3_offset
+        if l3_offset == 14:
+            ethertype = _gather_u16_be(buf, np.minimum(data + 12, last - 1))
+            vlan = (ethertype == 0x8100) & (end >= data + 18)
+            ethertype = np.where(vlan, _gather_u16_be(buf, np.minimum(data + 16, last - 1)), ethertype)
+            l3 = np.where(vlan, l3 + 4, l3)
+        elif l3_offset == 16:
+            ethertype = _gather_u16_be(buf, np.minimum(data + 14, last - 1))
+        else:
+            version = buf[np.minimum(data, last)] >> 4
+            ethertype = np.where(version == 6, 0x86DD, 0x0800)
+
+        # 4. Couche 3
+        ipv4 = (ethertype == 0x0800) & (end >= l3 + 20)
+        ipv6 = (ethertype == 0x86DD) & (end >= l3 + 40)
+        safe_l3 = np.where(ipv4 | ipv6, l3, 0)
+
+        ihl = (buf[safe_l3] & 0x0F).astype(np.int64) * 4
+        frag = _gather_u16_be(buf, safe_l3 + 6) & 0x1FFF
+        table["src"] = np.where(ipv4, _gather_u32(buf, safe_l3 + 12, ">"), 0)
+        table["dst"] = np.where(ipv4, _gather_u32(buf, safe_l3 + 16, ">"), 0)
+        proto = np.where(ipv4, buf[safe_l3 + 9], np.where(ipv6, buf[np.minimum(safe_l3 + 6, last)], 0))
+        table["proto"] = proto
+
+        # 5. Couche 4 : ports TCP/UDP
+        l4 = np.where(ipv4, l3 + ihl, l3 + 40)
+        has_ports = (ipv4 & (frag == 0) | ipv6) & ((proto == 6) | (proto == 17)) & (end >= l4 + 4)
+        safe_l4 = np.where(has_ports, l4, 0)
+        table["sport"] = np.where(has_ports, _gather_u16_be(buf, safe_l4), 0)
+        table["dport"] = np.where(has_ports, _gather_u16_be(buf, safe_l4 + 2), 0)
+
+        del buf
+        return table
+    finally:
+        mm.close()
+
+
+def _group_sum(keys, weights):
+    """Somme et comptage par clé (group-by vectorisé)"""
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(uniq))
+    sums = np.bincount(inverse, weights=weights, minlength=len(uniq))
+    return uniq, counts, sums
+
+
+def _top(order_values, n):
+    if len(order_values) <= n:
+        return np.argsort(order_values)[::-1]
+    idx = np.argpartition(order_values, -n)[-n:]
+    return idx[np.argsort(order_values[idx])[::-1]]
+
+
+def top_talkers(table, n=10, by="bytes"):
+    """
+    Hôtes IPv4 les plus actifs (émission + réception)
+
+    Args:
+        table (numpy.ndarray): Table de paquets
+        n (int): Nombre d'hôtes à retourner
+        by (str): Critère de tri ('bytes' ou 'packets')
+
+    Returns:
+        list: [{"ip", "packets", "bytes"}] triée par ordre décroissant
+    """
+    ipv4 = table[table["src"] != 0]
+    if not len(ipv4):
+        return []
+    hosts = np.concatenate([ipv4["src"], ipv4["dst"]])
+    weights = np.concatenate([ipv4["length"], ipv4["length"]]).astype(np.float64)
+    uniq, counts, sums = _group_sum(hosts, weights)
+    order = _top(sums if by == "bytes" else counts, n)
+    return [
+        {"ip": int_to_ip(uniq[i]), "packets": int(counts[i]), "bytes": int(sums[i])}
+        for i in order
+    ]
+
+
+def ip_counts(table, field, n=10):
+    """
+    Nombre de paquets par adresse source ou destination
+
+    Args:
+        table (numpy.ndarray): Table de paquets
+        field (str): 'src' ou 'dst'
+        n (int): Nombre d'adresses à retourner
+
+    Returns:
+        dict: {ip: paquets} trié par ordre décroissant
+    """
+    values = table[field][table["src"] != 0]
+    if not len(values):
+        return {}
+    uniq, counts = np.unique(values, return_counts=True)
+    return {int_to_ip(uniq[i]): int(counts[i]) for i in _top(counts, n)}
+
+
+def conversation_matrix(table, n=10):
+    """
+    Conversations IPv4 bidirectionnelles (A <-> B)
+
+    Args:
+        table (numpy.ndarray): Table de paquets
+        n (int): Nombre de conversations à retourner
+
+    Returns:
+        list: [{"a", "b", "packets", "bytes"}] triée par nombre de paquets
+    """
+    ipv4 = table[table["src"] != 0]
+    if not len(ipv4):
+        return []
+    lo = np.minimum(ipv4["src"], ipv4["dst"]).astype(np.uint64)
+    hi = np.maximum(ipv4["src"], ipv4["dst"]).astype(np.uint64)
+    keys = (lo << np.uint64(32)) | hi
+    uniq, counts, sums = _group_sum(keys, ipv4["length"].astype(np.float64))
+    return [
+        {
+            "a": int_to_ip(int(uniq[i]) >> 32),
+            "b": int_to_ip(int(uniq[i]) & 0xFFFFFFFF),
+            "packets": int(counts[i]),
+            "bytes": int(sums[i])
+        }
+        for i in _top(counts, n)
+    ]
+
+
+def port_histogram(table, field="dport", proto=None, n=10):
+    """
+    Histogramme des ports source ou destination
+
+    Args:
+        table (numpy.ndarray): Table de paquets
+        field (str): 'sport' ou 'dport'
+        proto (int, optional): Limiter à un protocole IP (6 = TCP, 17 = UDP)
+        n (int): Nombre de ports à retourner
+
+    Returns:
+        dict: {port: paquets} trié par ordre décroissant
+    """
+    mask = table[field] != 0
+    if proto is not None:
+        mask &= table["proto"] == proto
+    counts = np.bincount(table[field][mask], minlength=65536)
+    used = np.flatnonzero(counts)
+    if not len(used):
+        return {}
+    return {int(used[i]): int(counts[used[i]]) for i in _top(counts[used], n)}
+
+
+def bytes_per_second(table):
+    """
+    Débit en octets par seconde depuis le premier paquet
+
+    Args:
+        table (numpy.ndarray): Table de paquets
+
+    Returns:
+        list: Octets capturés pour chaque seconde de la capture
+    """
+    if not len(table):
+        return []
+    seconds = np.floor(table["ts"]).astype(np.int64)
+    seconds -= seconds.min()
+    return np.bincount(seconds, weights=table["length"].astype(np.float64)).astype(np.int64).tolist()
+
+
+def table_statistics(pcap_file, n=10):
+    """
+    Calcule l'ensemble des statistiques du rapport à partir de la table
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+        n (int): Taille des classements
+
+    Returns:
+        dict: src_ips, dst_ips, conversations, src_ports, dst_ports,
+        top_talkers et bytes_per_second
+    """
+    table = build_packet_table(pcap_file)
+    logger.info(f"Table de paquets construite: {len(table)} lignes ({table.nbytes / 1024:.1f} KB)")
+    return {
+        "src_ips": ip_counts(table, "src", n),
+        "dst_ips": ip_counts(table, "dst", n),
+        "conversations": {f"{c['a']} <-> {c['b']}": c["packets"] for c in conversation_matrix(table, n)},
+        "src_ports": port_histogram(table, "sport", n=n),
+        "dst_ports": port_histogram(table, "dport", n=n),
+        "top_talkers": top_talkers(table, n),
+        "bytes_per_second": bytes_per_second(table)
+    }
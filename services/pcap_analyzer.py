@@ -0,0 +1,590 @@
+# services/pcap_analyzer.py
+"""
+Analyse d'une capture en une seule passe et à mémoire constante.
+
+CaptureAnalyzer reçoit les paquets un par un (PacketRecord) et ne conserve que
+des compteurs : le nombre de paquets stockés ne dépend pas de la taille de la
+capture (seuls les 5 premiers sont gardés pour l'affichage). Les messages DNS
+et ARP sont décodés dans la même passe ; leurs journaux et compteurs sont
+bornés (DNS_LOG, DNS_NAMES, ARP_LOG, ARP_HOSTS). La série temporelle du trafic
+est limitée à SERIES_POINTS intervalles (voir traffic_series). Les top
+talkers (octets émis et reçus par hôte) et le débit par seconde sont eux aussi
+calculés pendant cette passe, sans relire la capture.
+
+En mode "approximate", les compteurs par IP, par port et par conversation et
+les ensembles d'hôtes et de flux sont remplacés par des résumés à mémoire
+fixe (voir sketches) : adapté aux captures longues ou continues, avec des
+bornes d'erreur reportées dans le résultat (error_bounds).
+"""
+import math
+from datetime import datetime
+from services.pcap_reader import dissect_packet, parse_dns, parse_arp, DNS_PORTS
+from services.flow_table import FlowTable, flow_key
+from services.sketches import HeavyHitters, HyperLogLog
+from services.traffic_series import TimeSeriesAccumulator, DEFAULT_BIN_WIDTH, DEFAULT_MAX_POINTS
+
+TIME_FORMAT = "%b %d, %Y %H:%M:%S.%f"
+
+MODE_EXACT = "exact"
+MODE_APPROXIMATE = "approximate"
+ANALYSIS_MODES = (MODE_EXACT, MODE_APPROXIMATE)
+
+
+class CaptureAnalyzer:
+    """Accumule les statistiques d'une capture paquet par paquet"""
+
+    # Version du format de résultat (invalide les analyses en cache)
+    VERSION = 7
+    FIRST_PACKETS = 5
+    TOP_PROTOCOLS = 3
+    TOP_N = 10
+    TOP_FLOWS = 20
+    # Flux conservés par capture dans un état partiel (fusion multi-captures)
+    PARTIAL_FLOWS = 5000
+    # Bornes des journaux et compteurs DNS / ARP
+    DNS_LOG = 200
+    DNS_PENDING = 1024
+    DNS_NAMES = 10000
+    ARP_LOG = 200
+    ARP_HOSTS = 4096
+    ARP_MACS_PER_HOST = 8
+    # Série temporelle : largeur initiale des intervalles et nombre maximal de points
+    SERIES_BIN_WIDTH = DEFAULT_BIN_WIDTH
+    SERIES_POINTS = DEFAULT_MAX_POINTS
+    # Mode approximatif : taille des résumés et flux détaillés conservés
+    SKETCH_CAPACITY = 1000
+    SKETCH_PRECISION = 12
+    APPROXIMATE_MAX_FLOWS = 100000
+
+    def __init__(self, pcap_file=None, bin_width=None, max_points=None, mode=MODE_EXACT):
+        """
+        Args:
+            pcap_file (str, optional): Fichier analysé (reporté dans le résultat)
+            bin_width (float, optional): Largeur initiale des intervalles de la série temporelle
+            max_points (int, optional): Nombre maximal de points de la série temporelle
+            mode (str): "exact" (compteurs complets) ou "approximate" (résumés à mémoire fixe)
+        """
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Mode d'analyse inconnu: {mode} (exact ou approximate)")
+        self.pcap_file = pcap_file
+        self.mode = mode
+        self.packet_count = 0
+        self.total_size = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.ip_addresses = set()
+        self.protocols = set()
+        self.protocol_counts = {}
+        self.tcp_ports = set()
+        self.udp_ports = set()
+        self.first_packets = []
+        self.flows = FlowTable()
+        self.sketches = None
+        if mode == MODE_APPROXIMATE:
+            self.flows = FlowTable(self.APPROXIMATE_MAX_FLOWS)
+            self.sketches = {name: HeavyHitters(self.SKETCH_CAPACITY) for name in
+                             ("src_ips", "dst_ips", "src_ports", "dst_ports", "conversations")}
+            self.sketches["hosts"] = HyperLogLog(self.SKETCH_PRECISION)
+            self.sketches["flows"] = HyperLogLog(self.SKETCH_PRECISION)
+        # Flux d'états exacts fusionnés sans leur clé (au-delà de PARTIAL_FLOWS) :
+        # absents du HyperLogLog, ajoutés à son estimation
+        self.unsketched_flows = 0
+        self.src_ip_counts = {}
+        self.dst_ip_counts = {}
+        self.src_port_counts = {}
+        self.dst_port_counts = {}
+        # Mode exact : [paquets, octets] par hôte et octets par seconde (entière)
+        self.host_traffic = {}
+        self.second_bytes = {}
+        self.dns_queries = []
+        self.dns_counts = {"queries": 0, "responses": 0}
+        self.dns_rcodes = {}
+        self.dns_types = {}
+        self.dns_names = {}
+        self.dns_names_dropped = 0
+        self._dns_pending = {}
+        self.arp_packets = []
+        self.arp_counts = {"who-has": 0, "is-at": 0}
+        self.arp_table = {}
+        self.series = TimeSeriesAccumulator(bin_width or self.SERIES_BIN_WIDTH,
+                                            max_points or self.SERIES_POINTS)
+
+    def add(self, record):
+        """
+        Intègre un paquet aux statistiques
+
+        Args:
+            record (PacketRecord): Paquet lu par PcapReader
+
+        Returns:
+            PacketInfo: En-têtes disséqués (réutilisables par l'appelant)
+        """
+        info = dissect_packet(record.linktype, record.data)
+        self.packet_count += 1
+        self.total_size += record.length
+
+        ts = record.timestamp
+        if self.first_timestamp is None or ts < self.first_timestamp:
+            self.first_timestamp = ts
+        if self.last_timestamp is None or ts > self.last_timestamp:
+            self.last_timestamp = ts
+
+        self.protocols.update(info.layers)
+        self.protocol_counts[info.protocol] = self.protocol_counts.get(info.protocol, 0) + 1
+
+        if self.sketches is not None:
+            new_flow = self._add_sketched(info, ts, record.length)
+        else:
+            if info.src:
+                self.ip_addresses.add(info.src)
+                self.ip_addresses.add(info.dst)
+                self.src_ip_counts[info.src] = self.src_ip_counts.get(info.src, 0) + 1
+                self.dst_ip_counts[info.dst] = self.dst_ip_counts.get(info.dst, 0) + 1
+                for host in (info.src, info.dst):
+                    traffic = self.host_traffic.get(host)
+                    if traffic is None:
+                        self.host_traffic[host] = [1, record.length]
+                    else:
+                        traffic[0] += 1
+                        traffic[1] += record.length
+                new_flow = self.flows.add(info, ts, record.length)
+            else:
+                new_flow = False
+            second = math.floor(ts)
+            self.second_bytes[second] = self.second_bytes.get(second, 0) + record.length
+            if info.sport:
+                self.src_port_counts[info.sport] = self.src_port_counts.get(info.sport, 0) + 1
+            if info.dport:
+                self.dst_port_counts[info.dport] = self.dst_port_counts.get(info.dport, 0) + 1
+        self.series.add(ts, record.length, info.protocol, new_flow)
+
+        if info.ip_proto == 6:
+            if info.sport:
+                self.tcp_ports.add(info.sport)
+            if info.dport:
+                self.tcp_ports.add(info.dport)
+        elif info.ip_proto == 17:
+            if info.sport:
+                self.udp_ports.add(info.sport)
+            if info.dport:
+                self.udp_ports.add(info.dport)
+
+        if (info.sport in DNS_PORTS or info.dport in DNS_PORTS) and info.payload_offset < len(record.data):
+            dns = parse_dns(record.data, info.payload_offset, tcp=info.ip_proto == 6)
+            if dns is not None:
+                self._add_dns(ts, info, dns)
+        elif info.protocol == "ARP":
+            arp = parse_arp(record.data, info.payload_offset)
+            if arp is not None:
+                self._add_arp(ts, arp)
+
+        if len(self.first_packets) < self.FIRST_PACKETS:
+            self.first_packets.append({
+                "number": self.packet_count,
+                "time": datetime.fromtimestamp(ts).strftime(TIME_FORMAT),
+                "src": info.src,
+                "dst": info.dst,
+                "protocol": info.protocol,
+                "length": record.length
+            })
+
+        return info
+
+    def _add_sketched(self, info, ts, length):
+        """Mode approximatif : IP, ports, conversations et flux dans les résumés"""
+        sketches = self.sketches
+        new_flow = False
+        if info.src:
+            for name, ip in (("src_ips", info.src), ("dst_ips", info.dst)):
+                counter = sketches[name]
+                # Un élément déjà compté a déjà été ajouté au HyperLogLog
+                if ip not in counter.counts:
+                    sketches["hosts"].add(ip)
+                counter.add(ip)
+            pair = f"{info.src} <-> {info.dst}" if info.src <= info.dst else f"{info.dst} <-> {info.src}"
+            sketches["conversations"].add(pair)
+            new_flow = self.flows.add(info, ts, length)
+            if new_flow:
+                sketches["flows"].add(flow_key(info.ip_proto, info.src, info.sport, info.dst, info.dport)[0])
+        if info.sport:
+            sketches["src_ports"].add(info.sport)
+        if info.dport:
+            sketches["dst_ports"].add(info.dport)
+        return new_flow
+
+    def error_bounds(self):
+        """
+        Bornes d'erreur des valeurs approximatives (mode approximate)
+
+        Returns:
+            dict: Bornes par compteur (sous-estimation maximale des tops,
+            erreur relative des nombres d'hôtes et de flux) et mémoire des résumés
+        """
+        if self.sketches is None:
+            return {}
+        sketches = self.sketches
+        return {
+            "ip_counts": {"src": sketches["src_ips"].bounds(), "dst": sketches["dst_ips"].bounds()},
+            "port_counts": {"src": sketches["src_ports"].bounds(), "dst": sketches["dst_ports"].bounds()},
+            "conversations": sketches["conversations"].bounds(),
+            "unique_ips": sketches["hosts"].bounds(),
+            "flow_count": sketches["flows"].bounds(),
+            "max_tracked_flows": self.flows.max_flows
+        }
+
+    def _add_dns(self, ts, info, dns):
+        if not dns.response:
+            self.dns_counts["queries"] += 1
+            self.dns_types[dns.qtype] = self.dns_types.get(dns.qtype, 0) + 1
+            if dns.query in self.dns_names:
+                self.dns_names[dns.query] += 1
+            elif len(self.dns_names) < self.DNS_NAMES:
+                self.dns_names[dns.query] = 1
+            else:
+                self.dns_names_dropped += 1
+
+            if len(self.dns_queries) < self.DNS_LOG:
+                entry = self._dns_entry(ts, info.src, info.dst, dns)
+                self.dns_queries.append(entry)
+                # Réponse attendue : même identifiant, même client, même question
+                self._dns_pending[(dns.id, info.src, dns.query)] = (ts, entry)
+                if len(self._dns_pending) > self.DNS_PENDING:
+                    del self._dns_pending[next(iter(self._dns_pending))]
+            return
+
+        self.dns_counts["responses"] += 1
+        self.dns_rcodes[dns.rcode] = self.dns_rcodes.get(dns.rcode, 0) + 1
+        pending = self._dns_pending.pop((dns.id, info.dst, dns.query), None)
+        if pending is not None:
+            query_ts, entry = pending
+            entry["rcode"] = dns.rcode
+            entry["answers"] = dns.answers
+            entry["latency"] = round(ts - query_ts, 6)
+        elif len(self.dns_queries) < self.DNS_LOG:
+            # Réponse sans requête capturée (capture démarrée entre les deux)
+            self.dns_queries.append(self._dns_entry(ts, info.dst, info.src, dns))
+
+    @staticmethod
+    def _dns_entry(ts, client, server, dns):
+        return {
+            "timestamp": datetime.fromtimestamp(ts).strftime(TIME_FORMAT),
+            "client": client,
+            "server": server,
+            "query": dns.query,
+            "type": dns.qtype,
+            "rcode": dns.rcode if dns.response else "",
+            "answers": dns.answers if dns.response else [],
+            "latency": None
+        }
+
+    def _add_arp(self, ts, arp):
+        self.arp_counts[arp.op] = self.arp_counts.get(arp.op, 0) + 1
+        if len(self.arp_packets) < self.ARP_LOG:
+            self.arp_packets.append({
+                "timestamp": datetime.fromtimestamp(ts).strftime(TIME_FORMAT),
+                "op": arp.op,
+                "src_mac": arp.src_mac,
+                "src_ip": arp.src_ip,
+                "dst_mac": arp.dst_mac,
+                "dst_ip": arp.dst_ip
+            })
+        # L'émetteur annonce toujours son couple IP <-> MAC (sauf sonde 0.0.0.0)
+        if arp.src_ip != "0.0.0.0":
+            self._add_arp_host(arp.src_ip, arp.src_mac)
+
+    def _add_arp_host(self, ip, mac):
+        macs = self.arp_table.get(ip)
+        if macs is None:
+            if len(self.arp_table) < self.ARP_HOSTS:
+                self.arp_table[ip] = [mac]
+        elif mac not in macs and len(macs) < self.ARP_MACS_PER_HOST:
+            macs.append(mac)
+
+    def _merge_exact_into_sketches(self, partial):
+        """Ajoute les compteurs d'un état exact aux résumés"""
+        sketches = self.sketches
+        for ip in partial["ip_addresses"]:
+            sketches["hosts"].add(ip)
+        for name, cast in (("src_ip", str), ("dst_ip", str), ("src_port", int), ("dst_port", int)):
+            for key, count in partial[f"{name}_counts"].items():
+                sketches[f"{name}s"].add(cast(key), count)
+        for key, entry in partial["flows"]:
+            _, a, _, b, _ = key
+            sketches["conversations"].add(f"{a} <-> {b}" if a <= b else f"{b} <-> {a}", entry[0])
+            sketches["flows"].add(tuple(key))
+        self.unsketched_flows += partial["flow_count"] - len(partial["flows"])
+
+    def protocol_details(self):
+        """
+        Détails DNS et ARP (bornés) inclus dans le résultat
+
+        Returns:
+            dict: dns_queries, dns_stats, arp_packets, arp_table, arp_conflicts, arp_stats
+        """
+        arp_table = [{"ip": ip, "macs": macs} for ip, macs in self.arp_table.items()]
+        return {
+            "dns_queries": self.dns_queries,
+            "dns_stats": {
+                "queries": self.dns_counts["queries"],
+                "responses": self.dns_counts["responses"],
+                "rcodes": _top_counts(self.dns_rcodes, self.TOP_N),
+                "types": _top_counts(self.dns_types, self.TOP_N),
+                "top_names": _top_counts(self.dns_names, self.TOP_N),
+                "distinct_names": len(self.dns_names),
+                "names_dropped": self.dns_names_dropped
+            },
+            "arp_packets": self.arp_packets,
+            "arp_table": arp_table,
+            # Une même IP annoncée par plusieurs MAC : usurpation ARP possible
+            "arp_conflicts": [entry for entry in arp_table if len(entry["macs"]) > 1],
+            "arp_stats": {
+                "requests": self.arp_counts.get("who-has", 0),
+                "replies": self.arp_counts.get("is-at", 0),
+                "hosts": len(self.arp_table)
+            }
+        }
+
+    def result(self):
+        """
+        Construit le dictionnaire de résultats (même format qu'analyze_pcap)
+
+        Returns:
+            dict: Statistiques de la capture
+        """
+        top_protocols = sorted(self.protocol_counts.items(), key=lambda x: x[1], reverse=True)[:self.TOP_PROTOCOLS]
+        avg_packet_size = self.total_size / self.packet_count if self.packet_count else 0
+        duration = 0.0
+        if self.packet_count:
+            duration = self.last_timestamp - self.first_timestamp
+
+        analysis_result = {
+            "file": self.pcap_file,
+            "analysis_mode": self.mode,
+            "packet_count": self.packet_count,
+            "unique_ips": len(self.ip_addresses),
+            "ip_addresses": list(self.ip_addresses),
+            "protocols": list(self.protocols),
+            "top_protocols": top_protocols,
+            "avg_packet_size": round(avg_packet_size, 2),
+            "tcp_ports": sorted(self.tcp_ports),
+            "udp_ports": sorted(self.udp_ports),
+            "first_packets": self.first_packets,
+            "capture_duration": round(duration, 6),
+            "flow_count": self.flows.total_flows,
+            "evicted_flows": self.flows.evicted_flows,
+            "flows": self.flows.top_flows(self.TOP_FLOWS),
+            "conversations": self.flows.top_conversations(self.TOP_N),
+            "ip_counts": {
+                "src": _top_counts(self.src_ip_counts, self.TOP_N),
+                "dst": _top_counts(self.dst_ip_counts, self.TOP_N)
+            },
+            "port_counts": {
+                "src": _top_counts(self.src_port_counts, self.TOP_N),
+                "dst": _top_counts(self.dst_port_counts, self.TOP_N)
+            },
+            "time_series": self.series.result()
+        }
+        if self.sketches is not None:
+            analysis_result.update(self._approximate_counts())
+        else:
+            analysis_result["top_talkers"] = self.top_talkers(self.TOP_N)
+            analysis_result["bytes_per_second"] = self.bytes_per_second()
+        analysis_result.update(self.protocol_details())
+        return analysis_result
+
+    def top_talkers(self, n):
+        """
+        Hôtes les plus actifs en octets (émission + réception), mode exact
+
+        Args:
+            n (int): Nombre d'hôtes à retourner
+
+        Returns:
+            list: [{"ip", "packets", "bytes"}] triée par ordre décroissant
+        """
+        top = sorted(self.host_traffic.items(), key=lambda item: item[1][1], reverse=True)[:n]
+        return [{"ip": ip, "packets": packets, "bytes": size} for ip, (packets, size) in top]
+
+    def bytes_per_second(self):
+        """
+        Octets capturés pour chaque seconde, de la première à la dernière (mode exact)
+
+        Returns:
+            list: Octets par seconde (0 pour les secondes sans paquet)
+        """
+        if not self.second_bytes:
+            return []
+        first = min(self.second_bytes)
+        return [self.second_bytes.get(second, 0) for second in range(first, max(self.second_bytes) + 1)]
+
+    def _approximate_counts(self):
+        """Champs du résultat issus des résumés (mode approximate)"""
+        sketches = self.sketches
+        src_ips = sketches["src_ips"].top(self.TOP_N)
+        dst_ips = sketches["dst_ips"].top(self.TOP_N)
+        return {
+            "unique_ips": sketches["hosts"].count(),
+            # Seuls les hôtes les plus actifs sont connus individuellement
+            "ip_addresses": sorted(set(src_ips) | set(dst_ips)),
+            "flow_count": sketches["flows"].count() + self.unsketched_flows,
+            "conversations": sketches["conversations"].top(self.TOP_N),
+            "ip_counts": {"src": src_ips, "dst": dst_ips},
+            "port_counts": {
+                "src": sketches["src_ports"].top(self.TOP_N),
+                "dst": sketches["dst_ports"].top(self.TOP_N)
+            },
+            "error_bounds": self.error_bounds()
+        }
+
+    def partial(self):
+        """
+        État partiel sérialisable en JSON, fusionnable avec merge_partial()
+
+        Contrairement à result(), les compteurs sont complets ; seuls les
+        PARTIAL_FLOWS flux les plus volumineux sont exportés.
+
+        Returns:
+            dict: Compteurs, ensembles et flux de la capture
+        """
+        return {
+            "file": self.pcap_file,
+            "mode": self.mode,
+            "packet_count": self.packet_count,
+            "total_size": self.total_size,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "ip_addresses": list(self.ip_addresses),
+            "protocols": list(self.protocols),
+            "protocol_counts": self.protocol_counts,
+            "tcp_ports": list(self.tcp_ports),
+            "udp_ports": list(self.udp_ports),
+            "first_packets": self.first_packets,
+            "flow_count": self.flows.total_flows,
+            "evicted_flows": self.flows.evicted_flows,
+            "flows": self.flows.export(self.PARTIAL_FLOWS),
+            "src_ip_counts": self.src_ip_counts,
+            "dst_ip_counts": self.dst_ip_counts,
+            "src_port_counts": self.src_port_counts,
+            "dst_port_counts": self.dst_port_counts,
+            "host_traffic": self.host_traffic,
+            "second_bytes": self.second_bytes,
+            "dns_queries": self.dns_queries,
+            "dns_counts": self.dns_counts,
+            "dns_rcodes": self.dns_rcodes,
+            "dns_types": self.dns_types,
+            "dns_names": self.dns_names,
+            "dns_names_dropped": self.dns_names_dropped,
+            "arp_packets": self.arp_packets,
+            "arp_counts": self.arp_counts,
+            "arp_table": self.arp_table,
+            "time_series": self.series.state(),
+            "sketches": {name: sketch.state() for name, sketch in (self.sketches or {}).items()},
+            "unsketched_flows": self.unsketched_flows
+        }
+
+    def merge_partial(self, partial):
+        """
+        Ajoute l'état partiel d'une autre capture aux statistiques
+
+        Les compteurs, ensembles d'adresses/ports et protocoles sont fusionnés
+        exactement. Un même flux présent dans plusieurs captures (rotation en
+        anneau par exemple) est recombiné et n'est compté qu'une fois, sauf s'il
+        ne fait pas partie des flux exportés par l'une des captures.
+
+        En mode approximate, les résumés sont fusionnés (les bornes d'erreur
+        s'additionnent) ; un état exact peut y être ajouté, l'inverse non.
+
+        Args:
+            partial (dict): Résultat de partial() (éventuellement relu depuis JSON)
+        """
+        if not partial.get("packet_count"):
+            return
+
+        # Captures consécutives (rotation) : les premiers paquets se suivent
+        if self.first_timestamp is None or partial["first_timestamp"] < self.first_timestamp:
+            self.first_timestamp = partial["first_timestamp"]
+            earlier, later, offset = partial.get("first_packets", []), self.first_packets, partial["packet_count"]
+        else:
+            earlier, later, offset = self.first_packets, partial.get("first_packets", []), self.packet_count
+        self.first_packets = _chain_first_packets(earlier, later, offset, self.FIRST_PACKETS)
+        if self.last_timestamp is None or partial["last_timestamp"] > self.last_timestamp:
+            self.last_timestamp = partial["last_timestamp"]
+
+        partial_sketches = partial.get("sketches")
+        if partial_sketches and self.sketches is None:
+            raise ValueError("Un état approximatif ne peut pas être fusionné dans une analyse exacte")
+
+        self.packet_count += partial["packet_count"]
+        self.total_size += partial["total_size"]
+        self.protocols.update(partial["protocols"])
+        self.tcp_ports.update(partial["tcp_ports"])
+        self.udp_ports.update(partial["udp_ports"])
+        _merge_counts(self.protocol_counts, partial["protocol_counts"])
+        if self.sketches is None:
+            self.ip_addresses.update(partial["ip_addresses"])
+            _merge_counts(self.src_ip_counts, partial["src_ip_counts"])
+            _merge_counts(self.dst_ip_counts, partial["dst_ip_counts"])
+            # Les clés entières deviennent des chaînes après un passage par JSON
+            _merge_counts(self.src_port_counts, partial["src_port_counts"], int)
+            _merge_counts(self.dst_port_counts, partial["dst_port_counts"], int)
+            for host, (packets, size) in partial["host_traffic"].items():
+                traffic = self.host_traffic.setdefault(host, [0, 0])
+                traffic[0] += packets
+                traffic[1] += size
+            _merge_counts(self.second_bytes, partial["second_bytes"], int)
+        elif partial_sketches:
+            for name, sketch in self.sketches.items():
+                sketch.merge(type(sketch).from_state(partial_sketches[name]))
+            self.unsketched_flows += partial.get("unsketched_flows", 0)
+        else:
+            self._merge_exact_into_sketches(partial)
+
+        recombined = []
+        for key, entry in partial["flows"]:
+            first_seen = self.flows.merge_entry(tuple(key), entry)
+            if first_seen is not None:
+                recombined.append(first_seen)
+        # Flux non exportés (au-delà de PARTIAL_FLOWS) : comptés mais non détaillés
+        self.flows.total_flows += partial["flow_count"] - len(partial["flows"])
+        self.flows.evicted_flows += partial["evicted_flows"]
+
+        self.dns_queries.extend(partial["dns_queries"][:self.DNS_LOG - len(self.dns_queries)])
+        _merge_counts(self.dns_counts, partial["dns_counts"])
+        _merge_counts(self.dns_rcodes, partial["dns_rcodes"])
+        _merge_counts(self.dns_types, partial["dns_types"])
+        self.dns_names_dropped += partial["dns_names_dropped"]
+        for name, count in partial["dns_names"].items():
+            if name in self.dns_names or len(self.dns_names) < self.DNS_NAMES:
+                self.dns_names[name] = self.dns_names.get(name, 0) + count
+            else:
+                self.dns_names_dropped += count
+        self.arp_packets.extend(partial["arp_packets"][:self.ARP_LOG - len(self.arp_packets)])
+        _merge_counts(self.arp_counts, partial["arp_counts"])
+        for ip, macs in partial["arp_table"].items():
+            for mac in macs:
+                self._add_arp_host(ip, mac)
+        self.series.merge_state(partial["time_series"])
+        # Un flux recombiné a été compté comme nouveau dans chacune des captures
+        for first_seen in recombined:
+            self.series.remove_new_flow(first_seen)
+
+
+def _chain_first_packets(earlier, later, offset, limit):
+    """Premiers paquets de deux captures consécutives, numérotés à la suite"""
+    chained = list(earlier[:limit])
+    for packet in later[:limit - len(chained)]:
+        chained.append(dict(packet, number=packet["number"] + offset))
+    return chained
+
+
+def _merge_counts(counts, other, cast=None):
+    """Additionne un dictionnaire de compteurs dans un autre"""
+    for key, value in other.items():
+        if cast is not None:
+            key = cast(key)
+        counts[key] = counts.get(key, 0) + value
+
+
+def _top_counts(counts, n):
+    """Les n entrées les plus fréquentes d'un dictionnaire de compteurs"""
+    return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True)[:n])
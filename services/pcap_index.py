@@ -0,0 +1,309 @@
+# services/pcap_index.py
+"""
+Index d'accès direct aux paquets d'une capture.
+
+L'index (`<capture>.idx`) enregistre un point de reprise tous les INTERVAL
+paquets : offset du paquet dans le fichier et horodatages minimal/maximal du
+bloc de paquets qui suit. Afficher la page N ou une plage horaire revient à
+une recherche dichotomique dans les points de reprise, un seek, puis la
+lecture d'au plus INTERVAL paquets en trop, au lieu de relire la capture.
+
+L'index est écrit par PcapWriter pendant la capture, ou construit à la
+première consultation ; il est reconstruit si la capture a changé depuis.
+"""
+import array
+import bisect
+import os
+import struct
+import sys
+from datetime import datetime
+from utils.logger import get_logger
+from services.pcap_reader import PcapReader, open_capture, dissect_packet
+
+# Configuration du logger
+logger = get_logger('pcap_index')
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"PIDX"
+INDEX_VERSION = 1
+# Nombre de paquets entre deux points de reprise
+DEFAULT_INTERVAL = 256
+
+# magic, version, intervalle, taille et mtime de la capture, paquets, points de reprise
+_HEADER = struct.Struct("<4sHHQqQQ")
+
+
+def index_path(pcap_file):
+    """Chemin du fichier d'index associé à une capture"""
+    return pcap_file + INDEX_SUFFIX
+
+
+class PcapIndexBuilder:
+    """Construit l'index d'une capture paquet par paquet"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        """
+        Args:
+            interval (int): Nombre de paquets entre deux points de reprise
+        """
+        self.interval = interval
+        self.packet_count = 0
+        self.offsets = array.array("Q")
+        self.min_ts = array.array("d")
+        self.max_ts = array.array("d")
+
+    def add(self, offset, timestamp):
+        """
+        Enregistre un paquet
+
+        Args:
+            offset (int): Offset de l'enregistrement dans le fichier
+            timestamp (float): Horodatage du paquet
+        """
+        if self.packet_count % self.interval == 0:
+            self.offsets.append(offset)
+            self.min_ts.append(timestamp)
+            self.max_ts.append(timestamp)
+        else:
+            if timestamp < self.min_ts[-1]:
+                self.min_ts[-1] = timestamp
+            if timestamp > self.max_ts[-1]:
+                self.max_ts[-1] = timestamp
+        self.packet_count += 1
+
+    def save(self, pcap_file):
+        """
+        Écrit l'index à côté de la capture (à appeler une fois le fichier fermé)
+
+        Args:
+            pcap_file (str): Chemin vers la capture indexée
+
+        Returns:
+            PcapIndex: Index écrit
+        """
+        stats = os.stat(pcap_file)
+        path = index_path(pcap_file)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, self.interval, stats.st_size,
+                                 stats.st_mtime_ns, self.packet_count, len(self.offsets)))
+            for values in (self.offsets, self.min_ts, self.max_ts):
+                _to_little_endian(values).tofile(f)
+        os.replace(tmp_path, path)
+        return PcapIndex(pcap_file, self.interval, self.packet_count, self.offsets, self.min_ts, self.max_ts)
+
+
+class PcapIndex:
+    """Points de reprise d'une capture et requêtes par position ou par date"""
+
+    def __init__(self, pcap_file, interval, packet_count, offsets, min_ts, max_ts):
+        self.pcap_file = pcap_file
+        self.interval = interval
+        self.packet_count = packet_count
+        self.offsets = offsets
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        # Maximum cumulé (croissant) et minimum des blocs suivants (croissant) :
+        # permettent une recherche dichotomique même si la capture n'est pas
+        # parfaitement triée par date
+        self._prefix_max = []
+        running = float("-inf")
+        for value in max_ts:
+            running = max(running, value)
+            self._prefix_max.append(running)
+        self._suffix_min = [0.0] * len(min_ts)
+        running = float("inf")
+        for i in range(len(min_ts) - 1, -1, -1):
+            running = min(running, min_ts[i])
+            self._suffix_min[i] = running
+
+    @property
+    def start_time(self):
+        return min(self.min_ts) if self.min_ts else None
+
+    @property
+    def end_time(self):
+        return max(self.max_ts) if self.max_ts else None
+
+    def packets(self, offset=0, limit=100):
+        """
+        Lit une page de paquets
+
+        Args:
+            offset (int): Numéro (à partir de 0) du premier paquet ; ramené à 0 s'il est négatif
+            limit (int): Nombre maximal de paquets
+
+        Returns:
+            list: Couples (numéro, PacketRecord)
+        """
+        offset = max(offset, 0)
+        if offset >= self.packet_count or limit <= 0:
+            return []
+        checkpoint = offset // self.interval
+        number = checkpoint * self.interval
+        page = []
+        with open_capture(self.pcap_file) as f:
+            reader = PcapReader(f)
+            reader.seek(self.offsets[checkpoint])
+            for record in reader:
+                if number >= offset:
+                    page.append((number, record))
+                    if len(page) >= limit:
+                        break
+                number += 1
+        return page
+
+    def time_range(self, start=None, end=None, limit=1000):
+        """
+        Lit les paquets compris dans une plage horaire
+
+        Args:
+            start (float, optional): Horodatage minimal (inclus)
+            end (float, optional): Horodatage maximal (inclus)
+            limit (int): Nombre maximal de paquets
+
+        Returns:
+            list: Couples (numéro, PacketRecord) dans l'ordre du fichier
+        """
+        if not self.offsets or limit <= 0:
+            return []
+        start = float("-inf") if start is None else start
+        end = float("inf") if end is None else end
+        # Premier bloc pouvant contenir un paquet >= start, dernier pouvant contenir un paquet <= end
+        first = bisect.bisect_left(self._prefix_max, start)
+        last = bisect.bisect_right(self._suffix_min, end) - 1
+        if first > last:
+            return []
+
+        matches = []
+        number = first * self.interval
+        last_number = min(self.packet_count, (last + 1) * self.interval)
+        with open_capture(self.pcap_file) as f:
+            reader = PcapReader(f)
+            reader.seek(self.offsets[first])
+            for record in reader:
+                if number >= last_number:
+                    break
+                block = number // self.interval
+                if self.max_ts[block] < start or self.min_ts[block] > end:
+                    # Bloc entièrement hors de la plage : on saute au suivant
+                    if block + 1 > last:
+                        break
+                    number = (block + 1) * self.interval
+                    reader.seek(self.offsets[block + 1])
+                    continue
+                if start <= record.timestamp <= end:
+                    matches.append((number, record))
+                    if len(matches) >= limit:
+                        break
+                number += 1
+        return matches
+
+
+def describe_packet(number, record):
+    """
+    Résumé sérialisable d'un paquet pour l'affichage paginé
+
+    Args:
+        number (int): Numéro du paquet (à partir de 0)
+        record (PacketRecord): Paquet lu
+
+    Returns:
+        dict: Numéro, horodatage, adresses, ports, protocole et tailles
+    """
+    info = dissect_packet(record.linktype, record.data)
+    return {
+        "number": number + 1,
+        "timestamp": record.timestamp,
+        "time": datetime.fromtimestamp(record.timestamp).strftime("%b %d, %Y %H:%M:%S.%f"),
+        "src": info.src,
+        "dst": info.dst,
+        "sport": info.sport,
+        "dport": info.dport,
+        "protocol": info.protocol,
+        "layers": info.layers,
+        "length": record.length,
+        "caplen": record.caplen
+    }
+
+
+def _to_little_endian(values):
+    if sys.byteorder == "little":
+        return values
+    swapped = array.array(values.typecode, values)
+    swapped.byteswap()
+    return swapped
+
+
+def load_index(pcap_file):
+    """
+    Charge l'index d'une capture s'il existe et correspond au fichier actuel
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+
+    Returns:
+        PcapIndex: Index chargé, ou None s'il est absent ou périmé
+    """
+    path = index_path(pcap_file)
+    try:
+        stats = os.stat(pcap_file)
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, version, interval, size, mtime, packet_count, checkpoints = _HEADER.unpack(header)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                return None
+            if size != stats.st_size or mtime != stats.st_mtime_ns:
+                logger.debug(f"Index périmé pour {pcap_file}")
+                return None
+            columns = []
+            for typecode in ("Q", "d", "d"):
+                values = array.array(typecode)
+                values.fromfile(f, checkpoints)
+                if sys.byteorder != "little":
+                    values.byteswap()
+                columns.append(values)
+    except (OSError, EOFError, struct.error) as e:
+        logger.debug(f"Index indisponible pour {pcap_file}: {e}")
+        return None
+    return PcapIndex(pcap_file, interval, packet_count, *columns)
+
+
+def build_index(pcap_file, interval=DEFAULT_INTERVAL):
+    """
+    Construit (ou reconstruit) l'index d'une capture en une passe
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+        interval (int): Nombre de paquets entre deux points de reprise
+
+    Returns:
+        PcapIndex: Index construit
+    """
+    logger.info(f"Construction de l'index de {pcap_file}")
+    builder = PcapIndexBuilder(interval)
+    with open_capture(pcap_file) as f:
+        for record in PcapReader(f):
+            builder.add(record.offset, record.timestamp)
+    try:
+        return builder.save(pcap_file)
+    except OSError as e:
+        # Répertoire en lecture seule : l'index reste utilisable en mémoire
+        logger.warning(f"Impossible d'écrire l'index de {pcap_file}: {e}")
+        return PcapIndex(pcap_file, interval, builder.packet_count,
+                         builder.offsets, builder.min_ts, builder.max_ts)
+
+
+def get_index(pcap_file):
+    """
+    Retourne l'index d'une capture, en le construisant si nécessaire
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+
+    Returns:
+        PcapIndex: Index à jour
+    """
+    return load_index(pcap_file) or build_index(pcap_file)
@@ -0,0 +1,638 @@
+# services/pcap_reader.py
+"""
+Lecture en flux des fichiers pcap / pcapng et dissection légère des en-têtes.
+
+Le lecteur ne charge jamais le fichier complet en mémoire : les paquets sont
+lus bloc par bloc depuis n'importe quel objet fichier (fichier disque, pipe
+tcpdump, ...). La dissection se limite aux en-têtes utiles aux statistiques
+(Ethernet, VLAN, SLL, IPv4/IPv6, TCP/UDP/ICMP, ARP) et se fait directement sur
+les octets, sans passer par scapy ni tshark. Les captures compressées (gzip,
+xz) sont décompressées à la volée, sans fichier temporaire.
+"""
+import gzip
+import json
+import lzma
+import socket
+import struct
+from collections import namedtuple
+
+# Types de lien (LINKTYPE_*) gérés par le dissecteur
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+# Sur certains systèmes, DLT_RAW vaut 12 ou 14 dans l'en-tête pcap
+RAW_LINKTYPES = {LINKTYPE_RAW, 12, 14, LINKTYPE_IPV4, LINKTYPE_IPV6}
+
+# Magics des formats de capture
+PCAP_MAGIC_USEC = 0xA1B2C3D4
+PCAP_MAGIC_NSEC = 0xA1B23C4D
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+# Types de blocs pcapng
+PCAPNG_IDB = 0x00000001
+PCAPNG_OPB = 0x00000002
+PCAPNG_SPB = 0x00000003
+PCAPNG_EPB = 0x00000006
+
+# Protocoles applicatifs déduits des ports bien connus
+WELL_KNOWN_PORTS = {
+    20: "ftp-data", 21: "ftp", 22: "ssh", 23: "telnet", 25: "smtp",
+    53: "dns", 67: "dhcp", 68: "dhcp", 69: "tftp", 80: "http",
+    110: "pop", 123: "ntp", 137: "nbns", 138: "nbdgm", 139: "nbss",
+    143: "imap", 161: "snmp", 162: "snmp", 389: "ldap", 443: "tls",
+    445: "smb", 465: "smtps", 514: "syslog", 587: "smtp", 993: "imaps",
+    995: "pop3s", 1900: "ssdp", 3306: "mysql", 3389: "rdp", 5353: "mdns",
+    5355: "llmnr", 5432: "pgsql", 5900: "vnc", 8080: "http", 8443: "tls",
+}
+
+# Protocoles IP (numéros IANA) reconnus
+IP_PROTOCOLS = {1: "icmp", 2: "igmp", 6: "tcp", 17: "udp", 47: "gre", 50: "esp", 58: "icmpv6", 132: "sctp"}
+
+# Types d'enregistrement et codes de retour DNS
+DNS_TYPES = {1: "A", 2: "NS", 5: "CNAME", 6: "SOA", 12: "PTR", 15: "MX", 16: "TXT", 28: "AAAA",
+             33: "SRV", 35: "NAPTR", 41: "OPT", 64: "SVCB", 65: "HTTPS", 255: "ANY"}
+DNS_RCODES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+DNS_PORTS = (53, 5353, 5355)
+# Nombre maximal de réponses décodées par message DNS
+DNS_MAX_ANSWERS = 10
+
+DnsMessage = namedtuple("DnsMessage", ["id", "response", "rcode", "query", "qtype", "answers"])
+DnsMessage.__doc__ = "Message DNS décodé par parse_dns (première question et réponses)"
+
+ArpMessage = namedtuple("ArpMessage", ["op", "src_mac", "src_ip", "dst_mac", "dst_ip"])
+ArpMessage.__doc__ = "Paquet ARP Ethernet/IPv4 décodé par parse_arp"
+
+# Fichier de métadonnées écrit à côté de chaque capture
+METADATA_SUFFIX = ".meta.json"
+
+# Compressions gérées : extension ajoutée au nom de la capture et magic du fichier
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "xz": ".xz"}
+GZIP_MAGIC = b"\x1f\x8b"
+XZ_MAGIC = b"\xfd7zXZ\x00"
+
+PacketRecord = namedtuple("PacketRecord", ["offset", "timestamp", "caplen", "length", "linktype", "data"])
+PacketRecord.__doc__ = "Paquet brut lu depuis la capture (offset = position du bloc dans le flux)"
+
+PacketInfo = namedtuple("PacketInfo", ["layers", "protocol", "src", "dst", "ip_proto", "sport", "dport", "tcp_flags",
+                                       "payload_offset", "payload_end", "transport_offset"],
+                        defaults=(None, None))
+PacketInfo.__doc__ = ("En-têtes extraits d'un paquet par dissect_packet (payload_end et transport_offset : "
+                      "fin de la charge utile et début de l'en-tête de transport, renseignés pour IP)")
+
+
+class PcapFormatError(Exception):
+    """Le fichier n'est pas une capture pcap/pcapng valide"""
+
+
+class PcapReader:
+    """
+    Lecteur en flux pour les formats pcap (µs et ns, les deux boutismes) et pcapng
+
+    Usage:
+        with open(path, "rb") as f:
+            for record in PcapReader(f):
+                ...
+    """
+
+    def __init__(self, fileobj):
+        """
+        Initialise le lecteur et lit l'en-tête de la capture
+
+        Args:
+            fileobj: Objet fichier binaire (seekable ou non)
+        """
+        self.fileobj = fileobj
+        self.position = 0
+        self.format = None
+        self.snaplen = 0
+        # Pour pcap : un seul type de lien. Pour pcapng : une entrée par interface.
+        self.interfaces = []
+        self._endian = "<"
+        self._ts_divisor = 1000000
+        self._read_header()
+
+    def _read(self, size):
+        data = self.fileobj.read(size)
+        if data:
+            self.position += len(data)
+        return data
+
+    def _read_exact(self, size):
+        data = self._read(size)
+        while data is not None and len(data) < size:
+            chunk = self._read(size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def _read_header(self):
+        head = self._read_exact(4)
+        if len(head) < 4:
+            raise PcapFormatError("Fichier de capture vide ou tronqué")
+
+        magic_le = struct.unpack("<I", head)[0]
+        magic_be = struct.unpack(">I", head)[0]
+
+        if magic_le == PCAPNG_SHB:
+            self.format = "pcapng"
+            self._read_section_header()
+            return
+
+        for endian, magic in (("<", magic_le), (">", magic_be)):
+            if magic in (PCAP_MAGIC_USEC, PCAP_MAGIC_NSEC):
+                self.format = "pcap"
+                self._endian = endian
+                self._ts_divisor = 1000000 if magic == PCAP_MAGIC_USEC else 1000000000
+                rest = self._read_exact(20)
+                if len(rest) < 20:
+                    raise PcapFormatError("En-tête pcap tronqué")
+                _, _, _, _, self.snaplen, linktype = struct.unpack(endian + "HHiIII", rest)
+                self.interfaces = [(linktype & 0xFFFF, self._ts_divisor)]
+                return
+
+        raise PcapFormatError(f"Format de capture inconnu (magic 0x{magic_le:08x})")
+
+    def _read_section_header(self):
+        """Lit un Section Header Block pcapng (le type a déjà été consommé)"""
+        self._read_section_header_from(self._read_exact(4))
+
+    def _parse_idb(self, body):
+        linktype, _, snaplen = struct.unpack_from(self._endian + "HHI", body, 0)
+        divisor = 1000000
+        pos = 8
+        # Options : recherche de if_tsresol (code 9)
+        while pos + 4 <= len(body):
+            code, length = struct.unpack_from(self._endian + "HH", body, pos)
+            pos += 4
+            if code == 0:
+                break
+            if code == 9 and length >= 1:
+                resol = body[pos]
+                if resol & 0x80:
+                    divisor = 2 ** (resol & 0x7F)
+                else:
+                    divisor = 10 ** resol
+            pos += (length + 3) & ~3
+        self.snaplen = max(self.snaplen, snaplen)
+        self.interfaces.append((linktype, divisor))
+
+    def seek(self, offset):
+        """
+        Repositionne la lecture sur un enregistrement (fichier seekable requis)
+
+        Sur une capture compressée, l'offset est celui du flux décompressé ; le
+        seek décompresse (sans les conserver) les données qui le précèdent.
+
+        Args:
+            offset (int): Offset d'un paquet (PacketRecord.offset)
+        """
+        if self.format == "pcapng" and not self.interfaces:
+            self._read_interfaces()
+        self.fileobj.seek(offset)
+        self.position = offset
+
+    def _read_interfaces(self):
+        """Lit les IDB qui suivent l'en-tête de section, jusqu'au premier paquet"""
+        while True:
+            header = self._read_exact(8)
+            if len(header) < 8:
+                return
+            block_type, block_len = struct.unpack(self._endian + "II", header)
+            if block_type in (PCAPNG_SHB, PCAPNG_EPB, PCAPNG_SPB, PCAPNG_OPB) or block_len < 12:
+                return
+            body = self._read_exact(block_len - 8)[:-4]
+            if block_type == PCAPNG_IDB:
+                self._parse_idb(body)
+
+    def __iter__(self):
+        if self.format == "pcap":
+            return self._iter_pcap()
+        return self._iter_pcapng()
+
+    def _iter_pcap(self):
+        unpack = struct.Struct(self._endian + "IIII").unpack
+        linktype, divisor = self.interfaces[0]
+        while True:
+            offset = self.position
+            header = self._read_exact(16)
+            if len(header) < 16:
+                return
+            ts_sec, ts_frac, caplen, length = unpack(header)
+            data = self._read_exact(caplen)
+            if len(data) < caplen:
+                # Paquet tronqué en fin de fichier (capture interrompue)
+                return
+            yield PacketRecord(offset, ts_sec + ts_frac / divisor, caplen, length, linktype, data)
+
+    def _iter_pcapng(self):
+        endian = self._endian
+        while True:
+            offset = self.position
+            header = self._read_exact(8)
+            if len(header) < 8:
+                return
+            block_type = struct.unpack(endian + "I", header[0:4])[0]
+
+            if block_type == PCAPNG_SHB:
+                # Nouvelle section : le boutisme peut changer
+                self._read_section_header_from(header[4:8])
+                endian = self._endian
+                continue
+
+            block_len = struct.unpack(endian + "I", header[4:8])[0]
+            if block_len < 12:
+                raise PcapFormatError(f"Bloc pcapng invalide à l'offset {offset}")
+            body = self._read_exact(block_len - 8)
+            if len(body) < block_len - 8:
+                return
+            body = body[:-4]  # longueur de bloc finale
+
+            if block_type == PCAPNG_EPB:
+                iface, ts_high, ts_low, caplen, length = struct.unpack_from(endian + "IIIII", body, 0)
+                linktype, divisor = self._interface(iface)
+                ts = ((ts_high << 32) | ts_low) / divisor
+                yield PacketRecord(offset, ts, caplen, length, linktype, body[20:20 + caplen])
+            elif block_type == PCAPNG_SPB:
+                length = struct.unpack_from(endian + "I", body, 0)[0]
+                linktype, _ = self._interface(0)
+                data = body[4:4 + length]
+                yield PacketRecord(offset, 0.0, len(data), length, linktype, data)
+            elif block_type == PCAPNG_OPB:
+                iface, _, ts_high, ts_low, caplen, length = struct.unpack_from(endian + "HHIIII", body, 0)
+                linktype, divisor = self._interface(iface)
+                ts = ((ts_high << 32) | ts_low) / divisor
+                yield PacketRecord(offset, ts, caplen, length, linktype, body[20:20 + caplen])
+            elif block_type == PCAPNG_IDB:
+                self._parse_idb(body)
+            # Les autres blocs (statistiques, résolution de noms, ...) sont ignorés
+
+    def _read_section_header_from(self, length_bytes):
+        """Lit la suite d'un SHB dont le type et la longueur ont été consommés"""
+        raw = length_bytes + self._read_exact(4)
+        if len(raw) < 8:
+            raise PcapFormatError("Section pcapng tronquée")
+        if struct.unpack("<I", raw[4:8])[0] == PCAPNG_BYTE_ORDER_MAGIC:
+            self._endian = "<"
+        elif struct.unpack(">I", raw[4:8])[0] == PCAPNG_BYTE_ORDER_MAGIC:
+            self._endian = ">"
+        else:
+            raise PcapFormatError("Byte-order magic pcapng invalide")
+        block_len = struct.unpack(self._endian + "I", raw[0:4])[0]
+        self._read_exact(block_len - 12)
+        self.interfaces = []
+
+    def _interface(self, iface):
+        if iface < len(self.interfaces):
+            return self.interfaces[iface]
+        return (LINKTYPE_ETHERNET, 1000000)
+
+
+def detect_compression(path):
+    """
+    Détecte la compression d'un fichier d'après ses premiers octets
+
+    Args:
+        path (str): Chemin vers le fichier
+
+    Returns:
+        str: "gzip", "xz" ou None si le fichier n'est pas compressé
+    """
+    with open(path, "rb") as f:
+        head = f.read(len(XZ_MAGIC))
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(XZ_MAGIC):
+        return "xz"
+    return None
+
+
+def open_capture(path):
+    """
+    Ouvre un fichier de capture en lecture binaire
+
+    Les captures compressées en gzip ou xz (détectées par leur magic, quelle
+    que soit l'extension) sont décompressées en flux.
+
+    Args:
+        path (str): Chemin vers le fichier pcap/pcapng, éventuellement compressé
+
+    Returns:
+        file: Objet fichier binaire à passer à PcapReader
+    """
+    compression = detect_compression(path)
+    if compression == "gzip":
+        return gzip.open(path, "rb")
+    if compression == "xz":
+        return lzma.open(path, "rb")
+    return open(path, "rb", buffering=1024 * 1024)
+
+
+def iter_packets(path):
+    """
+    Itère sur les paquets bruts d'un fichier de capture
+
+    Args:
+        path (str): Chemin vers le fichier pcap/pcapng
+
+    Yields:
+        PacketRecord: Paquet lu
+    """
+    with open_capture(path) as f:
+        for record in PcapReader(f):
+            yield record
+
+
+def metadata_path(pcap_file):
+    """Chemin du fichier de métadonnées associé à une capture"""
+    return pcap_file + METADATA_SUFFIX
+
+
+def read_capture_metadata(pcap_file):
+    """
+    Lit les métadonnées d'une capture (interface, filtre BPF, snaplen...)
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+
+    Returns:
+        dict: Métadonnées, vide si la capture n'en a pas
+    """
+    try:
+        with open(metadata_path(pcap_file), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _format_mac(raw):
+    return ":".join(f"{b:02x}" for b in raw)
+
+
+def dissect_packet(linktype, data):
+    """
+    Extrait les en-têtes réseau et transport d'un paquet brut
+
+    Args:
+        linktype (int): Type de lien de l'interface de capture
+        data (bytes): Octets capturés
+
+    Returns:
+        PacketInfo: Couches rencontrées ("eth:ethertype:ip:tcp:http"), protocole
+        de plus haut niveau, adresses IP, protocole IP, ports et flags TCP
+    """
+    layers = []
+    ethertype = None
+    pos = 0
+    n = len(data)
+
+    if linktype == LINKTYPE_ETHERNET:
+        if n < 14:
+            return PacketInfo(("eth",), "ETH", "", "", 0, 0, 0, 0, n)
+        layers.append("eth")
+        ethertype = (data[12] << 8) | data[13]
+        pos = 14
+        # 802.1Q / QinQ
+        while ethertype in (0x8100, 0x88A8) and n >= pos + 4:
+            layers.append("vlan")
+            ethertype = (data[pos + 2] << 8) | data[pos + 3]
+            pos += 4
+        layers.append("ethertype")
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if n < 16:
+            return PacketInfo(("sll",), "SLL", "", "", 0, 0, 0, 0, n)
+        layers.append("sll")
+        ethertype = (data[14] << 8) | data[15]
+        pos = 16
+        layers.append("ethertype")
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if n < 20:
+            return PacketInfo(("sll",), "SLL", "", "", 0, 0, 0, 0, n)
+        layers.append("sll")
+        ethertype = (data[0] << 8) | data[1]
+        pos = 20
+        layers.append("ethertype")
+    elif linktype == LINKTYPE_NULL:
+        if n < 4:
+            return PacketInfo(("null",), "NULL", "", "", 0, 0, 0, 0, n)
+        layers.append("null")
+        family = struct.unpack_from("<I", data, 0)[0]
+        if family > 0xFFFF:
+            family = struct.unpack_from(">I", data, 0)[0]
+        ethertype = 0x0800 if family == 2 else 0x86DD
+        pos = 4
+    elif linktype in RAW_LINKTYPES:
+        layers.append("raw")
+        if n and (data[0] >> 4) == 6:
+            ethertype = 0x86DD
+        else:
+            ethertype = 0x0800
+    else:
+        return PacketInfo((f"linktype{linktype}",), f"LINKTYPE{linktype}", "", "", 0, 0, 0, 0, 0)
+
+    src = dst = ""
+    ip_proto = 0
+
+    if ethertype == 0x0800:
+        if n < pos + 20:
+            layers.append("ip")
+            return PacketInfo(tuple(layers), "IPv4", "", "", 0, 0, 0, 0, n)
+        layers.append("ip")
+        ihl = (data[pos] & 0x0F) * 4
+        ip_proto = data[pos + 9]
+        # Ignorer le bourrage Ethernet au-delà de la longueur IP ; une longueur
+        # nulle ou trop courte (segmentation déléguée à la carte, TSO) n'est
+        # pas fiable : la longueur capturée est alors conservée
+        total_length = (data[pos + 2] << 8) | data[pos + 3]
+        ip_end = pos + total_length if total_length >= ihl else n
+        n = min(n, ip_end)
+        src = socket.inet_ntoa(data[pos + 12:pos + 16])
+        dst = socket.inet_ntoa(data[pos + 16:pos + 20])
+        # Fragment non initial : pas d'en-tête transport
+        frag = ((data[pos + 6] & 0x1F) << 8) | data[pos + 7]
+        pos += ihl
+        if frag:
+            return PacketInfo(tuple(layers), "IPv4", src, dst, ip_proto, 0, 0, 0, pos)
+    elif ethertype == 0x86DD:
+        if n < pos + 40:
+            layers.append("ipv6")
+            return PacketInfo(tuple(layers), "IPv6", "", "", 0, 0, 0, 0, n)
+        layers.append("ipv6")
+        ip_proto = data[pos + 6]
+        # Longueur nulle : jumbogramme ou segmentation déléguée (voir IPv4)
+        payload_length = (data[pos + 4] << 8) | data[pos + 5]
+        ip_end = pos + 40 + payload_length if payload_length else n
+        n = min(n, ip_end)
+        src = socket.inet_ntop(socket.AF_INET6, data[pos + 8:pos + 24])
+        dst = socket.inet_ntop(socket.AF_INET6, data[pos + 24:pos + 40])
+        pos += 40
+        # En-têtes d'extension courants (hop-by-hop, routage, options destination)
+        while ip_proto in (0, 43, 60) and n >= pos + 2:
+            ip_proto, ext_len = data[pos], (data[pos + 1] + 1) * 8
+            pos += ext_len
+    elif ethertype == 0x0806:
+        layers.append("arp")
+        return PacketInfo(tuple(layers), "ARP", "", "", 0, 0, 0, 0, pos)
+    else:
+        name = {0x88CC: "lldp", 0x888E: "eapol", 0x8863: "pppoed", 0x8864: "pppoes"}.get(ethertype, "")
+        if name:
+            layers.append(name)
+            return PacketInfo(tuple(layers), name.upper(), "", "", 0, 0, 0, 0, pos)
+        return PacketInfo(tuple(layers), f"0x{ethertype:04x}", "", "", 0, 0, 0, 0, pos)
+
+    sport = dport = flags = 0
+    proto_name = IP_PROTOCOLS.get(ip_proto)
+
+    transport_pos = pos
+    if ip_proto == 6 and n >= pos + 20:
+        layers.append("tcp")
+        sport = (data[pos] << 8) | data[pos + 1]
+        dport = (data[pos + 2] << 8) | data[pos + 3]
+        flags = data[pos + 13]
+        pos += (data[pos + 12] >> 4) * 4
+        top = "TCP"
+    elif ip_proto == 17 and n >= pos + 8:
+        layers.append("udp")
+        sport = (data[pos] << 8) | data[pos + 1]
+        dport = (data[pos + 2] << 8) | data[pos + 3]
+        pos += 8
+        top = "UDP"
+    elif proto_name:
+        layers.append(proto_name)
+        return PacketInfo(tuple(layers), proto_name.upper(), src, dst, ip_proto, 0, 0, 0, pos)
+    else:
+        return PacketInfo(tuple(layers), "IPv6" if "ipv6" in layers else "IPv4", src, dst, ip_proto, 0, 0, 0, pos)
+
+    # Protocole applicatif : port bien connu le plus bas des deux côtés
+    app = WELL_KNOWN_PORTS.get(min(sport, dport)) or WELL_KNOWN_PORTS.get(max(sport, dport))
+    # Pour TCP, on ne le retient que s'il y a une charge utile (comme tshark),
+    # même non capturée (snaplen, capture des en-têtes seuls)
+    if app and (ip_proto == 17 or pos < ip_end):
+        layers.append(app)
+        top = app.upper()
+
+    return PacketInfo(tuple(layers), top, src, dst, ip_proto, sport, dport, flags, pos, n, transport_pos)
+
+
+def _read_dns_name(data, pos, start):
+    """
+    Lit un nom DNS (avec pointeurs de compression)
+
+    Returns:
+        tuple: (nom, position après le nom dans le message)
+    """
+    labels = []
+    end = None
+    jumps = 0
+    n = len(data)
+    while pos < n:
+        length = data[pos]
+        if length == 0:
+            pos += 1
+            break
+        if length & 0xC0 == 0xC0:
+            if pos + 1 >= n or jumps > 20:
+                raise ValueError("Pointeur DNS invalide")
+            if end is None:
+                end = pos + 2
+            pos = start + (((length & 0x3F) << 8) | data[pos + 1])
+            jumps += 1
+            continue
+        pos += 1
+        labels.append(data[pos:pos + length].decode("ascii", errors="replace"))
+        pos += length
+    else:
+        raise ValueError("Nom DNS tronqué")
+    return ".".join(labels) or ".", end if end is not None else pos
+
+
+def parse_dns(data, offset=0, tcp=False):
+    """
+    Décode un message DNS directement sur les octets
+
+    Args:
+        data (bytes): Octets du paquet
+        offset (int): Début de la charge utile UDP/TCP (PacketInfo.payload_offset)
+        tcp (bool): Message précédé de sa longueur sur 2 octets (DNS sur TCP)
+
+    Returns:
+        DnsMessage: Message décodé, ou None s'il est invalide ou tronqué
+    """
+    if tcp:
+        offset += 2
+    start = offset
+    if len(data) < start + 12:
+        return None
+    txid, flags, qdcount, ancount = struct.unpack_from("!HHHH", data, start)
+    try:
+        pos = start + 12
+        query, qtype = "", ""
+        if qdcount:
+            query, pos = _read_dns_name(data, pos, start)
+            if len(data) < pos + 4:
+                return None
+            qtype_code = (data[pos] << 8) | data[pos + 1]
+            qtype = DNS_TYPES.get(qtype_code, str(qtype_code))
+            pos += 4
+            # Questions supplémentaires (rares) : ignorées
+            for _ in range(qdcount - 1):
+                _, pos = _read_dns_name(data, pos, start)
+                pos += 4
+
+        answers = []
+        for _ in range(min(ancount, DNS_MAX_ANSWERS)):
+            _, pos = _read_dns_name(data, pos, start)
+            if len(data) < pos + 10:
+                break
+            rtype, _, _, rdlength = struct.unpack_from("!HHIH", data, pos)
+            pos += 10
+            if len(data) < pos + rdlength:
+                break
+            rdata = data[pos:pos + rdlength]
+            if rtype == 1 and rdlength == 4:
+                answers.append(socket.inet_ntoa(rdata))
+            elif rtype == 28 and rdlength == 16:
+                answers.append(socket.inet_ntop(socket.AF_INET6, rdata))
+            elif rtype in (2, 5, 12):
+                answers.append(_read_dns_name(data, pos, start)[0])
+            elif rtype == 15 and rdlength > 2:
+                answers.append(_read_dns_name(data, pos + 2, start)[0])
+            else:
+                answers.append(DNS_TYPES.get(rtype, str(rtype)))
+            pos += rdlength
+    except (ValueError, IndexError, struct.error):
+        return None
+
+    return DnsMessage(txid, bool(flags & 0x8000), DNS_RCODES.get(flags & 0x0F, str(flags & 0x0F)),
+                      query, qtype, answers)
+
+
+def parse_arp(data, offset=0):
+    """
+    Décode un paquet ARP Ethernet/IPv4
+
+    Args:
+        data (bytes): Octets du paquet
+        offset (int): Début de l'en-tête ARP (PacketInfo.payload_offset)
+
+    Returns:
+        ArpMessage: Paquet décodé, ou None s'il ne s'agit pas d'ARP Ethernet/IPv4
+    """
+    if len(data) < offset + 28:
+        return None
+    htype, ptype, hlen, plen, op = struct.unpack_from("!HHBBH", data, offset)
+    if htype != 1 or ptype != 0x0800 or hlen != 6 or plen != 4:
+        return None
+    op_name = {1: "who-has", 2: "is-at"}.get(op, str(op))
+    return ArpMessage(
+        op_name,
+        _format_mac(data[offset + 8:offset + 14]),
+        socket.inet_ntoa(data[offset + 14:offset + 18]),
+        _format_mac(data[offset + 18:offset + 24]),
+        socket.inet_ntoa(data[offset + 24:offset + 28])
+    )
@@ -0,0 +1,282 @@
+# services/pcap_writer.py
+"""
+Écriture incrémentale de captures au format pcap.
+
+Les paquets sont écrits sur disque au fil de l'eau (vidage du tampon au plus
+toutes les FLUSH_INTERVAL secondes) : la mémoire utilisée ne dépend pas de la
+durée de la capture et un arrêt brutal ne fait perdre que la dernière seconde.
+RingPcapWriter ajoute une rotation par taille ou par durée sur un anneau de N
+fichiers, à la manière de `tcpdump -C/-G/-W`, et indexe chaque fichier pendant
+l'écriture (voir pcap_index). Les captures peuvent être compressées en flux
+(gzip ou xz) : open_capture() les relit de façon transparente.
+"""
+import gzip
+import json
+import lzma
+import os
+import struct
+import time
+from utils.logger import get_logger
+from services.pcap_reader import PCAP_MAGIC_USEC, LINKTYPE_ETHERNET, COMPRESSION_SUFFIXES, metadata_path
+from services.pcap_index import PcapIndexBuilder, index_path
+
+# Configuration du logger
+logger = get_logger('pcap_writer')
+
+# Intervalle maximal entre deux vidages du tampon d'écriture (secondes)
+FLUSH_INTERVAL = 1.0
+DEFAULT_SNAPLEN = 262144
+# Niveaux de compression : xz est bien plus coûteux en CPU que gzip, un
+# niveau bas lui permet de suivre le débit d'une capture
+GZIP_LEVEL = 6
+XZ_PRESET = 1
+
+_RECORD_HEADER = struct.Struct("<IIII")
+
+
+def capture_extension(compression=None):
+    """
+    Extension des fichiers de capture écrits
+
+    Args:
+        compression (str, optional): "gzip", "xz" ou None
+
+    Returns:
+        str: ".pcap", ".pcap.gz" ou ".pcap.xz"
+    """
+    if compression is not None and compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Compression non supportée: {compression} (gzip ou xz)")
+    return ".pcap" + COMPRESSION_SUFFIXES.get(compression, "")
+
+
+def write_capture_metadata(pcap_file, metadata):
+    """
+    Écrit les métadonnées d'une capture à côté du fichier pcap
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+        metadata (dict): Métadonnées sérialisables en JSON
+    """
+    try:
+        with open(metadata_path(pcap_file), "w") as f:
+            json.dump(metadata, f, indent=2)
+    except OSError as e:
+        logger.warning(f"Impossible d'écrire les métadonnées de {pcap_file}: {e}")
+
+
+class PcapWriter:
+    """
+    Écrit des paquets dans un fichier pcap classique (µs, little-endian)
+
+    byte_count et les offsets de l'index portent sur le flux pcap non
+    compressé ; file_size est la taille réellement écrite sur disque.
+    """
+
+    def __init__(self, path, linktype=LINKTYPE_ETHERNET, snaplen=DEFAULT_SNAPLEN, build_index=False,
+                 compression=None):
+        """
+        Args:
+            path (str): Fichier de sortie (écrasé s'il existe)
+            linktype (int): Type de lien des paquets écrits
+            snaplen (int): Taille maximale enregistrée par paquet
+            build_index (bool): Écrire l'index d'accès direct (.idx) à la fermeture
+            compression (str, optional): Compression en flux ("gzip" ou "xz")
+        """
+        capture_extension(compression)
+        self.path = path
+        self.linktype = linktype
+        self.snaplen = snaplen
+        self.compression = compression
+        self._index = PcapIndexBuilder() if build_index else None
+        self.packet_count = 0
+        self.byte_count = 0
+        self._raw = open(path, "wb", buffering=256 * 1024)
+        if compression == "gzip":
+            self._file = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=GZIP_LEVEL)
+        elif compression == "xz":
+            self._file = lzma.LZMAFile(self._raw, "wb", preset=XZ_PRESET)
+        else:
+            self._file = self._raw
+        self._file.write(struct.pack("<IHHiIII", PCAP_MAGIC_USEC, 2, 4, 0, 0, snaplen, linktype))
+        self.byte_count = 24
+        self._last_flush = time.monotonic()
+
+    def write(self, data, timestamp, length=None):
+        """
+        Ajoute un paquet au fichier
+
+        Args:
+            data (bytes): Octets du paquet
+            timestamp (float): Horodatage (secondes depuis l'epoch)
+            length (int, optional): Taille d'origine si data est tronqué
+        """
+        if length is None:
+            length = len(data)
+        if len(data) > self.snaplen:
+            data = data[:self.snaplen]
+        sec = int(timestamp)
+        usec = int(round((timestamp - sec) * 1000000))
+        if usec >= 1000000:
+            sec, usec = sec + 1, usec - 1000000
+        if self._index is not None:
+            self._index.add(self.byte_count, timestamp)
+        self._file.write(_RECORD_HEADER.pack(sec, usec, len(data), length))
+        self._file.write(data)
+        self.packet_count += 1
+        self.byte_count += 16 + len(data)
+
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            # gzip : vidage synchronisé, le fichier reste lisible jusqu'ici
+            self._file.flush()
+            if self._file is not self._raw:
+                self._raw.flush()
+            self._last_flush = now
+
+    @property
+    def file_size(self):
+        """Taille écrite sur disque (après compression)"""
+        return self._raw.tell()
+
+    @property
+    def closed(self):
+        return self._raw.closed
+
+    def close(self):
+        """Vide le tampon et ferme le fichier (puis écrit son index)"""
+        if not self._raw.closed:
+            self._file.close()
+            self._raw.close()
+            if self._index is not None:
+                try:
+                    self._index.save(self.path)
+                except OSError as e:
+                    logger.warning(f"Impossible d'écrire l'index de {self.path}: {e}")
+
+
+class RingPcapWriter:
+    """
+    Écriture en anneau de fichiers pcap avec rotation par taille et/ou durée
+
+    Les fichiers sont nommés `<base>_000.pcap`, `<base>_001.pcap`, ... ; quand
+    `max_files` est atteint, le plus ancien est supprimé. Sans critère de
+    rotation, un seul fichier `<base>.pcap` est écrit. Avec une compression,
+    l'extension devient `.pcap.gz` ou `.pcap.xz` et la rotation par taille
+    porte sur la taille compressée, approximative car le compresseur garde
+    des données en tampon (xz en particulier).
+    """
+
+    def __init__(self, base_path, linktype=None, snaplen=DEFAULT_SNAPLEN,
+                 max_file_size=None, rotate_seconds=None, max_files=None, metadata=None,
+                 build_index=True, compression=None, file_metadata=None):
+        """
+        Args:
+            base_path (str): Chemin sans extension (ex: captures/capture_20250101_120000)
+            linktype (int, optional): Type de lien ; peut être fixé avant le premier paquet
+            snaplen (int): Taille maximale enregistrée par paquet
+            max_file_size (int, optional): Taille (octets) déclenchant une rotation
+            rotate_seconds (float, optional): Durée déclenchant une rotation
+            max_files (int, optional): Nombre de fichiers conservés dans l'anneau
+            metadata (dict, optional): Métadonnées écrites à côté de chaque fichier
+            build_index (bool): Indexer chaque fichier pour l'accès direct aux paquets
+            compression (str, optional): Compression en flux ("gzip" ou "xz")
+            file_metadata (callable, optional): file_metadata(rotating) est appelé à la
+                fermeture de chaque fichier ; le dict retourné (compteurs...) complète ses
+                métadonnées. rotating est vrai si la fermeture est provoquée par le paquet
+                en cours d'écriture, qui appartient au fichier suivant
+        """
+        self.extension = capture_extension(compression)
+        self.base_path = base_path
+        self.linktype = linktype
+        self.snaplen = snaplen
+        self.max_file_size = max_file_size
+        self.rotate_seconds = rotate_seconds
+        self.max_files = max_files
+        self.metadata = metadata
+        self.build_index = build_index
+        self.compression = compression
+        self.file_metadata = file_metadata
+        self.rotating = bool(max_file_size or rotate_seconds)
+        self.files = []
+        self.packet_count = 0
+        self.byte_count = 0
+        self._writer = None
+        self._file_index = 0
+        self._sequence = 0
+        self._opened_at = 0.0
+
+    @property
+    def current_path(self):
+        """Fichier en cours d'écriture (ou dernier fichier écrit)"""
+        return self.files[-1] if self.files else None
+
+    def _next_path(self):
+        if not self.rotating:
+            return f"{self.base_path}{self.extension}"
+        path = f"{self.base_path}_{self._sequence:03d}{self.extension}"
+        self._sequence += 1
+        return path
+
+    def _open(self):
+        path = self._next_path()
+        self._writer = PcapWriter(path, self.linktype or LINKTYPE_ETHERNET, self.snaplen, self.build_index,
+                                  self.compression)
+        self._opened_at = time.monotonic()
+        self.files.append(path)
+        logger.debug(f"Ouverture du fichier de capture {path}")
+
+        # Le plus ancien fichier est retiré avant de calculer la position du nouveau
+        if self.max_files and len(self.files) > self.max_files:
+            oldest = self.files.pop(0)
+            for old_path in (oldest, metadata_path(oldest), index_path(oldest)):
+                try:
+                    if os.path.exists(old_path):
+                        os.remove(old_path)
+                except OSError as e:
+                    logger.warning(f"Impossible de supprimer {old_path}: {e}")
+            logger.debug(f"Rotation: suppression de {oldest}")
+
+        self._file_index = len(self.files) - 1
+        if self.metadata is not None:
+            write_capture_metadata(path, dict(self.metadata, file_index=self._file_index))
+
+    def _should_rotate(self):
+        if self.max_file_size and self._writer.file_size >= self.max_file_size:
+            return True
+        if self.rotate_seconds and time.monotonic() - self._opened_at >= self.rotate_seconds:
+            return True
+        return False
+
+    def write(self, data, timestamp, length=None):
+        """
+        Ajoute un paquet, en changeant de fichier si nécessaire
+
+        Args:
+            data (bytes): Octets du paquet
+            timestamp (float): Horodatage (secondes depuis l'epoch)
+            length (int, optional): Taille d'origine si data est tronqué
+        """
+        if self._writer is None:
+            self._open()
+        elif self.rotating and self._should_rotate():
+            self._close_file(rotating=True)
+            self._open()
+
+        before = self._writer.byte_count
+        self._writer.write(data, timestamp, length)
+        self.packet_count += 1
+        self.byte_count += self._writer.byte_count - before
+
+    def close(self):
+        """Ferme le fichier courant ; crée un fichier vide si aucun paquet n'a été reçu"""
+        if self._writer is None:
+            self._open()
+        self._close_file()
+
+    def _close_file(self, rotating=False):
+        if self._writer.closed:
+            return
+        self._writer.close()
+        if self.metadata is not None and self.file_metadata is not None:
+            write_capture_metadata(self._writer.path, dict(self.metadata, file_index=self._file_index,
+                                                           **self.file_metadata(rotating)))
@@ -0,0 +1,176 @@
+# services/sketches.py
+"""
+Résumés de flux (sketches) à mémoire fixe pour l'analyse approximative.
+
+- HeavyHitters : éléments les plus fréquents (IP, ports, conversations) selon
+  l'algorithme de Misra-Gries, dual de Space-Saving. Au plus 2 x capacity
+  compteurs ; chaque compteur sous-estime le vrai total d'au plus `error`
+  (suivi exactement, toujours <= N / (capacity + 1) pour N occurrences).
+- HyperLogLog : nombre d'éléments distincts (hôtes, flux) avec 2^precision
+  registres d'un octet ; erreur relative type 1,04 / sqrt(2^precision).
+
+Les deux résumés sont fusionnables (analyse de plusieurs captures) et
+sérialisables en JSON via state() / from_state(). Le hachage (blake2b) est
+stable d'un processus à l'autre, contrairement à hash().
+"""
+import base64
+import hashlib
+import math
+
+DEFAULT_CAPACITY = 1000
+DEFAULT_PRECISION = 12
+
+
+class HeavyHitters:
+    """Compteurs approximatifs des éléments fréquents (Misra-Gries)"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """
+        Args:
+            capacity (int): Nombre d'éléments dont le compte est garanti ; la
+                table est réduite à cette taille dès qu'elle en atteint le double
+        """
+        self.capacity = capacity
+        self.counts = {}
+        self.total = 0
+        # Somme des décréments appliqués : borne de sous-estimation de chaque compteur
+        self.error = 0
+
+    def add(self, key, count=1):
+        """
+        Compte une ou plusieurs occurrences d'un élément
+
+        Args:
+            key: Élément (hachable, sérialisable en JSON comme clé)
+            count (int): Nombre d'occurrences
+        """
+        self.total += count
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+            return
+        counts[key] = count
+        if len(counts) >= 2 * self.capacity:
+            self._reduce()
+
+    def _reduce(self):
+        """Retire à chaque compteur la (capacity+1)-ième plus grande valeur"""
+        values = sorted(self.counts.values(), reverse=True)
+        if len(values) <= self.capacity:
+            return
+        decrement = values[self.capacity]
+        self.error += decrement
+        self.counts = {key: value - decrement for key, value in self.counts.items() if value > decrement}
+
+    def merge(self, other):
+        """
+        Ajoute un autre résumé (les bornes d'erreur s'additionnent)
+
+        Args:
+            other (HeavyHitters): Résumé à fusionner
+        """
+        self.total += other.total
+        self.error += other.error
+        for key, value in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+        if len(self.counts) >= 2 * self.capacity:
+            self._reduce()
+
+    def top(self, n):
+        """
+        Les n éléments les plus fréquents
+
+        Returns:
+            dict: Élément -> compte estimé (vrai compte entre l'estimation et
+            l'estimation + error)
+        """
+        return dict(sorted(self.counts.items(), key=lambda x: x[1], reverse=True)[:n])
+
+    def bounds(self):
+        """Bornes d'erreur documentées du résumé"""
+        return {
+            "algorithm": "misra-gries",
+            "capacity": self.capacity,
+            "total": self.total,
+            "max_undercount": self.error,
+            "guaranteed_max_undercount": self.total // (self.capacity + 1)
+        }
+
+    def state(self):
+        """État sérialisable en JSON (couples élément / compte)"""
+        return {"capacity": self.capacity, "total": self.total, "error": self.error,
+                "counts": list(self.counts.items())}
+
+    @classmethod
+    def from_state(cls, state):
+        """Reconstruit un résumé depuis state() (éventuellement relu depuis JSON)"""
+        sketch = cls(state["capacity"])
+        sketch.total = state["total"]
+        sketch.error = state["error"]
+        # Les clés composées (listes en JSON) redeviennent des tuples
+        sketch.counts = {tuple(key) if isinstance(key, list) else key: value
+                         for key, value in state["counts"]}
+        return sketch
+
+
+def _hash64(key):
+    return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Estimation du nombre d'éléments distincts à mémoire fixe"""
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        """
+        Args:
+            precision (int): log2 du nombre de registres (4 à 16)
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("La précision HyperLogLog doit être comprise entre 4 et 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, key):
+        """Ajoute un élément (sa représentation str est hachée)"""
+        h = _hash64(key)
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Union avec un autre HyperLogLog de même précision"""
+        if other.precision != self.precision:
+            raise ValueError("Fusion de HyperLogLog de précisions différentes")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self):
+        """Nombre estimé d'éléments distincts"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # Petites cardinalités : comptage linéaire, plus précis
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def bounds(self):
+        """Bornes d'erreur documentées du résumé"""
+        return {
+            "algorithm": "hyperloglog",
+            "registers": len(self.registers),
+            "relative_std_error": round(1.04 / math.sqrt(len(self.registers)), 4)
+        }
+
+    def state(self):
+        """État sérialisable en JSON"""
+        return {"precision": self.precision, "registers": base64.b64encode(bytes(self.registers)).decode()}
+
+    @classmethod
+    def from_state(cls, state):
+        """Reconstruit un HyperLogLog depuis state()"""
+        sketch = cls(state["precision"])
+        sketch.registers = bytearray(base64.b64decode(state["registers"]))
+        return sketch
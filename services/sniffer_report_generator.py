@@ -19,11 +19,19 @@ class SnifferReportGenerator:
         os.makedirs(REPORTS_DIR, exist_ok=True)
         self.env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
     
-    def generate_report(self, pcap_file):
-        """Génère un rapport HTML à partir d'un fichier PCAP"""
+    def generate_report(self, pcap_file, analysis_results=None):
+        """
+        Génère un rapport HTML à partir d'un fichier PCAP
+        
+        Args:
+            pcap_file (str): Chemin vers le fichier pcap
+            analysis_results (dict, optional): Analyse déjà effectuée, pour éviter
+                de relire la capture
+        """
         try:
-            # Analyser le fichier PCAP avec votre fonction existante
-            analysis_results = analyze_pcap(pcap_file)
+            # Analyser le fichier PCAP (ou réutiliser l'analyse fournie / en cache)
+            if analysis_results is None:
+                analysis_results = analyze_pcap(pcap_file)
             
             if 'error' in analysis_results:
                 logger.error(f"Erreur dans l'analyse: {analysis_results['error']}")
@@ -75,45 +83,44 @@ class SnifferReportGenerator:
                 "src_ports": {},
                 "dst_ports": {}
             },
-            "dns_queries": [],
-            "arp_packets": []
+            "flows": [],
+            "flow_count": 0,
+            # Calculés pendant l'analyse en flux (ou sur les colonnes exportées)
+            "top_talkers": analysis_results.get("top_talkers", []),
+            "bytes_per_second": analysis_results.get("bytes_per_second", []),
+            "time_series": analysis_results.get("time_series") or {},
+            "dns_queries": analysis_results.get("dns_queries", []),
+            "dns_stats": analysis_results.get("dns_stats", {}),
+            "arp_packets": analysis_results.get("arp_packets", []),
+            "arp_table": analysis_results.get("arp_table", []),
+            "arp_conflicts": analysis_results.get("arp_conflicts", []),
+            "capture_metadata": analysis_results.get("capture_metadata") or {},
+            "analysis_mode": analysis_results.get("analysis_mode", "exact"),
+            "unique_ips": analysis_results.get("unique_ips", 0),
+            "error_bounds": analysis_results.get("error_bounds") or {},
+            "sampling_estimates": analysis_results.get("sampling_estimates") or {}
         }
         
-        # Calculer la taille du fichier
-        if 'file' in analysis_results and os.path.exists(analysis_results['file']):
+        # Calculer la taille du fichier (ou des fichiers pour une analyse groupée)
+        if analysis_results.get('file') and os.path.exists(analysis_results['file']):
             stats["file_size"] = os.path.getsize(analysis_results['file'])
+        elif 'total_file_size' in analysis_results:
+            stats["file_size"] = analysis_results['total_file_size']
         
         # Protocoles (transformer les top_protocols en dict)
         if 'top_protocols' in analysis_results:
             for proto, count in analysis_results['top_protocols']:
                 stats["protocols"][proto] = count
         
-        # IPs - extraire des données des premiers paquets
-        if 'first_packets' in analysis_results:
-            for packet in analysis_results['first_packets']:
-                src = packet.get('src')
-                dst = packet.get('dst')
-                if src:
-                    stats["ip_stats"]["src_ips"][src] = stats["ip_stats"]["src_ips"].get(src, 0) + 1
-                if dst:
-                    stats["ip_stats"]["dst_ips"][dst] = stats["ip_stats"]["dst_ips"].get(dst, 0) + 1
-                if src and dst:
-                    conv = f"{src} <-> {dst}"
-                    stats["ip_stats"]["conversations"][conv] = stats["ip_stats"]["conversations"].get(conv, 0) + 1
-        
-        # Ports
-        if 'tcp_ports' in analysis_results:
-            for port in analysis_results['tcp_ports'][:10]:  # Limiter aux 10 premiers
-                stats["port_stats"]["src_ports"][port] = 1  # Valeur arbitraire car on n'a pas le compte exact
-        
-        if 'udp_ports' in analysis_results:
-            for port in analysis_results['udp_ports'][:10]:  # Limiter aux 10 premiers
-                stats["port_stats"]["dst_ports"][port] = 1  # Valeur arbitraire car on n'a pas le compte exact
-        
-        # Trier et limiter les statistiques
-        stats["ip_stats"]["src_ips"] = dict(sorted(stats["ip_stats"]["src_ips"].items(), key=lambda x: x[1], reverse=True)[:10])
-        stats["ip_stats"]["dst_ips"] = dict(sorted(stats["ip_stats"]["dst_ips"].items(), key=lambda x: x[1], reverse=True)[:10])
-        stats["ip_stats"]["conversations"] = dict(sorted(stats["ip_stats"]["conversations"].items(), key=lambda x: x[1], reverse=True)[:10])
+        # Compteurs exacts issus de l'analyse en flux (IP, ports, flux 5-tuple)
+        if 'flows' in analysis_results:
+            stats["ip_stats"]["src_ips"] = analysis_results["ip_counts"]["src"]
+            stats["ip_stats"]["dst_ips"] = analysis_results["ip_counts"]["dst"]
+            stats["ip_stats"]["conversations"] = analysis_results["conversations"]
+            stats["port_stats"]["src_ports"] = analysis_results["port_counts"]["src"]
+            stats["port_stats"]["dst_ports"] = analysis_results["port_counts"]["dst"]
+            stats["flows"] = analysis_results["flows"]
+            stats["flow_count"] = analysis_results.get("flow_count", 0)
         
         return stats
 
@@ -0,0 +1,563 @@
+# services/tcp_reassembly.py
+"""
+Réassemblage des flux TCP d'une capture, à mémoire bornée.
+
+TcpReassembler reçoit les paquets un par un et restitue, pour chaque sens de
+chaque connexion, les octets de charge utile dans l'ordre des numéros de
+séquence (callback on_data) :
+
+- les retransmissions et recouvrements sont rognés (seuls les octets encore
+  jamais livrés le sont) ;
+- les segments arrivés en avance sont mis en attente jusqu'à ce que le trou
+  soit comblé ;
+- un paquet tronqué (snaplen) ou un trou jamais comblé est signalé comme
+  un manque (callback on_gap) plutôt que de bloquer le flux.
+
+La mémoire est bornée : au plus MAX_STREAM_BUFFER octets en attente par sens,
+MAX_TOTAL_BUFFER au total (au-delà, les flux inactifs depuis le plus
+longtemps sont vidés en sautant leurs trous), MAX_STREAMS connexions suivies et
+IDLE_TIMEOUT secondes d'inactivité avant fermeture. Les octets livrés ne sont
+pas conservés : c'est l'appelant qui décide de les compter, de les écrire ou
+d'en garder un extrait.
+
+Les flux sont numérotés dans l'ordre de leur premier paquet (équivalent de
+tcp.stream dans Wireshark). La numérotation ne dépend que de la capture : elle
+est identique que le flux soit réassemblé ou seulement compté (stream_filter),
+ce qui permet de suivre un flux en ne réassemblant que lui.
+"""
+import heapq
+import struct
+from collections import OrderedDict
+from utils.logger import get_logger
+from services.pcap_reader import PcapReader, open_capture, dissect_packet
+from services.flow_table import flow_key
+
+# Configuration du logger
+logger = get_logger('tcp_reassembly')
+
+# Octets hors séquence mis en attente par sens d'une connexion
+MAX_STREAM_BUFFER = 1024 * 1024
+# Octets hors séquence mis en attente pour l'ensemble des connexions
+MAX_TOTAL_BUFFER = 64 * 1024 * 1024
+# Connexions suivies simultanément (les plus anciennement actives sont fermées)
+MAX_STREAMS = 100000
+# Inactivité (secondes, temps de la capture) avant fermeture d'une connexion
+IDLE_TIMEOUT = 300.0
+# Paquets entre deux recherches de connexions inactives
+IDLE_CHECK_INTERVAL = 1000
+# Octets retournés au plus par follow_stream
+FOLLOW_MAX_BYTES = 1024 * 1024
+# Début de la charge utile conservé par sens dans la liste des flux
+PREVIEW_BYTES = 64
+
+CLIENT, SERVER = 0, 1
+DIRECTIONS = ("client", "server")
+
+TCP_FIN, TCP_SYN, TCP_RST, TCP_ACK = 0x01, 0x02, 0x04, 0x10
+_SEQ_MASK = 0xFFFFFFFF
+_SEQ = struct.Struct(">I")
+
+
+def _seq_diff(a, b):
+    """a - b modulo 2^32, ramené dans [-2^31, 2^31[ (bouclage des numéros de séquence)"""
+    diff = (a - b) & _SEQ_MASK
+    return diff - 0x100000000 if diff & 0x80000000 else diff
+
+
+class _HalfStream:
+    """État d'un sens de connexion"""
+
+    __slots__ = ("next_seq", "position", "pending", "queue", "pending_bytes", "packets", "bytes", "gaps",
+                 "retransmissions", "out_of_order", "fin")
+
+    def __init__(self):
+        self.next_seq = None
+        # Position de next_seq dans le flux, sans bouclage des numéros de séquence
+        self.position = 0
+        # Segments en avance : seq -> (octets capturés, octets manquants en fin de segment)
+        self.pending = {}
+        # Tas des segments en attente (position, seq) : le prochain à livrer en tête
+        self.queue = []
+        self.pending_bytes = 0
+        self.packets = 0
+        self.bytes = 0
+        self.gaps = 0
+        self.retransmissions = 0
+        self.out_of_order = 0
+        self.fin = False
+
+
+class TcpStream:
+    """Connexion TCP suivie (extrémités, compteurs et état de réassemblage)"""
+
+    def __init__(self, stream_id, key, client_is_a, timestamp, selected=True):
+        _, ip_a, port_a, ip_b, port_b = key
+        self.id = stream_id
+        self.key = key
+        self.client_is_a = client_is_a
+        self.client = (ip_a, port_a) if client_is_a else (ip_b, port_b)
+        self.server = (ip_b, port_b) if client_is_a else (ip_a, port_a)
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.packets = 0
+        # Numéro de séquence initial du SYN client (détection de réutilisation du 5-tuple)
+        self.client_isn = None
+        self.reset = False
+        # Les flux non sélectionnés ne sont que comptés (pas de réassemblage)
+        self.selected = selected
+        self.halves = (_HalfStream(), _HalfStream()) if selected else None
+
+    def summary(self):
+        """
+        Résumé sérialisable de la connexion
+
+        Returns:
+            dict: Identifiant, extrémités, durée et compteurs par sens
+        """
+        result = {
+            "id": self.id,
+            "client": self.client[0],
+            "client_port": self.client[1],
+            "server": self.server[0],
+            "server_port": self.server[1],
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "duration": round(self.last_seen - self.first_seen, 6),
+            "packets": self.packets,
+            "reset": self.reset
+        }
+        if self.halves:
+            for name, half in zip(DIRECTIONS, self.halves):
+                result[name + "_stats"] = {
+                    "packets": half.packets,
+                    "bytes": half.bytes,
+                    "gaps": half.gaps,
+                    "retransmissions": half.retransmissions,
+                    "out_of_order": half.out_of_order,
+                    "fin": half.fin
+                }
+        return result
+
+
+class TcpReassembler:
+    """Réassemble les flux TCP paquet par paquet"""
+
+    def __init__(self, on_data=None, on_gap=None, on_close=None, stream_filter=None,
+                 max_stream_buffer=MAX_STREAM_BUFFER, max_total_buffer=MAX_TOTAL_BUFFER,
+                 max_streams=MAX_STREAMS, idle_timeout=IDLE_TIMEOUT):
+        """
+        Args:
+            on_data (callable, optional): on_data(stream, direction, data) pour chaque
+                bloc d'octets livré dans l'ordre (direction : CLIENT ou SERVER)
+            on_gap (callable, optional): on_gap(stream, direction, size) pour chaque
+                manque (octets jamais capturés ou trou abandonné)
+            on_close (callable, optional): on_close(stream) à la fermeture d'un flux
+            stream_filter (callable, optional): stream_filter(stream_id) -> bool ; les
+                flux refusés sont numérotés et comptés sans être réassemblés
+            max_stream_buffer (int): Octets en attente au plus par sens
+            max_total_buffer (int): Octets en attente au plus au total
+            max_streams (int): Connexions suivies simultanément
+            idle_timeout (float): Inactivité (secondes) avant fermeture d'une connexion
+        """
+        self.on_data = on_data
+        self.on_gap = on_gap
+        self.on_close = on_close
+        self.stream_filter = stream_filter
+        self.max_stream_buffer = max_stream_buffer
+        self.max_total_buffer = max_total_buffer
+        self.max_streams = max_streams
+        self.idle_timeout = idle_timeout
+        # Connexions ouvertes, de la moins récemment active à la plus récente
+        self.streams = OrderedDict()
+        self.stream_count = 0
+        self.buffered = 0
+        self.peak_buffered = 0
+        self.forced_flushes = 0
+        self.idle_closed = 0
+        self.evicted = 0
+        self._packets = 0
+
+    def add(self, record):
+        """
+        Ajoute un paquet lu dans la capture
+
+        Args:
+            record (PacketRecord): Paquet brut
+        """
+        self.add_packet(record, dissect_packet(record.linktype, record.data))
+
+    def add_packet(self, record, info):
+        """
+        Ajoute un paquet déjà disséqué
+
+        Args:
+            record (PacketRecord): Paquet brut
+            info (PacketInfo): En-têtes disséqués du paquet
+        """
+        self._packets += 1
+        if self._packets % IDLE_CHECK_INTERVAL == 0:
+            self._close_idle(record.timestamp)
+        if info.ip_proto != 6 or info.transport_offset is None or not info.src:
+            return
+        data = record.data
+        header = info.transport_offset
+        if len(data) < header + 8:
+            return
+        seq = _SEQ.unpack_from(data, header + 4)[0]
+        flags = info.tcp_flags
+        key, forward = flow_key(6, info.src, info.sport, info.dst, info.dport)
+
+        stream = self.streams.get(key)
+        syn_only = flags & (TCP_SYN | TCP_ACK) == TCP_SYN
+        if stream is not None and syn_only and stream.client_isn is not None and stream.client_isn != seq:
+            # Nouveau SYN sur un 5-tuple déjà vu : nouvelle connexion
+            self._close(stream)
+            stream = None
+        if stream is None:
+            stream = self._open(key, forward, flags, record.timestamp)
+        else:
+            self.streams.move_to_end(key)
+
+        stream.packets += 1
+        if record.timestamp > stream.last_seen:
+            stream.last_seen = record.timestamp
+        direction = CLIENT if forward == stream.client_is_a else SERVER
+        if syn_only and direction == CLIENT:
+            stream.client_isn = seq
+        if flags & TCP_RST:
+            stream.reset = True
+        if not stream.selected:
+            return
+
+        payload = data[info.payload_offset:info.payload_end]
+        # Paquet tronqué à la capture : les octets non capturés sont un manque
+        missing = record.length - record.caplen if record.caplen < record.length else 0
+        self._segment(stream, direction, seq, payload, missing, flags)
+
+    def _open(self, key, forward, flags, timestamp):
+        if len(self.streams) >= self.max_streams:
+            self.evicted += 1
+            self._close(next(iter(self.streams.values())))
+        # Le client est l'émetteur du SYN, le destinataire du SYN-ACK, sinon l'émetteur du premier paquet
+        client_is_a = forward if not (flags & TCP_SYN and flags & TCP_ACK) else not forward
+        stream_id = self.stream_count
+        self.stream_count += 1
+        selected = self.stream_filter is None or self.stream_filter(stream_id)
+        stream = TcpStream(stream_id, key, client_is_a, timestamp, selected)
+        self.streams[key] = stream
+        return stream
+
+    def _segment(self, stream, direction, seq, payload, missing, flags):
+        half = stream.halves[direction]
+        half.packets += 1
+        if flags & TCP_SYN:
+            # Le SYN consomme un numéro de séquence
+            seq = (seq + 1) & _SEQ_MASK
+            if half.next_seq is None or not half.bytes:
+                self._set_next_seq(half, seq)
+        if half.next_seq is None:
+            half.next_seq = seq
+        if flags & TCP_FIN:
+            half.fin = True
+
+        size = len(payload) + missing
+        if not size:
+            return
+        diff = _seq_diff(seq, half.next_seq)
+        if diff > 0:
+            self._buffer(stream, direction, half, seq, payload, missing)
+        elif diff + size <= 0:
+            half.retransmissions += 1
+        else:
+            self._deliver(stream, direction, half, payload, missing, -diff)
+            self._drain(stream, direction, half)
+
+    def _deliver(self, stream, direction, half, payload, missing, trim=0):
+        """Livre un segment en rognant les `trim` premiers octets déjà livrés"""
+        if trim:
+            if trim >= len(payload):
+                missing -= trim - len(payload)
+                payload = b""
+            else:
+                payload = payload[trim:]
+        if payload:
+            half.bytes += len(payload)
+            if self.on_data:
+                self.on_data(stream, direction, payload)
+        if missing:
+            self._gap(stream, direction, half, missing)
+        half.next_seq = (half.next_seq + len(payload) + missing) & _SEQ_MASK
+        half.position += len(payload) + missing
+
+    @staticmethod
+    def _set_next_seq(half, seq):
+        """Fixe le prochain numéro attendu (SYN) en replaçant les segments déjà en attente"""
+        half.next_seq = seq
+        if half.queue:
+            half.queue = [(half.position + _seq_diff(pending, seq), pending) for pending in half.pending]
+            heapq.heapify(half.queue)
+
+    def _gap(self, stream, direction, half, size):
+        half.gaps += size
+        if self.on_gap:
+            self.on_gap(stream, direction, size)
+
+    def _buffer(self, stream, direction, half, seq, payload, missing):
+        """Met en attente un segment arrivé en avance"""
+        previous = half.pending.get(seq)
+        if previous is not None:
+            if len(previous[0]) + previous[1] >= len(payload) + missing:
+                half.retransmissions += 1
+                return
+            self._unbuffer(half, len(previous[0]))
+        else:
+            half.out_of_order += 1
+            heapq.heappush(half.queue, (half.position + _seq_diff(seq, half.next_seq), seq))
+        half.pending[seq] = (payload, missing)
+        half.pending_bytes += len(payload)
+        self.buffered += len(payload)
+        if self.buffered > self.peak_buffered:
+            self.peak_buffered = self.buffered
+
+        while half.pending_bytes > self.max_stream_buffer:
+            self._skip_gap(stream, direction, half)
+        if self.buffered > self.max_total_buffer:
+            self._relieve()
+
+    def _unbuffer(self, half, size):
+        half.pending_bytes -= size
+        self.buffered -= size
+
+    def _drain(self, stream, direction, half):
+        """Livre les segments en attente devenus contigus (dans l'ordre de leur position)"""
+        while half.queue and half.queue[0][0] <= half.position:
+            _, ready = heapq.heappop(half.queue)
+            payload, missing = half.pending.pop(ready)
+            self._unbuffer(half, len(payload))
+            trim = -_seq_diff(ready, half.next_seq)
+            if trim >= len(payload) + missing:
+                half.retransmissions += 1
+                continue
+            self._deliver(stream, direction, half, payload, missing, trim)
+
+    def _skip_gap(self, stream, direction, half):
+        """Abandonne le trou avant le premier segment en attente"""
+        position, first = half.queue[0]
+        self._gap(stream, direction, half, position - half.position)
+        half.next_seq = first
+        half.position = position
+        self._drain(stream, direction, half)
+
+    def _flush(self, stream):
+        """Livre tout ce qui est en attente pour une connexion, trous compris"""
+        if not stream.halves:
+            return
+        for direction, half in enumerate(stream.halves):
+            while half.pending:
+                self._skip_gap(stream, direction, half)
+
+    def _relieve(self):
+        """Vide les connexions les moins récemment actives jusqu'à repasser sous MAX_TOTAL_BUFFER"""
+        for stream in list(self.streams.values()):
+            if self.buffered <= self.max_total_buffer:
+                break
+            if stream.halves and (stream.halves[0].pending or stream.halves[1].pending):
+                self.forced_flushes += 1
+                self._flush(stream)
+
+    def _close_idle(self, now):
+        limit = now - self.idle_timeout
+        while self.streams:
+            stream = next(iter(self.streams.values()))
+            if stream.last_seen >= limit:
+                break
+            self.idle_closed += 1
+            self._close(stream)
+
+    def _close(self, stream):
+        del self.streams[stream.key]
+        self._flush(stream)
+        if self.on_close:
+            self.on_close(stream)
+
+    def finish(self):
+        """Ferme toutes les connexions encore ouvertes (fin de capture)"""
+        while self.streams:
+            self._close(next(iter(self.streams.values())))
+
+    def memory_stats(self):
+        """Compteurs d'utilisation mémoire et d'éviction"""
+        return {
+            "streams": self.stream_count,
+            "open_streams": len(self.streams),
+            "buffered_bytes": self.buffered,
+            "peak_buffered_bytes": self.peak_buffered,
+            "forced_flushes": self.forced_flushes,
+            "idle_closed": self.idle_closed,
+            "evicted": self.evicted
+        }
+
+
+def reassemble(pcap_file, reassembler, stop=None):
+    """
+    Passe une capture dans un réassembleur puis ferme les connexions restantes
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+        reassembler (TcpReassembler): Réassembleur configuré
+        stop (callable, optional): Arrête la lecture quand stop() est vrai
+    """
+    with open_capture(pcap_file) as f:
+        for record in PcapReader(f):
+            reassembler.add(record)
+            if stop and stop():
+                break
+    reassembler.finish()
+
+
+def list_streams(pcap_file, offset=0, limit=None):
+    """
+    Liste des flux TCP d'une capture (éventuellement une page)
+
+    Seuls les flux de la page sont réassemblés (compteurs par sens et début de
+    la charge utile) ; les autres sont seulement numérotés.
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+        offset (int): Numéro du premier flux
+        limit (int, optional): Nombre maximal de flux (défaut: tous)
+
+    Returns:
+        dict: Nombre total de flux, flux de la page et statistiques mémoire
+    """
+    page = {}
+    previews = {}
+
+    def on_data(stream, direction, data):
+        preview = previews.setdefault(stream.id, [b"", b""])
+        if len(preview[direction]) < PREVIEW_BYTES:
+            preview[direction] = (preview[direction] + data)[:PREVIEW_BYTES]
+
+    def on_close(stream):
+        if stream.selected:
+            summary = stream.summary()
+            preview = previews.pop(stream.id, (b"", b""))
+            for direction, name in enumerate(DIRECTIONS):
+                summary[name + "_preview"] = preview[direction].decode("latin-1")
+            page[stream.id] = summary
+
+    end = float("inf") if limit is None else offset + limit
+    reassembler = TcpReassembler(on_data=on_data, on_close=on_close,
+                                 stream_filter=lambda stream_id: offset <= stream_id < end)
+    reassemble(pcap_file, reassembler)
+    return {
+        "total": reassembler.stream_count,
+        "offset": offset,
+        "limit": limit,
+        "streams": [page[stream_id] for stream_id in sorted(page)],
+        "memory": reassembler.memory_stats()
+    }
+
+
+def follow_stream(pcap_file, stream_id, max_bytes=FOLLOW_MAX_BYTES):
+    """
+    Contenu d'un flux TCP dans l'ordre de l'échange ("Follow TCP stream")
+
+    Les blocs consécutifs d'un même sens sont regroupés ; les manques sont
+    signalés par un bloc {"direction", "gap"}.
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+        stream_id (int): Numéro du flux (voir list_streams)
+        max_bytes (int): Octets retournés au plus (le flux est tronqué au-delà)
+
+    Returns:
+        dict: Résumé du flux, blocs (direction, offset, data en bytes) et
+        indicateur de troncature, ou None si le flux n'existe pas
+    """
+    chunks = []
+    offsets = [0, 0]
+    state = {"summary": None, "kept": 0, "truncated": False}
+
+    def on_data(stream, direction, data):
+        offset = offsets[direction]
+        offsets[direction] += len(data)
+        room = max_bytes - state["kept"]
+        if room <= 0:
+            state["truncated"] = True
+            return
+        if len(data) > room:
+            data = data[:room]
+            state["truncated"] = True
+        state["kept"] += len(data)
+        last = chunks[-1] if chunks else None
+        if last and "data" in last and last["direction"] == DIRECTIONS[direction]:
+            last["data"] += data
+        else:
+            chunks.append({"direction": DIRECTIONS[direction], "offset": offset, "data": data})
+
+    def on_gap(stream, direction, size):
+        offsets[direction] += size
+        if not state["truncated"]:
+            chunks.append({"direction": DIRECTIONS[direction], "gap": size})
+
+    def on_close(stream):
+        if stream.selected:
+            state["summary"] = stream.summary()
+
+    reassembler = TcpReassembler(on_data=on_data, on_gap=on_gap, on_close=on_close,
+                                 stream_filter=lambda number: number == stream_id)
+    # Le flux est terminé dès qu'il a été fermé (inactivité ou réutilisation du 5-tuple)
+    reassemble(pcap_file, reassembler, stop=lambda: state["summary"] is not None)
+    if state["summary"] is None:
+        return None
+    for chunk in chunks:
+        if "data" in chunk:
+            chunk["data"] = bytes(chunk["data"])
+    return {
+        "stream": state["summary"],
+        "chunks": chunks,
+        "truncated": state["truncated"],
+        "memory": reassembler.memory_stats()
+    }
+
+
+def iter_stream_payload(pcap_file, stream_id, direction=CLIENT):
+    """
+    Charge utile réassemblée d'un sens d'un flux, en blocs (extraction de fichier)
+
+    Les blocs sont produits au fil de la lecture de la capture : la charge
+    utile n'est jamais entièrement en mémoire. Les manques ne sont pas comblés.
+
+    Args:
+        pcap_file (str): Chemin vers la capture
+        stream_id (int): Numéro du flux
+        direction (int): CLIENT (requêtes) ou SERVER (réponses)
+
+    Yields:
+        bytes: Octets dans l'ordre du flux
+    """
+    ready = []
+    done = []
+
+    def on_data(stream, chunk_direction, data):
+        if chunk_direction == direction:
+            ready.append(data)
+
+    def on_close(stream):
+        if stream.selected:
+            done.append(stream.id)
+
+    reassembler = TcpReassembler(on_data=on_data, on_close=on_close,
+                                 stream_filter=lambda number: number == stream_id)
+    with open_capture(pcap_file) as f:
+        for record in PcapReader(f):
+            reassembler.add(record)
+            if ready:
+                yield b"".join(ready)
+                ready.clear()
+            if done:
+                return
+    reassembler.finish()
+    if ready:
+        yield b"".join(ready)
@@ -0,0 +1,276 @@
+# services/traffic_series.py
+"""
+Séries temporelles de trafic (paquets/s, octets/s, nouveaux flux/s, débit par
+protocole) calculées par intervalles de largeur fixe.
+
+Les intervalles sont alignés sur une grille absolue : l'intervalle d'un paquet
+est floor(timestamp / largeur). Quand une capture couvre plus de `max_points`
+intervalles, la largeur est doublée (les intervalles sont fusionnés deux à
+deux) jusqu'à rentrer dans la limite : une capture de plusieurs jours reste
+affichable avec un nombre de points fixe. La grille absolue rend deux séries
+fusionnables (captures en anneau, analyse groupée).
+
+TimeSeriesAccumulator construit la série paquet par paquet (passe d'analyse en
+flux) ; series_from_arrays() produit exactement le même résultat de façon
+vectorisée à partir des colonnes exportées.
+"""
+import math
+from services.packet_table import USE_NUMPY
+
+if USE_NUMPY:
+    import numpy as np
+
+DEFAULT_BIN_WIDTH = 1.0
+DEFAULT_MAX_POINTS = 600
+# Protocoles détaillés dans la série (les autres sont regroupés)
+TOP_PROTOCOLS = 5
+OTHER_PROTOCOLS = "Autres"
+
+# Index des compteurs d'un intervalle
+PACKETS, BYTES, NEW_FLOWS, PROTOCOLS = range(4)
+
+
+def _span(first_bin, last_bin):
+    return last_bin - first_bin + 1
+
+
+class TimeSeriesAccumulator:
+    """Série temporelle construite paquet par paquet, à mémoire bornée"""
+
+    def __init__(self, bin_width=DEFAULT_BIN_WIDTH, max_points=DEFAULT_MAX_POINTS):
+        """
+        Args:
+            bin_width (float): Largeur initiale d'un intervalle (secondes)
+            max_points (int): Nombre maximal d'intervalles de la série
+        """
+        self.base_width = bin_width
+        self.bin_width = bin_width
+        self.max_points = max_points
+        self.bins = {}
+        self.first_bin = None
+        self.last_bin = None
+
+    def add(self, timestamp, length, protocol, new_flow=False):
+        """
+        Ajoute un paquet à la série
+
+        Args:
+            timestamp (float): Horodatage du paquet
+            length (int): Taille du paquet
+            protocol (str): Protocole de plus haut niveau
+            new_flow (bool): Le paquet ouvre un nouveau flux
+        """
+        index = math.floor(timestamp / self.bin_width)
+        if self.first_bin is None:
+            self.first_bin = self.last_bin = index
+        elif index < self.first_bin or index > self.last_bin:
+            self.first_bin = min(self.first_bin, index)
+            self.last_bin = max(self.last_bin, index)
+            while _span(self.first_bin, self.last_bin) > self.max_points:
+                self._double()
+            index = math.floor(timestamp / self.bin_width)
+
+        entry = self.bins.get(index)
+        if entry is None:
+            entry = self.bins[index] = [0, 0, 0, {}]
+        entry[PACKETS] += 1
+        entry[BYTES] += length
+        if new_flow:
+            entry[NEW_FLOWS] += 1
+        protocols = entry[PROTOCOLS]
+        protocols[protocol] = protocols.get(protocol, 0) + 1
+
+    def _double(self):
+        """Double la largeur des intervalles en fusionnant les intervalles voisins"""
+        merged = {}
+        for index, entry in self.bins.items():
+            target = merged.get(index // 2)
+            if target is None:
+                merged[index // 2] = entry
+                continue
+            target[PACKETS] += entry[PACKETS]
+            target[BYTES] += entry[BYTES]
+            target[NEW_FLOWS] += entry[NEW_FLOWS]
+            for protocol, count in entry[PROTOCOLS].items():
+                target[PROTOCOLS][protocol] = target[PROTOCOLS].get(protocol, 0) + count
+        self.bins = merged
+        self.bin_width *= 2
+        self.first_bin //= 2
+        self.last_bin //= 2
+
+    def state(self):
+        """État sérialisable (fusionnable avec merge_state)"""
+        return {
+            "base_width": self.base_width,
+            "bin_width": self.bin_width,
+            "bins": [[index] + entry for index, entry in self.bins.items()]
+        }
+
+    def merge_state(self, state):
+        """
+        Fusionne la série d'une autre capture (même largeur initiale)
+
+        Args:
+            state (dict): Résultat de state() (éventuellement relu depuis JSON)
+        """
+        if not state["bins"] or state["base_width"] != self.base_width:
+            return
+        other_width = state["bin_width"]
+        while self.bin_width < other_width:
+            self._double_empty_safe()
+        shift = round(math.log2(self.bin_width / other_width))
+        for index, packets, length, new_flows, protocols in state["bins"]:
+            index >>= shift
+            if self.first_bin is None:
+                self.first_bin = self.last_bin = index
+            else:
+                self.first_bin = min(self.first_bin, index)
+                self.last_bin = max(self.last_bin, index)
+            entry = self.bins.get(index)
+            if entry is None:
+                entry = self.bins[index] = [0, 0, 0, {}]
+            entry[PACKETS] += packets
+            entry[BYTES] += length
+            entry[NEW_FLOWS] += new_flows
+            for protocol, count in protocols.items():
+                entry[PROTOCOLS][protocol] = entry[PROTOCOLS].get(protocol, 0) + count
+        while _span(self.first_bin, self.last_bin) > self.max_points:
+            self._double()
+
+    def remove_new_flow(self, timestamp):
+        """
+        Retire un nouveau flux compté en double (flux recombiné lors d'une fusion)
+
+        Args:
+            timestamp (float): Premier paquet du flux dans la capture fusionnée
+        """
+        entry = self.bins.get(math.floor(timestamp / self.bin_width))
+        if entry is not None and entry[NEW_FLOWS]:
+            entry[NEW_FLOWS] -= 1
+
+    def _double_empty_safe(self):
+        if self.first_bin is None:
+            self.bin_width *= 2
+        else:
+            self._double()
+
+    def result(self):
+        """
+        Série temporelle sérialisable
+
+        Returns:
+            dict: start, bin_width, points et les séries packets, bytes, new_flows,
+            pps, bps, new_flows_per_s et protocols (paquets/s par protocole)
+        """
+        if self.first_bin is None:
+            return _empty_series(self.bin_width)
+        points = _span(self.first_bin, self.last_bin)
+        packets = [0] * points
+        sizes = [0] * points
+        new_flows = [0] * points
+        totals = {}
+        for index, entry in self.bins.items():
+            i = index - self.first_bin
+            packets[i] = entry[PACKETS]
+            sizes[i] = entry[BYTES]
+            new_flows[i] = entry[NEW_FLOWS]
+            for protocol, count in entry[PROTOCOLS].items():
+                totals[protocol] = totals.get(protocol, 0) + count
+
+        top = _top_protocols(totals)
+        per_protocol = {protocol: [0] * points for protocol in top}
+        if len(top) < len(totals):
+            per_protocol[OTHER_PROTOCOLS] = [0] * points
+        for index, entry in self.bins.items():
+            i = index - self.first_bin
+            for protocol, count in entry[PROTOCOLS].items():
+                key = protocol if protocol in top else OTHER_PROTOCOLS
+                per_protocol[key][i] += count
+
+        return _build_series(self.first_bin, self.bin_width, packets, sizes, new_flows, per_protocol)
+
+
+def _top_protocols(totals):
+    """Protocoles les plus fréquents (ex aequo départagés par nom)"""
+    ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+    return [protocol for protocol, _ in ranked[:TOP_PROTOCOLS]]
+
+
+def _empty_series(bin_width):
+    return {"start": None, "bin_width": bin_width, "points": 0, "packets": [], "bytes": [],
+            "new_flows": [], "pps": [], "bps": [], "new_flows_per_s": [], "protocols": {}}
+
+
+def _build_series(first_bin, bin_width, packets, sizes, new_flows, per_protocol):
+    return {
+        "start": first_bin * bin_width,
+        "bin_width": bin_width,
+        "points": len(packets),
+        "packets": packets,
+        "bytes": sizes,
+        "new_flows": new_flows,
+        "pps": [round(count / bin_width, 3) for count in packets],
+        "bps": [round(size * 8 / bin_width, 3) for size in sizes],
+        "new_flows_per_s": [round(count / bin_width, 3) for count in new_flows],
+        "protocols": {
+            protocol: [round(count / bin_width, 3) for count in counts]
+            for protocol, counts in per_protocol.items()
+        }
+    }
+
+
+def series_from_arrays(timestamps, lengths, protocols, protocol_names, new_flow_mask=None,
+                       bin_width=DEFAULT_BIN_WIDTH, max_points=DEFAULT_MAX_POINTS):
+    """
+    Série temporelle vectorisée (même résultat que TimeSeriesAccumulator)
+
+    Args:
+        timestamps (numpy.ndarray): Horodatages des paquets
+        lengths (numpy.ndarray): Tailles des paquets
+        protocols (numpy.ndarray): Identifiants de protocole (index dans protocol_names)
+        protocol_names (list): Noms des protocoles
+        new_flow_mask (numpy.ndarray, optional): Vrai pour le premier paquet de chaque flux
+        bin_width (float): Largeur initiale d'un intervalle (secondes)
+        max_points (int): Nombre maximal d'intervalles de la série
+
+    Returns:
+        dict: Série (format de TimeSeriesAccumulator.result())
+    """
+    if not len(timestamps):
+        return _empty_series(bin_width)
+
+    ts_min, ts_max = float(timestamps.min()), float(timestamps.max())
+    width = bin_width
+    while _span(math.floor(ts_min / width), math.floor(ts_max / width)) > max_points:
+        width *= 2
+
+    index = np.floor(timestamps / width).astype(np.int64)
+    first_bin = int(index.min())
+    index -= first_bin
+    points = int(index.max()) + 1
+
+    packets = np.bincount(index, minlength=points)
+    sizes = np.bincount(index, weights=lengths.astype(np.float64), minlength=points)
+    if new_flow_mask is not None:
+        new_flows = np.bincount(index[new_flow_mask], minlength=points)
+    else:
+        new_flows = np.zeros(points, dtype=np.int64)
+
+    protocol_counts = np.bincount(protocols, minlength=len(protocol_names))
+    totals = {protocol_names[i]: int(count) for i, count in enumerate(protocol_counts) if count}
+    top = _top_protocols(totals)
+    per_protocol = {}
+    top_ids = [protocol_names.index(protocol) for protocol in top]
+    for protocol_id, protocol in zip(top_ids, top):
+        per_protocol[protocol] = np.bincount(index[protocols == protocol_id], minlength=points)
+    if len(top) < len(totals):
+        other_mask = ~np.isin(protocols, top_ids)
+        per_protocol[OTHER_PROTOCOLS] = np.bincount(index[other_mask], minlength=points)
+
+    return _build_series(
+        first_bin, width,
+        packets.astype(np.int64).tolist(),
+        sizes.astype(np.int64).tolist(),
+        new_flows.astype(np.int64).tolist(),
+        {protocol: counts.astype(np.int64).tolist() for protocol, counts in per_protocol.items()}
+    )
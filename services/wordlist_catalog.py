@@ -0,0 +1,408 @@
+# services/wordlist_catalog.py
+"""
+Catalogue persistant des wordlists disponibles.
+
+Parcourir /usr/share/wordlists et SecLists (des dizaines de milliers de
+fichiers) à chaque affichage de la page Hydra coûte plusieurs secondes. Le
+catalogue garde sur disque, pour chaque répertoire exploré, sa date de
+modification, ses sous-répertoires et ses wordlists (taille, nombre de
+lignes, catégorie). Une mise à jour ne relit que les répertoires dont la date
+de modification a changé (fichier ajouté, supprimé ou renommé) : un seul
+stat par répertoire suffit pour les autres. Les lignes d'un fichier ne sont
+recomptées que si sa taille ou sa date de modification ont changé, et jamais
+pendant la requête : un thread d'arrière-plan les compte et l'entrée garde
+"lines" à None en attendant.
+
+Le contenu d'un fichier réécrit sur place ne modifie pas la date de son
+répertoire : les fichiers du répertoire local (WORDLISTS_DIR), où les imports
+peuvent écraser une liste existante, sont donc vérifiés un par un.
+"""
+import json
+import os
+import threading
+import time
+from utils.logger import get_logger
+
+# Configuration du logger
+logger = get_logger('wordlist_catalog')
+
+# Répertoire des wordlists importées ou générées par l'application
+WORDLISTS_DIR = "wordlists"
+# Répertoires explorés (chemins par défaut pour Kali Linux)
+WORDLIST_ROOTS = ["/usr/share/wordlists", "/usr/share/seclists", WORDLISTS_DIR]
+# Listes ajoutées quel que soit leur nom ou leur taille : (chemin, nom affiché, catégorie)
+EXTRA_WORDLISTS = [
+    ("/usr/share/wordlists/rockyou.txt", "rockyou.txt", "password"),
+    ("/etc/passwd", "system-users", "user")
+]
+# Les fichiers plus gros sont ignorés lors de l'exploration
+MAX_WORDLIST_SIZE = 20 * 1024 * 1024
+
+CATEGORY_USER = "user"
+CATEGORY_PASSWORD = "password"
+# Listes locales, proposées comme utilisateurs et comme mots de passe
+CATEGORY_BOTH = "both"
+CATEGORIES = (CATEGORY_USER, CATEGORY_PASSWORD, CATEGORY_BOTH)
+
+CATALOG_FILE = os.path.join("cache", "wordlists", "catalog.json")
+CATALOG_VERSION = 1
+# Délai minimal entre deux vérifications des répertoires (secondes)
+CHECK_INTERVAL = 5
+SORT_KEYS = ("name", "path", "size", "lines")
+# Taille des blocs lus pour compter les lignes
+_COUNT_CHUNK = 1024 * 1024
+# Délai entre deux publications des lignes comptées en arrière-plan (secondes)
+COUNT_PUBLISH_INTERVAL = 2
+
+
+def count_lines(path):
+    """
+    Compte les lignes d'un fichier (la dernière peut ne pas finir par un saut de ligne)
+
+    Args:
+        path (str): Chemin du fichier
+
+    Returns:
+        int: Nombre de lignes
+    """
+    lines = 0
+    last = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_COUNT_CHUNK)
+            if not chunk:
+                break
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last and last != b"\n":
+        lines += 1
+    return lines
+
+
+def categorize(directory, name):
+    """
+    Catégorie d'une wordlist d'après son emplacement et son nom
+
+    Args:
+        directory (str): Répertoire du fichier
+        name (str): Nom du fichier
+
+    Returns:
+        str: "user", "password", "both" ou None (fichier ignoré)
+    """
+    if directory == WORDLISTS_DIR:
+        return CATEGORY_BOTH
+    lower = name.lower()
+    if "user" in lower or "login" in lower:
+        return CATEGORY_USER
+    if "pass" in lower or "pwd" in lower or "dict" in lower:
+        return CATEGORY_PASSWORD
+    return None
+
+
+class WordlistCatalog:
+    """Catalogue des wordlists invalidé par les dates de modification des répertoires"""
+
+    def __init__(self, roots=None, catalog_file=CATALOG_FILE, check_interval=CHECK_INTERVAL):
+        """
+        Args:
+            roots (list, optional): Répertoires explorés (WORDLIST_ROOTS par défaut)
+            catalog_file (str): Fichier JSON du catalogue
+            check_interval (float): Délai minimal entre deux vérifications
+        """
+        self.roots = list(roots) if roots is not None else list(WORDLIST_ROOTS)
+        self.catalog_file = catalog_file
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._dirs = None
+        self._extras = {}
+        self._entries = None
+        self._checked_at = None
+        self._counter = None
+        # (chemin, taille, date) des fichiers dont le comptage a échoué
+        self._skipped = set()
+
+    def _load(self):
+        if self._dirs is not None:
+            return
+        self._dirs = {}
+        try:
+            with open(self.catalog_file, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CATALOG_VERSION:
+                self._dirs = data["dirs"]
+                self._extras = data.get("extras", {})
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, OSError) as e:
+            logger.warning(f"Catalogue des wordlists illisible, reconstruction: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.catalog_file), exist_ok=True)
+        tmp_path = self.catalog_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CATALOG_VERSION, "dirs": self._dirs, "extras": self._extras}, f)
+        os.replace(tmp_path, self.catalog_file)
+
+    @staticmethod
+    def _file_entry(path, category, old, stats=None):
+        """
+        Entrée d'un fichier, reprise de l'ancienne si taille et date n'ont pas changé
+
+        Les lignes d'une nouvelle entrée restent à None jusqu'au comptage en
+        arrière-plan (voir _count_pending).
+        """
+        stats = stats or os.stat(path)
+        if old and old["size"] == stats.st_size and old["mtime"] == stats.st_mtime_ns \
+                and old["category"] == category:
+            return old, False
+        return {"size": stats.st_size, "mtime": stats.st_mtime_ns, "lines": None, "category": category}, True
+
+    def _list_dir(self, path, old_files):
+        """Relit un répertoire modifié : sous-répertoires et wordlists"""
+        subdirs = []
+        files = {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    # Comme os.walk : les liens vers des répertoires ne sont pas suivis
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    category = categorize(path, entry.name)
+                    if category is None:
+                        continue
+                    stats = entry.stat()
+                    if stats.st_size >= MAX_WORDLIST_SIZE:
+                        continue
+                    files[entry.name], _ = self._file_entry(entry.path, category, old_files.get(entry.name), stats)
+                except OSError as e:
+                    logger.debug(f"Fichier ignoré {entry.path}: {e}")
+        return sorted(subdirs), files
+
+    def _verify_files(self, path, files):
+        """Vérifie un à un les fichiers d'un répertoire (contenu réécrit sur place)"""
+        changed = False
+        for name, old in list(files.items()):
+            full_path = os.path.join(path, name)
+            try:
+                stats = os.stat(full_path)
+            except OSError:
+                del files[name]
+                changed = True
+                continue
+            if stats.st_size >= MAX_WORDLIST_SIZE:
+                del files[name]
+                changed = True
+                continue
+            files[name], updated = self._file_entry(full_path, old["category"], old, stats)
+            changed = changed or updated
+        return changed
+
+    def _scan(self, path, seen):
+        """Met à jour un répertoire et ses descendants ; retourne True si le catalogue a changé"""
+        if path in seen:
+            return False
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        seen.add(path)
+        cached = self._dirs.get(path)
+        changed = False
+        if cached is None or cached["mtime"] != mtime:
+            old_files = cached["files"] if cached else {}
+            try:
+                subdirs, files = self._list_dir(path, old_files)
+            except OSError as e:
+                logger.warning(f"Répertoire de wordlists illisible {path}: {e}")
+                return False
+            cached = self._dirs[path] = {"mtime": mtime, "subdirs": subdirs, "files": files}
+            logger.debug(f"Répertoire de wordlists relu: {path} ({len(files)} listes)")
+            changed = True
+        elif path == WORDLISTS_DIR:
+            changed = self._verify_files(path, cached["files"])
+        for subdir in cached["subdirs"]:
+            changed = self._scan(subdir, seen) or changed
+        return changed
+
+    def _refresh_extras(self):
+        changed = False
+        for path, _, category in EXTRA_WORDLISTS:
+            old = self._extras.get(path)
+            try:
+                entry, updated = self._file_entry(path, category, old)
+            except OSError:
+                if old is not None:
+                    del self._extras[path]
+                    changed = True
+                continue
+            self._extras[path] = entry
+            changed = changed or updated
+        return changed
+
+    def refresh(self, force=False):
+        """
+        Met à jour le catalogue si le délai de vérification est écoulé
+
+        Args:
+            force (bool): Vérifier immédiatement les répertoires
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return
+            self._load()
+            os.makedirs(WORDLISTS_DIR, exist_ok=True)
+            seen = set()
+            changed = False
+            for root in self.roots:
+                changed = self._scan(root, seen) or changed
+            # Répertoires supprimés (ou qui ne sont plus atteignables)
+            for path in [path for path in self._dirs if path not in seen]:
+                del self._dirs[path]
+                changed = True
+            changed = self._refresh_extras() or changed
+            self._checked_at = time.monotonic()
+            if changed or self._entries is None:
+                self._entries = self._build_entries()
+            if changed:
+                logger.info(f"Catalogue des wordlists mis à jour: {len(self._entries)} listes "
+                            f"({self._checked_at - now:.2f} s)")
+                try:
+                    self._save()
+                except OSError as e:
+                    logger.warning(f"Impossible d'enregistrer le catalogue des wordlists: {e}")
+            self._start_counting()
+
+    def _pending_counts(self):
+        """Entrées stockées dont les lignes restent à compter : liste de (chemin, entrée)"""
+        pending = []
+        for directory, cached in self._dirs.items():
+            for name, entry in cached["files"].items():
+                if entry["lines"] is None:
+                    pending.append((os.path.join(directory, name), entry))
+        for path, entry in self._extras.items():
+            if entry["lines"] is None:
+                pending.append((path, entry))
+        return [(path, entry) for path, entry in pending
+                if (path, entry["size"], entry["mtime"]) not in self._skipped]
+
+    def _start_counting(self):
+        """Lance le comptage des lignes en arrière-plan s'il reste des fichiers à compter"""
+        if self._counter is not None or not self._pending_counts():
+            return
+        self._counter = threading.Thread(target=self._count_pending, name="wordlist-line-count", daemon=True)
+        self._counter.start()
+
+    def _publish_counts(self):
+        """Rend visibles les lignes comptées et enregistre le catalogue (verrou pris)"""
+        self._entries = self._build_entries()
+        try:
+            self._save()
+        except OSError as e:
+            logger.warning(f"Impossible d'enregistrer le catalogue des wordlists: {e}")
+
+    def _count_pending(self):
+        """Compte, hors verrou, les lignes des entrées qui n'en ont pas encore"""
+        while True:
+            with self._lock:
+                pending = self._pending_counts()
+                if not pending:
+                    self._counter = None
+                    return
+            published_at = time.monotonic()
+            for path, entry in pending:
+                try:
+                    lines = count_lines(path)
+                    stats = os.stat(path)
+                except OSError as e:
+                    logger.warning(f"Impossible de lire la wordlist {path}: {e}")
+                    lines = stats = None
+                with self._lock:
+                    # Un fichier modifié pendant le comptage sera recompté avec sa nouvelle entrée
+                    if stats is not None and stats.st_size == entry["size"] \
+                            and stats.st_mtime_ns == entry["mtime"]:
+                        entry["lines"] = lines
+                    else:
+                        self._skipped.add((path, entry["size"], entry["mtime"]))
+                    if time.monotonic() - published_at >= COUNT_PUBLISH_INTERVAL:
+                        self._publish_counts()
+                        published_at = time.monotonic()
+            with self._lock:
+                self._publish_counts()
+            logger.debug(f"Lignes comptées pour {len(pending)} wordlists")
+
+    def invalidate(self):
+        """Force une vérification des répertoires à la prochaine requête"""
+        with self._lock:
+            self._checked_at = None
+
+    def _build_entries(self):
+        entries = []
+        for directory, cached in self._dirs.items():
+            for name, entry in cached["files"].items():
+                entries.append(dict(entry, name=name, path=os.path.join(directory, name), directory=directory))
+        names = {path: name for path, name, _ in EXTRA_WORDLISTS}
+        listed = {entry["path"] for entry in entries}
+        for path, entry in self._extras.items():
+            if path not in listed:
+                entries.append(dict(entry, name=names.get(path, os.path.basename(path)), path=path,
+                                    directory=os.path.dirname(path)))
+        for entry in entries:
+            del entry["mtime"]
+        entries.sort(key=lambda entry: (entry["name"], entry["path"]))
+        return entries
+
+    def query(self, category=None, search=None, offset=0, limit=None, sort="name", descending=False):
+        """
+        Recherche paginée dans le catalogue
+
+        Args:
+            category (str, optional): "user" ou "password" (les listes "both" sont incluses)
+            search (str, optional): Texte recherché dans le nom ou le chemin (sans casse)
+            offset (int): Index de la première liste retournée
+            limit (int, optional): Nombre maximal de listes retournées
+            sort (str): Clé de tri (name, path, size, lines)
+            descending (bool): Tri décroissant
+
+        Returns:
+            dict: total, offset, limit et wordlists (name, path, directory, size, lines, category) ;
+                lines vaut None tant que le fichier n'a pas été compté
+        """
+        if category is not None and category not in CATEGORIES:
+            raise ValueError(f"Catégorie de wordlist inconnue: {category} (user ou password)")
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Clé de tri inconnue: {sort} ({', '.join(SORT_KEYS)})")
+        self.refresh()
+        with self._lock:
+            entries = self._entries
+        if category == CATEGORY_BOTH:
+            entries = [entry for entry in entries if entry["category"] == CATEGORY_BOTH]
+        elif category is not None:
+            entries = [entry for entry in entries if entry["category"] in (category, CATEGORY_BOTH)]
+        if search:
+            needle = search.lower()
+            entries = [entry for entry in entries if needle in entry["name"].lower() or needle in entry["path"].lower()]
+        if sort != "name" or descending:
+            entries = sorted(entries, key=lambda entry: (entry[sort] is not None, entry[sort] or 0)
+                             if sort in ("size", "lines") else entry[sort], reverse=descending)
+        offset = max(0, offset)
+        page = entries[offset:offset + limit] if limit is not None else entries[offset:]
+        return {
+            "total": len(entries),
+            "offset": offset,
+            "limit": limit,
+            "wordlists": [dict(entry) for entry in page]
+        }
+
+
+_catalog = None
+
+
+def get_wordlist_catalog():
+    """Retourne l'instance partagée du catalogue des wordlists"""
+    global _catalog
+    if _catalog is None:
+        _catalog = WordlistCatalog()
+    return _catalog
@@ -0,0 +1,402 @@
+# services/wordlist_merge.py
+"""
+Fusion, normalisation et dédoublonnage de wordlists volumineuses.
+
+Les entrées sont lues en flux, normalisées (décodage, espaces, casse, forme
+Unicode) puis filtrées (longueur, jeu de caractères). Le dédoublonnage
+conserve la première occurrence de chaque mot, dans l'ordre des entrées :
+les listes étant triées par fréquence, l'ordre compte pour Hydra.
+
+Jusqu'à IN_MEMORY_BYTES d'entrées, un ensemble en mémoire suffit. Au-delà,
+les mots sont répartis par hachage dans des partitions sur disque avec leur
+numéro d'ordre : deux doublons tombent toujours dans la même partition, que
+l'on dédoublonne seule en mémoire. Les partitions dédoublonnées, déjà triées
+par numéro d'ordre, sont ensuite fusionnées (heapq.merge) pour retrouver
+l'ordre d'origine. La mémoire utilisée est donc bornée par la taille d'une
+partition et non par celle des listes.
+
+Le résultat est enregistré dans WORDLISTS_DIR et apparaît dans le catalogue.
+"""
+import heapq
+import os
+import re
+import shutil
+import tempfile
+import unicodedata
+from datetime import datetime
+from utils.logger import get_logger
+from utils.jobs import BackgroundJob, registry
+from services.wordlist_catalog import WORDLISTS_DIR, get_wordlist_catalog
+
+# Configuration du logger
+logger = get_logger('wordlist_merge')
+
+# Volume d'entrée dédoublonné directement en mémoire
+IN_MEMORY_BYTES = 16 * 1024 * 1024
+# Volume d'entrée visé par partition (au plus MAX_PARTITIONS fichiers ouverts)
+PARTITION_BYTES = 16 * 1024 * 1024
+MAX_PARTITIONS = 256
+# Répertoire de travail (partitions) : sur disque, /tmp pouvant être en mémoire
+WORK_DIR = os.path.join("cache", "wordlists", "work")
+# Lignes traitées entre deux mises à jour de la progression
+PROGRESS_INTERVAL = 10000
+
+CASE_MODES = ("lower", "upper")
+UNICODE_FORMS = ("NFC", "NFD", "NFKC", "NFKD")
+# Jeux de caractères prédéfinis (mot entier)
+CHARSETS = {
+    "digits": r"[0-9]+",
+    "alpha": r"[A-Za-z]+",
+    "alnum": r"[A-Za-z0-9]+",
+    "ascii": r"[\x20-\x7e]+",
+    "printable": r"[^\x00-\x1f\x7f]+"
+}
+
+# Poids des phases dans la progression globale (mode partitionné)
+_PHASE_WEIGHTS = {"reading": 0.5, "deduplicating": 0.25, "writing": 0.25}
+
+
+def merge_options(options=None):
+    """
+    Valide les options de normalisation et de filtrage
+
+    Args:
+        options (dict, optional): encoding (défaut utf-8), fallback_encoding
+            (défaut latin-1, None pour ignorer les lignes indécodables), strip
+            (défaut True), case (lower/upper), unicode_form (NFC...),
+            min_length, max_length, charset (digits, alpha, alnum, ascii,
+            printable), pattern (expression régulière sur le mot entier),
+            skip_comments (lignes commençant par #)
+
+    Returns:
+        dict: Options complétées
+
+    Raises:
+        ValueError: Option invalide
+    """
+    options = dict(options or {})
+    result = {
+        "encoding": options.get("encoding") or "utf-8",
+        "fallback_encoding": options.get("fallback_encoding", "latin-1") or None,
+        "strip": bool(options.get("strip", True)),
+        "case": options.get("case") or None,
+        "unicode_form": options.get("unicode_form") or None,
+        "min_length": int(options["min_length"]) if options.get("min_length") not in (None, "") else None,
+        "max_length": int(options["max_length"]) if options.get("max_length") not in (None, "") else None,
+        "charset": options.get("charset") or None,
+        "pattern": options.get("pattern") or None,
+        "skip_comments": bool(options.get("skip_comments", False))
+    }
+    for key in ("encoding", "fallback_encoding"):
+        if result[key]:
+            try:
+                "".encode(result[key])
+            except LookupError:
+                raise ValueError(f"Encodage inconnu: {result[key]}")
+    if result["case"] is not None and result["case"] not in CASE_MODES:
+        raise ValueError(f"Casse inconnue: {result['case']} (lower ou upper)")
+    if result["unicode_form"] is not None and result["unicode_form"] not in UNICODE_FORMS:
+        raise ValueError(f"Forme Unicode inconnue: {result['unicode_form']} ({', '.join(UNICODE_FORMS)})")
+    if result["charset"] is not None and result["charset"] not in CHARSETS:
+        raise ValueError(f"Jeu de caractères inconnu: {result['charset']} ({', '.join(CHARSETS)})")
+    if result["pattern"] is not None:
+        try:
+            re.compile(result["pattern"])
+        except re.error as e:
+            raise ValueError(f"Expression régulière invalide: {e}")
+    for key in ("min_length", "max_length"):
+        if result[key] is not None and result[key] < 0:
+            raise ValueError(f"{key} doit être positif")
+    return result
+
+
+class _Normalizer:
+    """Normalisation et filtrage d'une ligne brute, avec compteurs"""
+
+    def __init__(self, options):
+        self.options = options
+        self.charset = re.compile(CHARSETS[options["charset"]]) if options["charset"] else None
+        self.pattern = re.compile(options["pattern"]) if options["pattern"] else None
+        self.stats = {
+            "lines_read": 0,
+            "empty": 0,
+            "comments": 0,
+            "invalid_encoding": 0,
+            "fallback_decoded": 0,
+            "filtered_length": 0,
+            "filtered_charset": 0
+        }
+
+    def __call__(self, raw):
+        """
+        Args:
+            raw (bytes): Ligne lue (avec son saut de ligne)
+
+        Returns:
+            str: Mot normalisé, None si la ligne est écartée
+        """
+        options = self.options
+        stats = self.stats
+        stats["lines_read"] += 1
+        raw = raw.rstrip(b"\r\n")
+        try:
+            word = raw.decode(options["encoding"])
+        except UnicodeDecodeError:
+            if not options["fallback_encoding"]:
+                stats["invalid_encoding"] += 1
+                return None
+            word = raw.decode(options["fallback_encoding"], errors="replace")
+            stats["fallback_decoded"] += 1
+        if options["strip"]:
+            word = word.strip()
+        if not word:
+            stats["empty"] += 1
+            return None
+        if options["skip_comments"] and word.startswith("#"):
+            stats["comments"] += 1
+            return None
+        if options["unicode_form"]:
+            word = unicodedata.normalize(options["unicode_form"], word)
+        if options["case"] == "lower":
+            word = word.lower()
+        elif options["case"] == "upper":
+            word = word.upper()
+        if (options["min_length"] is not None and len(word) < options["min_length"]) or \
+                (options["max_length"] is not None and len(word) > options["max_length"]):
+            stats["filtered_length"] += 1
+            return None
+        if (self.charset and not self.charset.fullmatch(word)) or (self.pattern and not self.pattern.fullmatch(word)):
+            stats["filtered_charset"] += 1
+            return None
+        return word
+
+
+def _read_partition(path):
+    """Lignes (numéro d'ordre, mot) d'une partition dédoublonnée"""
+    with open(path, "rb") as f:
+        for line in f:
+            seq, word = line.rstrip(b"\n").split(b"\t", 1)
+            yield int(seq), word
+
+
+class _Stopped(Exception):
+    pass
+
+
+def merge_wordlists(inputs, output_path, options=None, progress=None, stop_event=None, work_dir=WORK_DIR):
+    """
+    Fusionne et dédoublonne des wordlists en conservant l'ordre des premières occurrences
+
+    Args:
+        inputs (list): Chemins des wordlists, dans l'ordre de priorité
+        output_path (str): Fichier résultat (UTF-8, un mot par ligne)
+        options (dict, optional): Options de normalisation (voir merge_options)
+        progress (callable, optional): Appelé avec (phase, fraction de 0 à 1, statistiques)
+        stop_event (threading.Event, optional): Arrêt anticipé (le résultat n'est pas écrit)
+        work_dir (str): Répertoire des partitions temporaires
+
+    Returns:
+        dict: Statistiques (lignes lues, écartées, doublons, mots écrits...),
+        None si la fusion a été arrêtée
+    """
+    options = merge_options(options)
+    for path in inputs:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Wordlist introuvable: {path}")
+    total_bytes = sum(os.path.getsize(path) for path in inputs) or 1
+    normalize = _Normalizer(options)
+    stats = normalize.stats
+    in_memory = total_bytes <= IN_MEMORY_BYTES
+    state = {"bytes_read": 0}
+    reading_weight = 1.0 if in_memory else _PHASE_WEIGHTS["reading"]
+
+    def _report(phase, fraction):
+        if stop_event is not None and stop_event.is_set():
+            raise _Stopped()
+        if progress is not None:
+            progress(phase, min(1.0, fraction), stats)
+
+    def _words():
+        """Mots normalisés de toutes les entrées, dans l'ordre"""
+        for path in inputs:
+            with open(path, "rb") as f:
+                for raw in f:
+                    state["bytes_read"] += len(raw)
+                    if stats["lines_read"] % PROGRESS_INTERVAL == 0:
+                        _report("reading", reading_weight * state["bytes_read"] / total_bytes)
+                    word = normalize(raw)
+                    if word is not None:
+                        yield word
+
+    os.makedirs(work_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix="merge_", dir=work_dir)
+    tmp_output = os.path.join(tmp_dir, "output.txt")
+    partitions = min(MAX_PARTITIONS, -(-total_bytes // PARTITION_BYTES))
+    stats.update({"inputs": len(inputs), "input_bytes": total_bytes, "duplicates": 0, "written": 0,
+                  "partitions": 0 if in_memory else partitions})
+    try:
+        if in_memory:
+            seen = set()
+            with open(tmp_output, "w", encoding="utf-8", newline="\n") as out:
+                for word in _words():
+                    if word in seen:
+                        stats["duplicates"] += 1
+                        continue
+                    seen.add(word)
+                    out.write(word + "\n")
+                    stats["written"] += 1
+            _report("writing", 1.0)
+        else:
+            _merge_partitioned(_words, tmp_dir, tmp_output, partitions, stats, _report)
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        shutil.move(tmp_output, output_path)
+    except _Stopped:
+        logger.info(f"Fusion de wordlists arrêtée ({stats['lines_read']} lignes lues)")
+        return None
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    stats["output_bytes"] = os.path.getsize(output_path)
+    return stats
+
+
+def _merge_partitioned(words, tmp_dir, tmp_output, partitions, stats, report):
+    """Dédoublonnage par partitions de hachage puis fusion dans l'ordre d'origine"""
+    weights = _PHASE_WEIGHTS
+    paths = [os.path.join(tmp_dir, f"part{index:03d}") for index in range(partitions)]
+    files = [open(path, "wb") for path in paths]
+    seq = 0
+    # hash() varie d'un processus à l'autre mais reste stable pendant la fusion
+    try:
+        for word in words():
+            data = word.encode("utf-8")
+            files[hash(data) % partitions].write(b"%d\t%s\n" % (seq, data))
+            seq += 1
+    finally:
+        for f in files:
+            f.close()
+
+    # Chaque partition tient en mémoire ; ses lignes sont déjà triées par numéro d'ordre
+    kept_paths = []
+    for index, path in enumerate(paths):
+        report("deduplicating", weights["reading"] + weights["deduplicating"] * index / partitions)
+        kept_path = path + ".kept"
+        seen = set()
+        with open(path, "rb") as src, open(kept_path, "wb") as dst:
+            for line in src:
+                word = line[line.index(b"\t") + 1:]
+                if word in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(word)
+                dst.write(line)
+        os.remove(path)
+        kept_paths.append(kept_path)
+
+    unique = seq - stats["duplicates"]
+    base = weights["reading"] + weights["deduplicating"]
+    with open(tmp_output, "wb") as out:
+        for _, word in heapq.merge(*[_read_partition(path) for path in kept_paths]):
+            out.write(word + b"\n")
+            stats["written"] += 1
+            if stats["written"] % PROGRESS_INTERVAL == 0:
+                report("writing", base + weights["writing"] * stats["written"] / max(1, unique))
+    report("writing", 1.0)
+
+
+def _output_path(name):
+    """Chemin du résultat dans WORDLISTS_DIR (nom assaini, jamais écrasé)"""
+    if not name:
+        name = f"merged_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(name)).lstrip(".")
+    if not name:
+        raise ValueError("Nom de wordlist invalide")
+    if "." not in name:
+        name += ".txt"
+    path = os.path.join(WORDLISTS_DIR, name)
+    if os.path.exists(path):
+        raise ValueError(f"La wordlist {name} existe déjà")
+    return path
+
+
+class WordlistMergeJob(BackgroundJob):
+    """Fusion de wordlists en tâche de fond, enregistrée dans le catalogue"""
+
+    kind = "wordlist_merge"
+
+    def __init__(self, inputs, name=None, options=None):
+        """
+        Args:
+            inputs (list): Chemins des wordlists à fusionner, par ordre de priorité
+            name (str, optional): Nom de la wordlist produite (généré sinon)
+            options (dict, optional): Options de normalisation (voir merge_options)
+        """
+        super().__init__()
+        if not inputs:
+            raise ValueError("Aucune wordlist à fusionner")
+        for path in inputs:
+            if not os.path.isfile(path):
+                raise ValueError(f"Wordlist introuvable: {path}")
+        self.inputs = list(inputs)
+        self.options = merge_options(options)
+        self.output_path = _output_path(name)
+        self.phase = "pending"
+        self.fraction = 0.0
+        self.stats = {}
+
+    def _on_progress(self, phase, fraction, stats):
+        self.phase = phase
+        self.fraction = fraction
+        self.stats = dict(stats)
+
+    def run(self):
+        logger.info(f"Fusion de {len(self.inputs)} wordlists vers {self.output_path}")
+        stats = merge_wordlists(self.inputs, self.output_path, self.options,
+                                progress=self._on_progress, stop_event=self.stop_event)
+        if stats is None:
+            self.phase = "stopped"
+            return None
+        self.stats = stats
+        self.phase = "done"
+        self.fraction = 1.0
+        get_wordlist_catalog().invalidate()
+        logger.info(f"Wordlist {self.output_path} créée: {stats['written']} mots, "
+                    f"{stats['duplicates']} doublons écartés")
+        return {
+            "path": self.output_path,
+            "name": os.path.basename(self.output_path),
+            "stats": stats
+        }
+
+    def progress(self):
+        return {
+            "inputs": self.inputs,
+            "output": self.output_path,
+            "options": self.options,
+            "phase": self.phase,
+            "percent": round(self.fraction * 100, 1),
+            "stats": self.stats,
+            "result": self.result
+        }
+
+
+def start_wordlist_merge(inputs, name=None, options=None):
+    """
+    Lance une fusion de wordlists en arrière-plan
+
+    Args:
+        inputs (list): Chemins des wordlists à fusionner
+        name (str, optional): Nom de la wordlist produite
+        options (dict, optional): Options de normalisation
+
+    Returns:
+        WordlistMergeJob: Tâche démarrée
+    """
+    return registry.submit(WordlistMergeJob(inputs, name, options))
+
+
+def get_wordlist_merge_job(job_id):
+    """Retourne une fusion de wordlists par son identifiant (ou None)"""
+    job = registry.get(job_id)
+    if job is None or job.kind != WordlistMergeJob.kind:
+        return None
+    return job
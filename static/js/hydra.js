@@ -48,6 +48,44 @@ function loadServices() {
     });
 }
 
+// Nombre maximal de wordlists proposées par liste déroulante (page de l'API)
+const WORDLIST_PAGE_SIZE = 1000;
+
+// Récupère une page du catalogue des wordlists pour une catégorie
+function fetchWordlistPage(category) {
+    const params = new URLSearchParams({ category: category, limit: WORDLIST_PAGE_SIZE });
+    return fetch(`/api/hydra/wordlists?${params}`, {
+        headers: { 'Accept': 'application/json' }
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error('Réponse réseau non valide');
+        }
+        return response.json();
+    });
+}
+
+// Remplit une liste déroulante avec une page du catalogue
+function fillWordlistSelect(selectElement, page, placeholder) {
+    selectElement.innerHTML = `<option value="">${placeholder}</option>`;
+    
+    (page.wordlists || []).forEach(list => {
+        const option = document.createElement('option');
+        option.value = list.path;
+        // Les lignes sont comptées en arrière-plan : null tant que le fichier n'est pas compté
+        option.textContent = list.lines !== null ? `${list.name} (${list.lines} lignes)` : list.name;
+        selectElement.appendChild(option);
+    });
+    
+    if (page.total > page.wordlists.length) {
+        const option = document.createElement('option');
+        option.value = "";
+        option.disabled = true;
+        option.textContent = `... ${page.total - page.wordlists.length} autres listes non affichées`;
+        selectElement.appendChild(option);
+    }
+}
+
 // Fonction pour charger les wordlists
 function loadWordlists() {
     const userSelect = document.getElementById('userlist');
@@ -58,44 +96,11 @@ function loadWordlists() {
     userSelect.innerHTML = '<option value="">Chargement des listes...</option>';
     passSelect.innerHTML = '<option value="">Chargement des listes...</option>';
     
-    // Récupérer la liste des wordlists via l'API
-    fetch('/api/hydra/wordlists', {
-        headers: { 'Accept': 'application/json' }
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('Réponse réseau non valide');
-        }
-        return response.json();
-    })
-    .then(data => {
-        // Vider les listes
-        userSelect.innerHTML = '';
-        passSelect.innerHTML = '';
-        
-        // Option par défaut
-        userSelect.innerHTML = '<option value="">Sélectionnez une liste d\'utilisateurs</option>';
-        passSelect.innerHTML = '<option value="">Sélectionnez une liste de mots de passe</option>';
-        
-        // Ajouter les listes d'utilisateurs
-        if (data.user_lists && data.user_lists.length > 0) {
-            data.user_lists.forEach(list => {
-                const option = document.createElement('option');
-                option.value = list.path;
-                option.textContent = list.name;
-                userSelect.appendChild(option);
-            });
-        }
-        
-        // Ajouter les listes de mots de passe
-        if (data.pass_lists && data.pass_lists.length > 0) {
-            data.pass_lists.forEach(list => {
-                const option = document.createElement('option');
-                option.value = list.path;
-                option.textContent = list.name;
-                passSelect.appendChild(option);
-            });
-        }
+    // Une page du catalogue par catégorie plutôt que la liste complète
+    Promise.all([fetchWordlistPage('user'), fetchWordlistPage('password')])
+    .then(([userPage, passPage]) => {
+        fillWordlistSelect(userSelect, userPage, 'Sélectionnez une liste d\'utilisateurs');
+        fillWordlistSelect(passSelect, passPage, 'Sélectionnez une liste de mots de passe');
     })
     .catch(error => {
         console.error('Erreur lors du chargement des wordlists:', error);
@@ -150,6 +155,128 @@ function uploadWordlist(file, listType) {
     });
 }
 
+// Lance l'attaque en arrière-plan puis suit sa progression
+function startHydraJob(formData) {
+    fetch('/api/hydra/jobs', {method: 'POST', body: formData})
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            followHydraJob(data);
+        })
+        .catch(error => {
+            console.error('Erreur lors du lancement de l\'attaque:', error);
+            document.getElementById('hydra-job-panel').style.display = 'block';
+            document.getElementById('hydra-job-status').textContent = `Erreur: ${error.message}`;
+            resetStartButton();
+        });
+}
+
+function resetStartButton() {
+    const startBtn = document.getElementById('start-hydra-btn');
+    startBtn.disabled = false;
+    startBtn.innerHTML = 'Lancer l\'attaque';
+}
+
+function formatDuration(seconds) {
+    if (seconds === null || seconds === undefined) {
+        return '-';
+    }
+    const h = Math.floor(seconds / 3600);
+    const m = Math.floor((seconds % 3600) / 60);
+    const s = Math.floor(seconds % 60);
+    return h ? `${h}h${String(m).padStart(2, '0')}` : `${m}min${String(s).padStart(2, '0')}`;
+}
+
+function followHydraJob(jobData) {
+    const panel = document.getElementById('hydra-job-panel');
+    const output = document.getElementById('hydra-job-output');
+    const cancelBtn = document.getElementById('hydra-job-cancel-btn');
+    const resumeBtn = document.getElementById('hydra-job-resume-btn');
+    panel.style.display = 'block';
+    output.textContent = '';
+    cancelBtn.disabled = false;
+    resumeBtn.style.display = 'none';
+    let nextLine = 0;
+    
+    cancelBtn.onclick = function() {
+        cancelBtn.disabled = true;
+        fetch(jobData.cancel_url, {method: 'POST'});
+    };
+    
+    // Reprise depuis le point de reprise enregistré par Hydra
+    resumeBtn.onclick = function() {
+        resumeBtn.style.display = 'none';
+        fetch(jobData.resume_url, {method: 'POST'})
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) {
+                    throw new Error(data.error);
+                }
+                followHydraJob(data);
+            })
+            .catch(error => {
+                document.getElementById('hydra-job-status').textContent = `Erreur: ${error.message}`;
+            });
+    };
+    
+    function render(job) {
+        document.getElementById('hydra-job-status').textContent =
+            `Tâche ${job.id} sur ${job.target} (${job.service}) : ${job.status}`;
+        document.getElementById('hydra-job-tries').textContent =
+            job.tries_total ? `${job.tries_done} / ${job.tries_total}` : job.tries_done;
+        document.getElementById('hydra-job-percent').textContent = job.percent;
+        document.getElementById('hydra-job-rate').textContent = job.tries_per_second;
+        document.getElementById('hydra-job-eta').textContent = formatDuration(job.eta_seconds);
+        document.getElementById('hydra-job-progress').value = job.percent;
+        
+        const list = document.getElementById('hydra-job-credentials');
+        list.innerHTML = '';
+        job.credentials.forEach(credential => {
+            const item = document.createElement('li');
+            item.textContent = `${credential.host}:${credential.port} (${credential.service}) - ` +
+                `login: ${credential.login} - mot de passe: ${credential.password}`;
+            list.appendChild(item);
+        });
+    }
+    
+    function poll() {
+        Promise.all([
+            fetch(jobData.status_url).then(response => response.json()),
+            fetch(`${jobData.output_url}?since=${nextLine}`).then(response => response.json())
+        ])
+            .then(([status, out]) => {
+                if (out.lines && out.lines.length) {
+                    output.textContent += out.lines.join('\n') + '\n';
+                    output.scrollTop = output.scrollHeight;
+                }
+                nextLine = out.next;
+                const job = status.job;
+                render(job);
+                if (['completed', 'stopped', 'failed'].includes(job.status)) {
+                    cancelBtn.disabled = true;
+                    if (job.resumable) {
+                        resumeBtn.style.display = 'inline-block';
+                    }
+                    if (job.error) {
+                        document.getElementById('hydra-job-status').textContent += ` - ${job.error}`;
+                    }
+                    resetStartButton();
+                    return;
+                }
+                setTimeout(poll, 1000);
+            })
+            .catch(error => {
+                console.error('Erreur lors du suivi de l\'attaque:', error);
+                setTimeout(poll, 3000);
+            });
+    }
+    
+    render(jobData.job);
+    poll();
+}
+
 // Gestionnaire d'événement pour les options HTTP
 function handleServiceChange() {
     const httpOptions = document.getElementById('http-options');
@@ -272,6 +399,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 startBtn.innerHTML = 'Lancer l\'attaque';
                 return false;
             }
+            
+            // Attaque en arrière-plan : suivie sur cette page
+            const background = document.getElementById('background');
+            if (background && background.checked) {
+                event.preventDefault();
+                startHydraJob(new FormData(hydraForm));
+            }
         });
     }
 });
@@ -44,15 +44,141 @@ function loadInterfaces() {
 function submitCapture() {
     const form = document.getElementById('sniffer-form');
     const submitBtn = document.getElementById('start-capture-btn');
+    const liveCheckbox = document.getElementById('live');
     
     if (form && submitBtn) {
-        form.addEventListener('submit', function() {
+        form.addEventListener('submit', function(event) {
             submitBtn.disabled = true;
             submitBtn.textContent = 'Capture en cours...';
+            
+            // Mode live : capture en tâche de fond et statistiques en direct
+            if (liveCheckbox && liveCheckbox.checked) {
+                event.preventDefault();
+                startLiveCapture(new FormData(form));
+            }
         });
     }
 }
 
+// Formate un débit en bits/s
+function formatBitrate(bps) {
+    const units = ['bit/s', 'kbit/s', 'Mbit/s', 'Gbit/s'];
+    let value = bps;
+    let unit = 0;
+    while (value >= 1000 && unit < units.length - 1) {
+        value /= 1000;
+        unit++;
+    }
+    return `${value.toFixed(unit ? 1 : 0)} ${units[unit]}`;
+}
+
+// Remplace le contenu d'un élément par une liste de lignes (texte échappé)
+function fillRows(element, rows, cells) {
+    element.innerHTML = '';
+    rows.forEach(row => {
+        const tr = document.createElement(cells ? 'tr' : 'li');
+        if (cells) {
+            cells(row).forEach(value => {
+                const td = document.createElement('td');
+                td.textContent = value;
+                tr.appendChild(td);
+            });
+        } else {
+            tr.textContent = row;
+        }
+        element.appendChild(tr);
+    });
+}
+
+// Lance une capture en arrière-plan et suit ses statistiques en direct
+function startLiveCapture(formData) {
+    fetch('/api/sniffer/jobs', {method: 'POST', body: formData})
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            followLiveCapture(data);
+        })
+        .catch(error => {
+            console.error('Erreur lors du lancement de la capture:', error);
+            document.getElementById('live-panel').style.display = 'block';
+            document.getElementById('live-status').textContent = `Erreur: ${error.message}`;
+            const submitBtn = document.getElementById('start-capture-btn');
+            submitBtn.disabled = false;
+            submitBtn.textContent = 'Lancer la capture';
+        });
+}
+
+function followLiveCapture(jobData) {
+    const panel = document.getElementById('live-panel');
+    const status = document.getElementById('live-status');
+    const stopBtn = document.getElementById('live-stop-btn');
+    const refilterBtn = document.getElementById('live-refilter-btn');
+    const submitBtn = document.getElementById('start-capture-btn');
+    panel.style.display = 'block';
+    document.getElementById('live-links').innerHTML = '';
+    status.textContent = `Capture ${jobData.job.id} sur ${jobData.job.interface}` +
+        (jobData.job.bpf_filter ? ` (filtre: ${jobData.job.bpf_filter})` : '');
+    
+    const source = new EventSource(jobData.live_url);
+    source.addEventListener('stats', event => {
+        const stats = JSON.parse(event.data);
+        document.getElementById('live-packets').textContent = stats.packets;
+        document.getElementById('live-pps').textContent = stats.pps;
+        document.getElementById('live-bps').textContent = formatBitrate(stats.bps);
+        document.getElementById('live-hosts').textContent = stats.hosts;
+        fillRows(document.getElementById('live-talkers'), stats.top_talkers,
+            talker => [talker.ip, talker.packets, talker.bytes]);
+        fillRows(document.getElementById('live-protocols'),
+            Object.entries(stats.protocols).map(([protocol, count]) => `${protocol}: ${count}`));
+        fillRows(document.getElementById('live-new-hosts'),
+            stats.recent_hosts.slice().reverse().map(host =>
+                `${host.ip} (${new Date(host.first_seen * 1000).toLocaleTimeString()})`));
+    });
+    source.addEventListener('end', event => {
+        source.close();
+        const data = JSON.parse(event.data);
+        status.textContent = `Capture ${data.job.id} terminée (${data.job.status})`;
+        submitBtn.disabled = false;
+        submitBtn.textContent = 'Lancer la capture';
+        const links = document.getElementById('live-links');
+        if (data.job.file) {
+            const fileName = data.job.file.split('/').pop();
+            const link = document.createElement('a');
+            link.href = `/api/sniffer/download?file=${encodeURIComponent(fileName)}`;
+            link.textContent = 'Télécharger la capture';
+            links.appendChild(link);
+        }
+        if (data.job.report_path) {
+            const link = document.createElement('a');
+            link.href = `/api/report/download/${encodeURIComponent(data.job.report_path.split('/').pop())}`;
+            link.textContent = ' Voir le rapport HTML';
+            links.appendChild(link);
+        }
+    });
+    
+    stopBtn.onclick = () => fetch(jobData.stop_url, {method: 'POST'});
+    refilterBtn.onclick = () => {
+        source.close();
+        fetch(jobData.refilter_url, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({filter: document.getElementById('live-filter').value})
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) {
+                    throw new Error(data.error);
+                }
+                followLiveCapture(data);
+            })
+            .catch(error => {
+                status.textContent = `Erreur: ${error.message}`;
+            });
+    };
+}
+
 // Initialisation
 document.addEventListener('DOMContentLoaded', function() {
     loadInterfaces();
@@ -0,0 +1,91 @@
+# tests/test_analysis_cache.py
+"""Cache persistant des analyses (python -m unittest)"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from services import analysis_cache
+from services.analysis_cache import AnalysisCache, file_identity
+
+
+class AnalysisCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.capture = os.path.join(self.directory, "capture.pcap")
+        with open(self.capture, "wb") as f:
+            f.write(b"\x00" * 4096)
+        self.cache = AnalysisCache(cache_dir=os.path.join(self.directory, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _index(self):
+        with open(os.path.join(self.cache.cache_dir, analysis_cache.INDEX_FILE)) as f:
+            return json.load(f)
+
+    def test_identity_hashed_once_while_unchanged(self):
+        with mock.patch.object(analysis_cache, "content_hash", wraps=analysis_cache.content_hash) as hashed:
+            first = file_identity(self.capture)
+            self.assertEqual(file_identity(self.capture), first)
+            self.assertEqual(hashed.call_count, 1)
+            with open(self.capture, "ab") as f:
+                f.write(b"\x01")
+            self.assertNotEqual(file_identity(self.capture)["content_hash"], first["content_hash"])
+            self.assertEqual(hashed.call_count, 2)
+
+    def test_hit_does_not_rewrite_index(self):
+        self.cache.put(self.capture, {"packet_count": 3}, "v1")
+        written = self._index()
+        with mock.patch.object(self.cache, "_save_index", wraps=self.cache._save_index) as saved:
+            for _ in range(5):
+                self.assertEqual(self.cache.get(self.capture, "v1"), {"packet_count": 3})
+            self.assertEqual(saved.call_count, 0)
+        self.assertEqual(self._index(), written)
+
+    def test_flush_persists_last_access(self):
+        self.cache.put(self.capture, {"packet_count": 3}, "v1")
+        before = next(iter(self._index().values()))["last_access"]
+        with mock.patch("time.time", return_value=before + 100):
+            self.cache.get(self.capture, "v1")
+        self.cache.flush()
+        self.assertEqual(next(iter(self._index().values()))["last_access"], before + 100)
+
+    def test_access_flushed_after_interval(self):
+        self.cache.put(self.capture, {"packet_count": 3}, "v1")
+        self.cache._saved_at -= analysis_cache.INDEX_FLUSH_INTERVAL
+        with mock.patch.object(self.cache, "_save_index", wraps=self.cache._save_index) as saved:
+            self.cache.get(self.capture, "v1")
+            self.assertEqual(saved.call_count, 1)
+
+    def test_modified_capture_misses(self):
+        self.cache.put(self.capture, {"packet_count": 3}, "v1")
+        with open(self.capture, "ab") as f:
+            f.write(b"\x01")
+        self.assertIsNone(self.cache.get(self.capture, "v1"))
+
+    def test_eviction_uses_last_access(self):
+        cache = AnalysisCache(cache_dir=self.cache.cache_dir, max_entries=2)
+        paths = []
+        for name in ("a", "b", "c"):
+            path = os.path.join(self.directory, f"{name}.pcap")
+            with open(path, "wb") as f:
+                f.write(name.encode() * 100)
+            paths.append(path)
+        with mock.patch("time.time", return_value=1000):
+            cache.put(paths[0], {"n": 0})
+        with mock.patch("time.time", return_value=2000):
+            cache.put(paths[1], {"n": 1})
+        # Accès récent à "a" (non encore écrit) : c'est "b" qui est évincée
+        with mock.patch("time.time", return_value=3000):
+            cache.get(paths[0])
+        with mock.patch("time.time", return_value=4000):
+            cache.put(paths[2], {"n": 2})
+        self.assertIsNotNone(cache.get(paths[0]))
+        self.assertIsNone(cache.get(paths[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
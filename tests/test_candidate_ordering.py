@@ -0,0 +1,119 @@
+# tests/test_candidate_ordering.py
+"""Ordre des candidats soumis à Hydra (python -m unittest)"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from services import candidate_ordering
+from services.candidate_ordering import (rank_candidates, prepare_candidates, pair_file_size, _write_diagonal_pairs,
+                                         write_candidates, KIND_USER, KIND_PASSWORD, RANK_IN_MEMORY_BYTES)
+
+
+class CandidateOrderingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.work_dir = os.path.join(self.directory, "work")
+        self.users = self._write("users.txt", b"alice\nbob\nroot\ncarol\nbob\nadmin\n")
+        self.passwords = self._write("passwords.txt", b"hunter2\r\nsecret\ntoor\nsecret\n123456\nsummer\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _read(self, path):
+        with open(path, "rb") as f:
+            return f.read().splitlines()
+
+    def test_ranked_in_memory(self):
+        users, stats = rank_candidates(self.users, KIND_USER, "ssh")
+        # A priori SSH (root, admin), puis fréquence (bob), puis position d'origine
+        self.assertEqual(users, [b"root", b"admin", b"bob", b"alice", b"carol"])
+        self.assertEqual(stats, {"mode": "memory", "lines": 6, "unique": 5, "promoted": 2, "repeated": 1})
+        passwords, _ = rank_candidates(self.passwords, KIND_PASSWORD, "ssh")
+        self.assertEqual(passwords, [b"toor", b"123456", b"secret", b"hunter2", b"summer"])
+
+    def test_streaming_above_memory_limit(self):
+        with mock.patch.object(candidate_ordering, "RANK_IN_MEMORY_BYTES", 8):
+            words, stats = rank_candidates(self.users, KIND_USER, "ssh")
+            words = list(words)
+        # A priori présents en tête, le reste recopié dans l'ordre (doublons compris)
+        self.assertEqual(words, [b"root", b"admin", b"alice", b"bob", b"carol", b"bob"])
+        self.assertEqual(stats, {"mode": "stream", "promoted": 2})
+
+    def test_large_list_streamed(self):
+        # Liste réelle au-delà de RANK_IN_MEMORY_BYTES, a priori en toute fin
+        count = RANK_IN_MEMORY_BYTES // 9 + 1
+        with open(os.path.join(self.directory, "large.txt"), "wb") as f:
+            for start in range(0, count, 100000):
+                f.write(b"".join(b"w%07d\n" % i for i in range(start, min(count, start + 100000))))
+            f.write(b"toor\nw0000000\n")
+        words, stats = rank_candidates(os.path.join(self.directory, "large.txt"), KIND_PASSWORD, "ssh")
+        self.assertEqual(stats["mode"], "stream")
+        out_path = os.path.join(self.directory, "ordered.txt")
+        self.assertEqual(write_candidates(words, out_path), count + 2)
+        with open(out_path, "rb") as f:
+            self.assertEqual([f.readline() for _ in range(2)], [b"toor\n", b"w0000000\n"])
+
+    def test_diagonal_pairs_order(self):
+        path = os.path.join(self.directory, "pairs.txt")
+        self.assertEqual(_write_diagonal_pairs([b"a", b"b", b"c"], [b"1", b"2"], path), 6)
+        self.assertEqual(self._read(path), [b"a:1", b"a:2", b"b:1", b"b:2", b"c:1", b"c:2"])
+
+        users = [b"u%d" % i for i in range(7)]
+        passwords = [b"p%d" % i for i in range(4)]
+        _write_diagonal_pairs(users, passwords, path)
+        pairs = [tuple(line.split(b":")) for line in self._read(path)]
+        self.assertEqual(sorted(pairs), sorted((user, word) for user in users for word in passwords))
+        ranks = [users.index(user) + passwords.index(word) for user, word in pairs]
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(pair_file_size(users, passwords), os.path.getsize(path))
+
+    def test_interleaved_pairs_replace_ranked_lists(self):
+        prepared = prepare_candidates(self.users, self.passwords, "ssh", "interleaved", self.work_dir)
+        self.assertEqual((prepared["userlist"], prepared["passlist"]), (self.users, self.passwords))
+        self.assertFalse(prepared["loop_users"])
+        self.assertEqual(os.listdir(self.work_dir), ["ordered_pairs.txt"])
+        pairs = self._read(prepared["combo_file"])
+        self.assertEqual(len(pairs), prepared["pairs"])
+        self.assertEqual(pairs[:3], [b"root:toor", b"root:123456", b"admin:toor"])
+
+    def test_interleaved_pairs_bounded_by_bytes(self):
+        with mock.patch.object(candidate_ordering, "MAX_PAIR_BYTES", pair_file_size([b"x"] * 5, [b"y"] * 5)):
+            prepared = prepare_candidates(self.users, self.passwords, "ssh", "interleaved", self.work_dir)
+        self.assertIsNone(prepared["combo_file"])
+        self.assertTrue(prepared["loop_users"])
+        self.assertEqual(self._read(prepared["userlist"])[0], b"root")
+        self.assertEqual(prepared["passlist_stats"]["written"], 5)
+        self.assertNotIn("ordered_pairs.txt", os.listdir(self.work_dir))
+
+    def test_interleaved_without_pairs(self):
+        colon = self._write("colon.txt", b"root\ndomain:user\n")
+        for userlist, allow_pairs in ((colon, True), (self.users, False)):
+            prepared = prepare_candidates(userlist, self.passwords, "ssh", "interleaved", self.work_dir,
+                                          allow_pairs=allow_pairs)
+            self.assertIsNone(prepared["combo_file"])
+            self.assertTrue(prepared["loop_users"])
+        with mock.patch.object(candidate_ordering, "RANK_IN_MEMORY_BYTES", 8):
+            prepared = prepare_candidates(self.users, self.passwords, "ssh", "interleaved", self.work_dir)
+        self.assertEqual((prepared["combo_file"], prepared["loop_users"]), (None, True))
+        self.assertEqual(prepared["userlist_stats"]["written"], 6)
+
+    def test_ranked_and_original(self):
+        prepared = prepare_candidates(self.users, self.passwords, "ssh", "ranked", self.work_dir)
+        self.assertEqual((prepared["combo_file"], prepared["loop_users"]), (None, False))
+        self.assertEqual(self._read(prepared["passlist"]), [b"toor", b"123456", b"secret", b"hunter2", b"summer"])
+        original = prepare_candidates(self.users, self.passwords, "ssh", "original", self.work_dir)
+        self.assertEqual((original["userlist"], original["passlist"]), (self.users, self.passwords))
+        with self.assertRaises(ValueError):
+            prepare_candidates(self.users, self.passwords, "ssh", "random", self.work_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# tests/test_capture_sampling.py
+"""Échantillonnage des captures et compteurs par fichier (python -m unittest)"""
+import os
+import shutil
+import tempfile
+import unittest
+from services.capture_sampling import CaptureSampler, merge_sampling
+from services.pcap_reader import read_capture_metadata, LINKTYPE_ETHERNET
+from tests.test_pcap_analyzer import sample_packets
+from tests.test_pcap_writer import write_ring
+
+
+def feed(sampler, packets):
+    """Passe des couples (timestamp, octets) dans l'échantillonneur, retourne les paquets écrits"""
+    return [written for written in (sampler.sample(data, len(data), LINKTYPE_ETHERNET) for _, data in packets)
+            if written is not None]
+
+
+class CaptureSamplerTest(unittest.TestCase):
+
+    def test_packet_mode_keeps_one_in_n(self):
+        packets = sample_packets()
+        sampler = CaptureSampler(mode="packet", rate=3)
+        self.assertEqual(feed(sampler, packets), [data for _, data in packets[::3]])
+        self.assertEqual((sampler.packets_seen, sampler.packets_kept), (12, 4))
+
+    def test_flow_mode_keeps_first_packets(self):
+        sampler = CaptureSampler(mode="flow", per_flow=1)
+        # Un flux TCP et quatre flux UDP, dans les deux sens
+        self.assertEqual(len(feed(sampler, sample_packets())), 5)
+
+    def test_headers_only_keeps_original_length(self):
+        packets = sample_packets()
+        sampler = CaptureSampler(headers_only=True)
+        written = feed(sampler, packets)
+        self.assertTrue(all(len(kept) <= len(data) for kept, (_, data) in zip(written, packets)))
+        self.assertEqual(sampler.bytes_kept, sum(len(data) for _, data in packets))
+
+    def test_invalid_parameters(self):
+        for kwargs in ({"mode": "bogus"}, {"mode": "packet"}, {"mode": "flow", "per_flow": 0}):
+            with self.assertRaises(ValueError):
+                CaptureSampler(**kwargs)
+
+
+class FileCountersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sizes = [60, 70, 80, 90, 100]
+        self.sampler = CaptureSampler(mode="packet", rate=2)
+        for size in self.sizes[:3]:
+            self.sampler.sample(b"\x00" * size, size, LINKTYPE_ETHERNET)
+
+    def test_carry_over_moves_last_kept_packet(self):
+        # Paquets 0 et 2 retenus ; le 2 déclenche la rotation et ouvre le fichier suivant
+        first = self.sampler.file_counters(carry_over=True)
+        self.assertEqual(first, {"packets_seen": 2, "packets_kept": 1, "bytes_seen": 130, "bytes_kept": 60})
+        for size in self.sizes[3:]:
+            self.sampler.sample(b"\x00" * size, size, LINKTYPE_ETHERNET)
+        second = self.sampler.file_counters()
+        self.assertEqual(second, {"packets_seen": 3, "packets_kept": 2, "bytes_seen": 270, "bytes_kept": 180})
+        self.assertEqual(first["bytes_seen"] + second["bytes_seen"], sum(self.sizes))
+        self.assertEqual(self.sampler.file_counters()["packets_seen"], 0)
+
+    def test_without_carry_over(self):
+        self.assertEqual(self.sampler.file_counters(),
+                         {"packets_seen": 3, "packets_kept": 2, "bytes_seen": 210, "bytes_kept": 140})
+        self.assertEqual(self.sampler.file_counters(carry_over=True)["packets_kept"], 0)
+
+    def test_counters_follow_ring_rotation(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        packets = sample_packets()
+        sampler = CaptureSampler(mode="packet", rate=2)
+        writer = write_ring(os.path.join(directory, "sampled"), packets, sampler=sampler)
+        sections = [read_capture_metadata(path)["sampling"] for path in writer.files]
+        # Un fichier par paquet retenu : le paquet écarté qui le suit est compté avec lui
+        self.assertEqual(len(sections), 6)
+        for section, (ts, data) in zip(sections, packets[::2]):
+            self.assertEqual((section["packets_seen"], section["packets_kept"], section["bytes_kept"]),
+                             (2, 1, len(data)))
+        merged = merge_sampling(sections)
+        self.assertEqual((merged["packets_seen"], merged["packets_kept"]), (12, 6))
+        self.assertEqual(merged["bytes_seen"], sum(len(data) for _, data in packets))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+# tests/test_hydra_bruteforce.py
+"""Points de reprise des attaques Hydra (python -m unittest)"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from services import hydra_bruteforce
+from services.candidate_ordering import prepare_candidates
+from services.hydra_bruteforce import (AttackCheckpoint, HydraOutputParser, ShardedHydraScheduler,
+                                       list_attack_checkpoints, HYDRA_STATE_DIR, RESTORE_FILE, STATE_FILE)
+
+CREDENTIAL = {"login": "admin", "password": "secret", "host": "10.0.0.5", "service": "ssh"}
+
+
+class AttackCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _checkpoint(self, attack_id="0123456789ab", **options):
+        return AttackCheckpoint.create("10.0.0.5", "ssh", "users.txt", "passwords.txt", options, attack_id)
+
+    @staticmethod
+    def _parser(done, total, credentials=()):
+        parser = HydraOutputParser()
+        parser.done, parser.total, parser.credentials = done, total, list(credentials)
+        return parser
+
+    def test_save_and_load(self):
+        checkpoint = self._checkpoint(tasks=4)
+        self.assertEqual(checkpoint.params["userlist"], os.path.join(self.directory, "users.txt"))
+        checkpoint.resumes = 2
+        checkpoint.save("interrupted", self._parser(120, 1000, [CREDENTIAL]))
+
+        loaded = AttackCheckpoint.load("0123456789ab")
+        self.assertEqual(loaded.params, checkpoint.params)
+        self.assertEqual((loaded.status, loaded.resumes, loaded.created_at),
+                         ("interrupted", 2, checkpoint.created_at))
+        parser = HydraOutputParser()
+        loaded.seed(parser)
+        self.assertEqual((parser.done, parser.total, parser.credentials), (120, 1000, [CREDENTIAL]))
+        self.assertEqual(loaded.to_dict()["tries_done"], 120)
+
+    def test_save_without_parser_keeps_progress(self):
+        checkpoint = self._checkpoint()
+        checkpoint.save("running", self._parser(10, 50))
+        checkpoint.save("failed")
+        self.assertEqual(AttackCheckpoint.load(checkpoint.id).state["tries_done"], 10)
+
+    def test_periodic_save_throttled(self):
+        checkpoint = self._checkpoint()
+        checkpoint.save("running", self._parser(1, 50))
+        checkpoint.save("running", self._parser(2, 50), force=False)
+        self.assertEqual(AttackCheckpoint.load(checkpoint.id).state["tries_done"], 1)
+        checkpoint.save("running", self._parser(3, 50))
+        self.assertEqual(AttackCheckpoint.load(checkpoint.id).state["tries_done"], 3)
+        self.assertFalse(os.path.exists(os.path.join(checkpoint.directory, STATE_FILE + ".tmp")))
+
+    def test_load_missing_or_corrupt(self):
+        self.assertIsNone(AttackCheckpoint.load("ffffffffffff"))
+        checkpoint = self._checkpoint()
+        os.makedirs(checkpoint.directory)
+        with open(os.path.join(checkpoint.directory, STATE_FILE), "w") as f:
+            f.write("{truncated")
+        self.assertIsNone(AttackCheckpoint.load(checkpoint.id))
+
+    def test_invalid_identifier(self):
+        for attack_id in ("../../etc", "ABCDEF012345", "0123"):
+            with self.assertRaises(ValueError):
+                AttackCheckpoint.load(attack_id)
+
+    def test_resumable(self):
+        checkpoint = self._checkpoint()
+        checkpoint.save("interrupted")
+        self.assertFalse(AttackCheckpoint.load(checkpoint.id).resumable)
+        with open(os.path.join(checkpoint.directory, RESTORE_FILE), "wb") as f:
+            f.write(b"restore")
+        loaded = AttackCheckpoint.load(checkpoint.id)
+        self.assertTrue(loaded.resumable)
+        self.assertEqual(loaded.command(resume=True), ["hydra", "-R"])
+        loaded.save("completed")
+        self.assertFalse(AttackCheckpoint.load(checkpoint.id).resumable)
+        loaded.discard()
+        self.assertIsNone(AttackCheckpoint.load(checkpoint.id))
+
+    def test_list_checkpoints_newest_first(self):
+        for attack_id, created_at in (("aaaaaaaaaaaa", 1000.0), ("bbbbbbbbbbbb", 3000.0), ("cccccccccccc", 2000.0)):
+            checkpoint = self._checkpoint(attack_id)
+            checkpoint.created_at = created_at
+            checkpoint.save("interrupted")
+        os.makedirs(os.path.join(HYDRA_STATE_DIR, "shards"))
+        os.makedirs(os.path.join(HYDRA_STATE_DIR, "dddddddddddd"))
+        with open(os.path.join(HYDRA_STATE_DIR, "cccccccccccc", STATE_FILE)) as f:
+            self.assertEqual(json.load(f)["status"], "interrupted")
+        self.assertEqual([checkpoint.id for checkpoint in list_attack_checkpoints()],
+                         ["bbbbbbbbbbbb", "cccccccccccc", "aaaaaaaaaaaa"])
+
+
+class ShardedSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+        with open("users.txt", "w") as f:
+            f.write("root\nadmin\n")
+        with open("passwords.txt", "w") as f:
+            f.write("".join(f"pass{i}\n" for i in range(10)))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_progress_available_while_planning(self):
+        planning = threading.Event()
+        release = threading.Event()
+
+        def slow_prepare(*args, **kwargs):
+            planning.set()
+            release.wait(5)
+            return prepare_candidates(*args, **kwargs)
+
+        scheduler = ShardedHydraScheduler(["10.0.0.5", "10.0.0.6"], "ssh", "users.txt", "passwords.txt",
+                                          password_shards=2)
+        # Arrêt demandé d'avance : les shards planifiés sont annulés sans lancer Hydra
+        stop = threading.Event()
+        stop.set()
+        results = []
+        with mock.patch.object(hydra_bruteforce, "prepare_candidates", side_effect=slow_prepare), \
+                mock.patch.object(hydra_bruteforce, "start_hydra_process") as started:
+            runner = threading.Thread(target=lambda: results.append(scheduler.run(stop_event=stop)))
+            runner.start()
+            self.assertTrue(planning.wait(5))
+            progressed = []
+            reader = threading.Thread(target=lambda: progressed.append(scheduler.progress()))
+            reader.start()
+            reader.join(2)
+            blocked = reader.is_alive()
+            release.set()
+            runner.join(5)
+        self.assertFalse(blocked)
+        self.assertEqual(progressed[0]["tries_total"], 0)
+        started.assert_not_called()
+        self.assertEqual([shard["status"] for shard in results[0]["shards"]], ["skipped"] * 4)
+        self.assertEqual(sum(shard["tries_total"] for shard in results[0]["shards"]), 2 * 2 * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
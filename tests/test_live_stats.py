@@ -0,0 +1,103 @@
+# tests/test_live_stats.py
+"""Statistiques de trafic en direct (python -m unittest)"""
+import threading
+import unittest
+from unittest import mock
+from services import live_stats
+from services.live_stats import LiveTrafficStats, HISTORY
+from tests.test_pcap_reader import ethernet, ipv4, tcp, udp
+
+
+class FakeClock:
+    """Horloge monotone avancée à la main"""
+
+    def __init__(self, now=500.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def frame(src, dst, payload=b""):
+    return ethernet(0x0800, ipv4(6, tcp(40000, 80, payload), src, dst))
+
+
+class LiveTrafficStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.stats = LiveTrafficStats(clock=self.clock)
+
+    def _add(self, src="10.0.0.1", dst="10.0.0.2", length=100, data=None):
+        self.stats.add(data or frame(src, dst), 1000.0, length)
+
+    def test_rates_use_last_complete_second(self):
+        for _ in range(3):
+            self._add()
+        self.clock.now += 1.2
+        self._add(length=40)
+        snapshot = self.stats.snapshot()
+        self.assertEqual((snapshot["pps"], snapshot["bps"]), (3, 2400))
+        self.assertEqual((snapshot["packets"], snapshot["bytes"]), (4, 340))
+        # La seconde en cours n'est pas encore dans l'historique
+        self.assertEqual([entry["second"] for entry in snapshot["history"]], [0])
+        self.assertEqual(snapshot["avg_pps"], round(4 / 1.2, 2))
+
+    def test_idle_second_has_zero_rate(self):
+        self._add()
+        self.clock.now += 2.5
+        snapshot = self.stats.snapshot()
+        self.assertEqual((snapshot["pps"], snapshot["bps"], snapshot["new_hosts"]), (0, 0, 0))
+        self.assertEqual(len(snapshot["history"]), 1)
+
+    def test_history_bounded(self):
+        for _ in range(HISTORY + 15):
+            self._add()
+            self.clock.now += 1
+        history = self.stats.snapshot()["history"]
+        self.assertEqual(len(history), HISTORY)
+        self.assertEqual(history[-1]["second"], HISTORY + 14)
+
+    def test_top_talkers_and_new_hosts(self):
+        self._add("10.0.0.1", "10.0.0.2", 100)
+        self._add("10.0.0.3", "10.0.0.1", 500)
+        self.clock.now += 1
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot["top_talkers"][0], {"ip": "10.0.0.1", "packets": 2, "bytes": 600})
+        self.assertEqual(snapshot["hosts"], 3)
+        self.assertEqual(snapshot["new_hosts"], 3)
+        self.assertEqual([host["ip"] for host in snapshot["recent_hosts"]], ["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+
+    def test_hosts_bounded(self):
+        with mock.patch.object(live_stats, "MAX_HOSTS", 2):
+            self._add("10.0.0.1", "10.0.0.2")
+            self._add("10.0.0.1", "10.0.0.3")
+            self._add("10.0.0.4", "10.0.0.2")
+        snapshot = self.stats.snapshot()
+        self.assertEqual((snapshot["hosts"], snapshot["hosts_dropped"]), (2, 2))
+        self.assertEqual(snapshot["packets"], 3)
+
+    def test_non_ip_packets(self):
+        self._add(data=ethernet(0x0806, b"\x00" * 28), length=42)
+        self._add(data=ethernet(0x0800, ipv4(17, udp(5353, 53), "10.0.0.1", "10.0.0.53")), length=60)
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot["protocols"], {"ARP": 1, "DNS": 1})
+        self.assertEqual(snapshot["hosts"], 2)
+
+    def test_concurrent_updates(self):
+        def feed():
+            for i in range(500):
+                self._add(f"10.0.{i % 7}.1", "10.0.0.2", 10)
+
+        threads = [threading.Thread(target=feed) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = self.stats.snapshot()
+        self.assertEqual((snapshot["packets"], snapshot["bytes"]), (2000, 20000))
+        self.assertEqual(sum(self.stats.host_packets.values()), 4000)
+
+
+if __name__ == "__main__":
+    unittest.main()
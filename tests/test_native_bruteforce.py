@@ -0,0 +1,317 @@
+# tests/test_native_bruteforce.py
+"""Moteur natif contre des serveurs locaux (formulaire, FTP, POP3, IMAP, HTTP Basic) (python -m unittest)"""
+import asyncio
+import base64
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from urllib.parse import parse_qs
+from services.native_bruteforce import run_native_attack, _HttpFormSession
+
+# Mot de passe IMAP avec guillemet et barre oblique inverse (LOGIN entre guillemets)
+IMAP_PASSWORD = 'se"cr\\et'
+# Échecs de connexion FTP avant "421" et fermeture de la connexion
+FTP_MAX_FAILURES = 2
+
+
+async def _form_server(reader, writer):
+    """Formulaire de connexion HTTP/1.1 (keep-alive) : admin / secret"""
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        headers = {}
+        while True:
+            header = (await reader.readline()).decode("latin-1").strip()
+            if not header:
+                break
+            name, _, value = header.partition(":")
+            headers[name.lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        fields = parse_qs(body.decode("latin-1"), encoding="latin-1")
+        valid = (fields.get("user", [""])[0], fields.get("pwd", [""])[0]) == ("admin", "secret")
+        text = b"Welcome" if valid else b"Login incorrect"
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(text), text))
+        await writer.drain()
+    writer.close()
+
+
+async def _ftp_server(reader, writer):
+    """FTP : accueil et succès sur plusieurs lignes, "421" après FTP_MAX_FAILURES échecs"""
+    writer.write(b"220-Stand-in FTP\r\n220-Second line\r\n220 Ready\r\n")
+    user = None
+    failures = 0
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        command, _, argument = line.decode("latin-1").strip().partition(" ")
+        if command == "QUIT":
+            writer.write(b"221 Bye\r\n")
+            break
+        if command == "USER":
+            if failures >= FTP_MAX_FAILURES:
+                writer.write(b"421 Too many login failures\r\n")
+                break
+            user = argument
+            writer.write(b"331 Password required\r\n")
+        elif command == "PASS":
+            if (user, argument) == ("admin", "secret"):
+                writer.write(b"230-Welcome\r\n230-Quota: none\r\n230 Logged in\r\n")
+            else:
+                failures += 1
+                writer.write(b"530 Login incorrect\r\n")
+        else:
+            writer.write(b"502 Not implemented\r\n")
+        await writer.drain()
+    await writer.drain()
+    writer.close()
+
+
+async def _pop3_server(reader, writer):
+    """POP3 : USER / PASS, admin / secret"""
+    writer.write(b"+OK POP3 ready\r\n")
+    user = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        command, _, argument = line.decode("latin-1").strip().partition(" ")
+        if command == "QUIT":
+            writer.write(b"+OK Bye\r\n")
+            break
+        if command == "USER":
+            user = argument
+            writer.write(b"+OK\r\n")
+        elif command == "PASS":
+            writer.write(b"+OK Logged in\r\n" if (user, argument) == ("admin", "secret")
+                         else b"-ERR Authentication failed\r\n")
+        else:
+            writer.write(b"-ERR Unknown command\r\n")
+        await writer.drain()
+    await writer.drain()
+    writer.close()
+
+
+def _imap_arguments(text):
+    """Arguments entre guillemets d'une commande IMAP (échappements \\ et \")"""
+    return [re.sub(r'\\(.)', r"\1", value) for value in re.findall(r'"((?:[^"\\]|\\.)*)"', text)]
+
+
+async def _imap_server(reader, writer):
+    """IMAP : LOGIN étiqueté, admin / IMAP_PASSWORD"""
+    writer.write(b"* OK IMAP4rev1 ready\r\n")
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        tag, _, rest = line.decode("utf-8").strip().partition(" ")
+        command, _, arguments = rest.partition(" ")
+        if command == "LOGOUT":
+            writer.write(b"* BYE Logging out\r\n%s OK LOGOUT completed\r\n" % tag.encode())
+            break
+        if command == "LOGIN":
+            # Réponse non étiquetée avant le statut, comme Dovecot
+            writer.write(b"* CAPABILITY IMAP4rev1\r\n")
+            valid = _imap_arguments(arguments) == ["admin", IMAP_PASSWORD]
+            writer.write(b"%s %s\r\n" % (tag.encode(), b"OK LOGIN completed" if valid
+                                          else b"NO [AUTHENTICATIONFAILED] Invalid credentials"))
+        else:
+            writer.write(b"%s BAD Unknown command\r\n" % tag.encode())
+        await writer.drain()
+    await writer.drain()
+    writer.close()
+
+
+async def _basic_server(reader, writer):
+    """HTTP Basic (keep-alive) sur /private : admin / secret et guest / guest"""
+    valid = {base64.b64encode(pair).decode() for pair in (b"admin:secret", b"guest:guest")}
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        path = line.split()[1].decode()
+        headers = {}
+        while True:
+            header = (await reader.readline()).decode("latin-1").strip()
+            if not header:
+                break
+            name, _, value = header.partition(":")
+            headers[name.lower()] = value.strip()
+        token = headers.get("authorization", "").partition("Basic ")[2]
+        if path == "/private" and token in valid:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        else:
+            writer.write(b"HTTP/1.1 401 Unauthorized\r\nWWW-Authenticate: Basic realm=\"test\"\r\n"
+                         b"Transfer-Encoding: chunked\r\n\r\n6\r\ndenied\r\n0\r\n\r\n")
+        await writer.drain()
+    writer.close()
+
+
+class StandInServerTestCase(unittest.TestCase):
+    """Serveur asyncio local (cls.handler) dans un thread, et wordlists temporaires"""
+
+    handler = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        server = cls.loop.run_until_complete(asyncio.start_server(cls.handler, "127.0.0.1", 0))
+        cls.port = server.sockets[0].getsockname()[1]
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(5)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.userlist = os.path.join(self.directory, "users.txt")
+        self.passlist = os.path.join(self.directory, "passwords.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _lists(self, users, passwords):
+        with open(self.userlist, "wb") as f:
+            f.write(b"".join(user + b"\n" for user in users))
+        with open(self.passlist, "wb") as f:
+            f.write(b"".join(password + b"\n" for password in passwords))
+
+    def _run(self, service, **options):
+        options = dict({"port": self.port, "tasks": 1}, **options)
+        return run_native_attack("127.0.0.1", service, self.userlist, self.passlist, options, timeout=30)
+
+
+class NativeFormAttackTest(StandInServerTestCase):
+
+    handler = staticmethod(_form_server)
+
+    def setUp(self):
+        super().setUp()
+        # Ligne latin-1 (non UTF-8) avant le bon mot de passe, comme dans rockyou
+        self._lists([b"admin"], [b"caf\xe9", b"secret", b"other"])
+
+    def _attack(self):
+        options = {"port": self.port, "tasks": 1, "form_path": "/login", "form_data": "user=^USER^&pwd=^PASS^",
+                   "form_success": "F=incorrect"}
+        return run_native_attack("127.0.0.1", "http-post-form", self.userlist, self.passlist, options, timeout=30)
+
+    def test_non_utf8_password_line(self):
+        result = self._attack()
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(len(result["credentials"]), 1)
+        self.assertIn("password: secret", result["credentials"][0])
+        self.assertEqual(result["metrics"]["attempt_errors"], 0)
+        self.assertEqual(result["progress"]["tries_done"], 3)
+
+    def test_unexpected_error_skips_candidate(self):
+        original = _HttpFormSession._request
+
+        def _request(session, login, password):
+            if password == "other":
+                raise RuntimeError("erreur de test")
+            return original(session, login, password)
+
+        _HttpFormSession._request = _request
+        try:
+            with open(self.passlist, "wb") as f:
+                f.write(b"other\nsecret\n")
+            result = self._attack()
+        finally:
+            _HttpFormSession._request = original
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(len(result["credentials"]), 1)
+        self.assertEqual(result["metrics"]["attempt_errors"], 1)
+
+
+class NativeFtpAttackTest(StandInServerTestCase):
+
+    handler = staticmethod(_ftp_server)
+
+    def test_multiline_replies_and_421_reconnect(self):
+        self._lists([b"admin"], [b"a", b"b", b"c", b"secret", b"d"])
+        result = self._run("ftp")
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(len(result["credentials"]), 1)
+        self.assertIn("login: admin   password: secret", result["credentials"][0])
+        metrics = result["metrics"]
+        # Deux échecs par connexion : "421" au troisième USER, essai repris sur une nouvelle connexion
+        self.assertEqual((metrics["failures"], metrics["connections_opened"], metrics["connection_errors"]),
+                         (3, 2, 1))
+        self.assertGreater(metrics["connections_reused"], 0)
+        # Le dernier mot de passe d'admin (déjà trouvé) est compté sans être essayé
+        self.assertEqual((metrics["attempts"], result["progress"]["tries_done"]), (4, 5))
+
+
+class NativePop3AttackTest(StandInServerTestCase):
+
+    handler = staticmethod(_pop3_server)
+
+    def test_login_and_connection_reuse(self):
+        self._lists([b"root", b"admin"], [b"toor", b"secret"])
+        result = self._run("pop3")
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(len(result["credentials"]), 1)
+        self.assertIn("[pop3]", result["credentials"][0])
+        metrics = result["metrics"]
+        self.assertEqual((metrics["attempts"], metrics["failures"], metrics["connections_opened"]), (4, 3, 1))
+        self.assertEqual(metrics["connections_reused"], 3)
+
+
+class NativeImapAttackTest(StandInServerTestCase):
+
+    handler = staticmethod(_imap_server)
+
+    def test_tagged_login_with_quoting(self):
+        self._lists([b"admin"], [b'se"cret', b"se\\cret", IMAP_PASSWORD.encode(), b"other"])
+        result = self._run("imap", tasks=2)
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(len(result["credentials"]), 1)
+        self.assertTrue(result["credentials"][0].endswith(f"password: {IMAP_PASSWORD}"))
+        self.assertEqual(result["metrics"]["attempt_errors"], 0)
+        self.assertEqual(result["metrics"]["connection_errors"], 0)
+
+    def test_quoting(self):
+        self.assertEqual(_imap_arguments('"a\\\\b" "c\\"d"'), ["a\\b", 'c"d'])
+
+
+class NativeHttpBasicAttackTest(StandInServerTestCase):
+
+    handler = staticmethod(_basic_server)
+
+    def setUp(self):
+        super().setUp()
+        self._lists([b"admin", b"guest"], [b"guest", b"secret", b"other"])
+
+    def test_keep_alive_reuse(self):
+        result = self._run("http-get", form_path="/private")
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(sorted(line.split("login: ")[1] for line in result["credentials"]),
+                         ["admin   password: secret", "guest   password: guest"])
+        metrics = result["metrics"]
+        # Une seule connexion pour tous les essais (réponses Content-Length et chunked)
+        self.assertEqual((metrics["connections_opened"], metrics["connections_reused"]), (1, 2))
+        # admin trouvé au deuxième essai, guest au premier : leurs autres mots de passe ne sont pas essayés
+        self.assertEqual((metrics["attempts"], result["progress"]["tries_done"]), (3, 6))
+
+    def test_exit_on_first(self):
+        result = self._run("http-get", form_path="/private", exit_on_first=True)
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(len(result["credentials"]), 1)
+        self.assertIn("login: admin   password: secret", result["credentials"][0])
+        self.assertEqual(result["metrics"]["attempts"], 2)
+
+    def test_wrong_path_finds_nothing(self):
+        result = self._run("http-get", form_path="/other")
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual((result["credentials"], result["metrics"]["failures"]), ([], 6))
+
+
+if __name__ == "__main__":
+    unittest.main()
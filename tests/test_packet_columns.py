@@ -0,0 +1,96 @@
+# tests/test_packet_columns.py
+"""Export en colonnes (.cols) et analyses vectorisées (python -m unittest)"""
+import os
+import shutil
+import tempfile
+import unittest
+from services.packet_columns import (export_columns, load_columns, analysis_from_columns, series_from_columns,
+                                     columns_path)
+from services.pcap_reader import PcapReader, open_capture, dissect_packet
+from services.traffic_series import TimeSeriesAccumulator
+from services.flow_table import FlowTable
+from tests.test_pcap_analyzer import sample_packets, write_pcap
+from tests.test_pcap_reader import ethernet, ipv6, tcp
+
+ARP_REQUEST = (b"\x00\x01\x08\x00\x06\x04\x00\x01" + bytes.fromhex("020000000009") + bytes([10, 0, 0, 9])
+               + bytes(6) + bytes([10, 0, 0, 1]))
+
+
+def mixed_packets():
+    """Échanges IPv4 de sample_packets(), une connexion IPv6 et une requête ARP"""
+    packets = sample_packets()
+    packets.append((1004.0, ethernet(0x86DD, ipv6(6, tcp(40001, 443, b"hello")))))
+    packets.append((1004.5, ethernet(0x0806, ARP_REQUEST)))
+    return packets
+
+
+class PacketColumnsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pcap = os.path.join(self.directory, "capture.pcap")
+        write_pcap(self.pcap, mixed_packets())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_round_trip(self):
+        export_columns(self.pcap)
+        data = load_columns(self.pcap)
+        columns, dictionaries = data["columns"], data["dictionaries"]
+        with open_capture(self.pcap) as f:
+            records = list(PcapReader(f))
+        self.assertEqual(data["rows"], len(records))
+        for i, record in enumerate(records):
+            info = dissect_packet(record.linktype, record.data)
+            self.assertEqual(columns["ts"][i], record.timestamp)
+            self.assertEqual((columns["length"][i], columns["caplen"][i]), (record.length, record.caplen))
+            self.assertEqual(dictionaries["address"][columns["src"][i]], info.src)
+            self.assertEqual(dictionaries["address"][columns["dst"][i]], info.dst)
+            self.assertEqual((columns["sport"][i], columns["dport"][i]), (info.sport, info.dport))
+            self.assertEqual(columns["ip_proto"][i], info.ip_proto)
+            self.assertEqual(columns["tcp_flags"][i], info.tcp_flags)
+            self.assertEqual(dictionaries["protocol"][columns["protocol"][i]], info.protocol)
+            self.assertEqual(tuple(dictionaries["layers"][columns["layers"][i]]), info.layers)
+
+    def test_analysis_matches_streaming_pass(self):
+        expected = export_columns(self.pcap)
+        result = analysis_from_columns(load_columns(self.pcap), self.pcap)
+        self.assertEqual(set(result), set(expected))
+        for key in expected:
+            if key == "ip_addresses":
+                self.assertEqual(sorted(result[key]), sorted(expected[key]))
+            else:
+                self.assertEqual(result[key], expected[key], key)
+
+    def test_series_matches_accumulator(self):
+        export_columns(self.pcap)
+        flows = FlowTable()
+        series = TimeSeriesAccumulator(0.5, 4)
+        with open_capture(self.pcap) as f:
+            for record in PcapReader(f):
+                info = dissect_packet(record.linktype, record.data)
+                series.add(record.timestamp, record.length, info.protocol, flows.add(info, record.timestamp,
+                                                                                     record.length))
+        self.assertEqual(series_from_columns(load_columns(self.pcap), 0.5, 4), series.result())
+
+    def test_stale_columns_ignored(self):
+        export_columns(self.pcap)
+        write_pcap(self.pcap, sample_packets())
+        self.assertIsNone(load_columns(self.pcap))
+
+    def test_foreign_file_ignored(self):
+        with open(columns_path(self.pcap), "wb") as f:
+            f.write(b"not a columns file")
+        self.assertIsNone(load_columns(self.pcap))
+
+    def test_empty_capture(self):
+        write_pcap(self.pcap, [])
+        expected = export_columns(self.pcap)
+        data = load_columns(self.pcap)
+        self.assertEqual(data["rows"], 0)
+        self.assertEqual(analysis_from_columns(data, self.pcap)["packet_count"], expected["packet_count"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+# tests/test_pcap_analyzer.py
+"""Analyse en flux d'une capture par CaptureAnalyzer (python -m unittest)"""
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from unittest import mock
+from services.pcap_analyzer import CaptureAnalyzer
+from services.pcap_reader import PcapReader, open_capture, LINKTYPE_ETHERNET
+from services.packet_columns import export_columns, load_columns, column_statistics
+from tests.test_pcap_reader import ethernet, ipv4, tcp, udp
+
+
+def write_pcap(path, packets, linktype=LINKTYPE_ETHERNET):
+    """Écrit une capture pcap (microsecondes) à partir de couples (timestamp, octets)"""
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, linktype))
+        for ts, data in packets:
+            seconds = int(ts)
+            f.write(struct.pack("<IIII", seconds, int(round((ts - seconds) * 1000000)), len(data), len(data)))
+            f.write(data)
+
+
+def analyze(path, **kwargs):
+    analyzer = CaptureAnalyzer(path, **kwargs)
+    with open_capture(path) as f:
+        for record in PcapReader(f):
+            analyzer.add(record)
+    return analyzer
+
+
+def sample_packets(start=1000.25):
+    """Quelques échanges TCP / UDP entre trois hôtes, sur trois secondes"""
+    packets = []
+    for i in range(12):
+        if i % 3 == 2:
+            frame = ethernet(0x0800, ipv4(17, udp(5000 + i, 53, b"q" * i), "10.0.0.3", "10.0.0.1"))
+        else:
+            frame = ethernet(0x0800, ipv4(6, tcp(40000, 80, b"x" * (10 * i)), "10.0.0.1", "10.0.0.2"))
+        packets.append((start + i * 0.25, frame))
+    return packets
+
+
+class TalkersAndRateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pcap = os.path.join(self.directory, "sample.pcap")
+        write_pcap(self.pcap, sample_packets())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_single_pass_statistics(self):
+        result = analyze(self.pcap).result()
+        talkers = {entry["ip"]: entry for entry in result["top_talkers"]}
+        self.assertEqual(result["top_talkers"][0]["ip"], "10.0.0.1")
+        self.assertEqual(talkers["10.0.0.1"]["packets"], 12)
+        self.assertEqual(talkers["10.0.0.2"]["packets"], 8)
+        self.assertEqual(talkers["10.0.0.3"]["packets"], 4)
+        # Secondes entières 1000, 1001, 1002, 1003
+        self.assertEqual(len(result["bytes_per_second"]), 4)
+        self.assertEqual(sum(result["bytes_per_second"]), sum(len(data) for _, data in sample_packets()))
+
+    def test_matches_column_statistics(self):
+        result = analyze(self.pcap).result()
+        export_columns(self.pcap)
+        stats = column_statistics(load_columns(self.pcap), CaptureAnalyzer.TOP_N)
+        self.assertEqual(result["top_talkers"], stats["top_talkers"])
+        self.assertEqual(result["bytes_per_second"], stats["bytes_per_second"])
+
+    def test_approximate_mode_has_no_per_host_state(self):
+        analyzer = analyze(self.pcap, mode="approximate")
+        self.assertEqual(analyzer.host_traffic, {})
+        self.assertNotIn("top_talkers", analyzer.result())
+
+
+class PartialMergeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.packets = sample_packets()
+        self.single = os.path.join(self.directory, "single.pcap")
+        write_pcap(self.single, self.packets)
+        # Découpage en trois fichiers consécutifs, comme une rotation en anneau
+        self.parts = []
+        for i, chunk in enumerate((self.packets[:3], self.packets[3:8], self.packets[8:])):
+            path = os.path.join(self.directory, f"ring_{i:03d}.pcap")
+            write_pcap(path, chunk)
+            self.parts.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _merged(self, mode, order=None):
+        merged = CaptureAnalyzer(mode=mode)
+        for path in order or self.parts:
+            # Les états partiels sont relus depuis le cache JSON
+            merged.merge_partial(json.loads(json.dumps(analyze(path, mode=mode).partial())))
+        return merged.result()
+
+    def _assert_same_analysis(self, merged, expected):
+        for key in expected:
+            if key in ("ip_addresses", "protocols"):
+                # Ensembles : l'ordre dépend du hachage des chaînes
+                self.assertEqual(sorted(merged[key]), sorted(expected[key]), key)
+            elif key != "file":
+                self.assertEqual(merged[key], expected[key], key)
+
+    def test_exact_merge_equals_single_pass(self):
+        self._assert_same_analysis(self._merged("exact"), analyze(self.single).result())
+
+    def test_merge_order_does_not_matter(self):
+        expected = analyze(self.single).result()
+        self._assert_same_analysis(self._merged("exact", self.parts[::-1]), expected)
+
+    def test_flow_spanning_files_counted_once(self):
+        # Une connexion TCP présente dans les trois fichiers et quatre échanges UDP
+        merged = self._merged("exact")
+        self.assertEqual(merged["flow_count"], 5)
+        self.assertEqual(sum(merged["time_series"]["new_flows"]), 5)
+
+    def test_first_packets_numbered_across_files(self):
+        merged = self._merged("exact")
+        self.assertEqual([packet["number"] for packet in merged["first_packets"]],
+                         list(range(1, CaptureAnalyzer.FIRST_PACKETS + 1)))
+
+    def test_approximate_merge_equals_single_pass(self):
+        self._assert_same_analysis(self._merged("approximate"), analyze(self.single, mode="approximate").result())
+
+    def test_approximate_state_into_exact_analysis(self):
+        partial = analyze(self.parts[0], mode="approximate").partial()
+        with self.assertRaises(ValueError):
+            CaptureAnalyzer().merge_partial(partial)
+
+    def test_empty_partial_ignored(self):
+        empty = os.path.join(self.directory, "empty.pcap")
+        write_pcap(empty, [])
+        merged = CaptureAnalyzer()
+        merged.merge_partial(analyze(empty).partial())
+        self.assertEqual(merged.result()["packet_count"], 0)
+        self.assertIsNone(merged.first_timestamp)
+
+
+class ApproximateMergeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pcap = os.path.join(self.directory, "flows.pcap")
+        # 400 flux UDP distincts
+        write_pcap(self.pcap, [(1000.0 + i / 100, ethernet(0x0800, ipv4(17, udp(10000 + i, 53), "10.0.0.1",
+                                                                          "10.0.0.2")))
+                               for i in range(400)])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_exact_state_flows_beyond_export_counted(self):
+        with mock.patch.object(CaptureAnalyzer, "PARTIAL_FLOWS", 50):
+            partial = analyze(self.pcap).partial()
+        self.assertEqual((partial["flow_count"], len(partial["flows"])), (400, 50))
+        merged = CaptureAnalyzer(mode="approximate")
+        merged.merge_partial(json.loads(json.dumps(partial)))
+        self.assertEqual(merged.unsketched_flows, 350)
+        self.assertAlmostEqual(merged.result()["flow_count"], 400, delta=400 * 0.05)
+
+    def test_unsketched_flows_carried_by_approximate_state(self):
+        with mock.patch.object(CaptureAnalyzer, "PARTIAL_FLOWS", 50):
+            partial = analyze(self.pcap).partial()
+        intermediate = CaptureAnalyzer(mode="approximate")
+        intermediate.merge_partial(partial)
+        merged = CaptureAnalyzer(mode="approximate")
+        merged.merge_partial(json.loads(json.dumps(intermediate.partial())))
+        self.assertEqual(merged.result()["flow_count"], intermediate.result()["flow_count"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# tests/test_pcap_index.py
+"""Index d'accès direct aux paquets (.idx) et pagination (python -m unittest)"""
+import os
+import shutil
+import tempfile
+import unittest
+from flask import Flask
+from routes.sniffer_routes import sniffer_bp
+from services.pcap_index import build_index, load_index, index_path
+from services.pcap_reader import PcapReader, open_capture
+from tests.test_pcap_analyzer import write_pcap
+from tests.test_pcap_reader import ethernet, ipv4, udp
+
+INTERVAL = 4
+
+
+def numbered_packets(count, start=1000.0, step=0.5):
+    """Paquets UDP espacés de step secondes"""
+    return [(start + i * step, ethernet(0x0800, ipv4(17, udp(1000 + i, 53)))) for i in range(count)]
+
+
+def numbers(page):
+    """Numéros des paquets d'une page"""
+    return [number for number, _ in page]
+
+
+class PcapIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pcap = os.path.join(self.directory, "capture.pcap")
+        write_pcap(self.pcap, numbered_packets(10))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_round_trip(self):
+        built = build_index(self.pcap, INTERVAL)
+        loaded = load_index(self.pcap)
+        self.assertEqual((loaded.interval, loaded.packet_count), (INTERVAL, 10))
+        self.assertEqual(list(loaded.offsets), list(built.offsets))
+        self.assertEqual(list(loaded.min_ts), [1000.0, 1002.0, 1004.0])
+        self.assertEqual(list(loaded.max_ts), [1001.5, 1003.5, 1004.5])
+        with open_capture(self.pcap) as f:
+            offsets = [record.offset for record in PcapReader(f)]
+        self.assertEqual(list(loaded.offsets), offsets[::INTERVAL])
+
+    def test_stale_index_ignored(self):
+        build_index(self.pcap, INTERVAL)
+        write_pcap(self.pcap, numbered_packets(12))
+        self.assertIsNone(load_index(self.pcap))
+
+    def test_corrupt_index_ignored(self):
+        build_index(self.pcap, INTERVAL)
+        with open(index_path(self.pcap), "r+b") as f:
+            f.truncate(10)
+        self.assertIsNone(load_index(self.pcap))
+
+    def test_pages_across_checkpoints(self):
+        index = build_index(self.pcap, INTERVAL)
+        self.assertEqual(numbers(index.packets(0, 3)), [0, 1, 2])
+        self.assertEqual(numbers(index.packets(3, 4)), [3, 4, 5, 6])
+        self.assertEqual(numbers(index.packets(8, 100)), [8, 9])
+        self.assertEqual(index.packets(10, 5), [])
+        self.assertEqual(index.packets(0, 0), [])
+
+    def test_negative_offset_clamped(self):
+        index = build_index(self.pcap, INTERVAL)
+        self.assertEqual(numbers(index.packets(-3, 2)), [0, 1])
+
+    def test_time_range_boundaries_inclusive(self):
+        index = build_index(self.pcap, INTERVAL)
+        # 1001.5 et 1002.0 : dernier paquet d'un bloc et premier du suivant
+        self.assertEqual(numbers(index.time_range(1001.5, 1002.0)), [3, 4])
+        self.assertEqual(numbers(index.time_range(1004.5, None)), [9])
+        self.assertEqual(numbers(index.time_range(None, 1000.0)), [0])
+        self.assertEqual(numbers(index.time_range(1001.6, 1001.9)), [])
+        self.assertEqual(index.time_range(1005.0, 1006.0), [])
+        self.assertEqual(index.time_range(990.0, 999.0), [])
+        self.assertEqual(numbers(index.time_range(None, None, limit=3)), [0, 1, 2])
+
+    def test_time_range_unsorted_capture(self):
+        # Un paquet en retard dans le dernier bloc : il doit être trouvé quand même
+        packets = numbered_packets(10)
+        packets[9] = (1000.25, packets[9][1])
+        write_pcap(self.pcap, packets)
+        index = build_index(self.pcap, INTERVAL)
+        self.assertEqual(numbers(index.time_range(1000.2, 1000.3)), [9])
+        self.assertEqual(numbers(index.time_range(1000.0, 1000.5)), [0, 1, 9])
+        # Un bloc entièrement hors de la plage est sauté
+        self.assertEqual(numbers(index.time_range(1003.0, 1003.5)), [6, 7])
+
+
+class PacketsRouteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, "captures"))
+        write_pcap(os.path.join(self.directory, "captures", "capture.pcap"), numbered_packets(10))
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+        app = Flask(__name__)
+        app.register_blueprint(sniffer_bp, url_prefix="/api/sniffer")
+        self.client = app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_page(self):
+        response = self.client.get("/api/sniffer/packets/capture.pcap?offset=8&limit=5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([packet["number"] for packet in response.get_json()["packets"]], [9, 10])
+        self.assertNotIn("next_url", response.get_json())
+
+    def test_invalid_page(self):
+        for query in ("offset=-1", "limit=0", "limit=-5", "offset=abc"):
+            response = self.client.get(f"/api/sniffer/packets/capture.pcap?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+if __name__ == "__main__":
+    unittest.main()
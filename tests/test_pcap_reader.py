@@ -0,0 +1,166 @@
+# tests/test_pcap_reader.py
+"""Dissection des en-têtes par dissect_packet (python -m unittest)"""
+import socket
+import struct
+import unittest
+from services.pcap_reader import (dissect_packet, LINKTYPE_ETHERNET, LINKTYPE_LINUX_SLL, LINKTYPE_LINUX_SLL2,
+                                  LINKTYPE_NULL, LINKTYPE_RAW)
+
+SRC_MAC = bytes.fromhex("020000000001")
+DST_MAC = bytes.fromhex("020000000002")
+
+
+def ipv4(proto, payload, src="10.0.0.1", dst="10.0.0.2", total_length=None, frag=0):
+    """En-tête IPv4 de 20 octets suivi de la charge utile"""
+    length = 20 + len(payload) if total_length is None else total_length
+    return struct.pack(">BBHHHBBH4s4s", 0x45, 0, length, 1, frag, 64, proto, 0,
+                       socket.inet_aton(src), socket.inet_aton(dst)) + payload
+
+
+def ipv6(next_header, payload, src="2001:db8::1", dst="2001:db8::2", payload_length=None):
+    """En-tête IPv6 fixe suivi de la charge utile (en-têtes d'extension compris)"""
+    length = len(payload) if payload_length is None else payload_length
+    return struct.pack(">IHBB16s16s", 6 << 28, length, next_header, 64,
+                       socket.inet_pton(socket.AF_INET6, src), socket.inet_pton(socket.AF_INET6, dst)) + payload
+
+
+def tcp(sport, dport, payload=b"", flags=0x18):
+    return struct.pack(">HHIIBBHHH", sport, dport, 1, 0, 5 << 4, flags, 65535, 0, 0) + payload
+
+
+def udp(sport, dport, payload=b""):
+    return struct.pack(">HHHH", sport, dport, 8 + len(payload), 0) + payload
+
+
+def ethernet(ethertype, payload, vlans=()):
+    header = DST_MAC + SRC_MAC
+    for vlan in vlans:
+        header += struct.pack(">HH", 0x8100, vlan)
+    return header + struct.pack(">H", ethertype) + payload
+
+
+class DissectLinkTest(unittest.TestCase):
+
+    def test_ethernet_tcp(self):
+        info = dissect_packet(LINKTYPE_ETHERNET, ethernet(0x0800, ipv4(6, tcp(40000, 80, b"GET / HTTP/1.1\r\n"))))
+        self.assertEqual(info.layers, ("eth", "ethertype", "ip", "tcp", "http"))
+        self.assertEqual((info.src, info.dst, info.sport, info.dport), ("10.0.0.1", "10.0.0.2", 40000, 80))
+        self.assertEqual(info.protocol, "HTTP")
+        self.assertEqual(info.transport_offset, 34)
+        self.assertEqual(info.payload_offset, 54)
+
+    def test_vlan_and_qinq(self):
+        info = dissect_packet(LINKTYPE_ETHERNET, ethernet(0x0800, ipv4(17, udp(5353, 53)), vlans=(10, 20)))
+        self.assertEqual(info.layers[:4], ("eth", "vlan", "vlan", "ethertype"))
+        self.assertEqual(info.transport_offset, 14 + 8 + 20)
+        self.assertEqual(info.dport, 53)
+
+    def test_linux_sll(self):
+        header = struct.pack(">HHH8sH", 0, 1, 6, SRC_MAC + b"\0\0", 0x0800)
+        info = dissect_packet(LINKTYPE_LINUX_SLL, header + ipv4(6, tcp(1234, 22)))
+        self.assertEqual(info.layers[:3], ("sll", "ethertype", "ip"))
+        self.assertEqual((info.sport, info.dport), (1234, 22))
+
+    def test_linux_sll2(self):
+        header = struct.pack(">HHIHBB8s", 0x86DD, 0, 1, 1, 0, 6, SRC_MAC + b"\0\0")
+        info = dissect_packet(LINKTYPE_LINUX_SLL2, header + ipv6(17, udp(1000, 53)))
+        self.assertEqual(info.layers[:3], ("sll", "ethertype", "ipv6"))
+        self.assertEqual(info.dst, "2001:db8::2")
+
+    def test_null_loopback(self):
+        info = dissect_packet(LINKTYPE_NULL, struct.pack("<I", 2) + ipv4(6, tcp(5000, 443)))
+        self.assertEqual(info.layers[:2], ("null", "ip"))
+        self.assertEqual(info.dport, 443)
+
+    def test_raw_ipv4_and_ipv6(self):
+        self.assertEqual(dissect_packet(LINKTYPE_RAW, ipv4(17, udp(1, 2))).layers[:2], ("raw", "ip"))
+        self.assertEqual(dissect_packet(LINKTYPE_RAW, ipv6(6, tcp(1, 2))).layers[:2], ("raw", "ipv6"))
+
+    def test_unknown_linktype(self):
+        info = dissect_packet(147, b"\x00" * 40)
+        self.assertEqual(info.protocol, "LINKTYPE147")
+        self.assertIsNone(info.transport_offset)
+
+    def test_arp(self):
+        info = dissect_packet(LINKTYPE_ETHERNET, ethernet(0x0806, b"\x00" * 28))
+        self.assertEqual(info.protocol, "ARP")
+        self.assertEqual(info.payload_offset, 14)
+        self.assertIsNone(info.transport_offset)
+
+
+class DissectTruncationTest(unittest.TestCase):
+
+    def test_short_ethernet_frame(self):
+        info = dissect_packet(LINKTYPE_ETHERNET, b"\x00" * 10)
+        self.assertEqual(info.layers, ("eth",))
+        self.assertEqual(info.payload_offset, 10)
+
+    def test_truncated_ip_header(self):
+        info = dissect_packet(LINKTYPE_ETHERNET, ethernet(0x0800, ipv4(6, b""))[:14 + 12])
+        self.assertEqual(info.layers[-1], "ip")
+        self.assertEqual(info.src, "")
+
+    def test_truncated_tcp_header(self):
+        info = dissect_packet(LINKTYPE_ETHERNET, ethernet(0x0800, ipv4(6, tcp(1, 2)))[:14 + 20 + 10])
+        self.assertEqual(info.src, "10.0.0.1")
+        self.assertEqual(info.sport, 0)
+        self.assertIsNone(info.transport_offset)
+
+    def test_snaplen_keeps_application_layer(self):
+        # Charge utile non capturée : l'application est déduite de la longueur IP
+        packet = ethernet(0x0800, ipv4(6, tcp(40000, 80, b"x" * 500)))
+        info = dissect_packet(LINKTYPE_ETHERNET, packet[:54])
+        self.assertEqual(info.protocol, "HTTP")
+
+    def test_ethernet_padding_ignored(self):
+        packet = ethernet(0x0800, ipv4(6, tcp(40000, 5555))) + b"\x00" * 6
+        info = dissect_packet(LINKTYPE_ETHERNET, packet)
+        self.assertEqual(info.payload_end, 54)
+
+    def test_zero_total_length_keeps_captured_bytes(self):
+        # Trafic sortant segmenté par la carte (TSO) : longueur IP à 0
+        packet = ethernet(0x0800, ipv4(6, tcp(40000, 80, b"GET /"), total_length=0))
+        info = dissect_packet(LINKTYPE_ETHERNET, packet)
+        self.assertEqual((info.sport, info.dport), (40000, 80))
+        self.assertEqual(info.payload_end, len(packet))
+        self.assertEqual(info.protocol, "HTTP")
+
+    def test_zero_ipv6_payload_length_keeps_captured_bytes(self):
+        packet = ethernet(0x86DD, ipv6(6, tcp(40000, 443, b"data"), payload_length=0))
+        info = dissect_packet(LINKTYPE_ETHERNET, packet)
+        self.assertEqual(info.dport, 443)
+        self.assertEqual(info.payload_end, len(packet))
+
+    def test_non_initial_fragment(self):
+        info = dissect_packet(LINKTYPE_ETHERNET, ethernet(0x0800, ipv4(17, b"\x00" * 16, frag=10)))
+        self.assertEqual(info.ip_proto, 17)
+        self.assertEqual(info.sport, 0)
+        self.assertNotIn("udp", info.layers)
+
+
+class DissectIpv6ExtensionTest(unittest.TestCase):
+
+    def test_hop_by_hop_then_udp(self):
+        hop_by_hop = bytes([17, 0]) + b"\x00" * 6
+        info = dissect_packet(LINKTYPE_ETHERNET, ethernet(0x86DD, ipv6(0, hop_by_hop + udp(546, 547))))
+        self.assertEqual(info.ip_proto, 17)
+        self.assertEqual(info.transport_offset, 14 + 40 + 8)
+        self.assertEqual((info.sport, info.dport), (546, 547))
+
+    def test_chained_extensions(self):
+        # Options destination (16 octets) puis routage (8 octets) puis TCP
+        destination = bytes([43, 1]) + b"\x00" * 14
+        routing = bytes([6, 0]) + b"\x00" * 6
+        info = dissect_packet(LINKTYPE_RAW, ipv6(60, destination + routing + tcp(1, 22)))
+        self.assertEqual(info.ip_proto, 6)
+        self.assertEqual(info.transport_offset, 40 + 16 + 8)
+        self.assertEqual(info.dport, 22)
+
+    def test_icmpv6(self):
+        info = dissect_packet(LINKTYPE_RAW, ipv6(58, b"\x80\x00" + b"\x00" * 6))
+        self.assertEqual(info.ip_proto, 58)
+        self.assertEqual(info.sport, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
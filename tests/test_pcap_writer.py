@@ -0,0 +1,108 @@
+# tests/test_pcap_writer.py
+"""Écriture en anneau des captures et analyse de tous leurs fichiers (python -m unittest)"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from services import packet_sniffer
+from services.analysis_cache import AnalysisCache
+from services.capture_sampling import CaptureSampler
+from services.pcap_reader import read_capture_metadata, LINKTYPE_ETHERNET
+from services.pcap_writer import RingPcapWriter
+from tests.test_pcap_analyzer import analyze, sample_packets, write_pcap
+
+
+def write_ring(base, packets, max_files=None, sampler=None):
+    """Écrit des couples (timestamp, octets) en anneau, un fichier par paquet"""
+    # max_file_size d'un octet : rotation avant chaque nouveau paquet
+    writer = RingPcapWriter(base, max_file_size=1, max_files=max_files, metadata={"tool": "test"},
+                            build_index=False,
+                            file_metadata=packet_sniffer._sampling_counters(sampler) if sampler else None)
+    for ts, data in packets:
+        if sampler is None:
+            writer.write(data, ts)
+        else:
+            written = sampler.sample(data, len(data), LINKTYPE_ETHERNET)
+            if written is not None:
+                writer.write(written, ts, len(data))
+    writer.close()
+    return writer
+
+
+class RingWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.base = os.path.join(self.directory, "capture")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_one_file_per_packet(self):
+        writer = write_ring(self.base, sample_packets())
+        self.assertEqual(len(writer.files), 12)
+        self.assertEqual([read_capture_metadata(f)["file_index"] for f in writer.files], list(range(12)))
+
+    def test_ring_indices_stay_in_range(self):
+        writer = write_ring(self.base, sample_packets(), max_files=3)
+        self.assertEqual(len(writer.files), 3)
+        self.assertTrue(all(os.path.exists(f) for f in writer.files))
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith(".pcap")]), 3)
+        indices = [read_capture_metadata(f)["file_index"] for f in writer.files]
+        self.assertTrue(all(0 <= index < 3 for index in indices))
+        self.assertEqual(indices[-1], 2)
+
+
+class AnalyzeCapturesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        cache = AnalysisCache(cache_dir=os.path.join(self.directory, "cache"))
+        patcher = mock.patch.object(packet_sniffer, "get_analysis_cache", return_value=cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_all_files_are_analyzed(self):
+        packets = sample_packets()
+        single = os.path.join(self.directory, "single.pcap")
+        write_pcap(single, packets)
+        files = []
+        for i in range(3):
+            path = os.path.join(self.directory, f"ring_{i:03d}.pcap")
+            write_pcap(path, packets[i * 4:(i + 1) * 4])
+            files.append(path)
+
+        expected = analyze(single).result()
+        for use_cache in (True, True, False):
+            result = packet_sniffer.analyze_captures(files, use_cache=use_cache)
+            self.assertEqual(result["packet_count"], 12)
+            self.assertEqual(result["files"], files)
+            self.assertEqual(result["total_file_size"], sum(os.path.getsize(f) for f in files))
+            # Protocoles issus d'un ensemble : ordre dépendant du hachage des chaînes
+            self.assertEqual(sorted(result["protocols"]), sorted(expected["protocols"]))
+            for key in ("ip_counts", "port_counts", "flow_count", "top_talkers", "bytes_per_second"):
+                self.assertEqual(result[key], expected[key], key)
+
+    def test_single_file_uses_analyze_pcap(self):
+        path = os.path.join(self.directory, "single.pcap")
+        write_pcap(path, sample_packets())
+        with mock.patch.object(packet_sniffer, "analyze_pcap", return_value={"packet_count": 12}) as analyzed:
+            self.assertEqual(packet_sniffer.analyze_captures([path]), {"packet_count": 12})
+            analyzed.assert_called_once()
+
+    def test_sampling_counters_summed(self):
+        sampler = CaptureSampler(mode="packet", rate=2)
+        writer = write_ring(os.path.join(self.directory, "sampled"), sample_packets(), sampler=sampler)
+        result = packet_sniffer.analyze_captures(writer.files)
+        sampling = result["capture_metadata"]["sampling"]
+        self.assertEqual(sampling["packets_seen"], 12)
+        self.assertEqual(sampling["packets_kept"], result["packet_count"])
+        self.assertEqual(result["sampling_estimates"]["packet_count"], 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
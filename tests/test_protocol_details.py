@@ -0,0 +1,155 @@
+# tests/test_protocol_details.py
+"""Décodage DNS / ARP et détails de protocole de l'analyse (python -m unittest)"""
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import unittest
+from services.pcap_reader import parse_dns, parse_arp, DNS_MAX_ANSWERS
+from tests.test_pcap_analyzer import analyze, write_pcap
+from tests.test_pcap_reader import ethernet, ipv4, tcp, udp
+
+CLIENT_MAC = bytes.fromhex("020000000001")
+ROUTER_MAC = bytes.fromhex("020000000002")
+ATTACKER_MAC = bytes.fromhex("02000000000a")
+
+
+def dns_name(name):
+    """Nom DNS encodé en labels, sans compression"""
+    return b"".join(bytes([len(label)]) + label.encode() for label in name.split(".")) + b"\x00"
+
+
+def dns_message(txid, query, qtype=1, response=False, rcode=0, answers=()):
+    """Message DNS avec une question ; les réponses pointent sur le nom de la question"""
+    flags = (0x8180 if response else 0x0100) | rcode
+    message = struct.pack("!HHHHHH", txid, flags, 1, len(answers), 0, 0)
+    message += dns_name(query) + struct.pack("!HH", qtype, 1)
+    for rtype, rdata in answers:
+        message += b"\xc0\x0c" + struct.pack("!HHIH", rtype, 1, 300, len(rdata)) + rdata
+    return message
+
+
+def arp_packet(op, sender_mac, sender_ip, target_mac=bytes(6), target_ip="0.0.0.0"):
+    """En-tête ARP Ethernet/IPv4 (op 1 : requête, 2 : réponse)"""
+    return (struct.pack("!HHBBH", 1, 0x0800, 6, 4, op) + sender_mac + socket.inet_aton(sender_ip)
+            + target_mac + socket.inet_aton(target_ip))
+
+
+class ParseDnsTest(unittest.TestCase):
+
+    def test_query(self):
+        dns = parse_dns(dns_message(0x1234, "example.com", qtype=28))
+        self.assertEqual((dns.id, dns.response, dns.query, dns.qtype, dns.answers),
+                         (0x1234, False, "example.com", "AAAA", []))
+
+    def test_response_with_compressed_answers(self):
+        cname = dns_name("www")[:-1] + b"\xc0\x0c"
+        answers = [(5, cname), (1, socket.inet_aton("93.184.216.34")),
+                   (28, socket.inet_pton(socket.AF_INET6, "2001:db8::1")), (16, b"\x03txt")]
+        dns = parse_dns(dns_message(7, "example.com", response=True, answers=answers))
+        self.assertTrue(dns.response)
+        self.assertEqual(dns.rcode, "NOERROR")
+        self.assertEqual(dns.answers, ["www.example.com", "93.184.216.34", "2001:db8::1", "TXT"])
+
+    def test_mx_answer(self):
+        dns = parse_dns(dns_message(1, "example.com", qtype=15, response=True,
+                                    answers=[(15, b"\x00\x0a" + dns_name("mail.example.com"))]))
+        self.assertEqual(dns.answers, ["mail.example.com"])
+
+    def test_nxdomain(self):
+        self.assertEqual(parse_dns(dns_message(1, "missing.test", response=True, rcode=3)).rcode, "NXDOMAIN")
+
+    def test_answers_bounded(self):
+        answers = [(1, socket.inet_aton(f"10.0.0.{i}")) for i in range(DNS_MAX_ANSWERS + 5)]
+        dns = parse_dns(dns_message(1, "many.test", response=True, answers=answers))
+        self.assertEqual(len(dns.answers), DNS_MAX_ANSWERS)
+
+    def test_tcp_length_prefix(self):
+        message = dns_message(9, "example.org")
+        self.assertEqual(parse_dns(struct.pack("!H", len(message)) + message, tcp=True).query, "example.org")
+
+    def test_payload_offset(self):
+        self.assertEqual(parse_dns(b"\xff" * 42 + dns_message(3, "a.b"), 42).query, "a.b")
+
+    def test_truncated_or_invalid(self):
+        message = dns_message(1, "example.com", response=True, answers=[(1, socket.inet_aton("10.0.0.1"))])
+        self.assertIsNone(parse_dns(message[:8]))
+        self.assertIsNone(parse_dns(message[:16]))
+        # Réponse tronquée : la question reste lisible
+        self.assertEqual(parse_dns(message[:-2]).answers, [])
+        # Pointeur de compression qui boucle sur lui-même
+        looping = struct.pack("!HHHHHH", 1, 0x0100, 1, 0, 0, 0) + b"\xc0\x0c" + struct.pack("!HH", 1, 1)
+        self.assertIsNone(parse_dns(looping))
+
+
+class ParseArpTest(unittest.TestCase):
+
+    def test_request_and_reply(self):
+        request = parse_arp(arp_packet(1, CLIENT_MAC, "10.0.0.1", target_ip="10.0.0.254"))
+        self.assertEqual(request, ("who-has", "02:00:00:00:00:01", "10.0.0.1", "00:00:00:00:00:00", "10.0.0.254"))
+        reply = parse_arp(b"\x00" * 14 + arp_packet(2, ROUTER_MAC, "10.0.0.254", CLIENT_MAC, "10.0.0.1"), 14)
+        self.assertEqual((reply.op, reply.src_mac, reply.dst_ip), ("is-at", "02:00:00:00:00:02", "10.0.0.1"))
+
+    def test_not_ethernet_ipv4(self):
+        self.assertIsNone(parse_arp(arp_packet(1, CLIENT_MAC, "10.0.0.1")[:27]))
+        packet = bytearray(arp_packet(1, CLIENT_MAC, "10.0.0.1"))
+        packet[1] = 6
+        self.assertIsNone(parse_arp(bytes(packet)))
+
+
+class ProtocolDetailsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pcap = os.path.join(self.directory, "capture.pcap")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _details(self, packets):
+        write_pcap(self.pcap, packets)
+        return analyze(self.pcap).protocol_details()
+
+    def test_dns_query_matched_with_response(self):
+        query = dns_message(42, "example.com")
+        response = dns_message(42, "example.com", response=True, answers=[(1, socket.inet_aton("93.184.216.34"))])
+        tcp_query = dns_message(43, "example.org")
+        details = self._details([
+            (1000.0, ethernet(0x0800, ipv4(17, udp(50000, 53, query), "10.0.0.1", "10.0.0.53"))),
+            (1000.025, ethernet(0x0800, ipv4(17, udp(53, 50000, response), "10.0.0.53", "10.0.0.1"))),
+            # DNS sur TCP, requête sans réponse
+            (1001.0, ethernet(0x0800, ipv4(6, tcp(50001, 53, struct.pack("!H", len(tcp_query)) + tcp_query),
+                                           "10.0.0.1", "10.0.0.53")))
+        ])
+        first, second = details["dns_queries"]
+        self.assertEqual((first["client"], first["server"], first["query"]), ("10.0.0.1", "10.0.0.53", "example.com"))
+        self.assertEqual((first["rcode"], first["answers"], first["latency"]), ("NOERROR", ["93.184.216.34"], 0.025))
+        self.assertEqual(second["query"], "example.org")
+        self.assertEqual(details["dns_stats"]["queries"], 2)
+        self.assertEqual(details["dns_stats"]["responses"], 1)
+        self.assertEqual(details["dns_stats"]["distinct_names"], 2)
+
+    def test_unsolicited_response_logged(self):
+        response = dns_message(5, "late.test", response=True, rcode=3)
+        details = self._details([(1000.0, ethernet(0x0800, ipv4(17, udp(53, 50000, response), "10.0.0.53",
+                                                                "10.0.0.1")))])
+        entry = details["dns_queries"][0]
+        self.assertEqual((entry["client"], entry["rcode"]), ("10.0.0.1", "NXDOMAIN"))
+
+    def test_arp_table_and_conflicts(self):
+        details = self._details([
+            (1000.0, ethernet(0x0806, arp_packet(1, CLIENT_MAC, "10.0.0.1", target_ip="10.0.0.254"))),
+            (1000.1, ethernet(0x0806, arp_packet(2, ROUTER_MAC, "10.0.0.254", CLIENT_MAC, "10.0.0.1"))),
+            # Sonde (adresse 0.0.0.0) puis usurpation de l'adresse du routeur
+            (1001.0, ethernet(0x0806, arp_packet(1, ATTACKER_MAC, "0.0.0.0", target_ip="10.0.0.9"))),
+            (1002.0, ethernet(0x0806, arp_packet(2, ATTACKER_MAC, "10.0.0.254", CLIENT_MAC, "10.0.0.1")))
+        ])
+        self.assertEqual(details["arp_stats"], {"requests": 2, "replies": 2, "hosts": 2})
+        self.assertEqual(details["arp_conflicts"],
+                         [{"ip": "10.0.0.254", "macs": ["02:00:00:00:00:02", "02:00:00:00:00:0a"]}])
+        self.assertEqual(len(details["arp_packets"]), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
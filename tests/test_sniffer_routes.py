@@ -0,0 +1,92 @@
+# tests/test_sniffer_routes.py
+"""Validation des paramètres des routes du sniffer (python -m unittest)"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from flask import Flask
+from routes import sniffer_routes
+from routes.sniffer_routes import sniffer_bp
+from services import packet_sniffer
+from services.analysis_cache import AnalysisCache
+from tests.test_pcap_analyzer import sample_packets, write_pcap
+
+
+class SnifferRoutesTestCase(unittest.TestCase):
+    """Application minimale servant le blueprint depuis un répertoire temporaire"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, "captures"))
+        write_pcap(os.path.join(self.directory, "captures", "capture.pcap"), sample_packets())
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+        app = Flask(__name__)
+        app.register_blueprint(sniffer_bp, url_prefix="/api/sniffer")
+        self.client = app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class AnalysisModeTest(SnifferRoutesTestCase):
+
+    def test_unknown_mode_rejected(self):
+        body = {"analysis_mode": "bogus", "count": 10}
+        with mock.patch.object(sniffer_routes, "capture_packets") as captured, \
+                mock.patch.object(sniffer_routes, "start_capture_job") as started, \
+                mock.patch.object(sniffer_routes, "start_batch_analysis") as batched:
+            for url in ("/api/sniffer/start", "/api/sniffer/jobs", "/api/sniffer/batch",
+                        "/api/sniffer/report/capture.pcap"):
+                response = self.client.post(url, json=body)
+                self.assertEqual(response.status_code, 400, url)
+                self.assertIn("bogus", response.get_json()["error"])
+            response = self.client.post("/api/sniffer/start", json=dict(body, background=True))
+            self.assertEqual(response.status_code, 400)
+        captured.assert_not_called()
+        started.assert_not_called()
+        batched.assert_not_called()
+
+    def test_default_mode(self):
+        self.assertEqual(sniffer_routes._analysis_mode({}), "exact")
+        self.assertEqual(sniffer_routes._analysis_mode({"analysis_mode": "approximate"}), "approximate")
+
+
+class TcpStreamsRouteTest(SnifferRoutesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache = AnalysisCache(cache_dir=os.path.join(self.directory, "cache"))
+        patcher = mock.patch.object(packet_sniffer, "get_analysis_cache", return_value=cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pages_sliced_from_cached_list(self):
+        full = packet_sniffer.list_tcp_streams(os.path.join("captures", "capture.pcap"))
+        with mock.patch.object(packet_sniffer, "list_streams") as computed:
+            response = self.client.get("/api/sniffer/streams/capture.pcap?offset=0&limit=1")
+            self.client.get("/api/sniffer/streams/capture.pcap?offset=1&limit=5")
+        computed.assert_not_called()
+        data = response.get_json()
+        self.assertEqual((data["total"], data["offset"], data["limit"]), (full["total"], 0, 1))
+        self.assertEqual(data["streams"], full["streams"][:1])
+        self.assertEqual(self.client.get("/api/sniffer/streams/capture.pcap?offset=9").get_json()["streams"], [])
+
+    def test_invalid_page_rejected(self):
+        for query in ("offset=-1", "limit=0", f"limit={packet_sniffer.MAX_STREAM_PAGE + 1}", "limit=abc"):
+            response = self.client.get(f"/api/sniffer/streams/capture.pcap?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_unknown_payload_stream(self):
+        with mock.patch.object(sniffer_routes, "iter_stream_payload") as streamed:
+            response = self.client.get("/api/sniffer/streams/capture.pcap/99/payload")
+        self.assertEqual(response.status_code, 404)
+        streamed.assert_not_called()
+        response = self.client.get("/api/sniffer/streams/capture.pcap/0/payload?direction=client")
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+# tests/test_tcp_reassembly.py
+"""Réassemblage des flux TCP (python -m unittest)"""
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from unittest import mock
+from services import tcp_reassembly
+from services.pcap_reader import PacketRecord, LINKTYPE_ETHERNET
+from services.tcp_reassembly import (TcpReassembler, list_streams, follow_stream, iter_stream_payload,
+                                     CLIENT, SERVER, TCP_FIN, TCP_SYN, TCP_RST, TCP_ACK)
+from tests.test_pcap_analyzer import write_pcap
+from tests.test_pcap_reader import ethernet, ipv4
+
+PSH_ACK = 0x18
+
+
+def segment(seq, payload=b"", flags=PSH_ACK, from_client=True, client_port=40000):
+    """Trame Ethernet/IPv4/TCP avec numéro de séquence et drapeaux explicites"""
+    sport, dport = (client_port, 80) if from_client else (80, client_port)
+    src, dst = ("10.0.0.1", "10.0.0.2") if from_client else ("10.0.0.2", "10.0.0.1")
+    header = struct.pack(">HHIIBBHHH", sport, dport, seq, 0, 5 << 4, flags, 65535, 0, 0)
+    return ethernet(0x0800, ipv4(6, header + payload, src, dst))
+
+
+class Collector:
+    """Octets livrés, manques et résumés des flux fermés"""
+
+    def __init__(self):
+        self.data = {}
+        self.gaps = []
+        self.closed = []
+
+    def on_data(self, stream, direction, data):
+        self.data[stream.id, direction] = self.data.get((stream.id, direction), b"") + data
+
+    def on_gap(self, stream, direction, size):
+        self.gaps.append((stream.id, direction, size))
+
+    def on_close(self, stream):
+        self.closed.append(stream.summary())
+
+
+class TcpReassemblerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.collector = Collector()
+        self.timestamp = 1000.0
+
+    def _reassembler(self, **kwargs):
+        return TcpReassembler(on_data=self.collector.on_data, on_gap=self.collector.on_gap,
+                              on_close=self.collector.on_close, **kwargs)
+
+    def _feed(self, reassembler, frames, missing=0):
+        for frame in frames:
+            self.timestamp += 0.001
+            reassembler.add(PacketRecord(0, self.timestamp, len(frame), len(frame) + missing,
+                                         LINKTYPE_ETHERNET, frame))
+
+    def _run(self, frames, **kwargs):
+        reassembler = self._reassembler(**kwargs)
+        self._feed(reassembler, frames)
+        reassembler.finish()
+        return reassembler
+
+    def test_handshake_and_in_order_delivery(self):
+        self._run([
+            segment(999, flags=TCP_SYN),
+            segment(4999, flags=TCP_SYN | TCP_ACK, from_client=False),
+            segment(1000, b"hello "),
+            segment(1006, b"world"),
+            segment(5000, b"ok", from_client=False)
+        ])
+        self.assertEqual(self.collector.data, {(0, CLIENT): b"hello world", (0, SERVER): b"ok"})
+        summary = self.collector.closed[0]
+        self.assertEqual((summary["client_port"], summary["server_port"], summary["packets"]), (40000, 80, 5))
+
+    def test_out_of_order_segments(self):
+        self._run([segment(100, b"aaaa"), segment(108, b"cccc"), segment(104, b"bbbb")])
+        self.assertEqual(self.collector.data[0, CLIENT], b"aaaabbbbcccc")
+        stats = self.collector.closed[0]["client_stats"]
+        self.assertEqual((stats["out_of_order"], stats["gaps"], stats["bytes"]), (1, 0, 12))
+
+    def test_overlapping_retransmissions_trimmed(self):
+        reassembler = self._run([
+            segment(100, b"ab"),
+            segment(106, b"ghij"),
+            # Recouvre le segment précédent en attente
+            segment(104, b"efgh"),
+            segment(102, b"cd"),
+            # Retransmission entièrement livrée, en partie livrée (rognée), déjà en attente
+            segment(100, b"abcd"),
+            segment(108, b"ijkl"),
+            segment(116, b"q"),
+            segment(116, b"q"),
+            segment(112, b"mnop")
+        ])
+        self.assertEqual(self.collector.data[0, CLIENT], b"abcdefghijklmnopq")
+        stats = self.collector.closed[0]["client_stats"]
+        self.assertEqual((stats["retransmissions"], stats["out_of_order"], stats["gaps"]), (2, 3, 0))
+        self.assertEqual(reassembler.buffered, 0)
+
+    def test_pending_bytes_bounded(self):
+        reassembler = self._reassembler(max_stream_buffer=8)
+        self._feed(reassembler, [segment(100, b"ab"), segment(110, b"xxxxx"), segment(120, b"yyyyy")])
+        # 10 octets en attente > 8 : le trou avant le premier segment est abandonné
+        self.assertEqual(self.collector.gaps, [(0, CLIENT, 8)])
+        self.assertEqual(self.collector.data[0, CLIENT], b"abxxxxx")
+        self.assertEqual(reassembler.buffered, 5)
+        reassembler.finish()
+        self.assertEqual(self.collector.gaps, [(0, CLIENT, 8), (0, CLIENT, 5)])
+        self.assertEqual(self.collector.data[0, CLIENT], b"abxxxxxyyyyy")
+        self.assertEqual(reassembler.memory_stats()["buffered_bytes"], 0)
+
+    def test_total_buffer_relieved(self):
+        reassembler = self._reassembler(max_total_buffer=8)
+        self._feed(reassembler, [
+            segment(100, b"a", client_port=40000), segment(200, b"b", client_port=40001),
+            segment(110, b"xxxxx", client_port=40000), segment(210, b"yyyyy", client_port=40001)
+        ])
+        # La connexion la moins récemment active est vidée la première
+        self.assertEqual(reassembler.forced_flushes, 1)
+        self.assertEqual(self.collector.data[0, CLIENT], b"axxxxx")
+        self.assertNotIn((1, CLIENT), [(stream_id, direction) for stream_id, direction, _ in self.collector.gaps])
+        self.assertEqual((reassembler.buffered, reassembler.peak_buffered), (5, 10))
+
+    def test_fin_and_rst_closing(self):
+        self._run([
+            segment(100, b"req", flags=PSH_ACK | TCP_FIN),
+            segment(500, b"resp", from_client=False),
+            segment(504, flags=TCP_RST, from_client=False)
+        ])
+        summary = self.collector.closed[0]
+        self.assertTrue(summary["client_stats"]["fin"])
+        self.assertFalse(summary["server_stats"]["fin"])
+        self.assertTrue(summary["reset"])
+        self.assertEqual(self.collector.data, {(0, CLIENT): b"req", (0, SERVER): b"resp"})
+
+    def test_new_syn_opens_new_stream(self):
+        reassembler = self._run([
+            segment(1, flags=TCP_SYN), segment(2, b"first"),
+            segment(9000, flags=TCP_SYN), segment(9001, b"second")
+        ])
+        self.assertEqual(reassembler.stream_count, 2)
+        self.assertEqual([summary["id"] for summary in self.collector.closed], [0, 1])
+        self.assertEqual((self.collector.data[0, CLIENT], self.collector.data[1, CLIENT]), (b"first", b"second"))
+
+    def test_sequence_wraparound(self):
+        self._run([segment(0xFFFFFFFE, b"ab"), segment(2, b"ef"), segment(0, b"cd")])
+        self.assertEqual(self.collector.data[0, CLIENT], b"abcdef")
+        self.assertEqual(self.collector.closed[0]["client_stats"]["out_of_order"], 1)
+
+    def test_truncated_packet_reported_as_gap(self):
+        reassembler = self._reassembler()
+        self._feed(reassembler, [segment(100, b"abc")], missing=10)
+        self._feed(reassembler, [segment(113, b"z")])
+        reassembler.finish()
+        self.assertEqual(self.collector.data[0, CLIENT], b"abcz")
+        self.assertEqual(self.collector.gaps, [(0, CLIENT, 10)])
+
+    def test_idle_streams_closed(self):
+        reassembler = self._reassembler(idle_timeout=10)
+        with mock.patch.object(tcp_reassembly, "IDLE_CHECK_INTERVAL", 1):
+            self._feed(reassembler, [segment(100, b"a", client_port=40000)])
+            self.timestamp += 100
+            self._feed(reassembler, [segment(200, b"b", client_port=40001)])
+        self.assertEqual(reassembler.idle_closed, 1)
+        self.assertEqual([summary["id"] for summary in self.collector.closed], [0])
+        self.assertEqual(reassembler.memory_stats()["open_streams"], 1)
+
+    def test_many_reversed_segments(self):
+        count = 5000
+        frames = [segment(99, flags=TCP_SYN)]
+        frames += [segment(100 + 4 * i, struct.pack(">I", i)) for i in reversed(range(count))]
+        reassembler = self._run(frames)
+        expected = b"".join(struct.pack(">I", i) for i in range(count))
+        self.assertEqual(self.collector.data[0, CLIENT], expected)
+        self.assertEqual(reassembler.peak_buffered, 4 * (count - 1))
+        self.assertEqual(reassembler.buffered, 0)
+
+
+class CaptureStreamsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pcap = os.path.join(self.directory, "capture.pcap")
+        frames = []
+        for port in range(40000, 40005):
+            frames += [segment(1, f"GET /{port}".encode(), client_port=port),
+                       segment(1, b"200 OK", from_client=False, client_port=port)]
+        write_pcap(self.pcap, [(1000.0 + i * 0.01, frame) for i, frame in enumerate(frames)])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_pages_match_full_list(self):
+        full = list_streams(self.pcap)
+        self.assertEqual(full["total"], 5)
+        self.assertEqual([stream["id"] for stream in full["streams"]], list(range(5)))
+        self.assertEqual(full["streams"][2]["client_preview"], "GET /40002")
+        page = list_streams(self.pcap, 1, 2)
+        self.assertEqual((page["total"], page["streams"]), (5, full["streams"][1:3]))
+
+    def test_follow_stream(self):
+        result = follow_stream(self.pcap, 3)
+        self.assertEqual(result["chunks"], [{"direction": "client", "offset": 0, "data": b"GET /40003"},
+                                            {"direction": "server", "offset": 0, "data": b"200 OK"}])
+        self.assertFalse(result["truncated"])
+        self.assertTrue(follow_stream(self.pcap, 3, max_bytes=4)["truncated"])
+        self.assertIsNone(follow_stream(self.pcap, 5))
+
+    def test_iter_stream_payload(self):
+        self.assertEqual(b"".join(iter_stream_payload(self.pcap, 1)), b"GET /40001")
+        self.assertEqual(b"".join(iter_stream_payload(self.pcap, 1, SERVER)), b"200 OK")
+        self.assertEqual(b"".join(iter_stream_payload(self.pcap, 7)), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+# tests/test_traffic_series.py
+"""Séries temporelles de trafic par intervalles (python -m unittest)"""
+import random
+import unittest
+from services.packet_table import USE_NUMPY
+from services.traffic_series import TimeSeriesAccumulator, series_from_arrays, OTHER_PROTOCOLS, TOP_PROTOCOLS
+
+if USE_NUMPY:
+    import numpy as np
+
+
+def accumulate(packets, bin_width=1.0, max_points=600):
+    """Série construite paquet par paquet à partir de (timestamp, taille, protocole, nouveau flux)"""
+    series = TimeSeriesAccumulator(bin_width, max_points)
+    for ts, length, protocol, new_flow in packets:
+        series.add(ts, length, protocol, new_flow)
+    return series
+
+
+def random_packets(count, seed, start=1700000000.0, span=300.0):
+    rng = random.Random(seed)
+    names = ["TCP", "UDP", "HTTP", "DNS", "TLS", "ICMP", "ARP", "SSH"]
+    return [(start + rng.random() * span, rng.randint(60, 1500), rng.choice(names), rng.random() < 0.2)
+            for _ in range(count)]
+
+
+class AccumulatorTest(unittest.TestCase):
+
+    def test_absolute_grid_and_gaps(self):
+        result = accumulate([(10.2, 100, "TCP", True), (10.9, 50, "TCP", False), (13.0, 10, "UDP", True)]).result()
+        self.assertEqual(result["start"], 10.0)
+        self.assertEqual(result["points"], 4)
+        self.assertEqual(result["packets"], [2, 0, 0, 1])
+        self.assertEqual(result["bytes"], [150, 0, 0, 10])
+        self.assertEqual(result["new_flows"], [1, 0, 0, 1])
+        self.assertEqual(result["bps"], [1200.0, 0.0, 0.0, 80.0])
+
+    def test_bin_edge_belongs_to_next_bin(self):
+        result = accumulate([(4.999, 1, "TCP", False), (5.0, 1, "TCP", False)], bin_width=0.5).result()
+        self.assertEqual((result["start"], result["packets"]), (4.5, [1, 1]))
+
+    def test_packet_before_first_bin(self):
+        result = accumulate([(20.5, 1, "TCP", False), (18.1, 2, "TCP", False)]).result()
+        self.assertEqual((result["start"], result["packets"]), (18.0, [1, 0, 1]))
+
+    def test_width_doubles_past_max_points(self):
+        packets = [(float(ts), 1, "TCP", False) for ts in range(100, 120)]
+        result = accumulate(packets, max_points=6).result()
+        self.assertEqual(result["bin_width"], 4.0)
+        self.assertEqual(result["start"], 100.0)
+        self.assertEqual(result["packets"], [4, 4, 4, 4, 4])
+        self.assertEqual(result["pps"], [1.0] * 5)
+
+    def test_doubling_realigns_on_grid(self):
+        # 101 n'est pas un multiple de 2 : le premier intervalle commence à 100
+        packets = [(float(ts), 1, "TCP", False) for ts in range(101, 106)]
+        result = accumulate(packets, max_points=4).result()
+        self.assertEqual((result["start"], result["bin_width"], result["packets"]), (100.0, 2.0, [1, 2, 2]))
+
+    def test_other_protocols_grouped(self):
+        names = [f"P{i}" for i in range(TOP_PROTOCOLS + 2)]
+        packets = [(0.5, 1, name, False) for i, name in enumerate(names) for _ in range(len(names) - i)]
+        protocols = accumulate(packets).result()["protocols"]
+        self.assertEqual(set(protocols), set(names[:TOP_PROTOCOLS]) | {OTHER_PROTOCOLS})
+        self.assertEqual(protocols[OTHER_PROTOCOLS], [3.0])
+
+    def test_empty(self):
+        result = TimeSeriesAccumulator(2.0).result()
+        self.assertEqual((result["start"], result["points"], result["bin_width"]), (None, 0, 2.0))
+
+    def test_remove_new_flow(self):
+        series = accumulate([(1.5, 1, "TCP", True), (2.5, 1, "TCP", True)])
+        series.remove_new_flow(2.7)
+        series.remove_new_flow(2.7)
+        series.remove_new_flow(50.0)
+        self.assertEqual(series.result()["new_flows"], [1, 0])
+
+
+class MergeTest(unittest.TestCase):
+
+    def test_merge_equals_single_series(self):
+        packets = sorted(random_packets(500, seed=1))
+        expected = accumulate(packets, max_points=50).result()
+        merged = accumulate(packets[:200], max_points=50)
+        merged.merge_state(accumulate(packets[200:], max_points=50).state())
+        self.assertEqual(merged.result(), expected)
+
+    def test_merge_wider_series(self):
+        # La seconde série a déjà doublé sa largeur : la première est élargie avant la fusion
+        first = [(float(ts), 1, "TCP", False) for ts in range(0, 4)]
+        second = [(float(ts), 1, "UDP", False) for ts in range(4, 20)]
+        merged = accumulate(first, max_points=8)
+        merged.merge_state(accumulate(second, max_points=8).state())
+        self.assertEqual(merged.result(), accumulate(first + second, max_points=8).result())
+
+    def test_merge_different_base_width_ignored(self):
+        merged = accumulate([(1.0, 1, "TCP", False)])
+        merged.merge_state(accumulate([(2.0, 1, "TCP", False)], bin_width=0.5).state())
+        self.assertEqual(merged.result()["packets"], [1])
+
+
+@unittest.skipUnless(USE_NUMPY, "NumPy n'est pas installé")
+class VectorizedSeriesTest(unittest.TestCase):
+
+    def _vectorized(self, packets, bin_width, max_points):
+        names = sorted({protocol for _, _, protocol, _ in packets})
+        return series_from_arrays(
+            np.array([p[0] for p in packets]), np.array([p[1] for p in packets]),
+            np.array([names.index(p[2]) for p in packets]), names, np.array([p[3] for p in packets]),
+            bin_width, max_points
+        )
+
+    def test_matches_accumulator(self):
+        for seed, bin_width, max_points in ((2, 1.0, 600), (3, 0.1, 100), (4, 5.0, 7)):
+            packets = random_packets(2000, seed)
+            self.assertEqual(self._vectorized(packets, bin_width, max_points),
+                             accumulate(packets, bin_width, max_points).result(), (seed, bin_width, max_points))
+
+    def test_empty(self):
+        self.assertEqual(series_from_arrays(np.zeros(0), np.zeros(0), np.zeros(0, dtype=int), []),
+                         TimeSeriesAccumulator().result())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+# tests/test_wordlist_catalog.py
+"""Catalogue des wordlists : invalidation par dates et comptage en arrière-plan (python -m unittest)"""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from services import wordlist_catalog
+from services.wordlist_catalog import WordlistCatalog, WORDLISTS_DIR, count_lines
+
+
+def write_lines(path, count):
+    with open(path, "w") as f:
+        f.write("".join(f"word{i}\n" for i in range(count)))
+
+
+def touch_dir(path, seconds):
+    """Date de modification explicite (indépendante de la résolution du système de fichiers)"""
+    os.utime(path, (seconds, seconds))
+
+
+class WordlistCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+        patcher = mock.patch.object(wordlist_catalog, "EXTRA_WORDLISTS", [])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.system = os.path.join(self.directory, "system")
+        os.makedirs(os.path.join(self.system, "nested"))
+        os.makedirs(WORDLISTS_DIR)
+        write_lines(os.path.join(self.system, "passwords.txt"), 3)
+        write_lines(os.path.join(self.system, "nested", "usernames.txt"), 2)
+        write_lines(os.path.join(self.system, "readme.txt"), 1)
+        write_lines(os.path.join(WORDLISTS_DIR, "custom.txt"), 4)
+        self.catalog_file = os.path.join(self.directory, "cache", "catalog.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _catalog(self, check_interval=0):
+        return WordlistCatalog(roots=[self.system, WORDLISTS_DIR], catalog_file=self.catalog_file,
+                               check_interval=check_interval)
+
+    @staticmethod
+    def _wait_counted(catalog):
+        thread = catalog._counter
+        if thread is not None:
+            thread.join(5)
+            assert not thread.is_alive()
+
+    def _lines(self, catalog):
+        return {entry["name"]: entry["lines"] for entry in catalog.query()["wordlists"]}
+
+    def test_catalog_lists_and_categorizes(self):
+        catalog = self._catalog()
+        result = catalog.query()
+        self.assertEqual([entry["name"] for entry in result["wordlists"]],
+                         ["custom.txt", "passwords.txt", "usernames.txt"])
+        self.assertEqual({entry["name"] for entry in catalog.query(category="user")["wordlists"]},
+                         {"custom.txt", "usernames.txt"})
+        self._wait_counted(catalog)
+        self.assertEqual(self._lines(catalog), {"custom.txt": 4, "passwords.txt": 3, "usernames.txt": 2})
+
+    def test_unchanged_directories_not_relisted(self):
+        catalog = self._catalog()
+        catalog.query()
+        self._wait_counted(catalog)
+        with mock.patch.object(WordlistCatalog, "_list_dir", autospec=True,
+                               side_effect=WordlistCatalog._list_dir) as listed:
+            catalog.refresh(force=True)
+            # Catalogue rechargé depuis le disque par une nouvelle instance
+            reloaded = self._catalog()
+            self.assertEqual(self._lines(reloaded), self._lines(catalog))
+        listed.assert_not_called()
+
+    def test_directory_mtime_invalidates(self):
+        catalog = self._catalog()
+        catalog.query()
+        nested = os.path.join(self.system, "nested")
+        write_lines(os.path.join(nested, "login_names.txt"), 5)
+        touch_dir(nested, 1000000)
+        with mock.patch.object(WordlistCatalog, "_list_dir", autospec=True,
+                               side_effect=WordlistCatalog._list_dir) as listed:
+            catalog.refresh(force=True)
+        self.assertEqual([call.args[1] for call in listed.call_args_list], [nested])
+        self._wait_counted(catalog)
+        self.assertEqual(self._lines(catalog)["login_names.txt"], 5)
+
+        shutil.rmtree(nested)
+        touch_dir(self.system, 1000000)
+        catalog.refresh(force=True)
+        self.assertEqual(set(self._lines(catalog)), {"custom.txt", "passwords.txt"})
+        self.assertNotIn(nested, catalog._dirs)
+
+    def test_local_file_rewritten_in_place(self):
+        catalog = self._catalog()
+        catalog.query()
+        self._wait_counted(catalog)
+        mtime = os.stat(WORDLISTS_DIR).st_mtime_ns
+        write_lines(os.path.join(WORDLISTS_DIR, "custom.txt"), 7)
+        os.utime(WORDLISTS_DIR, ns=(mtime, mtime))
+        catalog.refresh(force=True)
+        self._wait_counted(catalog)
+        self.assertEqual(self._lines(catalog)["custom.txt"], 7)
+
+    def test_checks_throttled_until_invalidated(self):
+        catalog = self._catalog(check_interval=3600)
+        catalog.query()
+        write_lines(os.path.join(self.system, "more_passwords.txt"), 1)
+        touch_dir(self.system, 1000000)
+        self.assertNotIn("more_passwords.txt", self._lines(catalog))
+        catalog.invalidate()
+        self.assertIn("more_passwords.txt", self._lines(catalog))
+
+    def test_lines_counted_in_background(self):
+        release = threading.Event()
+
+        def slow_count(path):
+            release.wait(5)
+            return count_lines(path)
+
+        catalog = self._catalog()
+        with mock.patch.object(wordlist_catalog, "count_lines", side_effect=slow_count):
+            # La requête n'attend pas le comptage
+            self.assertEqual(set(self._lines(catalog).values()), {None})
+            release.set()
+            self._wait_counted(catalog)
+        self.assertEqual(self._lines(catalog), {"custom.txt": 4, "passwords.txt": 3, "usernames.txt": 2})
+        self.assertIsNone(catalog._counter)
+
+    def test_file_changed_while_counting_recounted(self):
+        path = os.path.join(self.system, "passwords.txt")
+
+        def rewrite_then_count(counted):
+            if counted == path and not rewritten:
+                rewritten.append(True)
+                write_lines(path, 9)
+            return count_lines(counted)
+
+        rewritten = []
+        catalog = self._catalog()
+        with mock.patch.object(wordlist_catalog, "count_lines", side_effect=rewrite_then_count):
+            catalog.query()
+            self._wait_counted(catalog)
+        # Le comptage de l'ancienne version est écarté
+        self.assertIsNone(self._lines(catalog)["passwords.txt"])
+        touch_dir(self.system, 1000000)
+        catalog.refresh(force=True)
+        self._wait_counted(catalog)
+        self.assertEqual(self._lines(catalog)["passwords.txt"], 9)
+
+    def test_corrupt_catalog_rebuilt(self):
+        os.makedirs(os.path.dirname(self.catalog_file))
+        with open(self.catalog_file, "w") as f:
+            f.write("{not json")
+        self.assertEqual(self._catalog().query()["total"], 3)
+
+    def test_query_validation_and_paging(self):
+        catalog = self._catalog()
+        page = catalog.query(offset=1, limit=1, sort="name", descending=True)
+        self.assertEqual((page["total"], [entry["name"] for entry in page["wordlists"]]), (3, ["passwords.txt"]))
+        self.assertEqual(catalog.query(search="NESTED")["total"], 1)
+        with self.assertRaises(ValueError):
+            catalog.query(category="bogus")
+        with self.assertRaises(ValueError):
+            catalog.query(sort="mtime")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+# tests/test_wordlist_merge.py
+"""Fusion et dédoublonnage de wordlists, en mémoire et par partitions (python -m unittest)"""
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from services import wordlist_merge
+from services.wordlist_merge import merge_wordlists, merge_options
+
+
+def random_words(count, seed):
+    rng = random.Random(seed)
+    # Peu de mots distincts : beaucoup de doublons dans chaque liste et entre les listes
+    return [f"{rng.choice(['pass', 'Pass', 'admin', 'été', 'qwerty'])}{rng.randint(0, count // 4)}"
+            for _ in range(count)]
+
+
+class WordlistMergeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.work_dir = os.path.join(self.directory, "work")
+        self.inputs = []
+        for index, seed in enumerate((1, 2, 3)):
+            lines = "".join(word + "\n" for word in random_words(3000, seed)).encode("utf-8")
+            self.inputs.append(self._write(f"list{index}.txt", lines))
+        # Octets invalides en UTF-8 (décodés en latin-1), CRLF, lignes vides et espaces
+        self.inputs.append(self._write("legacy.txt", b"caf\xe9\r\n\xe9t\xe9\npass1\n\n  admin2  \ncaf\xe9\n"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _merge(self, name, options=None, partitioned=False, **kwargs):
+        output = os.path.join(self.directory, name)
+        if partitioned:
+            with mock.patch.object(wordlist_merge, "IN_MEMORY_BYTES", 0), \
+                    mock.patch.object(wordlist_merge, "PARTITION_BYTES", 4096):
+                stats = merge_wordlists(self.inputs, output, options, work_dir=self.work_dir, **kwargs)
+        else:
+            stats = merge_wordlists(self.inputs, output, options, work_dir=self.work_dir, **kwargs)
+        if stats is None:
+            return None, None
+        with open(output, "rb") as f:
+            return f.read(), stats
+
+    def _expected(self, options=None):
+        """Premières occurrences dans l'ordre des entrées (référence naïve)"""
+        normalize = wordlist_merge._Normalizer(merge_options(options))
+        words = {}
+        for path in self.inputs:
+            with open(path, "rb") as f:
+                for raw in f:
+                    word = normalize(raw)
+                    if word is not None:
+                        words.setdefault(word, None)
+        return "".join(word + "\n" for word in words).encode("utf-8")
+
+    def test_partitioned_matches_in_memory(self):
+        for options in (None, {"case": "lower"}, {"fallback_encoding": None, "min_length": 5}):
+            in_memory, memory_stats = self._merge("memory.txt", options)
+            partitioned, partition_stats = self._merge("partitioned.txt", options, partitioned=True)
+            self.assertEqual(memory_stats["partitions"], 0)
+            self.assertGreater(partition_stats["partitions"], 1)
+            self.assertEqual(partitioned, in_memory, options)
+            self.assertEqual(in_memory, self._expected(options), options)
+            for key in ("lines_read", "duplicates", "written", "empty", "fallback_decoded", "invalid_encoding",
+                        "filtered_length"):
+                self.assertEqual(partition_stats[key], memory_stats[key], (options, key))
+            os.remove(os.path.join(self.directory, "memory.txt"))
+            os.remove(os.path.join(self.directory, "partitioned.txt"))
+        self.assertEqual(os.listdir(self.work_dir), [])
+
+    def test_duplicates_across_inputs_keep_first_occurrence(self):
+        output, stats = self._merge("out.txt", partitioned=True)
+        words = output.decode("utf-8").splitlines()
+        self.assertEqual(len(words), len(set(words)))
+        self.assertLess(words.index("pass1"), words.index("café"))
+        self.assertEqual(stats["written"] + stats["duplicates"],
+                         stats["lines_read"] - stats["empty"])
+
+    def test_latin1_fallback(self):
+        output, stats = self._merge("out.txt", partitioned=True)
+        words = output.decode("utf-8").splitlines()
+        self.assertEqual(words.count("café"), 1)
+        self.assertIn("admin2", words)
+        self.assertEqual(stats["fallback_decoded"], 3)
+        output, stats = self._merge("strict.txt", {"fallback_encoding": None}, partitioned=True)
+        self.assertNotIn("café", output.decode("utf-8").splitlines())
+        self.assertEqual(stats["invalid_encoding"], 3)
+
+    def test_progress_and_stop(self):
+        phases = []
+        self._merge("out.txt", partitioned=True, progress=lambda phase, fraction, stats: phases.append(phase))
+        self.assertEqual(phases[0], "reading")
+        self.assertIn("deduplicating", phases)
+        self.assertEqual(phases[-1], "writing")
+        stop = threading.Event()
+        stop.set()
+        self.assertEqual(self._merge("stopped.txt", partitioned=True, stop_event=stop), (None, None))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "stopped.txt")))
+        self.assertEqual(os.listdir(self.work_dir), [])
+
+    def test_invalid_options(self):
+        for options in ({"case": "title"}, {"charset": "emoji"}, {"pattern": "("}, {"encoding": "nope"},
+                        {"min_length": -1}):
+            with self.assertRaises(ValueError):
+                merge_options(options)
+
+
+if __name__ == "__main__":
+    unittest.main()
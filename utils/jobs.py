@@ -0,0 +1,161 @@
+# utils/jobs.py
+"""
+Exécution de tâches longues en arrière-plan.
+
+Une tâche (BackgroundJob) tourne dans un thread dédié et expose son état via
+to_dict() ; le registre (JobRegistry) permet aux routes de la retrouver par son
+identifiant pour en suivre la progression ou l'arrêter. Les workers Flask ne
+sont donc jamais bloqués par une capture ou une attaque longue.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from utils.logger import get_logger
+
+# Configuration du logger
+logger = get_logger('jobs')
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_STOPPED = "stopped"
+STATUS_FAILED = "failed"
+
+FINISHED_STATUSES = (STATUS_COMPLETED, STATUS_STOPPED, STATUS_FAILED)
+
+
+class BackgroundJob:
+    """
+    Tâche exécutée dans un thread
+
+    Les sous-classes implémentent run() (qui retourne le résultat) et peuvent
+    enrichir progress(). run() doit consulter régulièrement self.stop_event
+    pour permettre un arrêt anticipé.
+    """
+
+    kind = "job"
+
+    def __init__(self, job_id=None):
+        """
+        Args:
+            job_id (str, optional): Identifiant imposé (sinon généré)
+        """
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.status = STATUS_PENDING
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.result = None
+        self.stop_event = threading.Event()
+        self._thread = None
+
+    def run(self):
+        """Travail à effectuer (à implémenter par les sous-classes)"""
+        raise NotImplementedError
+
+    def progress(self):
+        """Informations de progression spécifiques à la tâche"""
+        return {}
+
+    def start(self):
+        """Démarre la tâche dans un thread d'arrière-plan"""
+        self._thread = threading.Thread(target=self._run, name=f"{self.kind}-{self.id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        self.status = STATUS_RUNNING
+        self.started_at = time.time()
+        logger.info(f"Démarrage de la tâche {self.kind} {self.id}")
+        try:
+            self.result = self.run()
+            self.status = STATUS_STOPPED if self.stop_event.is_set() else STATUS_COMPLETED
+        except Exception as e:
+            logger.error(f"Échec de la tâche {self.kind} {self.id}: {e}", exc_info=True)
+            self.error = str(e)
+            self.status = STATUS_FAILED
+        finally:
+            self.finished_at = time.time()
+            logger.info(f"Tâche {self.kind} {self.id} terminée ({self.status})")
+
+    def stop(self):
+        """Demande l'arrêt anticipé de la tâche"""
+        self.stop_event.set()
+
+    def wait(self, timeout=None):
+        """Attend la fin de la tâche"""
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def elapsed(self):
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self):
+        """État de la tâche sérialisable en JSON"""
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": round(self.elapsed, 3),
+            "error": self.error
+        }
+        data.update(self.progress())
+        return data
+
+
+class JobRegistry:
+    """Registre des tâches en cours et récemment terminées"""
+
+    def __init__(self, max_finished=50):
+        """
+        Args:
+            max_finished (int): Nombre de tâches terminées conservées
+        """
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, job):
+        """Enregistre et démarre une tâche"""
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job.start()
+
+    def add(self, job):
+        """Enregistre une tâche sans la démarrer"""
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id):
+        """Retourne une tâche par son identifiant (ou None)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, kind=None):
+        """Liste les tâches, éventuellement filtrées par type"""
+        with self._lock:
+            return [job for job in self._jobs.values() if kind is None or job.kind == kind]
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+# Registre partagé par toute l'application
+registry = JobRegistry()